@@ -23,7 +23,7 @@ git log -1 --oneline
 # Verifica se tem os arquivos novos
 echo ""
 echo "🔍 Verificando arquivos novos..."
-if grep -q "analyzeBottlenecks" funnel_builder.py; then
+if grep -q "analyzeBottlenecks" static/app.jsx; then
     echo "✅ Análise de gargalos: OK"
 else
     echo "❌ Análise de gargalos: NÃO ENCONTRADA"
@@ -46,9 +46,29 @@ echo ""
 echo "📦 Verificando dependências..."
 pip3 install bcrypt 2>/dev/null && echo "✅ bcrypt instalado"
 
+# Reinicia conforme o modo em que o servidor está rodando
+echo ""
+echo "🔁 Reiniciando o servidor..."
+if command -v docker >/dev/null 2>&1 && docker ps --format '{{.Names}}' | grep -qx "funnel-builder-app"; then
+    # No container o servidor é o PID 1 e ignora o SIGUSR2: a imagem é
+    # reconstruída e o container recriado (SIGTERM drena antes de sair)
+    docker compose up -d --build && echo "✅ Container recriado"
+else
+    # O processo mais antigo é o supervisor (pre-fork) ou o servidor único
+    PID=$(pgrep -o -f "funnel_builder\.py")
+    if [ -z "$PID" ]; then
+        echo "⚠️ Servidor não está rodando; inicie com: python3 funnel_builder.py"
+    elif pgrep -P "$PID" -f "funnel_builder\.py" >/dev/null; then
+        # Pre-fork: reload gradual dos workers pelo supervisor
+        kill -HUP "$PID" && echo "✅ Reload gradual dos workers (supervisor pid $PID)"
+    else
+        # Processo único: o sucessor herda o socket e o atual drena
+        kill -USR2 "$PID" && echo "✅ Handoff iniciado (pid $PID)"
+    fi
+fi
+
 echo ""
 echo "🎉 Atualização concluída!"
 echo ""
-echo "Para reiniciar o servidor:"
-echo "  killall python3"
-echo "  python3 funnel_builder.py"
+echo "Para parar (drena as requisições em andamento):"
+echo "  kill -TERM \$(pgrep -o -f funnel_builder.py)"
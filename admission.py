@@ -0,0 +1,175 @@
+"""
+Admission Control para Funnel Builder
+Limita quantas requisições de cada classe de rota executam ao mesmo tempo,
+com uma fila de espera curta; o excesso é recusado na hora com Retry-After
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class AdmissionClass:
+    """Uma classe de rotas: vagas de execução + fila de espera limitada"""
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float,
+                 reject_status: int = 503, retry_after: int = 1):
+        """
+        Args:
+            limit: requisições executando ao mesmo tempo
+            queue_size: requisições esperando vaga; além disso recusa na hora
+            queue_timeout: segundos máximos na fila antes de desistir
+            reject_status: 503 (sobrecarga) ou 429
+        """
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout = queue_timeout
+        self.reject_status = reject_status
+        self.retry_after = retry_after
+
+        self.condition = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def acquire(self) -> bool:
+        """Reserva uma vaga (esperando no máximo queue_timeout); False = recusar"""
+        with self.condition:
+            if self.active < self.limit and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return True
+
+            if self.waiting >= self.queue_size:
+                self.rejected += 1
+                return False
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timed_out += 1
+                        return False
+                    self.condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+            self.active += 1
+            self.admitted += 1
+            return True
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify()
+
+    def get_stats(self) -> Dict:
+        with self.condition:
+            return {
+                'limit': self.limit,
+                'active': self.active,
+                'waiting': self.waiting,
+                'queue_size': self.queue_size,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out
+            }
+
+
+class AdmissionController:
+    """
+    Classes de rota usadas pelo dispatcher
+
+    - auth: login/registro/logout (bcrypt, CPU)
+    - read: leituras baratas
+    - write: escritas e leituras pesadas (lista completa de funis)
+
+    Cada rota declara sua classe em api_routes (admission=...); rotas com
+    admission=False (probes e o stream SSE, limitado pelo próprio feed) não
+    passam pelo controle.
+    """
+
+    def __init__(self):
+        self.classes: Dict[str, AdmissionClass] = {}
+
+    def add(self, name: str, **options) -> AdmissionClass:
+        self.classes[name] = AdmissionClass(name, **options)
+        return self.classes[name]
+
+    def acquire(self, name: Optional[str]) -> Optional[AdmissionClass]:
+        """
+        Returns:
+            a classe admitida (liberar com release) ou None se não há controle;
+            levanta AdmissionRejected se a requisição deve ser recusada
+        """
+        if not name:
+            return None
+        admission_class = self.classes[name]
+        if not admission_class.acquire():
+            raise AdmissionRejected(admission_class)
+        return admission_class
+
+    def get_stats(self) -> Dict:
+        return {name: c.get_stats() for name, c in self.classes.items()}
+
+
+class AdmissionRejected(Exception):
+    """Requisição recusada pelo controle de admissão"""
+
+    def __init__(self, admission_class: AdmissionClass):
+        super().__init__(f'Classe {admission_class.name} saturada')
+        self.admission_class = admission_class
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+# Instância global
+admission = AdmissionController()
+admission.add(
+    'auth',
+    limit=_env_int('ADMISSION_AUTH_LIMIT', min(4, os.cpu_count() or 1)),
+    queue_size=_env_int('ADMISSION_AUTH_QUEUE', 8),
+    queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '1')),
+    reject_status=429
+)
+admission.add(
+    'read',
+    limit=_env_int('ADMISSION_READ_LIMIT', 12),
+    queue_size=_env_int('ADMISSION_READ_QUEUE', 32),
+    queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '1'))
+)
+admission.add(
+    'write',
+    limit=_env_int('ADMISSION_WRITE_LIMIT', 6),
+    queue_size=_env_int('ADMISSION_WRITE_QUEUE', 12),
+    queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '1'))
+)
+
+if __name__ == '__main__':
+    test = AdmissionClass('teste', limit=2, queue_size=1, queue_timeout=0.2)
+    results = []
+
+    def worker():
+        if test.acquire():
+            time.sleep(0.5)
+            test.release()
+            results.append('ok')
+        else:
+            results.append('recusada')
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print("Resultados:", sorted(results))
+    print("Stats:", test.get_stats())
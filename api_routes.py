@@ -0,0 +1,691 @@
+"""
+API Routes - Tabela de rotas da REST API do Funnel Builder
+Registra handlers de autenticação, funis e marketing no router compartilhado
+pelos engines HTTP, junto com os middlewares de rate limit, auth e corpo JSON
+"""
+
+import functools
+import hashlib
+import http.client
+import math
+import os
+import urllib.parse
+from typing import Callable, Dict, List, Optional, Tuple
+from auth import auth, STREAM_TICKET_TTL
+from database import db
+from models import Funnel
+from funnel_patch import PatchError, PatchConflict, is_json_patch, parse_item_diff, check_funnel_fields
+from precompressed import etag_matches
+from webhooks import webhook_manager
+from rate_limiter import rate_limiter
+from security_logger import security_logger
+from server_metrics import server_metrics
+from health import liveness, readiness
+from admission import admission
+from router import Router, Route, RequestContext
+from json_codec import RawJSON
+from json_stream import StreamingJSONEncoder, Lazy
+from pagination import PageRequest, KeysetPage
+from events import change_feed, stream_pump, EventStream
+from marketing_routes import (
+    handle_pages_list, handle_page_create, handle_page_get, handle_page_update, handle_page_delete,
+    handle_page_test_create, handle_page_test_delete,
+    handle_utms_list, handle_utm_create, handle_utm_get, handle_utm_update, handle_utm_delete,
+    handle_utm_generate_url,
+    handle_metrics_create, handle_metrics_list, handle_metrics_delete
+)
+
+
+router = Router()
+
+
+# ==================== MIDDLEWARES ====================
+
+RATE_LIMIT_MESSAGES = {
+    'login': 'Muitas tentativas de login. Tente novamente em {retry_after} segundos.',
+    'register': 'Muitas tentativas de registro. Tente novamente em {retry_after} segundos.',
+}
+
+
+def rate_limit_middleware(route: Route, ctx: RequestContext) -> Optional[Tuple]:
+    """Aplica o rate limit da rota (por IP)"""
+    if not route.rate_limit:
+        return None
+
+    allowed, retry_after = rate_limiter.is_allowed(ctx.client_ip, route.rate_limit)
+    if allowed:
+        return None
+
+    security_logger.log_rate_limit_exceeded(ctx.client_ip, route.rate_limit, retry_after)
+    message = RATE_LIMIT_MESSAGES.get(
+        route.rate_limit, 'Muitas requisições. Tente novamente em {retry_after} segundos.'
+    )
+    return 429, {'error': message.format(retry_after=retry_after)}, {'Retry-After': str(retry_after)}
+
+
+def auth_middleware(route: Route, ctx: RequestContext) -> Optional[Tuple]:
+    """Resolve o usuário do token Bearer (uma única vez por requisição)"""
+    if not route.auth:
+        return None
+
+    auth_header = ctx.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        ctx.token = auth_header[7:]
+
+    if ctx.token is None and route.auth == 'ticket':
+        # EventSource não envia headers: a URL traz um ticket de uso único
+        # (POST /api/events/ticket), nunca o token da sessão
+        ctx.user = auth.redeem_stream_ticket(ctx.query.get('ticket'))
+    else:
+        ctx.user = auth.get_user_from_token(ctx.token)
+
+    if ctx.user is None and route.auth != 'optional':
+        if ctx.token:
+            security_logger.log_invalid_token(ctx.token, ctx.client_ip)
+        return 401, {'error': 'Não autenticado'}
+
+    return None
+
+
+def body_middleware(route: Route, ctx: RequestContext) -> Optional[Tuple]:
+    """Lê e valida o corpo JSON (ValueError vira 400 no dispatcher)"""
+    if route.body:
+        ctx.body = ctx.read_body()
+    return None
+
+
+# Ordem importa: rate limit antes de tocar no banco, auth antes de ler o corpo
+MIDDLEWARE = [rate_limit_middleware, auth_middleware, body_middleware]
+
+
+def run_route(route: Route, ctx: RequestContext) -> Tuple:
+    """Executa middlewares e o handler da rota"""
+    for middleware in MIDDLEWARE:
+        response = middleware(route, ctx)
+        if response is not None:
+            return response
+    response = route.handler(ctx)
+    if ctx.method != 'GET' and 200 <= response[0] < 300:
+        # Escrita confirmada: o feed lê o change_log sem esperar o próximo ciclo
+        # (4xx/5xx não gravaram nada, não há o que ler)
+        change_feed.notify()
+    return response
+
+
+# ==================== GET CONDICIONAL ====================
+
+# O navegador guarda a resposta mas revalida sempre (If-None-Match)
+CONDITIONAL_CACHE_CONTROL = 'private, no-cache'
+
+
+def resource_etag(kind: str, resource_id: int, version: int) -> str:
+    """ETag fraco de um recurso versionado (vale para qualquer Content-Encoding)"""
+    return f'W/"{kind}-{resource_id}-v{version}"'
+
+
+def with_etag(kind: str, table: str,
+              variant: Optional[Callable[[RequestContext], str]] = None) -> Callable:
+    """
+    GET de um recurso com coluna version: ETag na resposta e 304 se não mudou
+
+    A versão vem de um lookup pela chave primária antes do handler rodar,
+    então um If-None-Match que confere não lê os blobs JSON do recurso.
+    Se o recurso mudar entre o lookup e o handler, a resposta sai com o
+    ETag antigo e a próxima revalidação simplesmente traz o corpo de novo.
+    variant(ctx) identifica representações diferentes do mesmo recurso
+    (ex.: ?fields=) e entra no ETag.
+    """
+    def decorator(handler: Callable) -> Callable:
+        @functools.wraps(handler)
+        def wrapper(ctx: RequestContext):
+            version = db.get_version(table, ctx.params['id'], ctx.user.id)
+            if version is None:
+                return handler(ctx)  # 404 do próprio handler
+
+            suffix = variant(ctx) if variant is not None else ''
+            etag_kind = f'{kind}.{suffix}' if suffix else kind
+            headers = {
+                'ETag': resource_etag(etag_kind, ctx.params['id'], version),
+                'Cache-Control': CONDITIONAL_CACHE_CONTROL
+            }
+            if etag_matches(ctx.headers.get('If-None-Match'), headers['ETag']):
+                return 304, None, headers
+
+            response = handler(ctx)
+            if response[0] != 200:
+                return response
+            return response[0], response[1], {**(response[2] if len(response) > 2 else {}), **headers}
+        return wrapper
+    return decorator
+
+
+# ==================== AUTENTICAÇÃO ====================
+
+@router.route('POST', '/api/register', auth=False, rate_limit='register', body=True, admission='auth')
+def register(ctx: RequestContext):
+    """POST /api/register - Registra novo usuário"""
+    data = ctx.body
+    email = data.get('email', '')
+
+    result = auth.register(
+        email=email,
+        password=data.get('password'),
+        name=data.get('name'),
+        whatsapp=data.get('whatsapp')
+    )
+
+    if not result['success']:
+        security_logger.log_registration_failure(
+            email=email,
+            ip=ctx.client_ip,
+            reason=result['message']
+        )
+        return 400, {'success': False, 'message': result['message']}
+
+    security_logger.log_registration(
+        user_id=result['user'].id,
+        email=email,
+        ip=ctx.client_ip
+    )
+
+    # Reseta rate limit após sucesso
+    rate_limiter.reset(ctx.client_ip, 'register')
+
+    # Envia webhook de novo usuário registrado
+    webhook_manager.on_user_registered(result['user'].to_dict())
+
+    return 200, {
+        'success': True,
+        'message': result['message'],
+        'token': result['token'],
+        'user': result['user'].to_dict()
+    }
+
+
+@router.route('POST', '/api/login', auth=False, rate_limit='login', body=True, admission='auth')
+def login(ctx: RequestContext):
+    """POST /api/login - Autentica usuário"""
+    data = ctx.body
+    email = data.get('email', '')
+
+    security_logger.log_login_attempt(email, ctx.client_ip, ctx.user_agent)
+
+    result = auth.login(
+        email=email,
+        password=data.get('password')
+    )
+
+    if not result['success']:
+        security_logger.log_login_failure(
+            email=email,
+            ip=ctx.client_ip,
+            reason=result['message']
+        )
+
+        # Detecta possível brute force
+        failed_count = security_logger.get_failed_logins_by_ip(ctx.client_ip, minutes=10)
+        if failed_count >= 10:
+            security_logger.log_brute_force_attempt(ctx.client_ip, email, failed_count)
+
+        return 401, {'success': False, 'message': result['message']}
+
+    security_logger.log_login_success(
+        user_id=result['user'].id,
+        email=email,
+        ip=ctx.client_ip
+    )
+
+    # Reseta rate limit após sucesso
+    rate_limiter.reset(ctx.client_ip, 'login')
+
+    return 200, {
+        'success': True,
+        'message': result['message'],
+        'token': result['token'],
+        'user': result['user'].to_dict()
+    }
+
+
+@router.route('DELETE', '/api/logout', auth='optional', admission='auth')
+def logout(ctx: RequestContext):
+    """DELETE /api/logout - Encerra a sessão"""
+    if ctx.token and ctx.user:
+        auth.logout(ctx.token)
+        security_logger.log_logout(ctx.user.id, ctx.client_ip)
+
+    return 200, {'success': True, 'message': 'Logout realizado'}
+
+
+# ==================== FUNIS ====================
+
+def simulated_revenue(data: Dict) -> Optional[float]:
+    """simulatedRevenue do corpo: receita calculada pelo editor, guardada para o resumo"""
+    value = data.get('simulatedRevenue')
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError('simulatedRevenue deve ser um número')
+    return float(value)
+
+
+# Classe 'read' como as outras listagens: ?view=summary e ?fields= nem tocam
+# nas linhas do grafo, e a lista completa sai em blocos de DB_STREAM_CHUNK funis
+@router.route('GET', '/api/funnels')
+def funnels_list(ctx: RequestContext):
+    """
+    GET /api/funnels - Lista funis do usuário
+
+    ?limit=&cursor= pagina por keyset; ?fields=a,b ou ?view=summary
+    devolvem só esses campos e só leem as colunas correspondentes.
+    """
+    page_request = PageRequest.from_query('funnels', ctx.query)
+    fields = Funnel.parse_fields(ctx.query)
+
+    if fields is None:
+        # Colunas JSON vão do banco para a resposta sem decodificar, e cada
+        # linha já sai do cursor no formato de Funnel.to_dict
+        page = KeysetPage(
+            page_request,
+            ctx.user.iter_funnel_dicts(raw_json=True, after=page_request.after,
+                                       limit=page_request.fetch_limit),
+            key=lambda f: (f['updatedAt'], f['id'])
+        )
+        funnels = iter(page)
+    else:
+        page = KeysetPage(
+            page_request,
+            ctx.user.iter_funnel_fields(fields, after=page_request.after,
+                                        limit=page_request.fetch_limit),
+            key=lambda f: (f['updatedAt'], f['id'])
+        )
+        funnels = (Funnel.project(f, fields) for f in page)
+
+    response = {'funnels': funnels}
+    if page_request.active:
+        response['next_cursor'] = Lazy(page.next_cursor)
+    return 200, response
+
+
+@router.route('POST', '/api/funnels', rate_limit='api_write', body=True)
+def funnel_create(ctx: RequestContext):
+    """POST /api/funnels - Cria funil"""
+    data = ctx.body
+    funnel = ctx.user.create_funnel(
+        name=data.get('name', 'Novo Funil'),
+        icon=data.get('icon', '🚀'),
+        elements=data.get('elements', []),
+        connections=data.get('connections', []),
+        simulated_revenue=simulated_revenue(data)
+    )
+
+    security_logger.log_funnel_created(
+        user_id=ctx.user.id,
+        funnel_id=funnel.id,
+        ip=ctx.client_ip
+    )
+
+    return 201, {'success': True, 'funnel': funnel.to_dict()}
+
+
+def funnel_fields_variant(ctx: RequestContext) -> str:
+    """Parte do ETag que distingue as projeções (?fields=/?view=) do funil completo"""
+    fields = Funnel.parse_fields(ctx.query)
+    if fields is None:
+        return ''
+    return hashlib.sha1(','.join(fields).encode('utf-8')).hexdigest()[:8]
+
+
+@router.route('GET', '/api/funnels/{id:int}')
+@with_etag('funnel', 'funnels', variant=funnel_fields_variant)
+def funnel_get(ctx: RequestContext):
+    """GET /api/funnels/:id - Busca funil (aceita ?fields=/?view= como a listagem)"""
+    fields = Funnel.parse_fields(ctx.query)
+    if fields is not None:
+        funnel_data = Funnel.get_fields(ctx.params['id'], ctx.user.id, fields)
+        if not funnel_data:
+            return 404, {'error': 'Funil não encontrado'}
+        return 200, {'funnel': funnel_data}
+
+    funnel = Funnel.get_by_id(ctx.params['id'], ctx.user.id, raw_json=True)
+
+    if not funnel:
+        return 404, {'error': 'Funil não encontrado'}
+
+    return 200, {'funnel': funnel.to_dict()}
+
+
+@router.route('PUT', '/api/funnels/{id:int}', body=True)
+def funnel_update(ctx: RequestContext):
+    """PUT /api/funnels/:id - Atualiza funil"""
+    funnel = Funnel.get_by_id(ctx.params['id'], ctx.user.id)
+
+    if not funnel:
+        return 404, {'error': 'Funil não encontrado'}
+
+    data = ctx.body
+    success = funnel.update(
+        name=data.get('name'),
+        icon=data.get('icon'),
+        elements=data.get('elements'),
+        connections=data.get('connections'),
+        simulated_revenue=simulated_revenue(data)
+    )
+
+    if not success:
+        return 500, {'error': 'Erro ao atualizar funil'}
+
+    return 200, {'success': True, 'funnel': funnel.to_dict()}
+
+
+@router.route('PATCH', '/api/funnels/{id:int}', body=True)
+def funnel_patch(ctx: RequestContext):
+    """
+    PATCH /api/funnels/:id - Altera parte do funil (autosave do editor)
+
+    Corpo em JSON Patch (lista de operações, RFC 6902) ou diff compacto por
+    id ({"elements": {"upsert": [...], "delete": [...]}, ...}), ver
+    funnel_patch.py. Aplicado inteiro ou nada; um "test" que falha responde
+    409. A resposta traz só o resumo do funil (?view=summary).
+    """
+    funnel_id = ctx.params['id']
+    data = ctx.body
+
+    try:
+        if is_json_patch(data):
+            found = Funnel.patch(funnel_id, ctx.user.id, operations=data)
+        else:
+            if not isinstance(data, dict):
+                return 400, {'error': 'Corpo deve ser uma lista JSON Patch ou um objeto com as alterações'}
+            items = parse_item_diff(data)
+            check_funnel_fields(data, {field for field in ('name', 'icon') if field in data})
+            revenue = simulated_revenue(data)
+            if not items and revenue is None and 'name' not in data and 'icon' not in data:
+                return 400, {'error': 'Nenhuma alteração informada'}
+            found = Funnel.patch(funnel_id, ctx.user.id, items=items, name=data.get('name'),
+                                 icon=data.get('icon'), simulated_revenue=revenue)
+    except PatchConflict as e:
+        return 409, {'error': str(e)}
+    except PatchError as e:
+        return 400, {'error': str(e)}
+
+    if not found:
+        return 404, {'error': 'Funil não encontrado'}
+
+    return 200, {'success': True, 'funnel': Funnel.get_fields(funnel_id, ctx.user.id,
+                                                              Funnel.SUMMARY_FIELDS)}
+
+
+@router.route('DELETE', '/api/funnels/{id:int}', rate_limit='api_write')
+def funnel_delete(ctx: RequestContext):
+    """DELETE /api/funnels/:id - Deleta funil"""
+    funnel_id = ctx.params['id']
+    funnel = Funnel.get_by_id(funnel_id, ctx.user.id)
+
+    if not funnel:
+        security_logger.log_unauthorized_access(
+            user_id=ctx.user.id,
+            resource=f'funnel:{funnel_id}',
+            ip=ctx.client_ip
+        )
+        return 404, {'error': 'Funil não encontrado'}
+
+    if not funnel.delete():
+        return 500, {'error': 'Erro ao deletar funil'}
+
+    security_logger.log_funnel_deleted(
+        user_id=ctx.user.id,
+        funnel_id=funnel_id,
+        ip=ctx.client_ip
+    )
+    return 200, {'success': True, 'message': 'Funil deletado'}
+
+
+# ==================== PÁGINAS ====================
+
+router.add('GET', '/api/pages',
+           lambda ctx: handle_pages_list(ctx.user.id, ctx.query), name='pages_list')
+router.add('POST', '/api/pages',
+           lambda ctx: handle_page_create(ctx.user.id, ctx.body),
+           rate_limit='api_write', body=True, name='page_create')
+router.add('GET', '/api/pages/{id:int}',
+           with_etag('page', 'pages')(lambda ctx: handle_page_get(ctx.user.id, ctx.params['id'])),
+           name='page_get')
+router.add('PUT', '/api/pages/{id:int}',
+           lambda ctx: handle_page_update(ctx.user.id, ctx.params['id'], ctx.body),
+           body=True, name='page_update')
+router.add('DELETE', '/api/pages/{id:int}',
+           lambda ctx: handle_page_delete(ctx.user.id, ctx.params['id']),
+           rate_limit='api_write', name='page_delete')
+
+router.add('POST', '/api/pages/{id:int}/tests',
+           lambda ctx: handle_page_test_create(ctx.user.id, ctx.params['id'], ctx.body),
+           rate_limit='api_write', body=True, name='page_test_create')
+router.add('DELETE', '/api/pages/tests/{id:int}',
+           lambda ctx: handle_page_test_delete(ctx.user.id, ctx.params['id']),
+           rate_limit='api_write', name='page_test_delete')
+
+# ==================== MÉTRICAS ====================
+
+router.add('GET', '/api/pages/{id:int}/metrics',
+           lambda ctx: handle_metrics_list(ctx.user.id, ctx.params['id'], ctx.query),
+           name='metrics_list')
+router.add('POST', '/api/pages/{id:int}/metrics',
+           lambda ctx: handle_metrics_create(ctx.user.id, ctx.params['id'], ctx.body),
+           rate_limit='api_write', body=True, name='metrics_create')
+router.add('DELETE', '/api/metrics/{id:int}',
+           lambda ctx: handle_metrics_delete(ctx.user.id, ctx.params['id']),
+           rate_limit='api_write', name='metrics_delete')
+
+# ==================== UTMs ====================
+
+router.add('GET', '/api/utms',
+           lambda ctx: handle_utms_list(ctx.user.id, ctx.query), name='utms_list')
+router.add('POST', '/api/utms',
+           lambda ctx: handle_utm_create(ctx.user.id, ctx.body),
+           rate_limit='api_write', body=True, name='utm_create')
+router.add('GET', '/api/utms/{id:int}',
+           with_etag('utm', 'utms')(lambda ctx: handle_utm_get(ctx.user.id, ctx.params['id'])),
+           name='utm_get')
+router.add('PUT', '/api/utms/{id:int}',
+           lambda ctx: handle_utm_update(ctx.user.id, ctx.params['id'], ctx.body),
+           body=True, name='utm_update')
+router.add('DELETE', '/api/utms/{id:int}',
+           lambda ctx: handle_utm_delete(ctx.user.id, ctx.params['id']),
+           rate_limit='api_write', name='utm_delete')
+router.add('POST', '/api/utms/{id:int}/generate',
+           lambda ctx: handle_utm_generate_url(ctx.user.id, ctx.params['id'], ctx.body),
+           body=True, name='utm_generate_url')
+
+
+# ==================== EVENTOS (SSE) ====================
+
+@router.route('POST', '/api/events/ticket', admission='read')
+def events_ticket(ctx: RequestContext):
+    """POST /api/events/ticket - Ticket de uso único para abrir GET /api/events?ticket="""
+    ticket = auth.create_stream_ticket(ctx.user.id)
+    return 200, {'ticket': ticket, 'expires_in': STREAM_TICKET_TTL}, NO_STORE
+
+
+# Sem controle de admissão: um 503 faria o EventSource desistir de vez. O
+# limite é o EVENTS_MAX_CONNECTIONS do feed, que responde 200 com um retry:
+@router.route('GET', '/api/events', auth='ticket', admission=False)
+def events_stream(ctx: RequestContext):
+    """
+    GET /api/events - Alterações de funis, páginas e UTMs do usuário (text/event-stream)
+
+    Cada evento traz {entity, id, version, action}; o cliente busca só o
+    que mudou. Na reconexão o EventSource envia Last-Event-ID e recebe as
+    alterações perdidas (ou um evento reset, se não der para reconstruí-las).
+    """
+    last_event_id = ctx.headers.get('Last-Event-ID') or ctx.query.get('last_event_id')
+    if last_event_id is not None:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            raise ValueError('Last-Event-ID inválido')
+
+    return 200, EventStream(change_feed, ctx.user.id, last_event_id)
+
+
+# ==================== BATCH ====================
+
+# Sub-requisições por POST /api/batch
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '20'))
+
+# Cada resultado é serializado ainda dentro da transação do batch
+BATCH_ENCODER = StreamingJSONEncoder()
+
+
+def _batch_headers(headers: Optional[Dict]) -> http.client.HTTPMessage:
+    """Headers de uma sub-requisição (ex: If-None-Match), sem diferenciar maiúsculas"""
+    message = http.client.HTTPMessage()
+    for name, value in (headers or {}).items():
+        message[str(name)] = str(value)
+    return message
+
+
+def _batch_prepare(ctx: RequestContext, item) -> Tuple:
+    """
+    Valida e roteia uma sub-requisição, aplicando o rate limit da rota
+
+    Returns:
+        (route, sub_ctx, None) ou (None, None, resposta de erro)
+    """
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+        return None, None, (400, {'error': 'Sub-requisição inválida: informe method e path'})
+
+    method = str(item.get('method', 'GET')).upper()
+    path, _, query_string = item['path'].partition('?')
+    route, params, allowed = router.match(method, path)
+    if route is None:
+        if allowed:
+            return None, None, (405, {'error': 'Método não permitido'})
+        return None, None, (404, {'error': 'Endpoint não encontrado'})
+
+    # Só rotas autenticadas comuns: nada de login/registro, probes ou batch aninhado
+    if route.auth is not True or route.admission not in ('read', 'write') or route.name == 'batch':
+        return None, None, (400, {'error': f'{method} {path} não pode ser usado em batch'})
+
+    body = item.get('body')
+    if body is None:
+        body = {}
+    elif not isinstance(body, dict):
+        return None, None, (400, {'error': 'Corpo da sub-requisição deve ser um objeto JSON'})
+
+    query = {k: v[0] for k, v in urllib.parse.parse_qs(query_string).items()}
+    sub_ctx = RequestContext(method, path, params, query, _batch_headers(item.get('headers')),
+                             ctx.client_ip, lambda: body, handler=ctx.handler)
+    sub_ctx.token = ctx.token
+    sub_ctx.user = ctx.user
+
+    # Rate limit antes de abrir a transação (no modo --workers ele também usa o banco)
+    response = rate_limit_middleware(route, sub_ctx)
+    if response is not None:
+        return None, None, response
+    return route, sub_ctx, None
+
+
+def _batch_execute(route: Route, sub_ctx: RequestContext) -> Tuple:
+    """Executa uma sub-requisição já autenticada (erros viram 4xx/5xx como no dispatcher)"""
+    try:
+        body_middleware(route, sub_ctx)
+        return route.handler(sub_ctx)
+    except ValueError as e:
+        return 400, {'error': str(e)}
+    except Exception as e:
+        security_logger.log_api_error(
+            endpoint=sub_ctx.path,
+            method=sub_ctx.method,
+            ip=sub_ctx.client_ip,
+            error=str(e),
+            status_code=500
+        )
+        return 500, {'error': 'Erro interno do servidor'}
+
+
+def _batch_result(response: Tuple) -> Dict:
+    """Resultado de um item: status, headers (ETag etc.) e corpo já serializado"""
+    result = {'status': response[0], 'body': RawJSON(BATCH_ENCODER.encode(response[1]))}
+    if len(response) > 2 and response[2]:
+        result['headers'] = response[2]
+    return result
+
+
+@router.route('POST', '/api/batch', body=True, admission='write')
+def batch(ctx: RequestContext):
+    """
+    POST /api/batch - Várias chamadas da API em uma requisição
+
+    Corpo: {"requests": [{"method": "GET", "path": "/api/pages"}, ...]}
+
+    O token é validado uma vez. Sem escritas, todas as leituras usam a mesma
+    conexão e o mesmo snapshot do banco; com escritas, o batch inteiro roda
+    em uma transação, na ordem enviada, e cada item com status >= 400 desfaz
+    só as próprias alterações (savepoint). A resposta traz um resultado por
+    item, na mesma ordem.
+    """
+    items = ctx.body.get('requests') if isinstance(ctx.body, dict) else None
+    if not isinstance(items, list) or not items:
+        return 400, {'error': 'Informe requests: lista de sub-requisições'}
+    if len(items) > BATCH_MAX_REQUESTS:
+        return 400, {'error': f'Máximo de {BATCH_MAX_REQUESTS} sub-requisições por batch'}
+
+    prepared: List[Tuple] = [_batch_prepare(ctx, item) for item in items]
+    write = any(route is not None and route.method != 'GET' for route, _, _ in prepared)
+
+    results = []
+    with db.connection(write=write) as conn:
+        for route, sub_ctx, error in prepared:
+            if error is not None:
+                results.append(_batch_result(error))
+                continue
+
+            if not write:
+                results.append(_batch_result(_batch_execute(route, sub_ctx)))
+                continue
+
+            conn.execute('SAVEPOINT batch_item')
+            response = _batch_execute(route, sub_ctx)
+            if response[0] >= 400:
+                conn.execute('ROLLBACK TO batch_item')
+            conn.execute('RELEASE batch_item')
+            results.append(_batch_result(response))
+
+    # Como iterador, o encoder entra em cada item e copia os corpos RawJSON
+    return 200, {'results': iter(results)}
+
+
+# ==================== SERVIDOR ====================
+
+# Probes: sem auth, sem rate limit, sem controle de admissão e sem eventos no security.log
+NO_STORE = {'Cache-Control': 'no-store'}
+
+
+@router.route('GET', '/healthz', auth=False, admission=False)
+def healthz(ctx: RequestContext):
+    """GET /healthz - Liveness"""
+    return 200, liveness(), NO_STORE
+
+
+@router.route('GET', '/readyz', auth=False, admission=False)
+def readyz(ctx: RequestContext):
+    """GET /readyz - Readiness (banco, fila do security log, backlog de webhooks)"""
+    ready, details = readiness()
+    return (200 if ready else 503), details, NO_STORE
+
+
+@router.route('GET', '/api/server/metrics', auth=False, admission=False)
+def server_metrics_view(ctx: RequestContext):
+    """GET /api/server/metrics - Contadores do servidor (apenas acesso local direto)"""
+    is_local = ctx.handler.client_address[0] in ('127.0.0.1', '::1')
+    if not is_local or ctx.headers.get('X-Forwarded-For'):
+        return 404, {'error': 'Endpoint não encontrado'}
+
+    stats = {'access': server_metrics.get_stats(), 'admission': admission.get_stats(),
+             'events': change_feed.get_stats(), 'event_streams': stream_pump.get_stats(),
+             'db_pool': db.pool.get_stats(),
+             'write_queue': db.write_queue.get_stats()}
+    server = getattr(ctx.handler, 'server', None)
+    if hasattr(server, 'get_stats'):
+        stats['server'] = server.get_stats()
+    return 200, stats
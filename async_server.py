@@ -0,0 +1,454 @@
+"""
+Async Server para Funnel Builder
+Engine HTTP baseado em asyncio streams que reaproveita o mesmo handler do HTTPServer
+"""
+
+import asyncio
+import io
+import os
+import socket
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from json_codec import json_codec
+from server_metrics import server_metrics
+
+
+# Rotas que executam bcrypt (CPU) e ficam em um executor separado das de banco
+AUTH_PATHS = ('/api/login', '/api/register')
+
+
+class BoundedExecutor:
+    """ThreadPoolExecutor com limite de tarefas pendentes"""
+
+    def __init__(self, workers: int, queue_size: int, name: str):
+        self.workers = max(1, workers)
+        self.limit = self.workers + max(0, queue_size)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+        self.pending = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        """Reserva uma vaga (chamado só na thread do event loop)"""
+        if self.pending >= self.limit:
+            self.rejected += 1
+            return False
+        self.pending += 1
+        return True
+
+    def release(self):
+        self.pending -= 1
+
+    def get_stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'pending': self.pending,
+            'limit': self.limit,
+            'rejected': self.rejected
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class _StreamWriterFile:
+    """
+    wfile entregue ao handler: cada write é agendado no event loop
+
+    A thread do executor espera o drain() terminar, então respostas grandes
+    respeitam o controle de fluxo do socket sem bufferizar tudo em memória.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, loop: asyncio.AbstractEventLoop):
+        self.writer = writer
+        self.loop = loop
+
+    async def _write(self, data: bytes):
+        self.writer.write(data)
+        await self.writer.drain()
+
+    def write(self, data) -> int:
+        if not data:
+            return 0
+        data = bytes(data)
+        asyncio.run_coroutine_threadsafe(self._write(data), self.loop).result()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class AsyncHTTPServer:
+    """
+    Servidor HTTP assíncrono
+
+    O event loop só faz I/O de socket (ler cabeçalhos e corpo, escrever a
+    resposta); a requisição completa é então entregue ao mesmo handler
+    BaseHTTPRequestHandler usado pelo engine de threads, executado em um
+    executor limitado. Conexões keep-alive ociosas custam apenas uma corrotina.
+
+    Uma resposta SSE (handler.event_stream) sai do executor logo depois dos
+    headers: os eventos são escritos pelo próprio event loop.
+
+    O timeout de ociosidade vem de handler_class.timeout e os prazos de
+    cabeçalhos/corpo de handler_class.header_timeout/body_timeout; o limite
+    de requisições por conexão é aplicado pelo próprio handler.
+
+    O socket de escuta é criado no construtor (ou recebido pronto, no caso
+    de um processo sucessor que herdou o socket do anterior). No shutdown()
+    o servidor para de aceitar, fecha conexões ociosas e espera até
+    drain_timeout segundos pelas requisições em andamento.
+    """
+
+    # Tamanho máximo de cada leitura do corpo
+    BODY_READ_CHUNK = 64 * 1024
+
+    # Handlers consultam para entregar streams SSE ao event loop
+    pumps_event_streams = True
+
+    def __init__(self, server_address: Tuple[str, int], handler_class,
+                 workers: int = 16, queue_size: int = 64, auth_workers: int = None,
+                 max_body_size: int = 10 * 1024 * 1024, max_header_size: int = 64 * 1024,
+                 retry_after: int = 1, reuse_port: bool = False,
+                 drain_timeout: float = 0, sock: socket.socket = None):
+        self.server_address = server_address
+        self.handler_class = handler_class
+        self.max_body_size = max_body_size
+        self.max_header_size = max_header_size
+        self.retry_after = retry_after
+        self.reuse_port = reuse_port
+        self.idle_timeout = getattr(handler_class, 'timeout', None)
+        self.header_timeout = getattr(handler_class, 'header_timeout', None)
+        self.body_timeout = getattr(handler_class, 'body_timeout', None)
+
+        if auth_workers is None:
+            auth_workers = min(4, os.cpu_count() or 1)
+
+        self.db_executor = BoundedExecutor(workers, queue_size, 'async-db')
+        self.auth_executor = BoundedExecutor(auth_workers, queue_size, 'async-auth')
+
+        self.drain_timeout = drain_timeout
+        self.draining = False
+        self.drained = True
+
+        self.socket = sock if sock is not None else self._create_socket()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopped = None
+        # Tarefa de cada conexão aberta -> True enquanto atende uma requisição
+        self._connections = {}
+
+    def _create_socket(self) -> socket.socket:
+        host, port = self.server_address
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.reuse_port:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind((host, port))
+            sock.listen(128)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+    # ==================== CICLO DE VIDA ====================
+
+    def serve_forever(self):
+        """Roda o event loop até shutdown() (bloqueia, como HTTPServer)"""
+        asyncio.run(self._serve())
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        # O asyncio fecha o socket que recebe: entrega uma cópia para o
+        # socket original continuar aberto (e herdável) até server_close()
+        self._server = await asyncio.start_server(
+            self._handle_connection, sock=self.socket.dup(),
+            limit=self.max_header_size
+        )
+        try:
+            await self._stopped.wait()
+        finally:
+            self._server.close()
+            await self._drain()
+            await self._server.wait_closed()
+
+    async def _drain(self):
+        """Fecha conexões ociosas e espera as requisições em andamento"""
+        self.draining = True
+
+        idle_tasks = [task for task, busy in self._connections.items() if not busy]
+        for task in idle_tasks:
+            task.cancel()
+        if idle_tasks:
+            await asyncio.wait(idle_tasks)
+
+        busy_tasks = [task for task, busy in self._connections.items() if busy]
+        if busy_tasks:
+            _, pending = await asyncio.wait(busy_tasks, timeout=self.drain_timeout or None)
+            self.drained = not pending
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+    def shutdown(self):
+        """Para o servidor (pode ser chamado de outra thread)"""
+        if self._loop and self._stopped:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def server_close(self):
+        """Fecha o socket de escuta e libera os executores"""
+        self.socket.close()
+        self.db_executor.shutdown()
+        self.auth_executor.shutdown()
+
+    def get_stats(self) -> dict:
+        return {
+            'engine': 'asyncio',
+            'db_executor': self.db_executor.get_stats(),
+            'auth_executor': self.auth_executor.get_stats()
+        }
+
+    # ==================== CONEXÕES ====================
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atende as requisições de uma conexão até ela ser fechada"""
+        peer = writer.get_extra_info('peername') or ('', 0)
+        client_address = (peer[0], peer[1])
+        connection_requests = 0
+        task = asyncio.current_task()
+        self._connections[task] = False
+        server_metrics.record_connection_opened()
+
+        try:
+            while True:
+                request = await self._read_request(reader, writer)
+                if request is None:
+                    break
+                raw, body_skipped = request
+
+                path = self._request_path(raw)
+                executor = self.auth_executor if path in AUTH_PATHS else self.db_executor
+
+                if not executor.try_acquire():
+                    await self._send_error(writer, 503, 'Servidor sobrecarregado. Tente novamente em instantes.',
+                                           {'Retry-After': str(self.retry_after)})
+                    break
+
+                wfile = _StreamWriterFile(writer, self._loop)
+                try:
+                    close, connection_requests, stream = await self._loop.run_in_executor(
+                        executor.executor, self._run_handler, raw, client_address,
+                        wfile, connection_requests
+                    )
+                finally:
+                    executor.release()
+
+                if stream is not None:
+                    # SSE: a drenagem fecha o stream como uma conexão ociosa
+                    self._connections[task] = False
+                    await self._pump_stream(reader, writer, stream)
+                    break
+
+                # Corpo não lido deixa bytes pendentes no stream: encerra a conexão
+                if close or body_skipped or self.draining:
+                    break
+                self._connections[task] = False
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Fechada pelo _drain: a task termina normalmente, senão o
+            # callback do start_server imprime o cancelamento como erro
+            pass
+        finally:
+            self._connections.pop(task, None)
+            server_metrics.record_connection_closed()
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except (ConnectionError, OSError, asyncio.CancelledError):
+                pass
+
+    async def _pump_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                           stream):
+        """
+        Escreve um stream SSE (ver events.EventStream) até ele acabar
+
+        A leitura pendente no reader detecta na hora o cliente que foi embora.
+        Cliente que não aceita dados por um heartbeat inteiro é desconectado.
+        """
+        loop = self._loop
+        ready = asyncio.Event()
+        stream.on_ready(lambda: loop.call_soon_threadsafe(ready.set))
+        ready.set()  # eventos que chegaram antes do callback
+        client_gone = loop.create_task(reader.read(1))
+        try:
+            while True:
+                waiter = loop.create_task(ready.wait())
+                done, _ = await asyncio.wait((client_gone, waiter), timeout=stream.heartbeat,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                if client_gone in done:
+                    break
+                ready.clear()
+                frames = stream.take()
+                if frames is None:
+                    break
+                writer.write(frames or stream.keepalive())
+                await asyncio.wait_for(writer.drain(), stream.heartbeat)
+        except (OSError, asyncio.TimeoutError):
+            pass
+        finally:
+            client_gone.cancel()
+            stream.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> Optional[Tuple[bytes, bool]]:
+        """
+        Lê cabeçalhos e corpo de uma requisição, cada fase com seu prazo total
+
+        Returns:
+            (bytes da requisição, corpo_ignorado) ou None se a conexão acabou
+        """
+        # Ociosa: esperando o primeiro byte da próxima requisição
+        try:
+            head = await asyncio.wait_for(reader.readexactly(1), self.idle_timeout)
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.TimeoutError:
+            server_metrics.increment('idle_timeouts')
+            return None
+
+        # Primeiro byte chegou: no shutdown a conexão é esperada, não cancelada
+        self._connections[asyncio.current_task()] = True
+
+        try:
+            head += await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.header_timeout)
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            await self._send_error(writer, 431, 'Cabeçalhos muito grandes')
+            return None
+        except asyncio.TimeoutError:
+            server_metrics.increment('header_timeouts')
+            await self._send_error(writer, 408, 'Tempo limite para envio da requisição excedido')
+            return None
+
+        content_length = self._content_length(head)
+        if content_length is None:
+            await self._send_error(writer, 400, 'Content-Length inválido')
+            return None
+
+        # Corpo acima do limite não é lido: o handler rejeita pelo cabeçalho
+        # e a conexão é encerrada em seguida
+        if content_length > self.max_body_size:
+            return head, True
+
+        if content_length:
+            body = await self._read_body(reader, writer, content_length)
+            if body is None:
+                return None
+            head += body
+        return head, False
+
+    async def _read_body(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                         content_length: int) -> Optional[bytes]:
+        """Lê o corpo aos pedaços, com prazo total de body_timeout"""
+        deadline = self._loop.time() + self.body_timeout if self.body_timeout else None
+        body = bytearray()
+
+        while len(body) < content_length:
+            timeout = deadline - self._loop.time() if deadline is not None else None
+            try:
+                if timeout is not None and timeout <= 0:
+                    raise asyncio.TimeoutError()
+                chunk = await asyncio.wait_for(
+                    reader.read(min(self.BODY_READ_CHUNK, content_length - len(body))), timeout
+                )
+            except asyncio.TimeoutError:
+                server_metrics.increment('body_timeouts')
+                await self._send_error(writer, 408, 'Tempo limite para envio da requisição excedido')
+                return None
+            if not chunk:
+                return None
+            body += chunk
+
+        return bytes(body)
+
+    @staticmethod
+    def _content_length(head: bytes) -> Optional[int]:
+        for line in head.split(b'\r\n')[1:]:
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'content-length':
+                try:
+                    length = int(value.strip())
+                except ValueError:
+                    return None
+                return length if length >= 0 else None
+        return 0
+
+    @staticmethod
+    def _request_path(raw: bytes) -> str:
+        request_line = raw.split(b'\r\n', 1)[0].decode('latin-1')
+        parts = request_line.split()
+        path = parts[1] if len(parts) >= 2 else ''
+        return path.split('?', 1)[0]
+
+    async def _send_error(self, writer: asyncio.StreamWriter, status: int, message: str,
+                          extra_headers: dict = None):
+        reasons = {400: 'Bad Request', 408: 'Request Timeout', 431: 'Request Header Fields Too Large',
+                   503: 'Service Unavailable'}
+        body = json_codec.dumps({'error': message})
+        headers = [
+            f'HTTP/1.1 {status} {reasons.get(status, "Error")}',
+            'Content-Type: application/json; charset=utf-8',
+            f'Content-Length: {len(body)}',
+            'Connection: close'
+        ]
+        for name, value in (extra_headers or {}).items():
+            headers.append(f'{name}: {value}')
+        try:
+            writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+
+    # ==================== HANDLER (EXECUTOR) ====================
+
+    def _run_handler(self, raw: bytes, client_address, wfile,
+                     connection_requests: int) -> Tuple[bool, int]:
+        """
+        Executa o handler síncrono sobre a requisição já lida
+
+        Returns:
+            (fechar_conexão, requisições atendidas na conexão, stream SSE ou None)
+        """
+        handler = self.handler_class.__new__(self.handler_class)
+        handler.request = None
+        handler.client_address = client_address
+        handler.server = self
+        handler.rfile = io.BytesIO(raw)
+        handler.wfile = wfile
+        handler.close_connection = True
+        handler.connection_requests = connection_requests
+
+        try:
+            handler.handle_one_request()
+        except (ConnectionError, OSError):
+            return True, handler.connection_requests, None
+        except Exception:
+            # Mesmo comportamento do socketserver.handle_error
+            print('-' * 40)
+            print(f'Exception occurred during processing of request from {client_address}')
+            traceback.print_exc()
+            print('-' * 40)
+            return True, handler.connection_requests, None
+
+        return (handler.close_connection, handler.connection_requests,
+                getattr(handler, 'event_stream', None))
@@ -4,23 +4,134 @@ Gerencia autenticação, registro e sessões de usuários
 """
 
 import bcrypt
+import hashlib
+import os
 import secrets
 import time
+from threading import Lock
 from typing import Optional, Dict
 from models import User
 from database import db
+from json_codec import json_codec
 from validators import validate_email, validate_password, validate_whatsapp, validate_name, sanitize_input
 
 
+# Tickets do stream SSE ficam no mesmo store das sessões, com este prefixo
+STREAM_TICKET_PREFIX = 'events:'
+# Validade de um ticket (segundos): só o tempo de abrir o EventSource
+STREAM_TICKET_TTL = 30
+
+
+def _hash_token(token: str) -> str:
+    """Tokens são guardados só como hash (memória, snapshot e banco)"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class MemorySessionStore:
+    """Sessões em memória do processo (modo de processo único)"""
+
+    def __init__(self):
+        self.sessions = {}  # hash do token -> {'user_id': int, 'expires': timestamp}
+        # Protege self.sessions quando o servidor atende em várias threads
+        self.lock = Lock()
+
+    def set(self, token: str, session: Dict):
+        with self.lock:
+            self.sessions[_hash_token(token)] = session
+
+    def get(self, token: str) -> Optional[Dict]:
+        with self.lock:
+            return self.sessions.get(_hash_token(token))
+
+    def delete(self, token: str) -> bool:
+        with self.lock:
+            return self.sessions.pop(_hash_token(token), None) is not None
+
+    def delete_expired(self, now: float) -> int:
+        with self.lock:
+            expired = [key for key, session in self.sessions.items()
+                      if session['expires'] < now]
+
+            for key in expired:
+                del self.sessions[key]
+
+        return len(expired)
+
+    def count(self) -> int:
+        with self.lock:
+            return len(self.sessions)
+
+    def snapshot(self, path: str) -> int:
+        """Grava as sessões em disco (rename atômico, permissão 0600)"""
+        with self.lock:
+            data = dict(self.sessions)
+
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(json_codec.dumps(data))
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def restore(self, path: str, now: float) -> int:
+        """Carrega um snapshot (ignorando sessões expiradas) e apaga o arquivo"""
+        try:
+            with open(path, 'rb') as f:
+                data = json_codec.loads(f.read())
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Snapshot de sessões ignorado ({path}): {e}")
+            return 0
+
+        restored = {key: session for key, session in data.items()
+                    if session.get('expires', 0) > now}
+        with self.lock:
+            self.sessions.update(restored)
+
+        os.remove(path)
+        return len(restored)
+
+
+class DatabaseSessionStore:
+    """
+    Sessões na tabela sessions do SQLite
+
+    Usado quando vários processos atendem a mesma porta: um login feito em
+    um worker continua válido nos demais. O token é gravado apenas como hash.
+    """
+
+    def __init__(self, database):
+        self.db = database
+
+    def set(self, token: str, session: Dict):
+        self.db.create_session(_hash_token(token), session['user_id'], session['expires'])
+
+    def get(self, token: str) -> Optional[Dict]:
+        return self.db.get_session(_hash_token(token))
+
+    def delete(self, token: str) -> bool:
+        return self.db.delete_session(_hash_token(token))
+
+    def delete_expired(self, now: float) -> int:
+        return self.db.delete_expired_sessions(now)
+
+    def count(self) -> int:
+        return self.db.count_sessions()
+
+
 class Auth:
     """Classe para gerenciar autenticação e sessões"""
 
-    def __init__(self):
-        # Armazena sessões ativas em memória (user_id -> token)
-        # Em produção, use Redis ou banco de dados
-        self.sessions = {}  # token -> {'user_id': int, 'expires': timestamp}
+    def __init__(self, store=None):
+        # Sessões ativas (token -> {'user_id', 'expires'}); em memória por padrão
+        self.store = store or MemorySessionStore()
         self.session_duration = 24 * 60 * 60  # 24 horas em segundos
 
+    def use_shared_sessions(self, database=None):
+        """Passa a guardar sessões no banco (compartilhadas entre processos)"""
+        self.store = DatabaseSessionStore(database or db)
+
     def hash_password(self, password: str) -> str:
         """Gera hash seguro da senha"""
         salt = bcrypt.gensalt()
@@ -190,10 +301,10 @@ class Auth:
         token = self.generate_token()
         expires = time.time() + self.session_duration
 
-        self.sessions[token] = {
+        self.store.set(token, {
             'user_id': user_id,
             'expires': expires
-        }
+        })
 
         return token
 
@@ -201,27 +312,53 @@ class Auth:
         """
         Retorna o usuário associado ao token (se válido)
         """
-        if not token:
+        # Ticket do stream não é token de sessão
+        if not token or token.startswith(STREAM_TICKET_PREFIX):
             return None
 
-        session = self.sessions.get(token)
+        session = self.store.get(token)
         if not session:
             return None
 
         # Verifica se a sessão expirou
         if time.time() > session['expires']:
-            del self.sessions[token]
+            self.store.delete(token)
             return None
 
         # Retorna o usuário
         return User.get_by_id(session['user_id'])
 
+    def create_stream_ticket(self, user_id: int) -> str:
+        """
+        Ticket de uso único para abrir /api/events
+
+        O EventSource não envia headers, então a credencial vai na URL, e
+        URLs acabam em logs (proxy, navegador). No lugar do token da sessão
+        vai este ticket: vale STREAM_TICKET_TTL segundos e uma conexão só.
+        """
+        ticket = self.generate_token()
+        self.store.set(STREAM_TICKET_PREFIX + ticket, {
+            'user_id': user_id,
+            'expires': time.time() + STREAM_TICKET_TTL
+        })
+        return ticket
+
+    def redeem_stream_ticket(self, ticket: str) -> Optional[User]:
+        """Usuário do ticket, que deixa de valer aqui (None se inválido, expirado ou já usado)"""
+        if not ticket:
+            return None
+
+        key = STREAM_TICKET_PREFIX + ticket
+        session = self.store.get(key)
+        # Só quem conseguiu apagar usa: o mesmo ticket não abre dois streams
+        if not session or not self.store.delete(key) or time.time() > session['expires']:
+            return None
+
+        return User.get_by_id(session['user_id'])
+
     def logout(self, token: str) -> bool:
         """Remove a sessão (logout)"""
-        if token in self.sessions:
-            del self.sessions[token]
-            return True
-        return False
+        return self.store.delete(token)
 
     def validate_token(self, token: str) -> bool:
         """Verifica se o token é válido"""
@@ -229,14 +366,19 @@ class Auth:
 
     def cleanup_expired_sessions(self):
         """Remove sessões expiradas (deve ser executado periodicamente)"""
-        now = time.time()
-        expired = [token for token, session in self.sessions.items()
-                  if session['expires'] < now]
-
-        for token in expired:
-            del self.sessions[token]
-
-        return len(expired)
+        return self.store.delete_expired(time.time())
+
+    def snapshot_sessions(self, path: str) -> int:
+        """Salva as sessões em memória ao encerrar (sessões no banco já persistem)"""
+        if not hasattr(self.store, 'snapshot'):
+            return 0
+        return self.store.snapshot(path)
+
+    def restore_sessions(self, path: str) -> int:
+        """Recarrega o snapshot salvo pelo processo anterior"""
+        if not hasattr(self.store, 'restore'):
+            return 0
+        return self.store.restore(path, time.time())
 
 
 # Instância global de autenticação
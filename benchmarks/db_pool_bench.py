@@ -0,0 +1,106 @@
+"""
+Benchmark de conexões SQLite do Funnel Builder
+Compara uma conexão nova por consulta (como era) com o ConnectionPool
+(conexões persistentes com WAL e synchronous=NORMAL)
+
+Uso: python benchmarks/db_pool_bench.py [--number 2000] [--threads 8]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+
+def bench(label: str, fn, number: int):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"  {label:<46} {seconds * 1e6:>10.1f} µs")
+
+
+def fresh_connection(db: Database) -> sqlite3.Connection:
+    """Conexão como get_connection() abria antes do pool"""
+    conn = sqlite3.connect(db.db_path, timeout=db.busy_timeout)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do pool de conexões SQLite')
+    parser.add_argument('--number', type=int, default=2000, help='Operações por medida')
+    parser.add_argument('--threads', type=int, default=8, help='Threads no teste concorrente')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='funnel-bench-')
+    db = Database(os.path.join(tmpdir, 'bench.db'))
+    user_id = db.create_user('bench@test.com', 'hash')
+    funnel_id = db.create_funnel(user_id, 'Funil do benchmark',
+                                 elements=[{'id': i, 'type': 'landing'} for i in range(40)])
+    db.create_session('token-hash', user_id, time.time() + 3600)
+
+    def session_before():
+        conn = fresh_connection(db)
+        conn.execute('SELECT user_id, expires FROM sessions WHERE token_hash = ?',
+                     ('token-hash',)).fetchone()
+        conn.close()
+
+    def funnel_before():
+        conn = fresh_connection(db)
+        conn.execute('SELECT * FROM funnels WHERE id = ? AND user_id = ?',
+                     (funnel_id, user_id)).fetchone()
+        conn.close()
+
+    def write_before():
+        # Sem o pool a conexão fica no synchronous padrão (FULL)
+        conn = fresh_connection(db)
+        conn.execute('INSERT OR REPLACE INTO sessions (token_hash, user_id, expires) VALUES (?, ?, ?)',
+                     ('bench-write', user_id, time.time()))
+        conn.commit()
+        conn.close()
+
+    print(f"Banco: {db.db_path}\n")
+    print("Leitura da sessão (todo request autenticado)")
+    bench('conexão nova por consulta (antes)', session_before, args.number)
+    bench('pool', lambda: db.get_session('token-hash'), args.number)
+
+    print("\nGET de um funil")
+    bench('conexão nova por consulta (antes)', funnel_before, args.number)
+    bench('pool', lambda: db.get_funnel_by_id(funnel_id, user_id), args.number)
+
+    print("\nEscrita com commit")
+    bench('conexão nova, synchronous=FULL (antes)', write_before, args.number // 10 or 1)
+    bench('pool, synchronous=NORMAL',
+          lambda: db.create_session('bench-write', user_id, time.time()), args.number // 10 or 1)
+
+    print(f"\nLeituras da sessão em {args.threads} threads")
+    for label, fn in (('conexão nova por consulta (antes)', session_before),
+                      ('pool', lambda: db.get_session('token-hash'))):
+        def worker():
+            for _ in range(args.number):
+                fn()
+
+        threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<46} {args.number * args.threads / elapsed:>10.0f} ops/s")
+
+    print(f"\nPool: {db.pool.get_stats()}")
+    db.pool.close()
+    for name in os.listdir(tmpdir):
+        os.remove(os.path.join(tmpdir, name))
+    os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
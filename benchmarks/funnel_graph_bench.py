@@ -0,0 +1,114 @@
+"""
+Benchmark do salvamento de funis grandes do Funnel Builder
+Compara a coluna JSON única (o grafo inteiro reescrito a cada autosave, como
+era) com as linhas de funnel_elements/funnel_connections (funnel_graph.py),
+quando o autosave só moveu um elemento no canvas
+
+Mede o tempo por salvamento e os bytes escritos no WAL por salvamento.
+
+Uso: python benchmarks/funnel_graph_bench.py [--elements 500] [--saves 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from json_codec import json_codec  # noqa: E402
+
+
+def make_graph(n_elements: int):
+    elements = [{
+        'id': 1_700_000_000_000 + i, 'type': 'landing', 'name': f'Página {i}', 'icon': '📄',
+        'color': '#3b82f6', 'x': (i % 20) * 220, 'y': (i // 20) * 160, 'investment': 0,
+        'impressions': 1000, 'clicks': 50, 'ctr': 5, 'cpm': 0, 'trafficMode': 'absolute',
+        'pageViewRate': 100, 'conversionRate': 12.5, 'price': 97, 'url': '',
+        'description': 'Landing page com oferta principal', 'generatesRevenue': False
+    } for i in range(n_elements)]
+    connections = [{
+        'id': 1_800_000_000_000 + i, 'from': elements[i]['id'], 'to': elements[i + 1]['id'],
+        'fromSide': 'right', 'toSide': 'left', 'conversion': 100
+    } for i in range(n_elements - 1)]
+    return elements, connections
+
+
+def measure(db: Database, save, saves: int):
+    """(ms por salvamento, bytes de WAL por salvamento)"""
+    conn = db.get_connection()
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+    wal = db.db_path + '-wal'
+    before = os.path.getsize(wal) if os.path.exists(wal) else 0
+
+    start = time.perf_counter()
+    for i in range(saves):
+        save(i)
+    elapsed = time.perf_counter() - start
+    return elapsed / saves * 1000, (os.path.getsize(wal) - before) / saves
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do autosave de funis grandes')
+    parser.add_argument('--elements', type=int, default=500, help='Elementos no funil')
+    parser.add_argument('--saves', type=int, default=200, help='Autosaves por medida')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='funnel-bench-')
+    db = Database(os.path.join(tmpdir, 'bench.db'))
+    user_id = db.create_user('bench@test.com', 'hash')
+    elements, connections = make_graph(args.elements)
+    funnel_id = db.create_funnel(user_id, 'Funil grande', elements=elements, connections=connections)
+
+    conn = db.get_connection()
+    # Checkpoint só manual, para o WAL acumular tudo o que foi escrito na medida
+    # (uma thread só: o pool devolve sempre esta mesma conexão)
+    conn.execute('PRAGMA wal_autocheckpoint = 0')
+    conn.execute('CREATE TABLE legacy_funnels (id INTEGER PRIMARY KEY, elements TEXT, connections TEXT)')
+    conn.execute('INSERT INTO legacy_funnels VALUES (1, ?, ?)',
+                 (json_codec.dumps_str(elements), json_codec.dumps_str(connections)))
+    conn.commit()
+    conn.close()
+
+    def moved(i):
+        # O autosave depois de arrastar um elemento: só x/y dele mudaram
+        graph = list(elements)
+        graph[i % len(graph)] = {**graph[i % len(graph)], 'x': 10_000 + i}
+        return graph
+
+    def save_before(i):
+        # O UPDATE de funnels (versão, updated_at, change_log) é o mesmo nos dois casos
+        graph = moved(i)
+        conn = db.get_connection()
+        conn.execute('UPDATE legacy_funnels SET elements = ?, connections = ? WHERE id = 1',
+                     (json_codec.dumps_str(graph), json_codec.dumps_str(connections)))
+        conn.execute('UPDATE funnels SET element_count = ?, connection_count = ?, '
+                     'updated_at = CURRENT_TIMESTAMP, version = version + 1 WHERE id = ? AND user_id = ?',
+                     (len(graph), len(connections), funnel_id, user_id))
+        conn.commit()
+        conn.close()
+
+    def save_after(i):
+        db._update_funnel(funnel_id, user_id, elements=moved(i), connections=connections)
+
+    size = len(json_codec.dumps(elements)) + len(json_codec.dumps(connections))
+    print(f"Funil: {args.elements} elementos, {size} bytes de JSON; {args.saves} autosaves\n")
+    print(f"  {'armazenamento':<32} {'tempo':>10} {'WAL':>14}")
+    for label, save in (('coluna JSON única (antes)', save_before),
+                        ('linhas por elemento', save_after)):
+        ms, wal_bytes = measure(db, save, args.saves)
+        print(f"  {label:<32} {ms:>7.2f} ms {wal_bytes / 1024:>10.1f} KiB")
+
+    assert db.get_funnel_by_id(funnel_id, user_id)['elements'] == moved(args.saves - 1)
+
+    db.pool.close()
+    for name in os.listdir(tmpdir):
+        os.remove(os.path.join(tmpdir, name))
+    os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
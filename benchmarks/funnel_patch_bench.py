@@ -0,0 +1,100 @@
+"""
+Benchmark do autosave de funis grandes: PUT da lista inteira x PATCH
+Um autosave depois de arrastar um elemento, nos três formatos aceitos por
+/api/funnels/:id: PUT com elements/connections completos (como era), PATCH
+com diff compacto por id (o que o editor envia) e PATCH em JSON Patch
+
+Mede o tamanho do corpo e o tempo no servidor (parse do corpo + gravação).
+
+Uso: python benchmarks/funnel_patch_bench.py [--elements 500] [--saves 200]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from funnel_patch import parse_item_diff  # noqa: E402
+from json_codec import json_codec  # noqa: E402
+from funnel_graph_bench import make_graph  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do PATCH de funis')
+    parser.add_argument('--elements', type=int, default=500, help='Elementos no funil')
+    parser.add_argument('--saves', type=int, default=200, help='Autosaves por medida')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='funnel-bench-')
+    db = Database(os.path.join(tmpdir, 'bench.db'))
+    user_id = db.create_user('bench@test.com', 'hash')
+    elements, connections = make_graph(args.elements)
+    funnel_id = db.create_funnel(user_id, 'Funil grande', elements=elements, connections=connections)
+
+    def moved(i):
+        index = i % len(elements)
+        element = {**elements[index], 'x': 10_000 + i, 'y': 20_000 + i}
+        return index, element
+
+    def put_body(i):
+        index, element = moved(i)
+        graph = list(elements)
+        graph[index] = element
+        return {'elements': graph, 'connections': connections, 'simulatedRevenue': 1000.0}
+
+    def diff_body(i):
+        _, element = moved(i)
+        return {'elements': {'upsert': [element]}, 'simulatedRevenue': 1000.0}
+
+    def json_patch_body(i):
+        index, element = moved(i)
+        return [{'op': 'replace', 'path': f'/elements/{index}/x', 'value': element['x']},
+                {'op': 'replace', 'path': f'/elements/{index}/y', 'value': element['y']},
+                {'op': 'replace', 'path': '/simulatedRevenue', 'value': 1000.0}]
+
+    def put(body):
+        data = json_codec.loads(body)
+        db.update_funnel(funnel_id, user_id, elements=data['elements'],
+                         connections=data['connections'], simulated_revenue=data['simulatedRevenue'])
+
+    def patch_diff(body):
+        data = json_codec.loads(body)
+        db.patch_funnel(funnel_id, user_id, items=parse_item_diff(data),
+                        simulated_revenue=data['simulatedRevenue'])
+
+    def patch_json(body):
+        db.patch_funnel(funnel_id, user_id, operations=json_codec.loads(body))
+
+    cases = [
+        ('PUT lista inteira (antes)', put_body, put),
+        ('PATCH diff por id (editor)', diff_body, patch_diff),
+        ('PATCH JSON Patch', json_patch_body, patch_json),
+    ]
+
+    print(f"Funil: {args.elements} elementos; {args.saves} autosaves movendo um elemento\n")
+    print(f"  {'formato':<30} {'corpo':>12} {'servidor':>12}")
+    for label, make_body, apply in cases:
+        bodies = [json_codec.dumps(make_body(i)) for i in range(args.saves)]
+        start = time.perf_counter()
+        for body in bodies:
+            apply(body)
+        elapsed = time.perf_counter() - start
+        size = sum(len(body) for body in bodies) / len(bodies)
+        print(f"  {label:<30} {size:>8.0f} B {elapsed / args.saves * 1000:>9.2f} ms")
+
+        _, last = moved(args.saves - 1)
+        stored = db.get_funnel_by_id(funnel_id, user_id)['elements']
+        assert stored[(args.saves - 1) % len(elements)] == last and len(stored) == len(elements)
+
+    db.pool.close()
+    for name in os.listdir(tmpdir):
+        os.remove(os.path.join(tmpdir, name))
+    os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
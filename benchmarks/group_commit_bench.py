@@ -0,0 +1,87 @@
+"""
+Benchmark do group commit do Funnel Builder
+Vários editores salvando funis ao mesmo tempo: um commit por escrita (como
+era) contra a write_queue, que junta as escritas de uma janela em um commit
+
+Uso: python benchmarks/group_commit_bench.py [--editors 50] [--seconds 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+
+def run(label: str, save, funnel_ids, seconds: float, commits: callable):
+    latencies = []
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def editor(funnel_id):
+        elements = [{'id': i, 'type': 'landing', 'x': i * 10, 'y': 40} for i in range(30)]
+        local = []
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            save(funnel_id, elements)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    commits_before = commits()
+    threads = [threading.Thread(target=editor, args=(funnel_id,)) for funnel_id in funnel_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"  {label:<28} {len(latencies) / seconds:>8.0f} escritas/s "
+          f"{(commits() - commits_before) / seconds:>8.0f} commits/s   p50 {p50:6.1f} ms  p99 {p99:6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do group commit')
+    parser.add_argument('--editors', type=int, default=50, help='Editores salvando ao mesmo tempo')
+    parser.add_argument('--seconds', type=float, default=3, help='Duração de cada medida')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='funnel-bench-')
+    db = Database(os.path.join(tmpdir, 'bench.db'))
+    user_id = db.create_user('bench@test.com', 'hash')
+    funnel_ids = [db.create_funnel(user_id, f'Funil {i}') for i in range(args.editors)]
+
+    direct_commits = [0]
+    direct_lock = threading.Lock()
+
+    def save_direct(funnel_id, elements):
+        # Sem a fila: cada save abre sua transação e faz seu commit
+        db._update_funnel(funnel_id, user_id, elements=elements)
+        with direct_lock:
+            direct_commits[0] += 1
+
+    def save_queued(funnel_id, elements):
+        db.update_funnel(funnel_id, user_id, elements=elements)
+
+    print(f"{args.editors} editores, {args.seconds:.0f} s por medida\n")
+    run('um commit por escrita (antes)', save_direct, funnel_ids, args.seconds,
+        lambda: direct_commits[0])
+    run('write_queue', save_queued, funnel_ids, args.seconds,
+        lambda: db.write_queue.get_stats()['commits'])
+    print(f"\nFila: {db.write_queue.get_stats()}")
+
+    db.pool.close()
+    for name in os.listdir(tmpdir):
+        os.remove(os.path.join(tmpdir, name))
+    os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
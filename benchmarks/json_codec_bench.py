@@ -0,0 +1,110 @@
+"""
+Benchmark de serialização JSON do Funnel Builder
+Compara json.dumps/json.loads (como era), StdlibCodec e OrjsonCodec em
+documentos de funil no formato salvo pelo app.jsx
+
+Uso: python benchmarks/json_codec_bench.py [--elements 40] [--funnels 50]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_codec import CODECS, RawJSON, get_codec  # noqa: E402
+from json_stream import StreamingJSONEncoder  # noqa: E402
+
+
+ELEMENT_TYPES = [
+    ('facebook', 'Facebook Ads', 'facebook'), ('google', 'Google Ads', 'search'),
+    ('landing', 'Landing Page', 'rocket'), ('captura', 'Página de Captura', 'file-edit'),
+    ('vsl', 'VSL (Video Sales Letter)', 'video'), ('checkout', 'Checkout', 'credit-card'),
+    ('upsell', 'Upsell', 'trending-up'), ('email', 'Sequência Email', 'mail-open'),
+    ('whatsapp', 'WhatsApp', 'smartphone'), ('obrigado', 'Página Obrigado', 'party-popper'),
+]
+
+
+def make_funnel(funnel_id: int, n_elements: int, rng: random.Random) -> dict:
+    """Funil com elementos e conexões iguais aos que o canvas grava"""
+    elements = []
+    for i in range(n_elements):
+        kind, name, icon = rng.choice(ELEMENT_TYPES)
+        elements.append({
+            'id': 1_700_000_000_000 + i, 'type': kind, 'name': name, 'icon': icon,
+            'color': f'color-{kind}', 'x': rng.randint(0, 3000), 'y': rng.randint(0, 2000),
+            'investment': round(rng.uniform(0, 5000), 2), 'impressions': rng.randint(0, 10 ** 6),
+            'clicks': rng.randint(0, 10 ** 4), 'ctr': round(rng.uniform(0, 5), 2),
+            'cpm': round(rng.uniform(5, 40), 2), 'trafficMode': 'absolute',
+            'pageViewRate': 100, 'conversionRate': round(rng.uniform(0, 60), 1),
+            'price': rng.choice([0, 47, 97, 197, 497]), 'url': f'https://exemplo.com.br/p/{i}',
+            'description': 'Página com oferta principal e depoimentos', 'generatesRevenue': rng.random() < 0.3
+        })
+    connections = [
+        {'id': 1_800_000_000_000 + i, 'from': elements[i]['id'], 'to': elements[i + 1]['id'],
+         'fromSide': 'right', 'toSide': 'left', 'conversion': rng.randint(5, 100)}
+        for i in range(n_elements - 1)
+    ]
+    return {'id': funnel_id, 'name': f'Funil de Lançamento {funnel_id}', 'icon': '🚀',
+            'elements': elements, 'connections': connections,
+            'createdAt': '2026-01-10 12:00:00', 'updatedAt': '2026-02-01 08:30:00'}
+
+
+def bench(label: str, fn, number: int):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"  {label:<42} {seconds * 1e6:>10.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos codecs JSON')
+    parser.add_argument('--elements', type=int, default=40, help='Elementos por funil')
+    parser.add_argument('--funnels', type=int, default=50, help='Funis na lista')
+    parser.add_argument('--number', type=int, default=50, help='Execuções por medida')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    funnels = [make_funnel(i, args.elements, rng) for i in range(args.funnels)]
+    doc = funnels[0]
+    stored = [(json.dumps(f['elements']), json.dumps(f['connections'])) for f in funnels]
+    encoded = json.dumps(doc).encode('utf-8')
+    print(f"Funil: {args.elements} elementos, {len(encoded)} bytes; lista: {args.funnels} funis\n")
+
+    print("Funil único")
+    bench('json.dumps + encode (antes)', lambda: json.dumps(doc).encode('utf-8'), args.number)
+    bench('json.loads (antes)', lambda: json.loads(encoded), args.number)
+    for name in CODECS:
+        codec = get_codec(name)
+        bench(f'{name}.dumps', lambda: codec.dumps(doc), args.number)
+        bench(f'{name}.loads', lambda: codec.loads(encoded), args.number)
+
+    print("\nGET /api/funnels (linhas do banco -> corpo da resposta)")
+
+    def decoded_rows(codec):
+        for f, (elements, connections) in zip(funnels, stored):
+            yield {**f, 'elements': codec.loads(elements), 'connections': codec.loads(connections)}
+
+    def raw_rows():
+        for f, (elements, connections) in zip(funnels, stored):
+            yield {**f, 'elements': RawJSON(elements), 'connections': RawJSON(connections)}
+
+    def before():
+        # Como o encoder antigo: cada funil via json.dumps e texto -> utf-8 no fim
+        rows = ({**f, 'elements': json.loads(e), 'connections': json.loads(c)}
+                for f, (e, c) in zip(funnels, stored))
+        return ('{"funnels": [' + ', '.join(json.dumps(r) for r in rows) + ']}').encode('utf-8')
+
+    bench('json (antes)', before, args.number // 5 or 1)
+    for name in CODECS:
+        codec = get_codec(name)
+        encoder = StreamingJSONEncoder(codec)
+        bench(f'{name} decodificando as colunas',
+              lambda: b''.join(encoder.iterencode({'funnels': decoded_rows(codec)})), args.number // 5 or 1)
+        bench(f'{name} com RawJSON',
+              lambda: b''.join(encoder.iterencode({'funnels': raw_rows()})), args.number // 5 or 1)
+
+
+if __name__ == '__main__':
+    main()
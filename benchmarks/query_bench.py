@@ -0,0 +1,122 @@
+"""
+Benchmark das listagens do Funnel Builder (linhas por segundo)
+Compara o caminho antigo (SELECT *, sqlite3.Row copiado campo a campo e
+Model.from_dict(...).to_dict()) com as row factories compiladas de queries.py
+
+Uso: python benchmarks/query_bench.py [--rows 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from json_codec import json_codec  # noqa: E402
+from marketing_models import Page, UTM, PageMetrics  # noqa: E402
+
+
+def page_before(row):
+    return {
+        'id': row['id'], 'user_id': row['user_id'], 'name': row['name'], 'url': row['url'],
+        'category': row['category'], 'description': row['description'],
+        'tags': json_codec.loads(row['tags']) if row['tags'] else [],
+        'status': row['status'], 'thumbnail_url': row['thumbnail_url'],
+        'created_at': row['created_at'], 'updated_at': row['updated_at']
+    }
+
+
+def utm_before(row):
+    return {
+        'id': row['id'], 'user_id': row['user_id'], 'name': row['name'],
+        'utm_source': row['utm_source'], 'utm_medium': row['utm_medium'],
+        'utm_campaign': row['utm_campaign'], 'utm_content': row['utm_content'],
+        'utm_term': row['utm_term'], 'tags': json_codec.loads(row['tags']) if row['tags'] else [],
+        'notes': row['notes'], 'created_at': row['created_at'], 'updated_at': row['updated_at']
+    }
+
+
+def metric_before(row):
+    return {
+        'id': row['id'], 'page_id': row['page_id'], 'user_id': row['user_id'], 'date': row['date'],
+        'impressions': row['impressions'], 'clicks': row['clicks'],
+        'conversions': row['conversions'], 'avg_time_on_page': row['avg_time_on_page'],
+        'bounce_rate': row['bounce_rate'], 'utm_id': row['utm_id'], 'notes': row['notes'],
+        'created_at': row['created_at']
+    }
+
+
+def rows_per_second(fn, rows: int, repeat: int = 5) -> float:
+    best = min(_timed(fn) for _ in range(repeat))
+    return rows / best
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das listagens de páginas, UTMs e métricas')
+    parser.add_argument('--rows', type=int, default=2000, help='Linhas por tabela')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='funnel-bench-')
+    db = Database(os.path.join(tmpdir, 'bench.db'))
+    user_id = db.create_user('bench@test.com', 'hash')
+
+    with db.connection(write=True):
+        page_ids = [db.create_page(user_id, f'Página {i}', f'https://exemplo.com.br/p/{i}',
+                                   description='Landing page com oferta principal',
+                                   tags=['lançamento', 'produto-digital'])
+                    for i in range(args.rows)]
+        for i in range(args.rows):
+            db.create_utm(user_id, f'Campanha {i}', 'facebook', 'cpc', f'campanha_{i}',
+                          utm_content='video_ad_1', tags=['black-friday'])
+        for i in range(args.rows):
+            db.create_page_metrics(page_ids[0], user_id, f'2024-{1 + i % 12:02d}-{1 + i % 28:02d}',
+                                   impressions=1000 + i, clicks=50 + i % 40, conversions=i % 9)
+
+    def legacy(query, params, to_dict, model):
+        conn = db.get_connection()
+        try:
+            return [model.from_dict(to_dict(row)).to_dict() for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+    cases = [
+        ('páginas',
+         lambda: legacy('SELECT * FROM pages WHERE user_id = ? ORDER BY updated_at DESC, id DESC',
+                        (user_id,), page_before, Page),
+         lambda: list(db.iter_pages_by_user(user_id))),
+        ('UTMs',
+         lambda: legacy('SELECT * FROM utms WHERE user_id = ? ORDER BY updated_at DESC, id DESC',
+                        (user_id,), utm_before, UTM),
+         lambda: list(db.iter_utms_by_user(user_id))),
+        ('métricas',
+         lambda: legacy('SELECT * FROM page_metrics WHERE page_id = ? AND user_id = ? '
+                        'ORDER BY date DESC, id DESC', (page_ids[0], user_id), metric_before, PageMetrics),
+         lambda: list(db.iter_page_metrics(page_ids[0], user_id))),
+    ]
+
+    print(f"{args.rows} linhas por tabela\n")
+    print(f"  {'listagem':<12} {'antes':>14} {'compilado':>14} {'ganho':>8}")
+    for label, before, after in cases:
+        assert len(before()) == len(after()) == args.rows
+        before_rate = rows_per_second(before, args.rows)
+        after_rate = rows_per_second(after, args.rows)
+        print(f"  {label:<12} {before_rate:>10.0f} l/s {after_rate:>10.0f} l/s "
+              f"{after_rate / before_rate:>7.1f}x")
+
+    db.pool.close()
+    for name in os.listdir(tmpdir):
+        os.remove(os.path.join(tmpdir, name))
+    os.rmdir(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Compression para Funnel Builder
+Writers de corpo de resposta: chunked (HTTP/1.1) e compressão gzip/deflate
+incremental, para respostas geradas aos pedaços sem montar o corpo inteiro
+"""
+
+import zlib
+from typing import Optional
+
+from precompressed import choose_encoding
+
+
+# Codificações oferecidas para respostas dinâmicas (ordem de preferência)
+DYNAMIC_ENCODINGS = ('gzip', 'deflate', 'identity')
+
+# wbits do zlib: 16+ gera cabeçalho gzip, positivo gera zlib (o "deflate" do HTTP)
+_WBITS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """Escolhe gzip/deflate/identity pelo Accept-Encoding (identity se nada servir)"""
+    return choose_encoding(accept_encoding, DYNAMIC_ENCODINGS) or 'identity'
+
+
+class ChunkedWriter:
+    """
+    Escreve o corpo com Transfer-Encoding: chunked
+
+    Agrupa escritas pequenas em chunks de até buffer_size bytes para não
+    gerar um chunk (e um write no socket) por fragmento do encoder.
+    """
+
+    def __init__(self, wfile, buffer_size: int = 16 * 1024):
+        self.wfile = wfile
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.bytes_written = 0
+
+    def write(self, data: bytes):
+        self.buffer += data
+        if len(self.buffer) >= self.buffer_size:
+            self._flush_chunk()
+
+    def _flush_chunk(self):
+        if not self.buffer:
+            return
+        self.wfile.write(b'%x\r\n' % len(self.buffer) + bytes(self.buffer) + b'\r\n')
+        self.bytes_written += len(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        """Envia o que restou e o chunk final de tamanho zero"""
+        self._flush_chunk()
+        self.wfile.write(b'0\r\n\r\n')
+
+
+class StreamWriter:
+    """Corpo delimitado pelo fechamento da conexão (clientes HTTP/1.0)"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.bytes_written = 0
+
+    def write(self, data: bytes):
+        self.wfile.write(data)
+        self.bytes_written += len(data)
+
+    def close(self):
+        pass
+
+
+class CompressingWriter:
+    """Comprime incrementalmente antes de repassar ao writer de baixo"""
+
+    def __init__(self, raw, encoding: str, level: int = 6):
+        self.raw = raw
+        self.encoding = encoding
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+        self.bytes_in = 0
+
+    def write(self, data: bytes):
+        self.bytes_in += len(data)
+        compressed = self.compressor.compress(data)
+        if compressed:
+            self.raw.write(compressed)
+
+    def close(self):
+        self.raw.write(self.compressor.flush())
+        self.raw.close()
+
+
+if __name__ == '__main__':
+    import gzip
+    import io
+
+    out = io.BytesIO()
+    writer = CompressingWriter(ChunkedWriter(out, buffer_size=256), 'gzip')
+    payload = b'{"id": 1, "name": "Funil"}, ' * 2000
+    for i in range(0, len(payload), 100):
+        writer.write(payload[i:i + 100])
+    writer.close()
+
+    # Decodifica os chunks para conferir
+    raw, body = out.getvalue(), b''
+    while True:
+        size_line, _, raw = raw.partition(b'\r\n')
+        size = int(size_line, 16)
+        if size == 0:
+            break
+        body, raw = body + raw[:size], raw[size + 2:]
+
+    print(f"Original: {len(payload)} bytes, comprimido: {len(body)} bytes")
+    print("Conteúdo confere:", gzip.decompress(body) == payload)
+    print("Negociação:", negotiate_encoding('deflate, gzip;q=0.5'), negotiate_encoding(None))
@@ -4,15 +4,265 @@ Gerencia conexão SQLite e operações CRUD
 """
 
 import sqlite3
-import json
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from funnel_graph import GRAPH_TABLES, items_sql, items_json, save_items, patch_items
+from funnel_patch import apply_json_patch, check_funnel_fields, referenced_fields
+from json_codec import json_codec, RawJSON
+from marketing_models import ctr, conversion_rate
+from migrations import migrate
+from queries import RowMapping, select_sql, keyset_params
+from write_queue import GroupCommitQueue
+
+
+# Conexões ociosas mantidas abertas por processo (acima disso são fechadas ao devolver)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '16'))
+# Cache de páginas por conexão, em KiB
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '8192'))
+# Quanto do arquivo do banco é lido via mmap, em bytes (0 desliga)
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(64 * 1024 * 1024)))
+# Statements preparados guardados por conexão (variantes de select_sql e as escritas)
+DB_STATEMENT_CACHE = int(os.getenv('DB_STATEMENT_CACHE', '256'))
+# Linhas lidas por consulta nas listagens em streaming (ver Database._iter_keyset)
+DB_STREAM_CHUNK = int(os.getenv('DB_STREAM_CHUNK', '100'))
+
+
+class _Connection(sqlite3.Connection):
+    """sqlite3.Connection que guarda de qual processo e geração do pool ela é"""
+    pid = 0
+    generation = 0
+
+
+class _PooledConnection:
+    """
+    Conexão emprestada do ConnectionPool por get_connection()
+
+    Os métodos do Database continuam chamando commit() e close(); close()
+    devolve a conexão ao pool em vez de fechá-la. Os cursores abertos por ela
+    são fechados na devolução, para um iter_* interrompido não deixar uma
+    leitura ativa (e o snapshot antigo) para o próximo que pegar a conexão.
+    """
+
+    def __init__(self, pool: 'ConnectionPool', conn: _Connection):
+        self.pool = pool
+        self.conn = conn
+        self._cursors = []
+
+    def cursor(self) -> sqlite3.Cursor:
+        cursor = self.conn.cursor()
+        self._cursors.append(cursor)
+        return cursor
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql: str, params) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, params)
+
+    def close(self):
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            self.pool.release(conn, self._cursors)
+            self._cursors = []
+
+    def __getattr__(self, name):
+        if self.conn is None:
+            raise sqlite3.ProgrammingError('Cannot operate on a closed database.')
+        return getattr(self.conn, name)
+
+
+class ConnectionPool:
+    """
+    Conexões SQLite persistentes, reaproveitadas entre operações
+
+    Abrir uma conexão por operação custava abrir o arquivo, ler o schema e
+    aplicar os PRAGMAs a cada consulta (inclusive a da sessão, em todo request).
+    Aqui cada conexão é configurada uma vez e volta para a pilha de ociosas ao
+    ser devolvida; acquire() nunca espera: sem conexão ociosa, abre outra.
+
+    Conexões não sobrevivem ao fork: o processo filho (worker do prefork)
+    começa com o pool vazio.
+    """
+
+    def __init__(self, db_path: str, busy_timeout: float, size: int = DB_POOL_SIZE):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.size = size
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # As conexões herdadas do pai não são fechadas no filho (o close do
+        # SQLite mexeria nos locks e no WAL que o pai ainda usa): ficam esquecidas aqui
+        self._inherited = getattr(self, '_idle', []) + getattr(self, '_inherited', [])
+        self._lock = threading.Lock()
+        self._idle: List[_Connection] = []
+        self._generation = 0
+        self.created = 0
+        self.reused = 0
+
+    def _connect(self) -> _Connection:
+        # check_same_thread=False: um iter_* pode ser consumido por outra thread
+        # do servidor; a conexão só é usada por quem a pegou até devolvê-la
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                               check_same_thread=False, factory=_Connection,
+                               cached_statements=DB_STATEMENT_CACHE)
+        conn.row_factory = sqlite3.Row  # Permite acessar colunas por nome
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}')
+        conn.execute(f'PRAGMA cache_size = {-DB_CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size = {DB_MMAP_SIZE}')
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.pid = os.getpid()
+        conn.generation = self._generation
+        return conn
+
+    def acquire(self) -> _PooledConnection:
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return _PooledConnection(self, self._idle.pop())
+            self.created += 1
+        return _PooledConnection(self, self._connect())
+
+    def release(self, conn: _Connection, cursors: List[sqlite3.Cursor]):
+        """Devolve a conexão limpa: sem cursores ativos nem transação aberta"""
+        if conn.pid != os.getpid():
+            self._inherited.append(conn)
+            return
+
+        try:
+            for cursor in cursors:
+                cursor.close()
+            if conn.in_transaction:
+                conn.rollback()
+            if conn.isolation_level != '':
+                conn.isolation_level = ''
+        except sqlite3.Error:
+            conn.close()
+            return
+
+        with self._lock:
+            if conn.generation == self._generation and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Fecha as conexões ociosas (as emprestadas fecham ao ser devolvidas)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._generation += 1
+        for conn in idle:
+            conn.close()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {'idle': len(self._idle), 'created': self.created, 'reused': self.reused}
+
+
+class _BoundConnection:
+    """
+    Conexão compartilhada por um bloco db.connection()
+
+    Os métodos do Database chamam commit() e close() ao fim de cada operação;
+    aqui os dois viram no-op e a transação é encerrada pelo próprio bloco.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def _json_list(value: Optional[str]) -> List:
+    return json_codec.loads(value) if value else []
+
+
+def _json_dict(value: Optional[str]) -> Dict:
+    return json_codec.loads(value) if value else {}
+
+
+def _graph_list(value: Optional[str]) -> List:
+    return json_codec.loads(items_json(value))
+
+
+def _raw_graph_list(value: Optional[str]) -> RawJSON:
+    return RawJSON(items_json(value))
+
+
+def _same_names(*columns: str) -> List[Tuple[str, str]]:
+    return [(column, column) for column in columns]
+
+
+# Linhas de cada tabela já no formato da API (o mesmo de Page.to_dict, UTM.to_dict...)
+PAGE_ROW = RowMapping('pages', _same_names(
+    'id', 'user_id', 'name', 'url', 'category', 'description', 'tags', 'status',
+    'thumbnail_url', 'created_at', 'updated_at'
+), convert={'tags': _json_list})
+
+PAGE_TEST_ROW = RowMapping('page_tests', _same_names(
+    'id', 'page_id', 'user_id', 'date', 'title', 'description', 'test_type', 'results',
+    'metrics', 'created_at'
+), convert={'metrics': _json_dict})
+
+UTM_ROW = RowMapping('utms', _same_names(
+    'id', 'user_id', 'name', 'utm_source', 'utm_medium', 'utm_campaign', 'utm_content',
+    'utm_term', 'tags', 'notes', 'created_at', 'updated_at'
+), convert={'tags': _json_list})
+
+PAGE_METRICS_ROW = RowMapping('page_metrics', _same_names(
+    'id', 'page_id', 'user_id', 'date', 'impressions', 'clicks', 'conversions',
+    'avg_time_on_page', 'bounce_rate', 'utm_id', 'notes', 'created_at'
+), computed=[
+    ('ctr', lambda d: ctr(d['impressions'], d['clicks'])),
+    ('conversion_rate', lambda d: conversion_rate(d['clicks'], d['conversions'])),
+])
 
 
 class Database:
     """Classe para gerenciar operações do banco de dados"""
 
+    # Tabelas com coluna version, incrementada a cada alteração do recurso
+    VERSIONED_TABLES = ('funnels', 'pages', 'utms')
+
+    # Campos de funil aceitos em ?fields= e a coluna (ou expressão) de cada um;
+    # elements/connections vêm das linhas de funnel_elements/funnel_connections
+    FUNNEL_FIELDS = {
+        'id': 'id',
+        'name': 'name',
+        'icon': 'icon',
+        'elements': items_sql(GRAPH_TABLES['elements']),
+        'connections': items_sql(GRAPH_TABLES['connections']),
+        'createdAt': 'created_at',
+        'updatedAt': 'updated_at',
+        'elementCount': 'element_count',
+        'connectionCount': 'connection_count',
+        'simulatedRevenue': 'simulated_revenue',
+    }
+
+    # Colunas da listagem completa (formato de Funnel.to_dict) e do GET por id
+    FUNNEL_LIST_COLUMNS = ('id', 'name', 'icon', FUNNEL_FIELDS['elements'],
+                           FUNNEL_FIELDS['connections'], 'created_at', 'updated_at')
+    FUNNEL_DETAIL_COLUMNS = ('id', 'user_id', 'name', 'icon', FUNNEL_FIELDS['elements'],
+                             FUNNEL_FIELDS['connections'], 'created_at', 'updated_at')
+
+    # Contagem mantida em funnels para cada lista de itens
+    FUNNEL_ITEM_COUNTS = {'elements': 'element_count', 'connections': 'connection_count'}
+
     def __init__(self, db_path=None):
         # Se rodando em Docker, usa /app/data/
         # Senão, usa o diretório atual
@@ -23,141 +273,84 @@ class Database:
                 db_path = 'funnel_builder.db'
 
         self.db_path = db_path
+        # Tempo máximo (segundos) esperando o lock de escrita de outra thread/processo
+        self.busy_timeout = 30
+        # Conexões persistentes (WAL, synchronous=NORMAL...) compartilhadas pelas threads
+        self.pool = ConnectionPool(db_path, self.busy_timeout)
+        # Conexão vinculada por db.connection(), por thread
+        self._local = threading.local()
+        # Autosave de funis e métricas: gravados em lotes, um commit por lote
+        self.write_queue = GroupCommitQueue(self)
         self.init_db()
 
     def get_connection(self):
-        """Retorna uma nova conexão com o banco"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Permite acessar colunas por nome
-        return conn
-
-    def init_db(self):
-        """Inicializa o banco de dados com as tabelas necessárias"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        # Tabela de usuários
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                name TEXT,
-                whatsapp TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Adiciona coluna whatsapp se não existir (migração)
+        """
+        Retorna uma conexão do pool
+
+        Cada operação pega sua própria conexão e a devolve no close(), então a
+        instância global pode ser usada por várias threads ao mesmo tempo.
+        Dentro de um bloco db.connection() a thread recebe a conexão vinculada
+        ao bloco.
+        """
+        bound = getattr(self._local, 'conn', None)
+        if bound is not None:
+            return bound
+        return self.pool.acquire()
+
+    @contextmanager
+    def connection(self, write: bool = False):
+        """
+        Executa várias operações do Database em uma única conexão e transação
+
+        - write=False: BEGIN; todas as leituras do bloco veem o mesmo snapshot
+        - write=True: BEGIN IMMEDIATE; as escritas são confirmadas juntas no
+          fim do bloco (rollback de tudo se o bloco levantar exceção)
+
+        Blocos aninhados reaproveitam a conexão do bloco de fora. Geradores
+        iter_* precisam ser consumidos dentro do bloco.
+        """
+        bound = getattr(self._local, 'conn', None)
+        if bound is not None:
+            yield bound
+            return
+
+        conn = self.pool.acquire()
+        conn.conn.isolation_level = None  # BEGIN/COMMIT explícitos; o pool restaura ao devolver
+        conn.execute('BEGIN IMMEDIATE' if write else 'BEGIN')
+        self._local.conn = _BoundConnection(conn)
         try:
-            cursor.execute('ALTER TABLE users ADD COLUMN whatsapp TEXT')
-            print("✅ Coluna whatsapp adicionada à tabela users")
-        except sqlite3.OperationalError:
-            # Coluna já existe
-            pass
-
-        # Tabela de funis
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS funnels (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                icon TEXT DEFAULT '🚀',
-                elements TEXT,
-                connections TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        ''')
-
-        # Tabela de páginas de marketing
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS pages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                url TEXT NOT NULL,
-                category TEXT DEFAULT 'landing',
-                description TEXT,
-                tags TEXT,
-                status TEXT DEFAULT 'active',
-                thumbnail_url TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        ''')
-
-        # Tabela de testes/alterações em páginas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS page_tests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                page_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                date TEXT NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT NOT NULL,
-                test_type TEXT DEFAULT 'ab_test',
-                results TEXT,
-                metrics TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (page_id) REFERENCES pages(id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        ''')
+            yield self._local.conn
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            self._local.conn = None
+            conn.close()
 
-        # Tabela de UTMs
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS utms (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                utm_source TEXT NOT NULL,
-                utm_medium TEXT NOT NULL,
-                utm_campaign TEXT NOT NULL,
-                utm_content TEXT,
-                utm_term TEXT,
-                tags TEXT,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        ''')
+    def in_transaction(self) -> bool:
+        """Se a thread atual está dentro de um bloco db.connection()"""
+        return getattr(self._local, 'conn', None) is not None
 
-        # Tabela de métricas de páginas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS page_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                page_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                date TEXT NOT NULL,
-                impressions INTEGER DEFAULT 0,
-                clicks INTEGER DEFAULT 0,
-                conversions INTEGER DEFAULT 0,
-                avg_time_on_page REAL DEFAULT 0,
-                bounce_rate REAL DEFAULT 0,
-                utm_id INTEGER,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (page_id) REFERENCES pages(id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (utm_id) REFERENCES utms(id) ON DELETE SET NULL
-            )
-        ''')
+    def ping(self) -> bool:
+        """Verifica se o banco responde (usado pelo /readyz)"""
+        try:
+            conn = self.get_connection()
+            try:
+                conn.execute('SELECT 1').fetchone()
+            finally:
+                conn.close()
+            return True
+        except sqlite3.Error:
+            return False
 
-        # Índices para performance
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_funnels_user_id ON funnels(user_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_pages_user_id ON pages(user_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_page_tests_page_id ON page_tests(page_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_utms_user_id ON utms(user_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_page_metrics_page_id ON page_metrics(page_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_page_metrics_date ON page_metrics(date)')
+    def init_db(self):
+        """
+        Deixa o schema do banco em dia (migrations.py)
 
-        conn.commit()
-        conn.close()
+        Com o schema já na última versão é só uma leitura do PRAGMA user_version.
+        """
+        migrate(self)
         print("✅ Banco de dados inicializado com sucesso!")
 
     # ==================== OPERAÇÕES DE USUÁRIO ====================
@@ -216,87 +409,195 @@ class Database:
             }
         return None
 
+    # ==================== VERSÕES (ETAG) ====================
+
+    def get_version(self, table: str, row_id: int, user_id: int) -> Optional[int]:
+        """
+        Versão atual de um funil/página/UTM do usuário
+
+        Lookup pela chave primária que não lê elementos/conexões: usado
+        para responder If-None-Match antes de carregar o recurso.
+
+        Returns:
+            a versão ou None se o recurso não existe (ou é de outro usuário)
+        """
+        if table not in self.VERSIONED_TABLES:
+            raise ValueError(f'Tabela sem versão: {table}')
+
+        conn = self.get_connection()
+        try:
+            row = conn.execute(
+                f'SELECT version FROM {table} WHERE id = ? AND user_id = ?', (row_id, user_id)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row['version'] if row else None
+
+    def _touch_page(self, cursor, page_id: int):
+        """Testes e métricas fazem parte do GET da página: mudam a versão dela"""
+        cursor.execute('UPDATE pages SET version = version + 1 WHERE id = ?', (page_id,))
+
     # ==================== OPERAÇÕES DE FUNIL ====================
 
     def create_funnel(self, user_id: int, name: str, icon: str = '🚀',
-                     elements: List = None, connections: List = None) -> int:
+                     elements: List = None, connections: List = None,
+                     simulated_revenue: float = None) -> int:
         """Cria um novo funil"""
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        elements_json = json.dumps(elements or [])
-        connections_json = json.dumps(connections or [])
+        elements = elements or []
+        connections = connections or []
 
         cursor.execute('''
-            INSERT INTO funnels (user_id, name, icon, elements, connections)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (user_id, name, icon, elements_json, connections_json))
+            INSERT INTO funnels (user_id, name, icon, element_count, connection_count,
+                                 simulated_revenue)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (user_id, name, icon, len(elements), len(connections), simulated_revenue))
 
         funnel_id = cursor.lastrowid
+        save_items(cursor, GRAPH_TABLES['elements'], funnel_id, elements)
+        save_items(cursor, GRAPH_TABLES['connections'], funnel_id, connections)
         conn.commit()
         conn.close()
         return funnel_id
 
     def get_funnels_by_user(self, user_id: int) -> List[Dict]:
         """Retorna todos os funis de um usuário"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, name, icon, elements, connections, created_at, updated_at
-            FROM funnels
-            WHERE user_id = ?
-            ORDER BY updated_at DESC
-        ''', (user_id,))
-
-        rows = cursor.fetchall()
-        conn.close()
+        return list(self.iter_funnels_by_user(user_id))
 
-        funnels = []
-        for row in rows:
-            funnels.append({
-                'id': row['id'],
-                'name': row['name'],
-                'icon': row['icon'],
-                'elements': json.loads(row['elements']) if row['elements'] else [],
-                'connections': json.loads(row['connections']) if row['connections'] else [],
-                'createdAt': row['created_at'],
-                'updatedAt': row['updated_at']
-            })
-
-        return funnels
-
-    def get_funnel_by_id(self, funnel_id: int, user_id: int) -> Optional[Dict]:
-        """Retorna um funil específico (valida se pertence ao usuário)"""
+    def _fetch_all(self, mapping: RowMapping, query: str, params) -> List[Dict]:
+        """Todas as linhas da consulta já mapeadas (RowMapping)"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT id, user_id, name, icon, elements, connections, created_at, updated_at
-            FROM funnels
-            WHERE id = ? AND user_id = ?
-        ''', (funnel_id, user_id))
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = mapping.factory
+            return cursor.execute(query, params).fetchall()
+        finally:
+            conn.close()
 
-        row = cursor.fetchone()
-        conn.close()
+    def _iter_keyset(self, mapping: RowMapping, where: Tuple[str, ...], params: list, order: str,
+                     after: Optional[Tuple] = None, limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Gera as linhas de uma listagem por keyset (order, id), já mapeadas
+
+        Lê em blocos de DB_STREAM_CHUNK linhas: cada bloco é uma consulta com
+        LIMIT que continua da chave da última linha do bloco anterior, e a
+        conexão volta ao pool antes de as linhas serem entregues. Assim a
+        memória fica em um bloco, não importa quantas linhas a listagem tenha,
+        e um cliente lento não segura a transação de leitura (um leitor aberto
+        impede o checkpoint do WAL, que cresce sem parar).
+        """
+        keys = {column: key for key, column in mapping.fields}
+        order_key, id_key = keys[order], keys['id']
+        while limit is None or limit > 0:
+            size = DB_STREAM_CHUNK if limit is None else min(DB_STREAM_CHUNK, limit)
+            query = select_sql(mapping, where, order, after is not None, True)
+            rows = self._fetch_all(mapping, query, keyset_params(list(params), after, size))
+            yield from rows
+            if len(rows) < size:
+                return
+            if limit is not None:
+                limit -= size
+            after = (rows[-1][order_key], rows[-1][id_key])
+
+    def _fetch_mapped(self, mapping: RowMapping, query: str, params) -> Optional[Dict]:
+        """Primeira linha da consulta já mapeada, ou None"""
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = mapping.factory
+            return cursor.execute(query, params).fetchone()
+        finally:
+            conn.close()
 
-        if row:
-            return {
-                'id': row['id'],
-                'user_id': row['user_id'],
-                'name': row['name'],
-                'icon': row['icon'],
-                'elements': json.loads(row['elements']) if row['elements'] else [],
-                'connections': json.loads(row['connections']) if row['connections'] else [],
-                'createdAt': row['created_at'],
-                'updatedAt': row['updated_at']
-            }
-        return None
+    @classmethod
+    @lru_cache(maxsize=64)
+    def _funnel_mapping(cls, columns: Tuple[str, ...], raw_json: bool) -> RowMapping:
+        """
+        RowMapping de funil para as colunas dadas, com os nomes da API (FUNNEL_FIELDS)
+
+        Com raw_json=True elements e connections saem como RawJSON, o JSON das
+        linhas juntado sem decodificar os itens (só para serializar na resposta).
+        """
+        names = {column: field for field, column in cls.FUNNEL_FIELDS.items()}
+        convert = _raw_graph_list if raw_json else _graph_list
+        return RowMapping('funnels', [(names.get(column, column), column) for column in columns],
+                          convert={'elements': convert, 'connections': convert})
+
+    def iter_funnels_by_user(self, user_id: int, raw_json: bool = False,
+                             after: Optional[Tuple] = None,
+                             limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Gera os funis de um usuário, um por vez
+
+        Cada item já tem o formato de Funnel.to_dict. after/limit paginam por
+        (updated_at, id), ver select_sql.
+        """
+        mapping = self._funnel_mapping(self.FUNNEL_LIST_COLUMNS, raw_json)
+        return self._iter_keyset(mapping, ('user_id = ?',), [user_id], 'updated_at', after, limit)
+
+    def get_funnel_by_id(self, funnel_id: int, user_id: int,
+                         raw_json: bool = False) -> Optional[Dict]:
+        """Retorna um funil específico (valida se pertence ao usuário)"""
+        mapping = self._funnel_mapping(self.FUNNEL_DETAIL_COLUMNS, raw_json)
+        return self._fetch_mapped(mapping, select_sql(mapping, ('id = ?', 'user_id = ?')),
+                                  (funnel_id, user_id))
+
+    def _funnel_fields_mapping(self, fields: Tuple[str, ...], raw_json: bool) -> RowMapping:
+        """
+        RowMapping para um ?fields= de funil
+
+        id e updated_at entram sempre (chave da paginação); elements e
+        connections só são lidos se pedidos.
+        """
+        wanted = {'id', 'updated_at'}.union(self.FUNNEL_FIELDS[field] for field in fields)
+        columns = tuple(column for column in self.FUNNEL_FIELDS.values() if column in wanted)
+        return self._funnel_mapping(columns, raw_json)
+
+    def iter_funnel_fields(self, user_id: int, fields: Tuple[str, ...], raw_json: bool = False,
+                           after: Optional[Tuple] = None,
+                           limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Como iter_funnels_by_user, mas só com as colunas dos campos pedidos
+
+        Gera dicts com os campos da API (FUNNEL_FIELDS) das colunas lidas,
+        mais id e updatedAt. A listagem resumida (contagens e receita
+        simulada) nunca toca nas tabelas de elementos e conexões.
+        """
+        mapping = self._funnel_fields_mapping(fields, raw_json)
+        return self._iter_keyset(mapping, ('user_id = ?',), [user_id], 'updated_at', after, limit)
+
+    def get_funnel_fields(self, funnel_id: int, user_id: int, fields: Tuple[str, ...],
+                          raw_json: bool = False) -> Optional[Dict]:
+        """Um funil com só as colunas dos campos pedidos (ver iter_funnel_fields)"""
+        mapping = self._funnel_fields_mapping(fields, raw_json)
+        return self._fetch_mapped(mapping, select_sql(mapping, ('id = ?', 'user_id = ?')),
+                                  (funnel_id, user_id))
 
     def update_funnel(self, funnel_id: int, user_id: int, name: str = None,
                      icon: str = None, elements: List = None,
-                     connections: List = None) -> bool:
-        """Atualiza um funil existente"""
+                     connections: List = None, simulated_revenue: float = None) -> bool:
+        """
+        Atualiza um funil existente
+
+        Passa pela write_queue: autosaves de vários editores chegando juntos
+        dividem um commit. Retorna depois que a alteração foi gravada.
+        Elementos e conexões só gravam as linhas que mudaram (save_items).
+        """
+        try:
+            return self.write_queue.submit(self._update_funnel, funnel_id, user_id, name, icon,
+                                           elements, connections, simulated_revenue)
+        except Exception as e:
+            # Levantada dentro do savepoint da fila: nada do funil foi gravado
+            print(f"❌ Erro ao atualizar funil: {e}")
+            return False
+
+    def _update_funnel(self, funnel_id: int, user_id: int, name: str = None,
+                       icon: str = None, elements: List = None,
+                       connections: List = None, simulated_revenue: float = None) -> bool:
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
 
             # Monta query dinâmica baseado nos campos fornecidos
@@ -312,32 +613,117 @@ class Database:
                 params.append(icon)
 
             if elements is not None:
-                updates.append('elements = ?')
-                params.append(json.dumps(elements))
+                updates.append('element_count = ?')
+                params.append(len(elements))
 
             if connections is not None:
-                updates.append('connections = ?')
-                params.append(json.dumps(connections))
+                updates.append('connection_count = ?')
+                params.append(len(connections))
+
+            if simulated_revenue is not None:
+                updates.append('simulated_revenue = ?')
+                params.append(simulated_revenue)
 
             if not updates:
                 return False
 
-            # Sempre atualiza o timestamp
+            # Sempre atualiza o timestamp e a versão
             updates.append('updated_at = CURRENT_TIMESTAMP')
+            updates.append('version = version + 1')
 
             query = f"UPDATE funnels SET {', '.join(updates)} WHERE id = ? AND user_id = ?"
             params.extend([funnel_id, user_id])
 
+            # O UPDATE vem antes das linhas: confirma que o funil é do usuário
             cursor.execute(query, params)
-            rows_affected = cursor.rowcount
+            if cursor.rowcount == 0:
+                return False
+
+            for field, items in (('elements', elements), ('connections', connections)):
+                if items is not None:
+                    save_items(cursor, GRAPH_TABLES[field], funnel_id, items)
+
             conn.commit()
+            return True
+        finally:
             conn.close()
 
-            return rows_affected > 0
-        except Exception as e:
-            print(f"❌ Erro ao atualizar funil: {e}")
+    def patch_funnel(self, funnel_id: int, user_id: int, operations: List = None,
+                     items: Dict = None, name: str = None, icon: str = None,
+                     simulated_revenue: float = None) -> bool:
+        """
+        Aplica um PATCH de funil (funnel_patch.py), inteiro ou nada
+
+        - operations: JSON Patch (RFC 6902); os campos citados do funil são
+          lidos, alterados e salvos (elements/connections por save_items, só
+          as linhas que mudaram)
+        - items: diff compacto {campo: (upsert, delete)} de parse_item_diff,
+          mais name/icon/simulated_revenue opcionais; não lê o grafo
+
+        Passa pela write_queue como update_funnel, então leitura e escrita do
+        JSON Patch acontecem sob o mesmo lock de escrita. Levanta PatchError
+        (ou PatchConflict) sem gravar nada.
+
+        Returns:
+            False se o funil não existe (ou é de outro usuário)
+        """
+        if operations is not None:
+            return self.write_queue.submit(self._patch_funnel_operations, funnel_id, user_id, operations)
+        return self.write_queue.submit(self._patch_funnel_items, funnel_id, user_id, items or {},
+                                       name, icon, simulated_revenue)
+
+    def _patch_funnel_operations(self, funnel_id: int, user_id: int, operations: List) -> bool:
+        # Patch que só mexe no nome não lê o grafo
+        doc = self.get_funnel_fields(funnel_id, user_id, referenced_fields(operations))
+        if doc is None:
             return False
 
+        touched = apply_json_patch(doc, operations)
+        check_funnel_fields(doc, touched)
+        if not touched:
+            return True  # só operações test
+
+        changed = {field: doc[field] if field in touched else None
+                   for field in ('name', 'icon', 'elements', 'connections', 'simulatedRevenue')}
+        return self._update_funnel(funnel_id, user_id, name=changed['name'], icon=changed['icon'],
+                                   elements=changed['elements'], connections=changed['connections'],
+                                   simulated_revenue=changed['simulatedRevenue'])
+
+    def _patch_funnel_items(self, funnel_id: int, user_id: int, items: Dict,
+                            name: str = None, icon: str = None,
+                            simulated_revenue: float = None) -> bool:
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            # Confere o dono antes de tocar nas linhas
+            owner = cursor.execute('SELECT 1 FROM funnels WHERE id = ? AND user_id = ?',
+                                   (funnel_id, user_id)).fetchone()
+            if owner is None:
+                return False
+
+            updates = []
+            params = []
+            for column, value in (('name', name), ('icon', icon), ('simulated_revenue', simulated_revenue)):
+                if value is not None:
+                    updates.append(f'{column} = ?')
+                    params.append(value)
+
+            for field, (upsert, delete) in items.items():
+                count = self.FUNNEL_ITEM_COUNTS[field]
+                updates.append(f'{count} = {count} + ?')
+                params.append(patch_items(cursor, GRAPH_TABLES[field], funnel_id, upsert, delete))
+
+            # Um único UPDATE do funil: uma versão nova e um evento no change_log
+            updates.append('updated_at = CURRENT_TIMESTAMP')
+            updates.append('version = version + 1')
+            params.extend([funnel_id, user_id])
+            cursor.execute(f"UPDATE funnels SET {', '.join(updates)} WHERE id = ? AND user_id = ?", params)
+
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+
     def delete_funnel(self, funnel_id: int, user_id: int) -> bool:
         """Deleta um funil"""
         conn = self.get_connection()
@@ -357,7 +743,7 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        tags_json = json.dumps(tags or [])
+        tags_json = json_codec.dumps_str(tags or [])
 
         cursor.execute('''
             INSERT INTO pages (user_id, name, url, category, description, tags, status, thumbnail_url)
@@ -371,67 +757,29 @@ class Database:
 
     def get_pages_by_user(self, user_id: int, category: str = None, status: str = None) -> List[Dict]:
         """Retorna todas as páginas de um usuário"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return list(self.iter_pages_by_user(user_id, category, status))
 
-        query = 'SELECT * FROM pages WHERE user_id = ?'
+    def iter_pages_by_user(self, user_id: int, category: str = None, status: str = None,
+                           after: Optional[Tuple] = None,
+                           limit: Optional[int] = None) -> Iterator[Dict]:
+        """Gera as páginas de um usuário, uma por vez (after/limit: ver select_sql)"""
+        where = ['user_id = ?']
         params = [user_id]
 
         if category:
-            query += ' AND category = ?'
+            where.append('category = ?')
             params.append(category)
 
         if status:
-            query += ' AND status = ?'
+            where.append('status = ?')
             params.append(status)
 
-        query += ' ORDER BY updated_at DESC'
-
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
-
-        pages = []
-        for row in rows:
-            pages.append({
-                'id': row['id'],
-                'user_id': row['user_id'],
-                'name': row['name'],
-                'url': row['url'],
-                'category': row['category'],
-                'description': row['description'],
-                'tags': json.loads(row['tags']) if row['tags'] else [],
-                'status': row['status'],
-                'thumbnail_url': row['thumbnail_url'],
-                'created_at': row['created_at'],
-                'updated_at': row['updated_at']
-            })
-
-        return pages
+        return self._iter_keyset(PAGE_ROW, tuple(where), params, 'updated_at', after, limit)
 
     def get_page_by_id(self, page_id: int, user_id: int) -> Optional[Dict]:
         """Retorna uma página específica"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM pages WHERE id = ? AND user_id = ?', (page_id, user_id))
-        row = cursor.fetchone()
-        conn.close()
-
-        if row:
-            return {
-                'id': row['id'],
-                'user_id': row['user_id'],
-                'name': row['name'],
-                'url': row['url'],
-                'category': row['category'],
-                'description': row['description'],
-                'tags': json.loads(row['tags']) if row['tags'] else [],
-                'status': row['status'],
-                'thumbnail_url': row['thumbnail_url'],
-                'created_at': row['created_at'],
-                'updated_at': row['updated_at']
-            }
-        return None
+        return self._fetch_mapped(PAGE_ROW, select_sql(PAGE_ROW, ('id = ?', 'user_id = ?')),
+                                  (page_id, user_id))
 
     def update_page(self, page_id: int, user_id: int, **kwargs) -> bool:
         """Atualiza uma página"""
@@ -448,12 +796,13 @@ class Database:
                     params.append(value)
                 elif key == 'tags':
                     updates.append('tags = ?')
-                    params.append(json.dumps(value))
+                    params.append(json_codec.dumps_str(value))
 
             if not updates:
                 return False
 
             updates.append('updated_at = CURRENT_TIMESTAMP')
+            updates.append('version = version + 1')
             query = f"UPDATE pages SET {', '.join(updates)} WHERE id = ? AND user_id = ?"
             params.extend([page_id, user_id])
 
@@ -486,7 +835,7 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        metrics_json = json.dumps(metrics or {})
+        metrics_json = json_codec.dumps_str(metrics or {})
 
         cursor.execute('''
             INSERT INTO page_tests (page_id, user_id, date, title, description, test_type, results, metrics)
@@ -494,46 +843,26 @@ class Database:
         ''', (page_id, user_id, date, title, description, test_type, results, metrics_json))
 
         test_id = cursor.lastrowid
+        self._touch_page(cursor, page_id)
         conn.commit()
         conn.close()
         return test_id
 
     def get_page_tests(self, page_id: int, user_id: int) -> List[Dict]:
         """Retorna todos os testes de uma página"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM page_tests
-            WHERE page_id = ? AND user_id = ?
-            ORDER BY date DESC
-        ''', (page_id, user_id))
-
-        rows = cursor.fetchall()
-        conn.close()
-
-        tests = []
-        for row in rows:
-            tests.append({
-                'id': row['id'],
-                'page_id': row['page_id'],
-                'user_id': row['user_id'],
-                'date': row['date'],
-                'title': row['title'],
-                'description': row['description'],
-                'test_type': row['test_type'],
-                'results': row['results'],
-                'metrics': json.loads(row['metrics']) if row['metrics'] else {},
-                'created_at': row['created_at']
-            })
-
-        return tests
+        query = select_sql(PAGE_TEST_ROW, ('page_id = ?', 'user_id = ?')) + ' ORDER BY date DESC'
+        return self._fetch_all(PAGE_TEST_ROW, query, (page_id, user_id))
 
     def delete_page_test(self, test_id: int, user_id: int) -> bool:
         """Deleta um teste de página"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        cursor.execute('SELECT page_id FROM page_tests WHERE id = ? AND user_id = ?', (test_id, user_id))
+        row = cursor.fetchone()
         cursor.execute('DELETE FROM page_tests WHERE id = ? AND user_id = ?', (test_id, user_id))
         rows_affected = cursor.rowcount
+        if row:
+            self._touch_page(cursor, row['page_id'])
         conn.commit()
         conn.close()
         return rows_affected > 0
@@ -547,7 +876,7 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
 
-        tags_json = json.dumps(tags or [])
+        tags_json = json_codec.dumps_str(tags or [])
 
         cursor.execute('''
             INSERT INTO utms (user_id, name, utm_source, utm_medium, utm_campaign,
@@ -562,60 +891,17 @@ class Database:
 
     def get_utms_by_user(self, user_id: int) -> List[Dict]:
         """Retorna todas as UTMs de um usuário"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM utms
-            WHERE user_id = ?
-            ORDER BY updated_at DESC
-        ''', (user_id,))
+        return list(self.iter_utms_by_user(user_id))
 
-        rows = cursor.fetchall()
-        conn.close()
-
-        utms = []
-        for row in rows:
-            utms.append({
-                'id': row['id'],
-                'user_id': row['user_id'],
-                'name': row['name'],
-                'utm_source': row['utm_source'],
-                'utm_medium': row['utm_medium'],
-                'utm_campaign': row['utm_campaign'],
-                'utm_content': row['utm_content'],
-                'utm_term': row['utm_term'],
-                'tags': json.loads(row['tags']) if row['tags'] else [],
-                'notes': row['notes'],
-                'created_at': row['created_at'],
-                'updated_at': row['updated_at']
-            })
-
-        return utms
+    def iter_utms_by_user(self, user_id: int, after: Optional[Tuple] = None,
+                          limit: Optional[int] = None) -> Iterator[Dict]:
+        """Gera as UTMs de um usuário, uma por vez (after/limit: ver select_sql)"""
+        return self._iter_keyset(UTM_ROW, ('user_id = ?',), [user_id], 'updated_at', after, limit)
 
     def get_utm_by_id(self, utm_id: int, user_id: int) -> Optional[Dict]:
         """Retorna uma UTM específica"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM utms WHERE id = ? AND user_id = ?', (utm_id, user_id))
-        row = cursor.fetchone()
-        conn.close()
-
-        if row:
-            return {
-                'id': row['id'],
-                'user_id': row['user_id'],
-                'name': row['name'],
-                'utm_source': row['utm_source'],
-                'utm_medium': row['utm_medium'],
-                'utm_campaign': row['utm_campaign'],
-                'utm_content': row['utm_content'],
-                'utm_term': row['utm_term'],
-                'tags': json.loads(row['tags']) if row['tags'] else [],
-                'notes': row['notes'],
-                'created_at': row['created_at'],
-                'updated_at': row['updated_at']
-            }
-        return None
+        return self._fetch_mapped(UTM_ROW, select_sql(UTM_ROW, ('id = ?', 'user_id = ?')),
+                                  (utm_id, user_id))
 
     def update_utm(self, utm_id: int, user_id: int, **kwargs) -> bool:
         """Atualiza uma UTM"""
@@ -632,12 +918,13 @@ class Database:
                     params.append(value)
                 elif key == 'tags':
                     updates.append('tags = ?')
-                    params.append(json.dumps(value))
+                    params.append(json_codec.dumps_str(value))
 
             if not updates:
                 return False
 
             updates.append('updated_at = CURRENT_TIMESTAMP')
+            updates.append('version = version + 1')
             query = f"UPDATE utms SET {', '.join(updates)} WHERE id = ? AND user_id = ?"
             params.extend([utm_id, user_id])
 
@@ -667,7 +954,15 @@ class Database:
                            impressions: int = 0, clicks: int = 0, conversions: int = 0,
                            avg_time_on_page: float = 0, bounce_rate: float = 0,
                            utm_id: int = None, notes: str = None) -> int:
-        """Cria registro de métricas para uma página"""
+        """Cria registro de métricas para uma página (em lote, pela write_queue)"""
+        return self.write_queue.submit(self._create_page_metrics, page_id, user_id, date,
+                                       impressions, clicks, conversions, avg_time_on_page,
+                                       bounce_rate, utm_id, notes)
+
+    def _create_page_metrics(self, page_id: int, user_id: int, date: str,
+                             impressions: int = 0, clicks: int = 0, conversions: int = 0,
+                             avg_time_on_page: float = 0, bounce_rate: float = 0,
+                             utm_id: int = None, notes: str = None) -> int:
         conn = self.get_connection()
         cursor = conn.cursor()
 
@@ -678,61 +973,238 @@ class Database:
         ''', (page_id, user_id, date, impressions, clicks, conversions, avg_time_on_page, bounce_rate, utm_id, notes))
 
         metric_id = cursor.lastrowid
+        self._touch_page(cursor, page_id)
         conn.commit()
         conn.close()
         return metric_id
 
     def get_page_metrics(self, page_id: int, user_id: int, start_date: str = None, end_date: str = None) -> List[Dict]:
         """Retorna métricas de uma página"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return list(self.iter_page_metrics(page_id, user_id, start_date, end_date))
+
+    def iter_page_metrics(self, page_id: int, user_id: int, start_date: str = None,
+                          end_date: str = None, after: Optional[Tuple] = None,
+                          limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Gera as métricas de uma página, uma por vez (after/limit: ver select_sql)
 
-        query = 'SELECT * FROM page_metrics WHERE page_id = ? AND user_id = ?'
+        Cada item já vem com ctr e conversion_rate, como PageMetrics.to_dict.
+        """
+        where = ['page_id = ?', 'user_id = ?']
         params = [page_id, user_id]
 
         if start_date:
-            query += ' AND date >= ?'
+            where.append('date >= ?')
             params.append(start_date)
 
         if end_date:
-            query += ' AND date <= ?'
+            where.append('date <= ?')
             params.append(end_date)
 
-        query += ' ORDER BY date DESC'
+        return self._iter_keyset(PAGE_METRICS_ROW, tuple(where), params, 'date', after, limit)
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+    def delete_page_metrics(self, metric_id: int, user_id: int) -> bool:
+        """Deleta registro de métricas"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT page_id FROM page_metrics WHERE id = ? AND user_id = ?', (metric_id, user_id))
+        row = cursor.fetchone()
+        cursor.execute('DELETE FROM page_metrics WHERE id = ? AND user_id = ?', (metric_id, user_id))
+        rows_affected = cursor.rowcount
+        if row:
+            self._touch_page(cursor, row['page_id'])
+        conn.commit()
         conn.close()
+        return rows_affected > 0
 
-        metrics = []
-        for row in rows:
-            metrics.append({
-                'id': row['id'],
-                'page_id': row['page_id'],
-                'user_id': row['user_id'],
-                'date': row['date'],
-                'impressions': row['impressions'],
-                'clicks': row['clicks'],
-                'conversions': row['conversions'],
-                'avg_time_on_page': row['avg_time_on_page'],
-                'bounce_rate': row['bounce_rate'],
-                'utm_id': row['utm_id'],
-                'notes': row['notes'],
-                'created_at': row['created_at']
-            })
+    # ==================== OPERAÇÕES DE SESSÃO ====================
 
-        return metrics
+    def create_session(self, token_hash: str, user_id: int, expires: float):
+        """Grava uma sessão (token já vem com hash)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT OR REPLACE INTO sessions (token_hash, user_id, expires) VALUES (?, ?, ?)',
+            (token_hash, user_id, expires)
+        )
+        conn.commit()
+        conn.close()
 
-    def delete_page_metrics(self, metric_id: int, user_id: int) -> bool:
-        """Deleta registro de métricas"""
+    def get_session(self, token_hash: str) -> Optional[Dict]:
+        """Busca uma sessão pelo hash do token"""
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('DELETE FROM page_metrics WHERE id = ? AND user_id = ?', (metric_id, user_id))
+        cursor.execute('SELECT user_id, expires FROM sessions WHERE token_hash = ?', (token_hash,))
+        row = cursor.fetchone()
+        conn.close()
+
+        if row:
+            return {
+                'user_id': row['user_id'],
+                'expires': row['expires']
+            }
+        return None
+
+    def delete_session(self, token_hash: str) -> bool:
+        """Remove uma sessão"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM sessions WHERE token_hash = ?', (token_hash,))
         rows_affected = cursor.rowcount
         conn.commit()
         conn.close()
         return rows_affected > 0
 
+    def delete_expired_sessions(self, now: float) -> int:
+        """Remove sessões expiradas"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM sessions WHERE expires < ?', (now,))
+        rows_affected = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return rows_affected
+
+    def count_sessions(self) -> int:
+        """Conta sessões armazenadas"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) as count FROM sessions')
+        count = cursor.fetchone()['count']
+        conn.close()
+        return count
+
+    # ==================== OPERAÇÕES DE RATE LIMIT ====================
+
+    def rate_limit_hit(self, key: str, max_attempts: int, window: int, now: float) -> tuple:
+        """
+        Registra uma tentativa na janela deslizante (atômico entre processos)
+
+        Returns:
+            (allowed, remaining_attempts ou retry_after)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('DELETE FROM rate_limit_hits WHERE key = ? AND ts <= ?', (key, now - window))
+            cursor.execute('SELECT COUNT(*) as count, MIN(ts) as oldest FROM rate_limit_hits WHERE key = ?', (key,))
+            row = cursor.fetchone()
+            current_attempts = row['count']
+
+            if current_attempts >= max_attempts:
+                conn.commit()
+                return False, int(window - (now - row['oldest']))
+
+            cursor.execute('INSERT INTO rate_limit_hits (key, ts) VALUES (?, ?)', (key, now))
+            conn.commit()
+            return True, max_attempts - current_attempts - 1
+        finally:
+            conn.close()
+
+    def rate_limit_oldest(self, key: str) -> Optional[float]:
+        """Timestamp da tentativa mais antiga ainda registrada para a chave"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT MIN(ts) as oldest FROM rate_limit_hits WHERE key = ?', (key,))
+        oldest = cursor.fetchone()['oldest']
+        conn.close()
+        return oldest
+
+    def rate_limit_reset(self, key: str = None, prefix: str = None):
+        """Remove tentativas de uma chave exata ou de todas com um prefixo"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        if key is not None:
+            cursor.execute('DELETE FROM rate_limit_hits WHERE key = ?', (key,))
+        elif prefix is not None:
+            cursor.execute('DELETE FROM rate_limit_hits WHERE substr(key, 1, ?) = ?', (len(prefix), prefix))
+        conn.commit()
+        conn.close()
+
+    def rate_limit_cleanup(self, cutoff: float) -> int:
+        """Remove tentativas anteriores ao cutoff"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM rate_limit_hits WHERE ts < ?', (cutoff,))
+        rows_affected = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return rows_affected
+
+    def rate_limit_keys(self) -> List[str]:
+        """Lista as chaves com tentativas registradas"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT DISTINCT key FROM rate_limit_hits')
+        keys = [row['key'] for row in cursor.fetchall()]
+        conn.close()
+        return keys
+
+    # ==================== CHANGE LOG ====================
+
+    @staticmethod
+    def _change_dict(row) -> Dict:
+        return {
+            'seq': row['seq'],
+            'user_id': row['user_id'],
+            'entity': row['entity'],
+            'id': row['entity_id'],
+            'version': row['version'],
+            'action': row['action']
+        }
+
+    def last_change_seq(self) -> int:
+        """Maior seq do change_log (0 se vazio)"""
+        conn = self.get_connection()
+        row = conn.execute('SELECT MAX(seq) AS seq FROM change_log').fetchone()
+        conn.close()
+        return row['seq'] or 0
+
+    def get_changes(self, after_seq: int, limit: int = 1000) -> List[Dict]:
+        """Alterações de todos os usuários com seq maior que after_seq, em ordem"""
+        conn = self.get_connection()
+        rows = conn.execute('''
+            SELECT * FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?
+        ''', (after_seq, limit)).fetchall()
+        conn.close()
+        return [self._change_dict(row) for row in rows]
+
+    def get_user_changes(self, user_id: int, after_seq: int, until_seq: int,
+                         limit: int) -> Optional[List[Dict]]:
+        """
+        Alterações de um usuário no intervalo (after_seq, until_seq]
+
+        Returns:
+            None se o intervalo tem mais que limit alterações ou começa antes
+            do que o change_log ainda guarda (o cliente precisa recarregar tudo)
+        """
+        conn = self.get_connection()
+        try:
+            oldest = conn.execute('SELECT MIN(seq) AS seq FROM change_log').fetchone()['seq']
+            if oldest is not None and after_seq < oldest - 1:
+                return None
+            rows = conn.execute('''
+                SELECT * FROM change_log
+                WHERE user_id = ? AND seq > ? AND seq <= ?
+                ORDER BY seq LIMIT ?
+            ''', (user_id, after_seq, until_seq, limit + 1)).fetchall()
+        finally:
+            conn.close()
+        if len(rows) > limit:
+            return None
+        return [self._change_dict(row) for row in rows]
+
+    def change_log_cleanup(self, cutoff: float) -> int:
+        """Remove alterações anteriores ao cutoff (timestamp)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM change_log WHERE ts < ?', (cutoff,))
+        rows_affected = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return rows_affected
+
     # ==================== UTILITÁRIOS ====================
 
     def get_stats(self) -> Dict:
@@ -0,0 +1,584 @@
+"""
+Change Feed para Funnel Builder
+Eventos de alteração de funis, páginas e UTMs para o endpoint SSE /api/events
+
+As escritas entram no change_log por triggers do SQLite, na mesma transação.
+Uma thread por processo lê o change_log e distribui cada alteração para as
+conexões abertas do dono do recurso; como a fonte é o banco, uma escrita
+atendida por outro worker do pre-fork também chega a todos.
+"""
+
+import os
+import random
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from database import db
+from json_codec import json_codec
+
+
+# Intervalo máximo entre leituras do change_log (escritas deste processo acordam antes)
+EVENTS_POLL_INTERVAL = float(os.getenv('EVENTS_POLL_INTERVAL', '0.5'))
+# Comentário enviado em conexões sem eventos, para proxies não as derrubarem
+EVENTS_HEARTBEAT = float(os.getenv('EVENTS_HEARTBEAT', '15'))
+# Eventos pendentes por conexão; acima disso a conexão recebe um reset
+EVENTS_BUFFER_SIZE = int(os.getenv('EVENTS_BUFFER_SIZE', '100'))
+# Por quanto tempo o change_log guarda alterações (replay do Last-Event-ID)
+EVENTS_RETENTION = int(os.getenv('EVENTS_RETENTION', '3600'))
+# Streams abertos por processo; acima disso o cliente recebe só um retry: maior
+EVENTS_MAX_CONNECTIONS = int(os.getenv('EVENTS_MAX_CONNECTIONS', '1000'))
+
+# Alterações lidas do change_log por consulta
+EVENTS_POLL_BATCH = 1000
+
+# Intervalo de reconexão sugerido ao EventSource (ms)
+EVENTS_RETRY_MS = 3000
+# Reconexão quando o processo está sem vagas (ms, mais até 50% de variação)
+EVENTS_FULL_RETRY_MS = 10000
+# Bytes pendentes de envio por stream; cliente que não lê é desconectado
+EVENTS_SEND_BUFFER = 256 * 1024
+
+PING_FRAME = b': ping\n\n'
+RESET_FRAME = b'event: reset\ndata: {}\n\n'
+
+
+class Subscription:
+    """
+    Uma conexão SSE: fila limitada de eventos de um usuário
+
+    Cliente lento não faz a fila crescer sem limite: quando ela enche, os
+    eventos pendentes são descartados e o cliente recebe um único reset
+    (recarregar tudo), que vale pelos eventos perdidos.
+    """
+
+    def __init__(self, user_id: int, max_buffer: int = EVENTS_BUFFER_SIZE):
+        self.user_id = user_id
+        self.max_buffer = max_buffer
+        self.events = deque()
+        self.overflowed = False
+        self.closed = False
+        # Recusada por falta de vagas (já nasce fechada)
+        self.rejected = False
+        # Chamado (em qualquer thread) quando há eventos ou a conexão fechou
+        self.on_ready: Optional[Callable[[], None]] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def push(self, event: Dict):
+        with self._lock:
+            if self.overflowed:
+                return
+            if len(self.events) >= self.max_buffer:
+                self.events.clear()
+                self.overflowed = True
+            else:
+                self.events.append(event)
+        self._signal()
+
+    def close(self):
+        self.closed = True
+        self._signal()
+
+    def _signal(self):
+        self._ready.set()
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def wait(self, timeout: float) -> tuple:
+        """
+        Espera eventos por até timeout segundos
+
+        Returns:
+            (eventos, precisa_reset)
+        """
+        self._ready.wait(timeout)
+        return self.drain()
+
+    def drain(self) -> tuple:
+        """Eventos pendentes sem esperar: (eventos, precisa_reset)"""
+        with self._lock:
+            self._ready.clear()
+            events = list(self.events)
+            self.events.clear()
+            overflowed = self.overflowed
+            self.overflowed = False
+        return events, overflowed
+
+
+class ChangeFeed:
+    """
+    Distribui as alterações do change_log para as conexões de cada usuário
+
+    A thread de leitura só existe enquanto houver alguma conexão aberta.
+    """
+
+    def __init__(self, database=db, poll_interval: float = EVENTS_POLL_INTERVAL,
+                 buffer_size: int = EVENTS_BUFFER_SIZE,
+                 max_connections: int = EVENTS_MAX_CONNECTIONS):
+        self.db = database
+        self.poll_interval = poll_interval
+        self.buffer_size = buffer_size
+        self.max_connections = max(1, max_connections)
+        self._reset_state()
+
+        # Threads não sobrevivem ao fork: cada worker do prefork lê o change_log por conta própria
+        os.register_at_fork(after_in_child=self._reset_state)
+
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_seq: Optional[int] = None
+        self.closed = False
+        self.connections = 0
+        self.delivered = 0
+        self.rejected = 0
+
+    # ==================== CONEXÕES ====================
+
+    def subscribe(self, user_id: int, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Registra uma conexão do usuário
+
+        Com last_event_id (reconexão do EventSource) as alterações perdidas
+        entram na fila antes das novas; se não der para reconstruí-las a
+        conexão começa com um reset. Acima de max_connections a inscrição
+        volta fechada e marcada como rejected.
+        """
+        subscription = Subscription(user_id, self.buffer_size)
+        with self._lock:
+            if self.closed:
+                subscription.close()
+                return subscription
+
+            if self.connections >= self.max_connections:
+                self.rejected += 1
+                subscription.rejected = True
+                subscription.close()
+                return subscription
+
+            if self.last_seq is None:
+                self.last_seq = self.db.last_change_seq()
+
+            if last_event_id is not None and last_event_id < self.last_seq:
+                missed = self.db.get_user_changes(user_id, last_event_id, self.last_seq,
+                                                  self.buffer_size)
+                if missed is None:
+                    subscription.overflowed = True
+                else:
+                    for event in missed:
+                        subscription.push(event)
+
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            self.connections += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll_loop, name='change-feed',
+                                                daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None and subscription in subscribers:
+                subscribers.remove(subscription)
+                self.connections -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def notify(self):
+        """Uma escrita acabou de ser confirmada neste processo: lê o change_log já"""
+        self._wake.set()
+
+    def close(self):
+        """Encerra todas as conexões (servidor parando); o EventSource reconecta em outro processo"""
+        with self._lock:
+            self.closed = True
+            subscriptions = [s for subs in self._subscribers.values() for s in subs]
+        for subscription in subscriptions:
+            subscription.close()
+        self._wake.set()
+
+    # ==================== LEITURA DO CHANGE_LOG ====================
+
+    def _poll_loop(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+            with self._lock:
+                if self.closed or not self._subscribers:
+                    # Sem conexões a posição deixa de valer: a próxima parte do seq atual
+                    self._thread = None
+                    self.last_seq = None
+                    return
+                after_seq = self.last_seq
+
+            try:
+                changes = self.db.get_changes(after_seq, EVENTS_POLL_BATCH)
+            except Exception as e:
+                print(f"⚠️ Change feed: erro ao ler alterações: {e}")
+                continue
+
+            if changes:
+                self._dispatch(changes)
+
+    def _dispatch(self, changes: List[Dict]):
+        with self._lock:
+            for change in changes:
+                for subscription in self._subscribers.get(change['user_id'], ()):
+                    subscription.push(change)
+                    self.delivered += 1
+            self.last_seq = changes[-1]['seq']
+        if len(changes) == EVENTS_POLL_BATCH:
+            # Lote cheio: ainda há alterações para ler
+            self._wake.set()
+
+    def cleanup(self, retention: int = EVENTS_RETENTION) -> int:
+        """Apaga do change_log o que já passou do prazo de replay"""
+        return self.db.change_log_cleanup(time.time() - retention)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'connections': self.connections,
+                'max_connections': self.max_connections,
+                'users': len(self._subscribers),
+                'last_seq': self.last_seq,
+                'delivered': self.delivered,
+                'rejected': self.rejected
+            }
+
+
+def format_event(change: Dict) -> bytes:
+    """Alteração no formato SSE: id = seq do change_log (volta no Last-Event-ID)"""
+    data = json_codec.dumps({
+        'entity': change['entity'],
+        'id': change['id'],
+        'version': change['version'],
+        'action': change['action']
+    })
+    return b'id: %d\nevent: change\ndata: %s\n\n' % (change['seq'], data)
+
+
+class EventStream:
+    """
+    Corpo de uma resposta text/event-stream
+
+    Handlers devolvem (200, EventStream(...)). O servidor HTTP envia
+    preamble() junto com os headers e depois, sem ocupar uma thread por
+    conexão, take() sempre que on_ready() avisar e keepalive() a cada
+    heartbeat segundos sem eventos; take() devolve None quando o stream
+    acabou. frames() faz o mesmo bloqueando a thread (modo single-thread).
+    """
+
+    def __init__(self, feed: ChangeFeed, user_id: int, last_event_id: Optional[int] = None,
+                 heartbeat: float = EVENTS_HEARTBEAT):
+        self.feed = feed
+        self.subscription = feed.subscribe(user_id, last_event_id)
+        self.heartbeat = heartbeat
+
+    def preamble(self) -> bytes:
+        """
+        Primeiro frame: intervalo de reconexão do EventSource
+
+        Sem vagas no processo a resposta continua sendo 200 (um 503 faria o
+        EventSource desistir de vez): só o retry, maior e com variação para
+        as reconexões não chegarem juntas, e o stream termina em seguida. O
+        evento busy repete o intervalo para quem reconecta por conta própria.
+        """
+        if self.subscription.rejected:
+            retry = EVENTS_FULL_RETRY_MS + random.randrange(EVENTS_FULL_RETRY_MS // 2)
+            return b'retry: %d\nevent: busy\ndata: {"retry": %d}\n\n' % (retry, retry)
+        return b'retry: %d\n: conectado\n\n' % EVENTS_RETRY_MS
+
+    def on_ready(self, callback: Callable[[], None]):
+        """callback() é chamado (em qualquer thread) quando take() tem algo novo"""
+        self.subscription.on_ready = callback
+
+    def take(self) -> Optional[bytes]:
+        """Frames dos eventos pendentes, sem esperar (b'' = nada; None = stream encerrado)"""
+        if self.subscription.closed:
+            return None
+        events, overflowed = self.subscription.drain()
+        frames = RESET_FRAME if overflowed else b''
+        if events:
+            frames += b''.join(format_event(event) for event in events)
+        return frames
+
+    def keepalive(self) -> bytes:
+        return PING_FRAME
+
+    def frames(self, should_stop: Callable[[], bool] = lambda: False) -> Iterator[bytes]:
+        """Frames depois do preamble, bloqueando até should_stop() ou o stream acabar"""
+        subscription = self.subscription
+        while not subscription.closed and not should_stop():
+            subscription.wait(self.heartbeat)
+            frames = self.take()
+            if frames is None:
+                break
+            yield frames or PING_FRAME
+
+    def close(self):
+        self.subscription.on_ready = None
+        self.feed.unsubscribe(self.subscription)
+
+
+class _PumpedStream:
+    """Um stream SSE no StreamPump: socket, bytes ainda não enviados e próximo ping"""
+
+    def __init__(self, sock: socket.socket, stream: EventStream,
+                 on_close: Optional[Callable[[], None]]):
+        self.sock = sock
+        self.stream = stream
+        self.on_close = on_close
+        self.pending = bytearray()
+        self.next_ping = 0.0
+        self.events = selectors.EVENT_READ
+        self.closed = False
+
+
+class StreamPump:
+    """
+    Thread única com um selector que escreve os streams SSE do pool de threads
+
+    O worker envia os headers e entrega o socket (handler.detached): um
+    stream aberto custa um descritor no selector, não uma thread do pool.
+    O socket fica registrado para leitura, então o cliente que fecha a aba
+    é detectado na hora (EOF) e a vaga volta logo, sem esperar o próximo
+    heartbeat. Cliente que não lê e acumula mais que send_buffer bytes é
+    desconectado (reconecta com o Last-Event-ID).
+    """
+
+    def __init__(self, send_buffer: int = EVENTS_SEND_BUFFER):
+        self.send_buffer = send_buffer
+        self._reset_state()
+
+        # Como no ChangeFeed: a thread e o selector não sobrevivem ao fork
+        os.register_at_fork(after_in_child=self._reset_state)
+
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._wake_r = self._wake_w = None
+        # Pedidos de outras threads, aplicados na thread do pump
+        self._incoming: List[_PumpedStream] = []
+        self._ready: Set[_PumpedStream] = set()
+        self._streams: Set[_PumpedStream] = set()
+        self.disconnected = 0
+        self.dropped = 0
+
+    def attach(self, sock: socket.socket, stream: EventStream,
+               on_close: Optional[Callable[[], None]] = None):
+        """
+        Assume o socket de uma resposta SSE cujo preamble já foi enviado
+
+        A partir daqui o pump fecha o socket e o stream; on_close() é
+        chamado depois disso.
+        """
+        entry = _PumpedStream(sock, stream, on_close)
+        with self._lock:
+            if self._thread is None:
+                self._selector = selectors.DefaultSelector()
+                self._wake_r, self._wake_w = socket.socketpair()
+                self._wake_r.setblocking(False)
+                self._wake_w.setblocking(False)
+                self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+                self._thread = threading.Thread(target=self._loop, name='event-streams',
+                                                daemon=True)
+                self._thread.start()
+            self._incoming.append(entry)
+        stream.on_ready(lambda: self._mark_ready(entry))
+        self._wake()
+
+    def _mark_ready(self, entry: _PumpedStream):
+        with self._lock:
+            self._ready.add(entry)
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass  # buffer cheio: o pump já vai acordar
+
+    # ==================== THREAD DO PUMP ====================
+
+    def _loop(self):
+        while True:
+            timeout = None
+            if self._streams:
+                next_ping = min(entry.next_ping for entry in self._streams)
+                timeout = max(0.0, next_ping - time.monotonic())
+
+            for key, mask in self._selector.select(timeout):
+                entry = key.data
+                if entry is None:
+                    self._clear_wake()
+                    continue
+                if mask & selectors.EVENT_READ:
+                    self._on_readable(entry)
+                if mask & selectors.EVENT_WRITE and not entry.closed:
+                    self._flush(entry)
+
+            with self._lock:
+                incoming, self._incoming = self._incoming, []
+                ready, self._ready = self._ready, set()
+
+            for entry in incoming:
+                self._register(entry)
+                ready.add(entry)
+
+            for entry in ready:
+                if not entry.closed:
+                    frames = entry.stream.take()
+                    if frames is None:
+                        self._close(entry)
+                    elif frames:
+                        self._send(entry, frames)
+
+            now = time.monotonic()
+            for entry in [e for e in self._streams if e.next_ping <= now]:
+                self._send(entry, entry.stream.keepalive())
+
+    def _clear_wake(self):
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except OSError:
+            pass
+
+    def _register(self, entry: _PumpedStream):
+        try:
+            entry.sock.setblocking(False)
+            self._selector.register(entry.sock, selectors.EVENT_READ, entry)
+        except (OSError, ValueError):
+            self._close(entry)
+            return
+        entry.next_ping = time.monotonic() + entry.stream.heartbeat
+        self._streams.add(entry)
+
+    def _on_readable(self, entry: _PumpedStream):
+        """O cliente não manda nada depois do GET: EOF ou erro = foi embora"""
+        try:
+            data = entry.sock.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self.disconnected += 1
+            self._close(entry)
+
+    def _send(self, entry: _PumpedStream, data: bytes):
+        entry.pending += data
+        entry.next_ping = time.monotonic() + entry.stream.heartbeat
+        self._flush(entry)
+
+    def _flush(self, entry: _PumpedStream):
+        try:
+            while entry.pending:
+                sent = entry.sock.send(entry.pending)
+                del entry.pending[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.disconnected += 1
+            self._close(entry)
+            return
+
+        if len(entry.pending) > self.send_buffer:
+            self.dropped += 1
+            self._close(entry)
+            return
+
+        events = selectors.EVENT_READ
+        if entry.pending:
+            events |= selectors.EVENT_WRITE
+        if events != entry.events:
+            entry.events = events
+            self._selector.modify(entry.sock, events, entry)
+
+    def _close(self, entry: _PumpedStream):
+        if entry.closed:
+            return
+        entry.closed = True
+        self._streams.discard(entry)
+        try:
+            self._selector.unregister(entry.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            entry.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        entry.sock.close()
+        entry.stream.close()
+        if entry.on_close is not None:
+            entry.on_close()
+
+    def get_stats(self) -> Dict:
+        return {
+            'streams': len(self._streams),
+            'disconnected': self.disconnected,
+            'dropped': self.dropped
+        }
+
+
+# Instâncias globais
+change_feed = ChangeFeed()
+stream_pump = StreamPump()
+
+
+if __name__ == '__main__':
+    from database import Database
+
+    test_db = Database('test_funnel.db')
+    feed = ChangeFeed(test_db, poll_interval=0.05, buffer_size=3)
+
+    user_id = test_db.create_user('feed@test.com', 'hash') or test_db.get_user_by_email('feed@test.com')['id']
+    subscription = feed.subscribe(user_id)
+
+    funnel_id = test_db.create_funnel(user_id, 'Funil do feed')
+    test_db.update_funnel(funnel_id, user_id, name='Renomeado')
+    feed.notify()
+
+    events, overflowed = subscription.wait(2)
+    print(f"✅ Eventos recebidos: {[(e['entity'], e['action'], e['version']) for e in events]}")
+
+    for i in range(5):
+        test_db.update_funnel(funnel_id, user_id, name=f'Nome {i}')
+    time.sleep(0.3)
+    events, overflowed = subscription.wait(1)
+    print(f"✅ Buffer limitado: {len(events)} eventos, reset={overflowed}")
+
+    # Stream no pump: eventos chegam pelo socket e o EOF do cliente libera a vaga
+    pump = StreamPump()
+    server_side, client_side = socket.socketpair()
+    stream = EventStream(feed, user_id, heartbeat=0.2)
+    closed = threading.Event()
+    pump.attach(server_side, stream, closed.set)
+    test_db.update_funnel(funnel_id, user_id, name='Pelo pump')
+    feed.notify()
+    client_side.settimeout(2)
+    received = client_side.recv(4096)
+    print(f"✅ Pump entregou: {received.splitlines()[0].decode()}")
+    client_side.close()
+    print(f"✅ Cliente desconectado detectado: {closed.wait(1)}, "
+          f"conexões no feed: {feed.get_stats()['connections']}")
+
+    small_feed = ChangeFeed(test_db, max_connections=1)
+    kept = EventStream(small_feed, user_id)
+    extra = EventStream(small_feed, user_id)
+    print(f"✅ Sem vagas: {extra.preamble().splitlines()[0].decode()}, take={extra.take()}")
+    kept.close()
+    small_feed.close()
+
+    feed.close()
+    print(f"✅ Conexão encerrada no close(): {subscription.closed}")
@@ -0,0 +1,201 @@
+"""
+Grafo do funil (elements/connections) guardado uma linha por item
+Tabelas funnel_elements e funnel_connections, chave (funnel_id, item_key)
+
+Salvar o funil compara a lista recebida com as linhas gravadas e só grava o
+que mudou: mover um elemento no canvas é um UPDATE de uma linha, não a
+reescrita do grafo inteiro. A API continua recebendo e devolvendo as listas
+completas; a leitura junta o JSON das linhas na ordem salva, sem decodificar
+os itens (ver items_sql e items_json).
+"""
+
+import sqlite3
+from operator import itemgetter
+from typing import Dict, List, Optional, Set, Tuple
+
+from json_codec import json_codec
+
+
+# Campo do funil na API -> tabela das linhas
+GRAPH_TABLES = {
+    'elements': 'funnel_elements',
+    'connections': 'funnel_connections',
+}
+
+
+def items_sql(table: str) -> str:
+    """
+    Expressão SQL com os itens do funil da linha atual de funnels
+
+    Usada como coluna no SELECT de funnels (ver Database.FUNNEL_FIELDS). Dá
+    pares [posição, "data"]: a ordem de um agregado não é garantida nem com
+    ORDER BY na subconsulta (e o SQLite 3.40 não aceita ORDER BY dentro de
+    json_group_array), então a lista é ordenada em items_json.
+    """
+    return (f"(SELECT json_group_array(json_array(position, data)) "
+            f"FROM {table} WHERE funnel_id = funnels.id)")
+
+
+def items_json(value: Optional[str]) -> str:
+    """
+    Texto da lista JSON a partir da coluna de items_sql
+
+    Só os pares são decodificados: o data de cada item (string) é juntado
+    como está, na ordem das posições.
+    """
+    if not value:
+        return '[]'
+    pairs = json_codec.loads(value)
+    pairs.sort(key=itemgetter(0))
+    return '[' + ','.join([data for _, data in pairs]) + ']'
+
+
+def id_key(item_id) -> str:
+    """Chave da linha de um item com id: o id em JSON ('17', '"abc"')"""
+    # Os ids do editor são inteiros (Date.now()): str() dá o mesmo texto que o JSON
+    return str(item_id) if type(item_id) is int else json_codec.dumps_str(item_id)
+
+
+def item_key(item, index: int, seen: Set[str]) -> str:
+    """
+    Chave da linha de um item da lista completa
+
+    Item sem id (ou com id repetido na mesma lista) fica com a posição na
+    lista ('@3'), que não é JSON válido e não colide com nenhum id.
+    """
+    if isinstance(item, dict) and item.get('id') is not None:
+        key = id_key(item['id'])
+        if key not in seen:
+            return key
+    return f'@{index}'
+
+
+def save_items(cursor: sqlite3.Cursor, table: str, funnel_id: int, items: List) -> Dict[str, int]:
+    """
+    Deixa as linhas de table iguais à lista items, gravando só a diferença
+
+    Itens que continuam na mesma ordem mantêm a posição, então remover ou
+    acrescentar um item não renumera os outros. Só uma reordenação
+    (item novo no meio ou troca de ordem) reescreve a posição dos que vêm
+    depois.
+
+    Returns:
+        {'upserted': n, 'deleted': n}
+    """
+    # Tuplas em vez do sqlite3.Row da conexão (funil grande são centenas de
+    # linhas) e data em bytes, comparado direto com a saída de json_codec.dumps
+    reader = cursor.connection.cursor()
+    reader.row_factory = None
+    try:
+        stored: Dict[str, Tuple[int, bytes]] = {
+            key: (position, data) for key, position, data in reader.execute(
+                f'SELECT item_key, position, CAST(data AS BLOB) FROM {table} WHERE funnel_id = ?',
+                (funnel_id,))
+        }
+    finally:
+        reader.close()
+
+    seen: Set[str] = set()
+    upserts = []
+    previous = -1
+    for index, item in enumerate(items):
+        key = item_key(item, index, seen)
+        seen.add(key)
+        data = json_codec.dumps(item)
+        old = stored.get(key)
+        if old is not None and old[0] > previous:
+            position = old[0]
+            if old[1] == data:
+                previous = position
+                continue
+        else:
+            position = previous + 1
+        upserts.append((funnel_id, key, position, data.decode('utf-8')))
+        previous = position
+
+    deleted = [(funnel_id, key) for key in stored if key not in seen]
+    if deleted:
+        cursor.executemany(f'DELETE FROM {table} WHERE funnel_id = ? AND item_key = ?', deleted)
+    if upserts:
+        cursor.executemany(f'''
+            INSERT INTO {table} (funnel_id, item_key, position, data) VALUES (?, ?, ?, ?)
+            ON CONFLICT (funnel_id, item_key) DO UPDATE SET
+                position = excluded.position, data = excluded.data
+        ''', upserts)
+    return {'upserted': len(upserts), 'deleted': len(deleted)}
+
+
+def patch_items(cursor: sqlite3.Cursor, table: str, funnel_id: int,
+                upsert: List[Dict], delete: List) -> int:
+    """
+    Aplica um diff por id nas linhas de table: custo proporcional ao diff
+
+    upsert traz itens completos com id: o que já existe é substituído na
+    mesma posição, o que é novo entra no fim. delete traz os ids removidos
+    (id que não existe é ignorado). Só as linhas citadas são gravadas; item
+    novo lê também a maior posição do funil.
+
+    Returns:
+        quantos itens a lista ganhou (negativo se perdeu)
+    """
+    rows = [(id_key(item['id']), json_codec.dumps_str(item)) for item in upsert]
+    keys = [key for key, _ in rows] + [id_key(item_id) for item_id in delete]
+    if not keys:
+        return 0
+
+    existing = {row[0] for row in cursor.execute(
+        f'SELECT item_key FROM {table} WHERE funnel_id = ? '
+        f'AND item_key IN (SELECT value FROM json_each(?))',
+        (funnel_id, json_codec.dumps_str(keys))
+    )}
+
+    deleted = [(funnel_id, id_key(item_id)) for item_id in delete if id_key(item_id) in existing]
+    if deleted:
+        cursor.executemany(f'DELETE FROM {table} WHERE funnel_id = ? AND item_key = ?', deleted)
+
+    updated = [(data, funnel_id, key) for key, data in rows if key in existing]
+    if updated:
+        cursor.executemany(f'UPDATE {table} SET data = ? WHERE funnel_id = ? AND item_key = ?', updated)
+
+    added = [(key, data) for key, data in rows if key not in existing]
+    if added:
+        last = cursor.execute(f'SELECT COALESCE(MAX(position), -1) FROM {table} WHERE funnel_id = ?',
+                              (funnel_id,)).fetchone()[0]
+        cursor.executemany(
+            f'INSERT INTO {table} (funnel_id, item_key, position, data) VALUES (?, ?, ?, ?)',
+            [(funnel_id, key, last + offset, data) for offset, (key, data) in enumerate(added, start=1)]
+        )
+    return len(added) - len(deleted)
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE funnels (id INTEGER PRIMARY KEY)')
+    conn.execute('''
+        CREATE TABLE funnel_elements (
+            funnel_id INTEGER NOT NULL, item_key TEXT NOT NULL,
+            position INTEGER NOT NULL, data TEXT NOT NULL,
+            PRIMARY KEY (funnel_id, item_key)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('INSERT INTO funnels (id) VALUES (1)')
+    cursor = conn.cursor()
+
+    elements = [{'id': i, 'type': 'landing', 'x': i * 10, 'y': 40} for i in range(100)]
+    print("Criação:", save_items(cursor, 'funnel_elements', 1, elements))
+
+    elements[42] = {**elements[42], 'x': 999}
+    print("Mover um elemento:", save_items(cursor, 'funnel_elements', 1, elements))
+
+    del elements[10]
+    elements.append({'id': 'novo', 'type': 'checkout'})
+    print("Remover um e acrescentar outro:", save_items(cursor, 'funnel_elements', 1, elements))
+
+    stored = conn.execute(f'SELECT {items_sql("funnel_elements")} FROM funnels WHERE id = 1').fetchone()[0]
+    print("Lista lida de volta igual:", json_codec.loads(items_json(stored)) == elements)
+
+    moved = {**elements[5], 'x': 555}
+    print("Diff por id:", patch_items(cursor, 'funnel_elements', 1, [moved, {'id': 'fim'}], [0]))
+    stored = json_codec.loads(items_json(conn.execute(
+        f'SELECT {items_sql("funnel_elements")} FROM funnels WHERE id = 1').fetchone()[0]))
+    print("Diff aplicado:", stored[4] == moved, stored[-1], len(stored))
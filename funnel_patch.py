@@ -0,0 +1,274 @@
+"""
+Alterações parciais de funil para Funnel Builder (PATCH /api/funnels/:id)
+
+Dois formatos de corpo:
+
+- JSON Patch (RFC 6902): lista de operações add/remove/replace/move/copy/test
+  sobre o documento {name, icon, elements, connections, simulatedRevenue},
+  ex.: [{"op": "replace", "path": "/elements/3/x", "value": 120}]
+- Diff compacto por id: {"elements": {"upsert": [...], "delete": [ids]},
+  "connections": {...}, "name": ..., "icon": ..., "simulatedRevenue": ...}.
+  Itens de upsert são completos e substituem o item de mesmo id (ou entram
+  no fim da lista); é o formato do autosave do editor e grava só as linhas
+  citadas, sem carregar o grafo (ver funnel_graph.patch_items)
+
+Erros de formato levantam PatchError (400); um "test" que não confere
+levanta PatchConflict (409). Nos dois casos nada do patch é gravado.
+"""
+
+import copy
+import math
+from typing import Any, Dict, List, Set, Tuple
+
+from funnel_graph import id_key
+
+
+# Campos do funil que um patch pode alterar (primeiro nível do documento)
+PATCHABLE_FIELDS = ('name', 'icon', 'elements', 'connections', 'simulatedRevenue')
+
+JSON_PATCH_OPS = ('add', 'remove', 'replace', 'move', 'copy', 'test')
+
+
+class PatchError(ValueError):
+    """Patch mal formado ou que não se aplica ao funil"""
+
+
+class PatchConflict(PatchError):
+    """Operação test falhou: o funil não está no estado que o cliente esperava"""
+
+
+def _parse_pointer(pointer) -> List[str]:
+    """JSON Pointer (RFC 6901) -> tokens, com ~1 -> / e ~0 -> ~"""
+    if not isinstance(pointer, str) or not pointer.startswith('/'):
+        raise PatchError(f'Caminho inválido: {pointer!r}')
+    tokens = [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+    if tokens[0] not in PATCHABLE_FIELDS:
+        raise PatchError(f'Campo não pode ser alterado: {pointer}')
+    return tokens
+
+
+def _array_index(container: List, token: str, pointer: str, append: bool = False) -> int:
+    """Índice de lista do token; com append=True aceita '-' e len(lista) (para add)"""
+    if append and token == '-':
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token[0] == '0'):
+        raise PatchError(f'Índice inválido em {pointer}')
+    index = int(token)
+    if index > len(container) or (index == len(container) and not append):
+        raise PatchError(f'Índice fora da lista em {pointer}')
+    return index
+
+
+def _resolve_parent(doc: Dict, tokens: List[str], pointer: str) -> Tuple[Any, str]:
+    """(container, último token) do caminho; os intermediários precisam existir"""
+    target = doc
+    for token in tokens[:-1]:
+        if isinstance(target, dict):
+            if token not in target:
+                raise PatchError(f'Caminho não existe: {pointer}')
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[_array_index(target, token, pointer)]
+        else:
+            raise PatchError(f'Caminho não existe: {pointer}')
+    return target, tokens[-1]
+
+
+def _get(doc: Dict, pointer) -> Any:
+    container, token = _resolve_parent(doc, _parse_pointer(pointer), pointer)
+    if isinstance(container, dict):
+        if token not in container:
+            raise PatchError(f'Caminho não existe: {pointer}')
+        return container[token]
+    if isinstance(container, list):
+        return container[_array_index(container, token, pointer)]
+    raise PatchError(f'Caminho não existe: {pointer}')
+
+
+def _add(doc: Dict, pointer, value: Any):
+    container, token = _resolve_parent(doc, _parse_pointer(pointer), pointer)
+    if isinstance(container, dict):
+        container[token] = value
+    elif isinstance(container, list):
+        container.insert(_array_index(container, token, pointer, append=True), value)
+    else:
+        raise PatchError(f'Caminho não existe: {pointer}')
+
+
+def _remove(doc: Dict, pointer) -> Any:
+    tokens = _parse_pointer(pointer)
+    if len(tokens) == 1:
+        raise PatchError(f'Campo não pode ser removido: {pointer}')
+    container, token = _resolve_parent(doc, tokens, pointer)
+    if isinstance(container, dict):
+        if token not in container:
+            raise PatchError(f'Caminho não existe: {pointer}')
+        return container.pop(token)
+    if isinstance(container, list):
+        return container.pop(_array_index(container, token, pointer))
+    raise PatchError(f'Caminho não existe: {pointer}')
+
+
+def _json_equal(a: Any, b: Any) -> bool:
+    """Igualdade do test: como ==, mas true/false não são iguais a 1/0"""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def apply_json_patch(doc: Dict, operations: List) -> Set[str]:
+    """
+    Aplica as operações (RFC 6902) em doc, na ordem, alterando-o no lugar
+
+    Quem chama descarta doc se uma operação falhar: o patch é tudo ou nada.
+
+    Returns:
+        campos de primeiro nível alterados (um patch só de test não altera nada)
+    """
+    if not isinstance(operations, list) or not operations:
+        raise PatchError('Informe uma lista de operações JSON Patch')
+
+    touched = set()
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get('op') not in JSON_PATCH_OPS:
+            raise PatchError(f"Operação inválida: use op entre {', '.join(JSON_PATCH_OPS)}")
+        op, path = operation['op'], operation.get('path')
+        field = _parse_pointer(path)[0]
+
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise PatchError(f'Operação {op} sem value')
+        if op in ('move', 'copy') and 'from' not in operation:
+            raise PatchError(f'Operação {op} sem from')
+
+        if op == 'test':
+            if not _json_equal(_get(doc, path), operation['value']):
+                raise PatchConflict(f'Teste falhou em {path}')
+            continue
+
+        if op == 'add':
+            _add(doc, path, operation['value'])
+        elif op == 'remove':
+            _remove(doc, path)
+        elif op == 'replace':
+            _get(doc, path)  # o alvo precisa existir
+            container, token = _resolve_parent(doc, _parse_pointer(path), path)
+            if isinstance(container, list):
+                token = _array_index(container, token, path)
+            container[token] = operation['value']
+        elif op == 'move':
+            source = operation['from']
+            touched.add(_parse_pointer(source)[0])
+            if path != source and path.startswith(source + '/'):
+                raise PatchError(f'Não é possível mover {source} para dentro de si mesmo')
+            _add(doc, path, _remove(doc, source))
+        elif op == 'copy':
+            _add(doc, path, copy.deepcopy(_get(doc, operation['from'])))
+        touched.add(field)
+
+    return touched
+
+
+def referenced_fields(operations) -> Tuple[str, ...]:
+    """
+    Campos de primeiro nível citados em path/from, para ler só eles do banco
+
+    Operação mal formada devolve todos: apply_json_patch é quem a rejeita.
+    """
+    fields = set()
+    for operation in operations if isinstance(operations, list) else [None]:
+        if not isinstance(operation, dict):
+            return PATCHABLE_FIELDS
+        for pointer in (operation.get('path'), operation.get('from')):
+            if isinstance(pointer, str) and pointer.startswith('/'):
+                fields.add(pointer[1:].split('/')[0])
+    return tuple(field for field in PATCHABLE_FIELDS if field in fields) or PATCHABLE_FIELDS
+
+
+def check_funnel_fields(doc: Dict, fields: Set[str]):
+    """Valida os campos alterados do documento já com o patch aplicado"""
+    for field in fields:
+        value = doc.get(field)
+        if field in ('name', 'icon'):
+            if not isinstance(value, str) or not value.strip():
+                raise PatchError(f'{field} deve ser um texto não vazio')
+        elif field in ('elements', 'connections'):
+            if not isinstance(value, list):
+                raise PatchError(f'{field} deve ser uma lista')
+        elif field == 'simulatedRevenue':
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise PatchError('simulatedRevenue deve ser um número')
+
+
+def _valid_id(item_id) -> bool:
+    return item_id is not None and not isinstance(item_id, (dict, list))
+
+
+def parse_item_diff(body: Dict) -> Dict[str, Tuple[List[Dict], List]]:
+    """
+    Parte elements/connections de um diff compacto
+
+    Returns:
+        {campo: (itens de upsert, ids removidos)} só dos campos presentes
+    """
+    diff = {}
+    for field in ('elements', 'connections'):
+        if field not in body:
+            continue
+        changes = body[field]
+        if not isinstance(changes, dict) or not set(changes) <= {'upsert', 'delete'}:
+            raise PatchError(f'{field} deve ser {{"upsert": [...], "delete": [...]}}')
+        upsert = changes.get('upsert') or []
+        delete = changes.get('delete') or []
+        if not isinstance(upsert, list) or not isinstance(delete, list):
+            raise PatchError(f'{field}.upsert e {field}.delete devem ser listas')
+
+        if any(not isinstance(item, dict) or not _valid_id(item.get('id')) for item in upsert):
+            raise PatchError(f'Todo item de {field}.upsert precisa de id')
+        if not all(_valid_id(item_id) for item_id in delete):
+            raise PatchError(f'{field}.delete deve ser uma lista de ids')
+
+        keys = [id_key(item['id']) for item in upsert] + [id_key(item_id) for item_id in delete]
+        if len(set(keys)) != len(keys):
+            raise PatchError(f'Id repetido em {field}')
+        diff[field] = (upsert, delete)
+    return diff
+
+
+def is_json_patch(body) -> bool:
+    """Corpo em JSON Patch (lista de operações) ou diff compacto (objeto)"""
+    return isinstance(body, list)
+
+
+if __name__ == '__main__':
+    doc = {
+        'name': 'Funil', 'icon': '🚀', 'simulatedRevenue': 0,
+        'elements': [{'id': 1, 'x': 0, 'y': 0}, {'id': 2, 'x': 100, 'y': 0}],
+        'connections': [],
+    }
+    touched = apply_json_patch(doc, [
+        {'op': 'test', 'path': '/elements/1/id', 'value': 2},
+        {'op': 'replace', 'path': '/elements/1/x', 'value': 140},
+        {'op': 'add', 'path': '/connections/-', 'value': {'id': 9, 'from': 1, 'to': 2}},
+        {'op': 'replace', 'path': '/name', 'value': 'Funil de vendas'},
+    ])
+    print("Campos alterados:", sorted(touched))
+    print("Elemento movido:", doc['elements'][1])
+
+    try:
+        apply_json_patch(doc, [{'op': 'test', 'path': '/elements/0/x', 'value': False}])
+    except PatchConflict as e:
+        print("Conflito:", e)
+
+    for bad in ([{'op': 'replace', 'path': '/id', 'value': 3}],
+                [{'op': 'remove', 'path': '/elements/7'}],
+                [{'op': 'move', 'from': '/elements', 'path': '/elements/0'}]):
+        try:
+            apply_json_patch(doc, bad)
+        except PatchError as e:
+            print("Rejeitado:", e)
+
+    print("Diff compacto:", parse_item_diff({'elements': {'upsert': [{'id': 2, 'x': 1}], 'delete': [1]}}))
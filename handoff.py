@@ -0,0 +1,161 @@
+"""
+Handoff para Funnel Builder
+Reinício sem downtime: o processo atual passa o socket de escuta para um
+novo processo (mesmo comando) e só encerra depois que ele está pronto
+"""
+
+import os
+import select
+import socket
+import subprocess
+import sys
+import time
+from typing import Optional
+
+
+# Descritores repassados ao sucessor pelo ambiente
+LISTEN_FD_ENV = 'FUNNEL_LISTEN_FD'
+READY_FD_ENV = 'FUNNEL_HANDOFF_READY_FD'
+GO_FD_ENV = 'FUNNEL_HANDOFF_GO_FD'
+
+
+def inherited_listen_socket() -> Optional[socket.socket]:
+    """Socket de escuta herdado do processo anterior (None em um start normal)"""
+    fd = os.environ.pop(LISTEN_FD_ENV, None)
+    if fd is None:
+        return None
+    return socket.socket(fileno=int(fd))
+
+
+def is_successor() -> bool:
+    """True quando este processo foi iniciado por um handoff"""
+    return READY_FD_ENV in os.environ
+
+
+class Successor:
+    """Novo processo já pronto, esperando o anterior liberar"""
+
+    def __init__(self, process: subprocess.Popen, go_fd: int):
+        self.process = process
+        self.go_fd = go_fd
+
+    def release(self):
+        """
+        Avisa o sucessor que o anterior terminou de drenar
+
+        A partir daqui ele restaura as sessões salvas no snapshot; a porta
+        já estava sendo atendida por ele desde o sinal de pronto.
+        """
+        if self.go_fd is not None:
+            os.close(self.go_fd)
+            self.go_fd = None
+
+
+def unsupported_reason() -> Optional[str]:
+    """
+    Por que este processo não pode passar o socket adiante (None = pode)
+
+    Como PID 1 (CMD do container) o processo anterior sair encerra o
+    container inteiro, sucessor incluído.
+    """
+    if os.getpid() == 1:
+        return 'processo é o PID 1 (container); reinicie o container'
+    return None
+
+
+def spawn_successor(sock: socket.socket, ready_timeout: float = 30) -> Optional[Successor]:
+    """
+    Sobe um novo processo com o mesmo comando herdando o socket de escuta
+
+    Espera o sucessor sinalizar que carregou o código e está atendendo.
+    Se ele falhar (erro de import, porta, timeout), é encerrado e o
+    processo atual continua servindo normalmente.
+
+    Returns:
+        o Successor pronto ou None se o handoff falhou (ou não é suportado)
+    """
+    reason = unsupported_reason()
+    if reason:
+        print(f"⚠️ Handoff recusado: {reason}")
+        return None
+
+    ready_read, ready_write = os.pipe()
+    go_read, go_write = os.pipe()
+
+    env = dict(os.environ)
+    env[LISTEN_FD_ENV] = str(sock.fileno())
+    env[READY_FD_ENV] = str(ready_write)
+    env[GO_FD_ENV] = str(go_read)
+
+    try:
+        process = subprocess.Popen(
+            [sys.executable] + sys.argv, env=env,
+            pass_fds=(sock.fileno(), ready_write, go_read)
+        )
+    except OSError as e:
+        print(f"❌ Handoff: não foi possível iniciar o novo processo: {e}")
+        for fd in (ready_read, ready_write, go_read, go_write):
+            os.close(fd)
+        return None
+    finally:
+        # As pontas do filho só existem no filho
+        for fd in (ready_write, go_read):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    ready = False
+    deadline = time.monotonic() + ready_timeout
+    try:
+        while not ready:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([ready_read], [], [], remaining)
+            if not readable:
+                continue
+            # EOF sem o byte de pronto = o sucessor morreu antes de subir
+            ready = os.read(ready_read, 1) == b'1'
+            if not ready:
+                break
+    finally:
+        os.close(ready_read)
+
+    if not ready:
+        print(f"❌ Handoff: novo processo (pid {process.pid}) não ficou pronto; mantendo o atual")
+        os.close(go_write)
+        process.kill()
+        process.wait()
+        return None
+
+    print(f"🔁 Handoff: novo processo (pid {process.pid}) pronto")
+    return Successor(process, go_write)
+
+
+def wait_for_predecessor(timeout: float = 60) -> bool:
+    """
+    No sucessor: avisa que está pronto e espera o anterior terminar de drenar
+
+    Chamado com o servidor já atendendo (em outra thread). Retorna quando o
+    anterior libera (fecha o pipe) ou quando o prazo acaba.
+
+    Returns:
+        False se este processo não veio de um handoff
+    """
+    ready_fd = os.environ.pop(READY_FD_ENV, None)
+    go_fd = os.environ.pop(GO_FD_ENV, None)
+    if ready_fd is None or go_fd is None:
+        return False
+
+    ready_fd, go_fd = int(ready_fd), int(go_fd)
+    try:
+        os.write(ready_fd, b'1')
+    finally:
+        os.close(ready_fd)
+
+    try:
+        select.select([go_fd], [], [], timeout)
+    finally:
+        os.close(go_fd)
+    return True
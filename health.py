@@ -0,0 +1,61 @@
+"""
+Health checks para Funnel Builder
+Liveness (/healthz) e readiness (/readyz) baratos o bastante para probes frequentes
+"""
+
+import os
+import time
+from typing import Dict, Tuple
+
+from database import db
+from security_logger import security_logger
+from webhooks import webhook_manager
+
+
+# Acima destes limites o processo deixa de aceitar tráfego novo (readyz = 503)
+READY_MAX_LOG_QUEUE = int(os.getenv('READY_MAX_LOG_QUEUE', '1000'))
+READY_MAX_WEBHOOK_BACKLOG = int(os.getenv('READY_MAX_WEBHOOK_BACKLOG', '200'))
+
+
+def liveness() -> Dict:
+    """O processo está de pé e atendendo (não toca em banco nem disco)"""
+    return {'status': 'ok', 'pid': os.getpid()}
+
+
+def readiness() -> Tuple[bool, Dict]:
+    """
+    Verifica as dependências do processo
+
+    Returns:
+        (pronto, detalhes por verificação)
+    """
+    started = time.perf_counter()
+
+    log_queue = security_logger.queue_depth()
+    webhook_backlog = webhook_manager.backlog()
+
+    checks = {
+        'database': {'ok': db.ping()},
+        'security_log_queue': {
+            'ok': log_queue <= READY_MAX_LOG_QUEUE,
+            'depth': log_queue,
+            'max': READY_MAX_LOG_QUEUE
+        },
+        'webhook_backlog': {
+            'ok': webhook_backlog <= READY_MAX_WEBHOOK_BACKLOG,
+            'depth': webhook_backlog,
+            'max': READY_MAX_WEBHOOK_BACKLOG
+        },
+    }
+
+    ready = all(check['ok'] for check in checks.values())
+    return ready, {
+        'status': 'ready' if ready else 'not_ready',
+        'checks': checks,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 3)
+    }
+
+
+if __name__ == '__main__':
+    print("Liveness:", liveness())
+    print("Readiness:", readiness())
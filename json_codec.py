@@ -0,0 +1,114 @@
+"""
+JSON Codec para Funnel Builder
+Serialização JSON única para respostas, corpo das requisições, colunas do
+banco e security.log: usa orjson quando instalado, senão o json da stdlib
+"""
+
+import json
+import os
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # Opcional: sem ele o json da stdlib atende tudo
+    orjson = None
+
+
+# auto (orjson se instalado), orjson ou stdlib
+JSON_CODEC = os.getenv('JSON_CODEC', 'auto')
+
+
+class RawJSON:
+    """
+    Valor já serializado, escrito na resposta como está
+
+    Usado para as colunas JSON do banco (elements/connections): o texto
+    guardado vai direto para o cliente, sem json.loads + json.dumps. Aceito
+    pelo StreamingJSONEncoder em dicts/listas do caminho até o valor; o
+    codec sozinho não sabe serializá-lo.
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: Union[str, bytes]):
+        self.data = data.encode('utf-8') if isinstance(data, str) else data
+
+    def loads(self) -> Any:
+        return json_codec.loads(self.data)
+
+
+class StdlibCodec:
+    """json da stdlib com encoder/decoder configurados uma única vez"""
+
+    name = 'stdlib'
+
+    def __init__(self):
+        # json.dumps com opções cria um JSONEncoder novo a cada chamada
+        self.encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        self.decoder = json.JSONDecoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.encoder.encode(obj).encode('utf-8')
+
+    def dumps_str(self, obj: Any) -> str:
+        return self.encoder.encode(obj)
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        """Levanta ValueError (JSONDecodeError/UnicodeDecodeError) se inválido"""
+        if not isinstance(data, str):
+            data = bytes(data).decode('utf-8')
+        return self.decoder.decode(data)
+
+
+class OrjsonCodec:
+    """orjson: gera bytes direto e decodifica sem passar por str"""
+
+    name = 'orjson'
+
+    def __init__(self):
+        self.option = orjson.OPT_NON_STR_KEYS
+        # Inteiros acima de 64 bits e afins: orjson recusa, a stdlib aceita
+        self.fallback = StdlibCodec()
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, option=self.option)
+        except orjson.JSONEncodeError:
+            return self.fallback.dumps(obj)
+
+    def dumps_str(self, obj: Any) -> str:
+        return self.dumps(obj).decode('utf-8')
+
+    def loads(self, data: Union[str, bytes, bytearray]) -> Any:
+        """orjson.JSONDecodeError é subclasse de json.JSONDecodeError (ValueError)"""
+        return orjson.loads(data)
+
+
+CODECS = {'stdlib': StdlibCodec}
+if orjson is not None:
+    CODECS['orjson'] = OrjsonCodec
+
+
+def get_codec(name: str = JSON_CODEC):
+    """Instancia o codec pedido (auto = o mais rápido disponível)"""
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+    if name not in CODECS:
+        print(f"⚠️ JSON_CODEC={name} indisponível; usando json da stdlib")
+        name = 'stdlib'
+    return CODECS[name]()
+
+
+# Instância global
+json_codec = get_codec()
+
+
+if __name__ == '__main__':
+    doc = {'id': 1, 'name': 'Funil Início', 'elements': [{'id': 1, 'x': 10.5}]}
+    for codec_name in CODECS:
+        codec = get_codec(codec_name)
+        encoded = codec.dumps(doc)
+        print(f"{codec_name}: {encoded!r}")
+        print("   ida e volta:", codec.loads(encoded) == doc)
+        print("   chave int:", codec.dumps({2: True}))
+    print("Codec ativo:", json_codec.name)
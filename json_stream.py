@@ -0,0 +1,144 @@
+"""
+JSON Stream para Funnel Builder
+Encoder JSON que aceita geradores/iteradores como arrays, para listas que
+são lidas do cursor do SQLite e escritas na resposta linha a linha
+"""
+
+from collections.abc import Iterator
+from typing import Any, Callable
+
+from json_codec import json_codec, RawJSON
+
+
+class Lazy:
+    """
+    Valor calculado só quando o encoder chega nele
+
+    Útil para totais que dependem de um gerador que aparece antes no mesmo
+    objeto: {'pages': rows, 'total': Lazy(lambda: counter.count)}
+    """
+
+    __slots__ = ('fn',)
+
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+
+
+class CountingIterator:
+    """Repassa os itens de um iterável contando quantos passaram"""
+
+    def __init__(self, iterable, on_item: Callable[[Any], None] = None):
+        self.iterator = iter(iterable)
+        self.on_item = on_item
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self.iterator)
+        self.count += 1
+        if self.on_item is not None:
+            self.on_item(item)
+        return item
+
+
+def _is_stream(value) -> bool:
+    return isinstance(value, (Iterator, Lazy, RawJSON))
+
+
+def _has_stream(value) -> bool:
+    """
+    Verifica o próprio valor, dicts aninhados e os filhos diretos de listas
+
+    Dicts são percorridos em profundidade ({'funnel': {'elements': RawJSON}});
+    listas só no primeiro nível, para não varrer arrays grandes já decodificados.
+    """
+    if _is_stream(value):
+        return True
+    if isinstance(value, dict):
+        return any(_has_stream(v) if isinstance(v, dict) else _is_stream(v)
+                   for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_is_stream(v) for v in value)
+    return False
+
+
+class StreamingJSONEncoder:
+    """
+    Encoder de respostas JSON em bytes, com suporte a geradores e RawJSON
+
+    Objetos sem geradores saem inteiros pelo codec (orjson quando instalado).
+    Quando há um gerador, a estrutura em volta dele é escrita aos pedaços e
+    cada item produzido é serializado e liberado antes do próximo ser lido,
+    então o pico de memória é o de um item, não o da lista inteira. RawJSON
+    é copiado para a saída sem passar pelo codec.
+    """
+
+    ITEM_SEPARATOR = b','
+    KEY_SEPARATOR = b':'
+
+    def __init__(self, codec=None):
+        self.codec = codec or json_codec
+
+    def encode(self, o) -> bytes:
+        return b''.join(self.iterencode(o))
+
+    def iterencode(self, o) -> Iterator:
+        if not _has_stream(o):
+            return iter((self.codec.dumps(o),))
+        return self._iterencode_value(o)
+
+    def _iterencode_value(self, o):
+        if isinstance(o, Lazy):
+            o = o.fn()
+
+        if isinstance(o, RawJSON):
+            yield o.data
+        elif isinstance(o, Iterator):
+            yield from self._iterencode_iterator(o)
+        elif isinstance(o, dict) and _has_stream(o):
+            yield from self._iterencode_dict(o)
+        elif isinstance(o, (list, tuple)) and _has_stream(o):
+            yield from self._iterencode_iterator(iter(o))
+        else:
+            yield self.codec.dumps(o)
+
+    def _iterencode_iterator(self, items):
+        yield b'['
+        first = True
+        for item in items:
+            if not first:
+                yield self.ITEM_SEPARATOR
+            first = False
+            yield from self._iterencode_value(item)
+        yield b']'
+
+    def _iterencode_dict(self, o):
+        yield b'{'
+        first = True
+        for key, value in o.items():
+            if not first:
+                yield self.ITEM_SEPARATOR
+            first = False
+            yield self.codec.dumps(str(key)) + self.KEY_SEPARATOR
+            yield from self._iterencode_value(value)
+        yield b'}'
+
+
+if __name__ == '__main__':
+    encoder = StreamingJSONEncoder()
+
+    def rows():
+        for i in range(3):
+            yield {'id': i, 'name': f'Funil {i}', 'elements': RawJSON('[1,2,3]')}
+
+    counter = CountingIterator(rows())
+    data = {'success': True, 'funnels': counter, 'total': Lazy(lambda: counter.count)}
+    streamed = b''.join(encoder.iterencode(data))
+
+    expected = {'success': True, 'funnels': [
+        {'id': i, 'name': f'Funil {i}', 'elements': [1, 2, 3]} for i in range(3)
+    ], 'total': 3}
+    print(streamed.decode('utf-8'))
+    print("Mesmo conteúdo:", json_codec.loads(streamed) == expected)
@@ -5,7 +5,21 @@ Classes para representar páginas, UTMs e testes A/B
 
 from typing import List, Dict, Optional
 from datetime import datetime
-import json
+from json_codec import json_codec
+
+
+def ctr(impressions: int, clicks: int) -> float:
+    """CTR (Click-Through Rate) em porcentagem"""
+    if not impressions:
+        return 0
+    return (clicks / impressions) * 100
+
+
+def conversion_rate(clicks: int, conversions: int) -> float:
+    """Taxa de conversão sobre os cliques, em porcentagem"""
+    if not clicks:
+        return 0
+    return (conversions / clicks) * 100
 
 
 class Page:
@@ -38,7 +52,7 @@ class Page:
             url=data['url'],
             category=data.get('category', 'landing'),
             description=data.get('description'),
-            tags=json.loads(data.get('tags', '[]')) if isinstance(data.get('tags'), str) else data.get('tags', []),
+            tags=json_codec.loads(data.get('tags', '[]')) if isinstance(data.get('tags'), str) else data.get('tags', []),
             status=data.get('status', 'active'),
             thumbnail_url=data.get('thumbnail_url'),
             created_at=data.get('created_at'),
@@ -95,7 +109,7 @@ class PageTest:
             description=data['description'],
             test_type=data.get('test_type', 'ab_test'),
             results=data.get('results'),
-            metrics=json.loads(data.get('metrics', '{}')) if isinstance(data.get('metrics'), str) else data.get('metrics', {}),
+            metrics=json_codec.loads(data.get('metrics', '{}')) if isinstance(data.get('metrics'), str) else data.get('metrics', {}),
             created_at=data.get('created_at')
         )
 
@@ -166,7 +180,7 @@ class UTM:
             utm_campaign=data['utm_campaign'],
             utm_content=data.get('utm_content'),
             utm_term=data.get('utm_term'),
-            tags=json.loads(data.get('tags', '[]')) if isinstance(data.get('tags'), str) else data.get('tags', []),
+            tags=json_codec.loads(data.get('tags', '[]')) if isinstance(data.get('tags'), str) else data.get('tags', []),
             notes=data.get('notes'),
             created_at=data.get('created_at'),
             updated_at=data.get('updated_at')
@@ -217,16 +231,12 @@ class PageMetrics:
     @property
     def ctr(self) -> float:
         """Calcula CTR (Click-Through Rate)"""
-        if self.impressions == 0:
-            return 0
-        return (self.clicks / self.impressions) * 100
+        return ctr(self.impressions, self.clicks)
 
     @property
     def conversion_rate(self) -> float:
         """Calcula taxa de conversão"""
-        if self.clicks == 0:
-            return 0
-        return (self.conversions / self.clicks) * 100
+        return conversion_rate(self.clicks, self.conversions)
 
     @staticmethod
     def from_dict(data: Dict) -> 'PageMetrics':
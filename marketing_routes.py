@@ -3,27 +3,46 @@ Marketing Routes - Handlers para endpoints de Páginas, UTMs e Métricas
 Define as rotas de API para gerenciamento de marketing digital
 """
 
-import json
 from typing import Dict
 from database import db
 from marketing_models import Page, PageTest, UTM, PageMetrics
 from validators import validate_url
+from json_stream import CountingIterator, Lazy
+from pagination import PageRequest, KeysetPage
 
 
 def handle_pages_list(user_id: int, query_params: Dict = None) -> tuple:
-    """GET /api/pages - Lista páginas do usuário"""
+    """
+    GET /api/pages - Lista páginas do usuário
+
+    Com ?limit= e/ou ?cursor= devolve uma página por vez e o next_cursor;
+    total passa a ser o número de itens desta página.
+    """
     try:
         category = query_params.get('category') if query_params else None
         status = query_params.get('status') if query_params else None
+        page_request = PageRequest.from_query('pages', query_params)
+
+        # Páginas saem do cursor direto para a resposta, já no formato de
+        # Page.to_dict (uma cópia por linha); o total é lido no fim
+        page = KeysetPage(
+            page_request,
+            db.iter_pages_by_user(user_id, category=category, status=status,
+                                  after=page_request.after, limit=page_request.fetch_limit),
+            key=lambda p: (p['updated_at'], p['id'])
+        )
+        pages = CountingIterator(page)
 
-        pages_data = db.get_pages_by_user(user_id, category=category, status=status)
-        pages = [Page.from_dict(p).to_dict() for p in pages_data]
-
-        return 200, {
+        response = {
             'success': True,
             'pages': pages,
-            'total': len(pages)
+            'total': Lazy(lambda: pages.count)
         }
+        if page_request.active:
+            response['next_cursor'] = Lazy(page.next_cursor)
+        return 200, response
+    except ValueError as e:
+        return 400, {'success': False, 'error': str(e)}
     except Exception as e:
         return 500, {'success': False, 'error': f'Erro ao buscar páginas: {str(e)}'}
 
@@ -74,13 +93,11 @@ def handle_page_get(user_id: int, page_id: int) -> tuple:
 
         page = Page.from_dict(page_data)
 
-        # Buscar testes da página
-        tests_data = db.get_page_tests(page_id, user_id)
-        tests = [PageTest.from_dict(t).to_dict() for t in tests_data]
+        # Buscar testes da página (já no formato de PageTest.to_dict)
+        tests = db.get_page_tests(page_id, user_id)
 
-        # Buscar métricas da página (últimos 30 dias)
-        metrics_data = db.get_page_metrics(page_id, user_id)
-        metrics = [PageMetrics.from_dict(m).to_dict() for m in metrics_data[:30]]
+        # Buscar métricas da página (últimos 30 registros)
+        metrics = list(db.iter_page_metrics(page_id, user_id, limit=30))
 
         return 200, {
             'success': True,
@@ -196,17 +213,29 @@ def handle_page_test_delete(user_id: int, test_id: int) -> tuple:
 
 # ==================== ROTAS DE UTMs ====================
 
-def handle_utms_list(user_id: int) -> tuple:
-    """GET /api/utms - Lista UTMs do usuário"""
+def handle_utms_list(user_id: int, query_params: Dict = None) -> tuple:
+    """GET /api/utms - Lista UTMs do usuário (?limit=&cursor= como em /api/pages)"""
     try:
-        utms_data = db.get_utms_by_user(user_id)
-        utms = [UTM.from_dict(u).to_dict() for u in utms_data]
+        page_request = PageRequest.from_query('utms', query_params)
 
-        return 200, {
+        page = KeysetPage(
+            page_request,
+            db.iter_utms_by_user(user_id, after=page_request.after,
+                                 limit=page_request.fetch_limit),
+            key=lambda u: (u['updated_at'], u['id'])
+        )
+        utms = CountingIterator(page)
+
+        response = {
             'success': True,
             'utms': utms,
-            'total': len(utms)
+            'total': Lazy(lambda: utms.count)
         }
+        if page_request.active:
+            response['next_cursor'] = Lazy(page.next_cursor)
+        return 200, response
+    except ValueError as e:
+        return 400, {'success': False, 'error': str(e)}
     except Exception as e:
         return 500, {'success': False, 'error': f'Erro ao buscar UTMs: {str(e)}'}
 
@@ -364,6 +393,11 @@ def handle_metrics_create(user_id: int, page_id: int, data: Dict) -> tuple:
         if not data.get('date'):
             return 400, {'success': False, 'error': 'Data é obrigatória'}
 
+        # Com foreign_keys=ON uma UTM inexistente viraria erro do banco
+        utm_id = data.get('utm_id')
+        if utm_id is not None and not db.get_utm_by_id(utm_id, user_id):
+            return 400, {'success': False, 'error': 'UTM não encontrada'}
+
         # Criar métricas
         metric_id = db.create_page_metrics(
             page_id=page_id,
@@ -374,7 +408,7 @@ def handle_metrics_create(user_id: int, page_id: int, data: Dict) -> tuple:
             conversions=data.get('conversions', 0),
             avg_time_on_page=data.get('avg_time_on_page', 0),
             bounce_rate=data.get('bounce_rate', 0),
-            utm_id=data.get('utm_id'),
+            utm_id=utm_id,
             notes=data.get('notes')
         )
 
@@ -392,8 +426,16 @@ def handle_metrics_create(user_id: int, page_id: int, data: Dict) -> tuple:
 
 
 def handle_metrics_list(user_id: int, page_id: int, query_params: Dict = None) -> tuple:
-    """GET /api/pages/:id/metrics - Lista métricas da página"""
+    """
+    GET /api/pages/:id/metrics - Lista métricas da página
+
+    Com ?limit= e/ou ?cursor= pagina por (date, id). O summary só vem na
+    listagem completa: somar o período inteiro a cada página desfaria o
+    custo constante da paginação.
+    """
     try:
+        page_request = PageRequest.from_query('metrics', query_params)
+
         # Verificar se página existe
         page_data = db.get_page_by_id(page_id, user_id)
         if not page_data:
@@ -402,29 +444,50 @@ def handle_metrics_list(user_id: int, page_id: int, query_params: Dict = None) -
         start_date = query_params.get('start_date') if query_params else None
         end_date = query_params.get('end_date') if query_params else None
 
-        metrics_data = db.get_page_metrics(page_id, user_id, start_date, end_date)
-        metrics = [PageMetrics.from_dict(m).to_dict() for m in metrics_data]
+        # Estatísticas agregadas acumuladas enquanto as linhas são escritas
+        totals = {'impressions': 0, 'clicks': 0, 'conversions': 0}
 
-        # Calcular estatísticas agregadas
-        total_impressions = sum(m['impressions'] for m in metrics)
-        total_clicks = sum(m['clicks'] for m in metrics)
-        total_conversions = sum(m['conversions'] for m in metrics)
+        def accumulate(metric):
+            totals['impressions'] += metric['impressions']
+            totals['clicks'] += metric['clicks']
+            totals['conversions'] += metric['conversions']
 
-        avg_ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
-        avg_conversion_rate = (total_conversions / total_clicks * 100) if total_clicks > 0 else 0
+        page = KeysetPage(
+            page_request,
+            db.iter_page_metrics(page_id, user_id, start_date, end_date,
+                                 after=page_request.after, limit=page_request.fetch_limit),
+            key=lambda m: (m['date'], m['id'])
+        )
+        metrics = CountingIterator(page, on_item=accumulate)
 
-        return 200, {
-            'success': True,
-            'metrics': metrics,
-            'total': len(metrics),
-            'summary': {
+        def summary():
+            total_impressions = totals['impressions']
+            total_clicks = totals['clicks']
+            total_conversions = totals['conversions']
+
+            avg_ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
+            avg_conversion_rate = (total_conversions / total_clicks * 100) if total_clicks > 0 else 0
+
+            return {
                 'total_impressions': total_impressions,
                 'total_clicks': total_clicks,
                 'total_conversions': total_conversions,
                 'avg_ctr': round(avg_ctr, 2),
                 'avg_conversion_rate': round(avg_conversion_rate, 2)
             }
+
+        response = {
+            'success': True,
+            'metrics': metrics,
+            'total': Lazy(lambda: metrics.count)
         }
+        if page_request.active:
+            response['next_cursor'] = Lazy(page.next_cursor)
+        else:
+            response['summary'] = Lazy(summary)
+        return 200, response
+    except ValueError as e:
+        return 400, {'success': False, 'error': str(e)}
     except Exception as e:
         return 500, {'success': False, 'error': f'Erro ao buscar métricas: {str(e)}'}
 
@@ -0,0 +1,403 @@
+"""
+Migrações do banco para Funnel Builder
+Lista ordenada e numerada das alterações de schema, aplicadas uma única vez
+
+O número da última migração aplicada fica em PRAGMA user_version: com o
+schema em dia, iniciar o servidor custa só essa leitura. As pendentes rodam
+em uma transação BEGIN IMMEDIATE (o lock de escrita do SQLite), então vários
+processos iniciando juntos não aplicam a mesma migração duas vezes, e cada
+uma fica registrada na tabela schema_migrations.
+
+Migrações já publicadas não mudam: alteração nova é migração nova no fim da
+lista. Bancos criados antes deste módulo (user_version 0) passam por todas;
+por isso as primeiras só criam o que ainda não existe.
+"""
+
+import sqlite3
+from typing import Callable, List, Set, Tuple
+
+from funnel_graph import GRAPH_TABLES, save_items
+from json_codec import json_codec
+
+
+def _columns(cursor: sqlite3.Cursor, table: str) -> Set[str]:
+    return {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+
+
+def _add_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str) -> bool:
+    """ALTER TABLE ADD COLUMN se a coluna ainda não existe; retorna se adicionou"""
+    if column in _columns(cursor, table):
+        return False
+    cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    return True
+
+
+def _m001_initial_schema(cursor: sqlite3.Cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            name TEXT,
+            whatsapp TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS funnels (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            icon TEXT DEFAULT '🚀',
+            elements TEXT,
+            connections TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            url TEXT NOT NULL,
+            category TEXT DEFAULT 'landing',
+            description TEXT,
+            tags TEXT,
+            status TEXT DEFAULT 'active',
+            thumbnail_url TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS page_tests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            page_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            test_type TEXT DEFAULT 'ab_test',
+            results TEXT,
+            metrics TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (page_id) REFERENCES pages(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS utms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            utm_source TEXT NOT NULL,
+            utm_medium TEXT NOT NULL,
+            utm_campaign TEXT NOT NULL,
+            utm_content TEXT,
+            utm_term TEXT,
+            tags TEXT,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS page_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            page_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            impressions INTEGER DEFAULT 0,
+            clicks INTEGER DEFAULT 0,
+            conversions INTEGER DEFAULT 0,
+            avg_time_on_page REAL DEFAULT 0,
+            bounce_rate REAL DEFAULT 0,
+            utm_id INTEGER,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (page_id) REFERENCES pages(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (utm_id) REFERENCES utms(id) ON DELETE SET NULL
+        )
+    ''')
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_funnels_user_id ON funnels(user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pages_user_id ON pages(user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_page_tests_page_id ON page_tests(page_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_utms_user_id ON utms(user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_page_metrics_page_id ON page_metrics(page_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_page_metrics_date ON page_metrics(date)')
+
+
+def _m002_users_whatsapp(cursor: sqlite3.Cursor):
+    # Bancos anteriores à coluna
+    _add_column(cursor, 'users', 'whatsapp', 'TEXT')
+
+
+def _m003_shared_sessions(cursor: sqlite3.Cursor):
+    # Sessões e tentativas do rate limiter compartilhadas entre processos (modo --workers)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            expires REAL NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rate_limit_hits (
+            key TEXT NOT NULL,
+            ts REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_rate_limit_hits_key_ts ON rate_limit_hits(key, ts)')
+
+
+def _m004_resource_versions(cursor: sqlite3.Cursor):
+    # Contador de versão de funis, páginas e UTMs (ETag do GET)
+    for table in ('funnels', 'pages', 'utms'):
+        _add_column(cursor, table, 'version', 'INTEGER NOT NULL DEFAULT 1')
+
+
+def _m005_keyset_indexes(cursor: sqlite3.Cursor):
+    # Ordem da listagem + id de desempate, para a paginação por keyset
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_funnels_user_updated ON funnels(user_id, updated_at, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_pages_user_updated ON pages(user_id, updated_at, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_utms_user_updated ON utms(user_id, updated_at, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_page_metrics_page_date ON page_metrics(page_id, date, id)')
+
+
+def _m006_funnel_summary(cursor: sqlite3.Cursor):
+    # Resumo do funil para a listagem sem ler elements/connections
+    for column, source in (('element_count', 'elements'), ('connection_count', 'connections')):
+        if _add_column(cursor, 'funnels', column, 'INTEGER NOT NULL DEFAULT 0'):
+            cursor.execute(f'''
+                UPDATE funnels SET {column} =
+                    CASE WHEN json_valid({source}) THEN json_array_length({source}) ELSE 0 END
+            ''')
+    _add_column(cursor, 'funnels', 'simulated_revenue', 'REAL')
+
+
+def _m007_change_log(cursor: sqlite3.Cursor):
+    # Alterações de funis, páginas e UTMs para o feed /api/events
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            entity TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            version INTEGER,
+            action TEXT NOT NULL,
+            ts REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_change_log_user_seq ON change_log(user_id, seq)')
+
+    # A alteração entra na mesma transação da escrita, então só aparece no
+    # feed depois do commit (e some junto num rollback)
+    for table, entity in (('funnels', 'funnel'), ('pages', 'page'), ('utms', 'utm')):
+        for event, action, row in (('INSERT', 'created', 'NEW'), ('UPDATE', 'updated', 'NEW'),
+                                   ('DELETE', 'deleted', 'OLD')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_change_{action}
+                AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO change_log (user_id, entity, entity_id, version, action)
+                    VALUES ({row}.user_id, '{entity}', {row}.id, {row}.version, '{action}');
+                END
+            ''')
+
+
+def _m008_funnel_graph_rows(cursor: sqlite3.Cursor):
+    # Elementos e conexões uma linha por item (funnel_graph.py), no lugar das colunas JSON
+    for table in GRAPH_TABLES.values():
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                funnel_id INTEGER NOT NULL,
+                item_key TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (funnel_id, item_key),
+                FOREIGN KEY (funnel_id) REFERENCES funnels(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+        ''')
+
+    legacy = [field for field in GRAPH_TABLES if field in _columns(cursor, 'funnels')]
+    if not legacy:
+        return
+
+    # O que não é uma lista JSON não vira linha, mas também não some quando as
+    # colunas forem removidas: o texto original fica em funnel_graph_legacy
+    rejected = []
+    for row in cursor.execute(f"SELECT id, {', '.join(legacy)} FROM funnels").fetchall():
+        for index, field in enumerate(legacy, start=1):
+            try:
+                items = json_codec.loads(row[index]) if row[index] else []
+            except ValueError:
+                items = None
+            # element_count/connection_count (migração 006) já contam 0 para o que não é lista
+            if isinstance(items, list):
+                save_items(cursor, GRAPH_TABLES[field], row[0], items)
+            else:
+                rejected.append((row[0], field, row[index]))
+
+    if rejected:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS funnel_graph_legacy (
+                funnel_id INTEGER NOT NULL,
+                field TEXT NOT NULL,
+                data TEXT,
+                PRIMARY KEY (funnel_id, field)
+            )
+        ''')
+        cursor.executemany('INSERT OR REPLACE INTO funnel_graph_legacy (funnel_id, field, data) '
+                           'VALUES (?, ?, ?)', rejected)
+        print(f"⚠️ {len(rejected)} valor(es) de elements/connections que não são lista JSON "
+              f"copiados para funnel_graph_legacy")
+
+    # As colunas antigas ficam no lugar, sem ser lidas nem escritas: a versão
+    # anterior continua subindo em um rollback. Removê-las é um passo à parte,
+    # ver drop_legacy_graph_columns
+
+
+def _m009_keyset_not_null(cursor: sqlite3.Cursor):
+    # updated_at é a chave da paginação (migração 005): uma linha com NULL gera
+    # um cursor que a próxima página não consegue continuar. Preenche o que já
+    # existe e recusa NULL daqui em diante; os triggers fazem o papel de NOT
+    # NULL sem recriar as tabelas (com índices, FKs e os triggers da 007)
+    for table in ('funnels', 'pages', 'utms'):
+        cursor.execute(f'''
+            UPDATE {table} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)
+            WHERE updated_at IS NULL
+        ''')
+        for event in ('INSERT', 'UPDATE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_updated_at_not_null_{event.lower()}
+                BEFORE {event} ON {table}
+                WHEN NEW.updated_at IS NULL
+                BEGIN
+                    SELECT RAISE(ABORT, 'NOT NULL constraint failed: {table}.updated_at');
+                END
+            ''')
+
+
+# (número, descrição, função) em ordem; o número vira o PRAGMA user_version
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, 'schema inicial', _m001_initial_schema),
+    (2, 'coluna whatsapp em users', _m002_users_whatsapp),
+    (3, 'sessões e rate limit no banco', _m003_shared_sessions),
+    (4, 'coluna version em funnels, pages e utms', _m004_resource_versions),
+    (5, 'índices da paginação por keyset', _m005_keyset_indexes),
+    (6, 'colunas de resumo do funil', _m006_funnel_summary),
+    (7, 'change_log e triggers do feed de eventos', _m007_change_log),
+    (8, 'elementos e conexões do funil por linha', _m008_funnel_graph_rows),
+    (9, 'updated_at sem NULL (chave da paginação)', _m009_keyset_not_null),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+assert [number for number, _, _ in MIGRATIONS] == list(range(1, LATEST_VERSION + 1)), \
+    'Migrações devem ser numeradas em sequência a partir de 1'
+
+
+def schema_version(conn) -> int:
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(database) -> List[int]:
+    """
+    Aplica as migrações pendentes no banco do Database
+
+    Returns:
+        Números das migrações aplicadas (vazio com o schema em dia)
+    """
+    conn = database.get_connection()
+    try:
+        version = schema_version(conn)
+    finally:
+        conn.close()
+
+    if version > LATEST_VERSION:
+        print(f"⚠️ Banco na versão {version}, mais nova que a deste código ({LATEST_VERSION})")
+    if version >= LATEST_VERSION:
+        return []
+
+    applied = []
+    with database.connection(write=True) as conn:
+        cursor = conn.cursor()
+        # Outro processo pode ter migrado enquanto esperávamos o lock
+        version = schema_version(cursor)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        for number, name, apply in MIGRATIONS:
+            if number <= version:
+                continue
+            apply(cursor)
+            cursor.execute('INSERT OR REPLACE INTO schema_migrations (version, name) VALUES (?, ?)',
+                           (number, name))
+            print(f"✅ Migração {number:03d} aplicada: {name}")
+            applied.append(number)
+
+        if applied:
+            cursor.execute(f'PRAGMA user_version = {LATEST_VERSION}')
+    return applied
+
+
+def drop_legacy_graph_columns(database) -> List[str]:
+    """
+    Remove de funnels as colunas elements/connections substituídas na migração 008
+
+    Não roda no start: depois disso a versão anterior do código não sobe mais
+    com este banco. Rodar à mão quando não houver mais volta
+    (python migrations.py funnel_builder.db --drop-legacy-graph).
+
+    Returns:
+        Colunas removidas (vazio se já não existiam ou se o SQLite não tem DROP COLUMN)
+    """
+    if sqlite3.sqlite_version_info < (3, 35, 0):
+        print(f"⚠️ SQLite {sqlite3.sqlite_version} sem DROP COLUMN (3.35+): colunas mantidas")
+        return []
+
+    with database.connection(write=True) as conn:
+        cursor = conn.cursor()
+        if schema_version(cursor) < 8:
+            raise RuntimeError('Migração 008 ainda não aplicada: as colunas ainda são a fonte dos dados')
+        legacy = [field for field in GRAPH_TABLES if field in _columns(cursor, 'funnels')]
+        for field in legacy:
+            cursor.execute(f'ALTER TABLE funnels DROP COLUMN {field}')
+    return legacy
+
+
+if __name__ == '__main__':
+    import sys
+    from database import Database
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    target = Database(args[0] if args else 'test_funnel.db')
+    conn = target.get_connection()
+    print(f"📦 Versão do schema: {schema_version(conn)} (código: {LATEST_VERSION})")
+    for row in conn.execute('SELECT version, name, applied_at FROM schema_migrations ORDER BY version'):
+        print(f"   {row['version']:03d} {row['name']} ({row['applied_at']})")
+    conn.close()
+
+    print(f"✅ Segunda execução aplica: {migrate(target)}")
+
+    if '--drop-legacy-graph' in sys.argv:
+        print(f"🗑️ Colunas antigas removidas de funnels: {drop_legacy_graph_columns(target)}")
@@ -3,7 +3,7 @@ Models module for Funnel Builder
 Define classes User e Funnel com métodos convenientes
 """
 
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from database import db
 
 
@@ -55,13 +55,40 @@ class User:
 
     def get_funnels(self) -> List['Funnel']:
         """Retorna todos os funis deste usuário"""
-        funnels_data = db.get_funnels_by_user(self.id)
-        return [Funnel.from_dict(data) for data in funnels_data]
+        return list(self.iter_funnels())
+
+    def iter_funnels(self, raw_json: bool = False, after: Optional[Tuple] = None,
+                     limit: Optional[int] = None) -> Iterator['Funnel']:
+        """
+        Gera os funis deste usuário um por vez (para respostas em streaming)
+
+        raw_json=True mantém elements/connections como RawJSON: só para
+        serializar na resposta, não para ler ou alterar. after/limit
+        paginam por (updated_at, id).
+        """
+        for data in self.iter_funnel_dicts(raw_json, after=after, limit=limit):
+            yield Funnel.from_dict(data)
+
+    def iter_funnel_dicts(self, raw_json: bool = False, after: Optional[Tuple] = None,
+                          limit: Optional[int] = None) -> Iterator[Dict]:
+        """Como iter_funnels, mas já no formato de Funnel.to_dict (sem criar objetos)"""
+        return db.iter_funnels_by_user(self.id, raw_json, after=after, limit=limit)
+
+    def iter_funnel_fields(self, fields: Tuple[str, ...], after: Optional[Tuple] = None,
+                           limit: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Gera os funis deste usuário só com os campos pedidos (Funnel.parse_fields)
+
+        Cada item traz também id e updatedAt; use Funnel.project para
+        deixar só os campos pedidos na resposta.
+        """
+        return db.iter_funnel_fields(self.id, fields, raw_json=True, after=after, limit=limit)
 
     def create_funnel(self, name: str, icon: str = '🚀',
-                     elements: List = None, connections: List = None) -> 'Funnel':
+                     elements: List = None, connections: List = None,
+                     simulated_revenue: float = None) -> 'Funnel':
         """Cria um novo funil para este usuário"""
-        funnel_id = db.create_funnel(self.id, name, icon, elements, connections)
+        funnel_id = db.create_funnel(self.id, name, icon, elements, connections, simulated_revenue)
         return Funnel(funnel_id, self.id, name, icon, elements or [], connections or [])
 
     def to_dict(self) -> Dict:
@@ -81,6 +108,10 @@ class User:
 class Funnel:
     """Classe que representa um funil de vendas"""
 
+    # ?view=summary: o que o dashboard mostra, sem elements/connections
+    SUMMARY_FIELDS = ('id', 'name', 'icon', 'elementCount', 'connectionCount',
+                      'simulatedRevenue', 'createdAt', 'updatedAt')
+
     def __init__(self, funnel_id: int, user_id: int, name: str, icon: str = '🚀',
                  elements: List = None, connections: List = None,
                  created_at: str = None, updated_at: str = None):
@@ -94,13 +125,55 @@ class Funnel:
         self.updated_at = updated_at
 
     @staticmethod
-    def get_by_id(funnel_id: int, user_id: int) -> Optional['Funnel']:
-        """Busca funil por ID (valida ownership)"""
-        funnel_data = db.get_funnel_by_id(funnel_id, user_id)
+    def get_by_id(funnel_id: int, user_id: int, raw_json: bool = False) -> Optional['Funnel']:
+        """Busca funil por ID (valida ownership; raw_json como em User.iter_funnels)"""
+        funnel_data = db.get_funnel_by_id(funnel_id, user_id, raw_json)
         if funnel_data:
             return Funnel.from_dict(funnel_data)
         return None
 
+    @staticmethod
+    def parse_fields(query: Optional[Dict]) -> Optional[Tuple[str, ...]]:
+        """
+        Campos pedidos em ?fields=a,b ou ?view=summary|full
+
+        Returns:
+            None para o funil completo (to_dict) ou a tupla de campos, com id
+            sempre primeiro. Levanta ValueError para campo ou view desconhecidos.
+        """
+        query = query or {}
+        fields_param = query.get('fields')
+        view = query.get('view', 'full')
+
+        if fields_param:
+            fields = ['id']
+            for field in fields_param.split(','):
+                field = field.strip()
+                if not field:
+                    continue
+                if field not in db.FUNNEL_FIELDS:
+                    raise ValueError(f'Campo desconhecido em fields: {field}')
+                if field not in fields:
+                    fields.append(field)
+            return tuple(fields)
+
+        if view == 'summary':
+            return Funnel.SUMMARY_FIELDS
+        if view != 'full':
+            raise ValueError('view deve ser summary ou full')
+        return None
+
+    @staticmethod
+    def get_fields(funnel_id: int, user_id: int, fields: Tuple[str, ...]) -> Optional[Dict]:
+        """Busca funil por ID só com os campos pedidos (já projetado)"""
+        data = db.get_funnel_fields(funnel_id, user_id, fields, raw_json=True)
+        return Funnel.project(data, fields) if data else None
+
+    @staticmethod
+    def project(data: Dict, fields: Tuple[str, ...]) -> Dict:
+        """Mantém só os campos pedidos, na ordem pedida"""
+        return {field: data[field] for field in fields}
+
     @staticmethod
     def from_dict(data: Dict) -> 'Funnel':
         """Cria instância de Funnel a partir de dicionário"""
@@ -116,15 +189,17 @@ class Funnel:
         )
 
     def update(self, name: str = None, icon: str = None,
-              elements: List = None, connections: List = None) -> bool:
-        """Atualiza o funil no banco"""
+              elements: List = None, connections: List = None,
+              simulated_revenue: float = None) -> bool:
+        """Atualiza o funil no banco (simulated_revenue: receita simulada no editor)"""
         success = db.update_funnel(
             funnel_id=self.id,
             user_id=self.user_id,
             name=name,
             icon=icon,
             elements=elements,
-            connections=connections
+            connections=connections,
+            simulated_revenue=simulated_revenue
         )
 
         if success:
@@ -140,6 +215,18 @@ class Funnel:
 
         return success
 
+    @staticmethod
+    def patch(funnel_id: int, user_id: int, operations: List = None, items: Dict = None,
+              name: str = None, icon: str = None, simulated_revenue: float = None) -> bool:
+        """
+        Altera parte de um funil sem carregá-lo (JSON Patch ou diff compacto, ver funnel_patch.py)
+
+        Returns:
+            False se o funil não existe; levanta PatchError se o patch não se aplica
+        """
+        return db.patch_funnel(funnel_id, user_id, operations=operations, items=items,
+                               name=name, icon=icon, simulated_revenue=simulated_revenue)
+
     def delete(self) -> bool:
         """Deleta o funil do banco"""
         return db.delete_funnel(self.id, self.user_id)
@@ -0,0 +1,152 @@
+"""
+Paginação para Funnel Builder
+Paginação por keyset (updated_at, id) ou (date, id) com cursores opacos:
+cada página é uma busca no índice composto, não importa quantas linhas
+o usuário já percorreu
+"""
+
+import base64
+import binascii
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from json_codec import json_codec
+
+
+# Tamanho de página quando o cliente manda só ?cursor=, e o máximo aceito em ?limit=
+PAGE_DEFAULT_LIMIT = int(os.getenv('PAGE_DEFAULT_LIMIT', '50'))
+PAGE_MAX_LIMIT = int(os.getenv('PAGE_MAX_LIMIT', '200'))
+
+
+def encode_cursor(scope: str, key: Tuple) -> str:
+    """
+    Cursor opaco para a próxima página
+
+    Args:
+        scope: listagem de origem ('funnels', 'pages'...), para um cursor
+               de uma listagem não ser aceito em outra
+        key: (valor de ordenação, id) da última linha entregue
+    """
+    raw = json_codec.dumps([scope, *key])
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(scope: str, cursor: str) -> Tuple:
+    """
+    Volta o cursor para (valor de ordenação, id)
+
+    Levanta ValueError (vira 400) se o cursor foi adulterado ou é de outra listagem.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json_codec.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError, binascii.Error):
+        raise ValueError('Cursor inválido')
+
+    # A chave de ordenação é texto (datas), mas um updated_at importado pode
+    # ser número; NULL não existe (migração 009)
+    if (not isinstance(data, list) or len(data) != 3 or data[0] != scope
+            or not isinstance(data[1], (str, int, float)) or isinstance(data[1], bool)
+            or not isinstance(data[2], int) or isinstance(data[2], bool)):
+        raise ValueError('Cursor inválido')
+    return data[1], data[2]
+
+
+class PageRequest:
+    """Parâmetros ?limit= e ?cursor= de uma listagem"""
+
+    def __init__(self, scope: str, limit: Optional[int], after: Optional[Tuple]):
+        self.scope = scope
+        self.limit = limit
+        self.after = after
+
+    @property
+    def active(self) -> bool:
+        """Sem limit nem cursor a listagem continua devolvendo tudo"""
+        return self.limit is not None
+
+    @property
+    def fetch_limit(self) -> Optional[int]:
+        """Uma linha a mais que a página: se ela vier, existe próxima página"""
+        return self.limit + 1 if self.active else None
+
+    @classmethod
+    def from_query(cls, scope: str, query: Optional[Dict]) -> 'PageRequest':
+        """
+        Lê limit/cursor da query string
+
+        Levanta ValueError se limit não for inteiro entre 1 e PAGE_MAX_LIMIT.
+        """
+        query = query or {}
+        limit = query.get('limit')
+        cursor = query.get('cursor')
+
+        if limit is None and not cursor:
+            return cls(scope, None, None)
+
+        if limit is None:
+            limit = PAGE_DEFAULT_LIMIT
+        else:
+            try:
+                limit = int(limit)
+            except (TypeError, ValueError):
+                raise ValueError('limit deve ser um número inteiro')
+            if not 1 <= limit <= PAGE_MAX_LIMIT:
+                raise ValueError(f'limit deve estar entre 1 e {PAGE_MAX_LIMIT}')
+
+        after = decode_cursor(scope, cursor) if cursor else None
+        return cls(scope, limit, after)
+
+
+class KeysetPage:
+    """
+    Corta as linhas do banco (buscadas com fetch_limit) no tamanho da página
+
+    Guarda a chave da última linha entregue para gerar o next_cursor, que
+    só é lido depois que a lista foi escrita na resposta:
+    {'pages': page, 'next_cursor': Lazy(page.next_cursor)}
+    """
+
+    def __init__(self, request: PageRequest, rows: Iterable[Dict],
+                 key: Callable[[Dict], Tuple]):
+        self.request = request
+        self.rows = rows
+        self.key = key
+        self.last_key = None
+        self.has_more = False
+
+    def __iter__(self) -> Iterator[Dict]:
+        for count, row in enumerate(self.rows):
+            if self.request.active and count == self.request.limit:
+                # Linha extra: só confirma que há mais; o gerador do banco é fechado
+                self.has_more = True
+                close = getattr(self.rows, 'close', None)
+                if close is not None:
+                    close()
+                return
+            self.last_key = self.key(row)
+            yield row
+
+    def next_cursor(self) -> Optional[str]:
+        """Cursor da página seguinte (None na última página)"""
+        if not self.has_more or self.last_key is None:
+            return None
+        return encode_cursor(self.request.scope, self.last_key)
+
+
+if __name__ == '__main__':
+    token = encode_cursor('funnels', ('2024-01-01 10:00:00', 42))
+    print("Cursor:", token)
+    print("Decodificado:", decode_cursor('funnels', token))
+
+    for bad in (token + 'x', 'nada', encode_cursor('pages', ('2024-01-01', 1))):
+        try:
+            decode_cursor('funnels', bad)
+            print("❌ Cursor inválido aceito:", bad)
+        except ValueError:
+            print("✅ Rejeitado:", bad)
+
+    request = PageRequest.from_query('funnels', {'limit': '2'})
+    rows = ({'id': i, 'updated_at': f'2024-01-0{i}'} for i in range(5, 0, -1))
+    page = KeysetPage(request, rows, key=lambda r: (r['updated_at'], r['id']))
+    print("Página:", [r['id'] for r in page], "próximo:", page.next_cursor())
@@ -0,0 +1,454 @@
+"""
+Thread Pool Server para Funnel Builder
+Servidor HTTP com pool limitado de workers e fila de conexões pendentes
+"""
+
+import queue
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from http.server import HTTPServer
+
+from json_codec import json_codec
+
+
+# Segundos lendo (e descartando) o que o cliente ainda envia depois do 503,
+# para o close não virar um reset que apaga a resposta
+REJECT_LINGER = 2.0
+
+
+class _Rejection:
+    """Conexão recusada: lê o que já chegou, responde 503 e fecha sem reset"""
+
+    def __init__(self, sock: socket.socket, response: bytes, deadline: float):
+        self.sock = sock
+        self.response = response
+        self.deadline = deadline
+        self.answered = False
+
+    def on_readable(self) -> bool:
+        """Returns: True quando a conexão terminou"""
+        try:
+            data = self.sock.recv(64 * 1024)
+        except BlockingIOError:
+            return False
+        except OSError:
+            return True
+        if not self.answered:
+            self.answer()
+            return False
+        return not data
+
+    def answer(self):
+        """Envia o 503 e fecha o lado de escrita; o resto do pedido é descartado"""
+        self.answered = True
+        self.deadline = time.monotonic() + REJECT_LINGER
+        try:
+            self.sock.send(self.response)
+            self.sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
+class _IdleReactor:
+    """
+    Thread única com um selector para as conexões que não estão em requisição
+
+    - conexões novas esperam aqui o primeiro byte
+    - conexões keep-alive ociosas (handler estacionado) esperam a próxima requisição
+    - conexões recusadas leem o pedido, recebem o 503 e fecham
+
+    Só quando chega dado a conexão entra na fila do pool: ociosidade custa um
+    descritor no selector, não uma thread.
+    """
+
+    def __init__(self, server: 'ThreadPoolHTTPServer'):
+        self.server = server
+        self.selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self.selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+        # Pedidos de outras threads, aplicados na thread do reactor
+        self._incoming = deque()
+        self._draining = False
+        self._stopped = False
+        # sock -> [entrada, prazo]; entrada = (sock, addr), handler ou _Rejection
+        self._entries = {}
+        self.idle = 0
+        self.idle_closed = 0
+
+        self.thread = threading.Thread(target=self._loop, name='http-idle', daemon=True)
+        self.thread.start()
+
+    # ==================== CHAMADO DE OUTRAS THREADS ====================
+
+    def _submit(self, command):
+        self._incoming.append(command)
+        try:
+            self._wake_w.send(b'\0')
+        except OSError:
+            pass  # buffer cheio: o reactor já vai acordar
+
+    def add_new(self, request, client_address):
+        self._submit(('new', (request, client_address)))
+
+    def add_parked(self, handler):
+        self._submit(('parked', handler))
+
+    def add_rejection(self, request):
+        self._submit(('reject', request))
+
+    def drain(self):
+        """Servidor encerrando: despacha o que já tem requisição, fecha o resto"""
+        self._submit(('drain', None))
+
+    def stop(self):
+        self._submit(('stop', None))
+        self.thread.join(timeout=5)
+
+    # ==================== THREAD DO REACTOR ====================
+
+    def _loop(self):
+        while not self._stopped:
+            now = time.monotonic()
+            deadlines = [deadline for _, deadline in self._entries.values()]
+            timeout = max(0.0, min(deadlines) - now) if deadlines else None
+            for key, _ in self.selector.select(min(timeout, 1.0) if timeout is not None else 1.0):
+                if key.fileobj is self._wake_r:
+                    try:
+                        self._wake_r.recv(4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self._on_readable(key.fileobj)
+
+            while self._incoming:
+                self._apply(*self._incoming.popleft())
+
+            now = time.monotonic()
+            for sock, (entry, deadline) in list(self._entries.items()):
+                if deadline <= now:
+                    self._expire(sock, entry)
+
+        for sock, (entry, _) in list(self._entries.items()):
+            self._close(sock, entry, timed_out=False)
+        self.selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _apply(self, command, item):
+        if command == 'stop':
+            self._stopped = True
+        elif command == 'drain':
+            self._draining = True
+            for sock, (entry, _) in list(self._entries.items()):
+                if isinstance(entry, _Rejection):
+                    continue
+                self._forget(sock)
+                if self._has_data(sock):
+                    self._dispatch(sock, entry)
+                else:
+                    self._close(sock, entry, timed_out=False)
+        elif command == 'reject':
+            item.setblocking(False)
+            rejection = _Rejection(item, self.server.reject_response(),
+                                   time.monotonic() + REJECT_LINGER)
+            self._watch(item, rejection, rejection.deadline)
+        else:
+            sock = item[0] if command == 'new' else item.request
+            if self._draining or self._stopped:
+                # Chegou depois do drain: só é atendido se já mandou a requisição
+                if self._has_data(sock):
+                    self._dispatch(sock, item)
+                else:
+                    self._close(sock, item, timed_out=False)
+                return
+            if self._watch(sock, item, time.monotonic() + self.server.idle_timeout):
+                self.idle += 1
+
+    def _watch(self, sock, entry, deadline: float) -> bool:
+        try:
+            self.selector.register(sock, selectors.EVENT_READ)
+        except (ValueError, OSError):
+            # Socket já fechado pelo cliente
+            self._close(sock, entry, timed_out=False)
+            return False
+        self._entries[sock] = [entry, deadline]
+        return True
+
+    def _forget(self, sock):
+        entry = self._entries.pop(sock, None)
+        if entry is not None and not isinstance(entry[0], _Rejection):
+            self.idle -= 1
+        try:
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+
+    def _on_readable(self, sock):
+        entry = self._entries.get(sock, (None,))[0]
+        if entry is None:
+            return
+        if isinstance(entry, _Rejection):
+            if entry.on_readable():
+                self._forget(sock)
+                self.server.shutdown_request(sock)
+            return
+        self._forget(sock)
+        self._dispatch(sock, entry)
+
+    def _dispatch(self, sock, entry):
+        """Chegou a requisição: a conexão vai para a fila do pool"""
+        if not self.server.enqueue(entry):
+            # Pool saturado: a requisição recebe 503 (lida antes, sem reset)
+            if not isinstance(entry, tuple):
+                entry.close_parked(timed_out=False)
+            sock.setblocking(False)
+            rejection = _Rejection(sock, self.server.reject_response(),
+                                   time.monotonic() + REJECT_LINGER)
+            rejection.answer()
+            self._watch(sock, rejection, rejection.deadline)
+
+    def _expire(self, sock, entry):
+        if isinstance(entry, _Rejection):
+            if not entry.answered:
+                entry.answer()
+                self._entries[sock][1] = entry.deadline
+                return
+            self._forget(sock)
+            self.server.shutdown_request(sock)
+            return
+        self._close(sock, entry, timed_out=True)
+
+    def _close(self, sock, entry, timed_out: bool):
+        self._forget(sock)
+        self.idle_closed += 1
+        if not isinstance(entry, (tuple, _Rejection)):
+            entry.close_parked(timed_out=timed_out)
+        self.server.shutdown_request(sock)
+
+    @staticmethod
+    def _has_data(sock) -> bool:
+        # Com timeout o socket espera dados antes do recv, mesmo com MSG_DONTWAIT
+        previous = sock.gettimeout()
+        sock.settimeout(0)
+        try:
+            return bool(sock.recv(1, socket.MSG_PEEK))
+        except BlockingIOError:
+            return False
+        except OSError:
+            return True  # erro/EOF: o worker descobre e fecha
+        finally:
+            sock.settimeout(previous)
+
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """
+    HTTPServer que atende conexões em um pool fixo de threads
+
+    O accept continua na thread principal. Conexão sem requisição pendente
+    (recém-aceita ou keep-alive entre requisições) espera no selector de uma
+    thread separada; quando chega dado ela entra em uma fila limitada e é
+    processada pelo primeiro worker livre. Quando a fila está cheia o
+    servidor responde 503 com Retry-After, em vez de deixar o cliente
+    esperando atrás de requisições lentas.
+
+    Handlers que estacionam a conexão entre requisições (FunnelBuilderHandler)
+    marcam parked=True ao sair e implementam resume() e close_parked().
+    """
+
+    # Backlog do listen() no kernel
+    request_queue_size = 128
+
+    # Handlers consultam para decidir se estacionam conexões ociosas
+    parks_idle_connections = True
+    # Handler com detached=True ficou com o socket (ex.: stream SSE): o worker não fecha
+    detaches_connections = True
+
+    def __init__(self, server_address, handler_class, workers: int = 16,
+                 queue_size: int = 64, retry_after: int = 1, bind_and_activate: bool = True,
+                 max_idle_connections: int = 1024):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.retry_after = retry_after
+        self.max_idle_connections = max_idle_connections
+        # Prazo de ociosidade (sem requisição) = timeout do handler (keep-alive)
+        self.idle_timeout = getattr(handler_class, 'timeout', None) or 5.0
+
+        self._pending = queue.Queue(maxsize=self.queue_size)
+        self._threads = []
+        self._stats_lock = threading.Lock()
+        self._busy = 0
+        self._rejected = 0
+
+        # Ligado durante o encerramento: handlers passam a responder com
+        # Connection: close em vez de manter o keep-alive
+        self.draining = False
+
+        super().__init__(server_address, handler_class, bind_and_activate)
+
+        self._reactor = _IdleReactor(self)
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f'http-worker-{i}')
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def process_request(self, request, client_address):
+        """Conexão aceita espera o primeiro byte no selector (ou vai direto, drenando)"""
+        if self.draining:
+            if not self.enqueue((request, client_address)):
+                self._reject(request)
+        elif self._reactor.idle >= self.max_idle_connections:
+            self._reject(request)
+        else:
+            self._reactor.add_new(request, client_address)
+
+    def enqueue(self, item) -> bool:
+        """Coloca na fila do pool uma conexão com requisição; False se saturado"""
+        try:
+            self._pending.put_nowait(item)
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            return False
+        return True
+
+    def park(self, handler) -> bool:
+        """
+        Handler keep-alive ocioso sai do worker e espera no selector
+
+        Returns:
+            False se não cabe (limite de ociosas ou drenando): o handler fecha
+        """
+        if self.draining or self._reactor.idle >= self.max_idle_connections:
+            return False
+        self._reactor.add_parked(handler)
+        return True
+
+    def _worker_loop(self):
+        """Loop de cada worker: processa conexões até receber sentinela"""
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+
+            handler = None
+            with self._stats_lock:
+                self._busy += 1
+            try:
+                if isinstance(item, tuple):
+                    request, client_address = item
+                    handler = self.RequestHandlerClass(request, client_address, self)
+                else:
+                    handler = item
+                    request, client_address = handler.request, handler.client_address
+                    handler.resume()
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                if getattr(handler, 'parked', False):
+                    if not self.park(handler):
+                        handler.close_parked(timed_out=False)
+                        self.shutdown_request(request)
+                elif not getattr(handler, 'detached', False):
+                    # detached: outro componente ficou com o socket (SSE)
+                    self.shutdown_request(request)
+                with self._stats_lock:
+                    self._busy -= 1
+
+    def reject_response(self) -> bytes:
+        body = json_codec.dumps({
+            'error': 'Servidor sobrecarregado. Tente novamente em instantes.'
+        })
+
+        return (
+            'HTTP/1.1 503 Service Unavailable\r\n'
+            'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Retry-After: {self.retry_after}\r\n'
+            'Connection: close\r\n'
+            '\r\n'
+        ).encode('latin-1') + body
+
+    def _reject(self, request):
+        """
+        Responde 503 sem ocupar um worker
+
+        O selector lê o pedido antes de responder e descarta o resto depois:
+        fechar com dados não lidos faz o kernel mandar RST, e o cliente
+        perde o 503 (connection reset).
+        """
+        with self._stats_lock:
+            self._rejected += 1
+        self._reactor.add_rejection(request)
+
+    def drain(self, timeout: float) -> bool:
+        """
+        Espera as conexões enfileiradas e em atendimento terminarem
+
+        Chamado depois de sair do serve_forever(): nenhuma conexão nova é
+        aceita, as ociosas fecham e as que estão em requisição fecham ao
+        fim da requisição atual.
+
+        Returns:
+            False se o prazo acabou com conexões ainda em andamento
+        """
+        self.draining = True
+        self._reactor.drain()
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._stats_lock:
+                idle = self._busy == 0 and self._pending.qsize() == 0
+            if idle:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def get_stats(self) -> dict:
+        """Retorna estatísticas do pool"""
+        with self._stats_lock:
+            return {
+                'workers': self.workers,
+                'busy_workers': self._busy,
+                'queued': self._pending.qsize(),
+                'queue_size': self.queue_size,
+                'rejected': self._rejected,
+                'idle_connections': self._reactor.idle,
+                'idle_closed': self._reactor.idle_closed
+            }
+
+    def server_close(self):
+        """Fecha o socket e encerra os workers"""
+        super().server_close()
+        self._reactor.stop()
+        for _ in self._threads:
+            self._pending.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+
+def drain_listen_backlog(httpd):
+    """
+    Atende as conexões que já estavam na fila do kernel antes de fechar o socket
+
+    Com SO_REUSEPORT cada processo tem sua própria fila de accept; fechar o
+    socket com conexões pendentes faz o kernel resetá-las. Usado ao encerrar
+    um worker (reload gradual) depois de sair do serve_forever().
+    """
+    # Encerrando: as conexões vão direto para a fila, sem esperar no selector
+    httpd.draining = True
+    httpd.socket.setblocking(False)
+    while True:
+        try:
+            request, client_address = httpd.socket.accept()
+        except OSError:
+            break
+        request.setblocking(True)
+        httpd.process_request(request, client_address)
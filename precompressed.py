@@ -0,0 +1,137 @@
+"""
+Precompressed para Funnel Builder
+Corpos de resposta estáticos codificados uma única vez (identity, gzip, deflate)
+com ETag forte por variante e negociação via Accept-Encoding
+"""
+
+import gzip
+import hashlib
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+
+# Ordem de preferência quando o cliente aceita mais de uma codificação com o mesmo q
+ENCODING_PREFERENCE = ('gzip', 'deflate', 'identity')
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    Converte 'gzip;q=1.0, deflate;q=0.5, *;q=0' em {'gzip': 1.0, 'deflate': 0.5, '*': 0.0}
+    Valores de q inválidos são tratados como 0 (codificação recusada)
+    """
+    accepted: Dict[str, float] = {}
+    if not header:
+        return accepted
+
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+
+    return accepted
+
+
+def choose_encoding(header: Optional[str], available=ENCODING_PREFERENCE) -> Optional[str]:
+    """
+    Escolhe a melhor codificação disponível para o Accept-Encoding do cliente
+
+    Returns:
+        nome da codificação, ou None se o cliente recusou todas (inclusive identity)
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*')
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = accepted.get(encoding, wildcard)
+        if q is None:
+            # identity é aceita por padrão (com a menor prioridade); as demais só se pedidas
+            q = 0.001 if encoding == 'identity' else 0.0
+        if q > best_q:
+            best, best_q = encoding, q
+
+    return best
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara If-None-Match (lista ou '*') com um ETag (comparação fraca, RFC 7232)"""
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == '*':
+        return True
+
+    bare = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+class PrecompressedBody:
+    """
+    Corpo estático mantido em memória já codificado em cada variante
+
+    Cada variante tem seu próprio ETag forte (a mesma representação
+    comprimida de formas diferentes não é byte a byte igual).
+    """
+
+    def __init__(self, content: bytes, content_type: str, level: int = 9):
+        self.content_type = content_type
+        digest = hashlib.sha256(content).hexdigest()[:20]
+
+        self.variants: Dict[str, Tuple[bytes, str]] = {
+            'identity': (content, f'"{digest}"'),
+            'gzip': (gzip.compress(content, compresslevel=level, mtime=0), f'"{digest}-gz"'),
+            'deflate': (zlib.compress(content, level), f'"{digest}-df"'),
+        }
+
+        # Não vale a pena servir uma variante comprimida maior que o original
+        for encoding in ('gzip', 'deflate'):
+            if len(self.variants[encoding][0]) >= len(content):
+                del self.variants[encoding]
+
+    @property
+    def encodings(self) -> List[str]:
+        return [e for e in ENCODING_PREFERENCE if e in self.variants]
+
+    def select(self, accept_encoding: Optional[str]) -> Optional[Tuple[str, bytes, str]]:
+        """
+        Returns:
+            (codificação, corpo, etag) ou None se nenhuma variante é aceitável
+        """
+        encoding = choose_encoding(accept_encoding, self.encodings)
+        if encoding is None:
+            return None
+        body, etag = self.variants[encoding]
+        return encoding, body, etag
+
+    def get_stats(self) -> Dict[str, int]:
+        """Tamanho em bytes de cada variante"""
+        return {encoding: len(body) for encoding, (body, _) in self.variants.items()}
+
+
+if __name__ == '__main__':
+    page = PrecompressedBody(('<p>Funnel Builder</p>' * 500).encode('utf-8'), 'text/html; charset=utf-8')
+    print("Variantes:", page.get_stats())
+
+    for header in ('gzip, deflate, br', 'deflate', 'gzip;q=0, deflate;q=0.5', 'identity;q=0, *;q=0', None):
+        selected = page.select(header)
+        print(f"{header!r:35} -> {selected[0] if selected else '406'}")
+
+    _, _, etag = page.select('gzip')
+    print("If-None-Match bate:", etag_matches(f'"outro", {etag}', etag))
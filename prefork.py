@@ -0,0 +1,234 @@
+"""
+Prefork Supervisor para Funnel Builder
+Mantém N processos worker escutando a mesma porta (SO_REUSEPORT)
+"""
+
+import os
+import select
+import signal
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Pipe de "pronto" repassado ao worker iniciado por exec
+WORKER_READY_FD_ENV = 'FUNNEL_PREFORK_READY_FD'
+
+
+def _ready_callback(write_fd: int) -> Callable[[], None]:
+    """ready() do worker: escreve no pipe que o supervisor espera"""
+    def ready():
+        try:
+            os.write(write_fd, b'1')
+            os.close(write_fd)
+        except OSError:
+            pass
+    return ready
+
+
+def exec_worker_ready() -> Optional[Callable[[], None]]:
+    """
+    No processo worker iniciado por exec: o callback ready() do supervisor
+
+    Returns:
+        None quando este processo não é um worker do prefork
+    """
+    fd = os.environ.pop(WORKER_READY_FD_ENV, None)
+    if fd is None:
+        return None
+    return _ready_callback(int(fd))
+
+
+class PreforkSupervisor:
+    """
+    Supervisor de workers pré-forkados
+
+    Cada worker abre seu próprio socket na porta com SO_REUSEPORT; o kernel
+    distribui as conexões entre eles. O supervisor:
+    - recria workers que morrem inesperadamente
+    - SIGHUP (ou SIGUSR2): reload gradual (sobe o substituto, espera ficar
+      pronto, encerra o antigo)
+    - SIGTERM/SIGINT: encerra todos os workers e sai
+
+    Com exec_argv cada worker é um processo novo (fork + exec do comando),
+    que importa o código do disco: o reload depois de um deploy sobe a
+    versão nova. Sem exec_argv o worker é só um fork do supervisor e roda
+    worker_main com o código já carregado nele.
+    """
+
+    def __init__(self, worker_main: Callable[[Callable[[], None]], None], workers: int,
+                 stop_timeout: float = 30, ready_timeout: float = 10,
+                 exec_argv: Optional[List[str]] = None):
+        """
+        Args:
+            worker_main: função executada no processo filho; recebe um callback
+                ready() que deve ser chamado quando o socket estiver escutando
+            workers: número de processos
+            stop_timeout: segundos esperando um worker encerrar antes do SIGKILL
+            ready_timeout: segundos esperando um worker novo ficar pronto no reload
+            exec_argv: comando do worker ([executável, args...]); o processo
+                iniciado chama exec_worker_ready() e depois o mesmo worker_main
+        """
+        self.worker_main = worker_main
+        self.exec_argv = exec_argv
+        self.num_workers = max(1, workers)
+        self.stop_timeout = stop_timeout
+        self.ready_timeout = ready_timeout
+
+        self.workers: Dict[int, int] = {}  # slot -> pid
+        self.restarts = 0
+        self._stopping = False
+        self._reload_requested = False
+
+    # ==================== SINAIS ====================
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _on_reload(self, signum, frame):
+        # SIGUSR2 (handoff do modo de processo único) vira reload gradual aqui:
+        # o supervisor não troca de processo, só os workers
+        self._reload_requested = True
+
+    # ==================== WORKERS ====================
+
+    def _spawn(self, slot: int) -> Tuple[int, bool]:
+        """
+        Cria um worker e espera ele sinalizar que está escutando
+
+        Returns:
+            (pid, pronto): pronto=False se ele morreu ou estourou ready_timeout
+        """
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+
+        if pid == 0:
+            # Processo filho (sinais ignorados continuam ignorados depois do exec;
+            # SIGUSR2 é do supervisor, mas pgrep -f também acha os workers)
+            os.close(read_fd)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGUSR2, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+            exit_code = 0
+            try:
+                if self.exec_argv:
+                    os.set_inheritable(write_fd, True)
+                    env = dict(os.environ, **{WORKER_READY_FD_ENV: str(write_fd)})
+                    os.execve(self.exec_argv[0], self.exec_argv, env)
+                self.worker_main(_ready_callback(write_fd))
+            except Exception as e:
+                print(f"❌ Worker {slot} (pid {os.getpid()}) falhou: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        # Processo supervisor
+        os.close(write_fd)
+        ready = self._wait_ready(read_fd)
+        self.workers[slot] = pid
+        return pid, ready
+
+    def _wait_ready(self, read_fd: int) -> bool:
+        """Bloqueia até o worker escrever no pipe (ou timeout/morte)"""
+        try:
+            readable, _, _ = select.select([read_fd], [], [], self.ready_timeout)
+            # EOF sem o byte de pronto = o worker morreu antes de subir
+            return bool(readable) and os.read(read_fd, 1) == b'1'
+        finally:
+            os.close(read_fd)
+
+    def _stop_worker(self, pid: int):
+        """Envia SIGTERM e espera o worker sair (SIGKILL após o timeout)"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+
+        deadline = time.time() + self.stop_timeout
+        while time.time() < deadline:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if done:
+                return
+            time.sleep(0.1)
+
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+
+    def _reap(self):
+        """Recolhe workers mortos e recria os que saíram sem pedido"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            slot = next((s for s, p in self.workers.items() if p == pid), None)
+            if slot is None:
+                continue
+
+            del self.workers[slot]
+            if not self._stopping:
+                self.restarts += 1
+                print(f"⚠️ Worker {slot} (pid {pid}) saiu com status {status}; reiniciando")
+                self._spawn(slot)
+
+    def _rolling_reload(self):
+        """
+        Substitui os workers um de cada vez, sem deixar a porta sem ninguém
+
+        Se um worker novo não fica pronto (ex.: erro de import no código
+        novo), o reload para ali e os workers antigos continuam atendendo.
+        """
+        print("🔄 Reload gradual dos workers...")
+        for slot in sorted(self.workers):
+            old_pid = self.workers[slot]
+            new_pid, ready = self._spawn(slot)
+            if not ready:
+                print(f"❌ Worker novo do slot {slot} (pid {new_pid}) não ficou pronto; "
+                      f"reload interrompido, mantendo os workers atuais")
+                self.workers[slot] = old_pid
+                self._stop_worker(new_pid)
+                return
+            self._stop_worker(old_pid)
+        print("✅ Reload concluído")
+
+    # ==================== LOOP PRINCIPAL ====================
+
+    def run(self):
+        """Sobe os workers e supervisiona até SIGTERM/SIGINT"""
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        signal.signal(signal.SIGUSR2, self._on_reload)
+
+        for slot in range(self.num_workers):
+            self._spawn(slot)
+        print(f"👷 {self.num_workers} workers ativos: {sorted(self.workers.values())}")
+
+        while not self._stopping:
+            if self._reload_requested:
+                self._reload_requested = False
+                self._rolling_reload()
+            self._reap()
+            time.sleep(0.2)
+
+        print("\n🛑 Encerrando workers...")
+        for pid in list(self.workers.values()):
+            self._stop_worker(pid)
+        self.workers.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            'workers': self.num_workers,
+            'pids': sorted(self.workers.values()),
+            'restarts': self.restarts
+        }
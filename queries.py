@@ -0,0 +1,109 @@
+"""
+Consultas compiladas para Funnel Builder
+Mapeamento de linhas por tabela e texto SQL montado uma vez por variante
+
+Cada RowMapping declara as colunas lidas e a chave de cada uma na saída; a
+row factory gerada monta o dict final direto da tupla do SQLite, em uma
+passada, sem sqlite3.Row intermediário nem cópia campo a campo depois. As
+listagens repassam esse dict para a resposta como está.
+
+O texto das consultas sai de funções com cache: o mesmo filtro gera sempre
+a mesma string, que o cache de statements da conexão (persistente, ver
+ConnectionPool) reaproveita já preparada.
+"""
+
+import sqlite3
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+
+class RowMapping:
+    """
+    Colunas de uma tabela -> dict de saída
+
+    Args:
+        table: tabela consultada
+        fields: (chave de saída, coluna) na ordem do SELECT
+        convert: {chave: função} aplicada ao valor da coluna (ex.: JSON)
+        computed: (chave, função(dict)) calculadas depois das colunas, na ordem dada
+    """
+
+    def __init__(self, table: str, fields: Sequence[Tuple[str, str]],
+                 convert: Optional[Dict[str, Callable[[Any], Any]]] = None,
+                 computed: Sequence[Tuple[str, Callable[[Dict], Any]]] = ()):
+        self.table = table
+        self.fields = tuple(fields)
+        self.columns = ', '.join(column for _, column in self.fields)
+        self.factory = self._compile(convert or {}, computed)
+
+    def _compile(self, convert: Dict[str, Callable], computed: Sequence[Tuple[str, Callable]]):
+        # Gera "def row(cursor, r): d = {'id': r[0], 'tags': _c6(r[6]), ...}":
+        # um literal de dict com índices fixos é o jeito mais barato de montar a saída
+        namespace = {}
+        items = []
+        for index, (key, _) in enumerate(self.fields):
+            if key in convert:
+                namespace[f'_c{index}'] = convert[key]
+                items.append(f'{key!r}: _c{index}(r[{index}])')
+            else:
+                items.append(f'{key!r}: r[{index}]')
+
+        lines = ['def row(cursor, r):', f"    d = {{{', '.join(items)}}}"]
+        for index, (key, fn) in enumerate(computed):
+            namespace[f'_f{index}'] = fn
+            lines.append(f'    d[{key!r}] = _f{index}(d)')
+        lines.append('    return d')
+
+        exec('\n'.join(lines), namespace)
+        return namespace['row']
+
+
+@lru_cache(maxsize=256)
+def select_sql(mapping: RowMapping, where: Tuple[str, ...], order: Optional[str] = None,
+               after: bool = False, limit: bool = False) -> str:
+    """
+    SELECT das colunas do mapping com os filtros dados (unidos por AND)
+
+    order liga a paginação por keyset, em ordem (order, id) decrescente:
+    after acrescenta a comparação por row value com a chave da última linha
+    da página anterior (uma busca no índice composto, não importa quantas
+    páginas já foram percorridas) e limit o LIMIT. Os parâmetros vêm na
+    mesma ordem: filtros, chave (2 valores), limite.
+    """
+    query = f"SELECT {mapping.columns} FROM {mapping.table} WHERE {' AND '.join(where)}"
+    if order is not None:
+        if after:
+            query += f' AND ({order}, id) < (?, ?)'
+        query += f' ORDER BY {order} DESC, id DESC'
+    if limit:
+        query += ' LIMIT ?'
+    return query
+
+
+def keyset_params(params: list, after: Optional[Tuple] = None, limit: Optional[int] = None) -> list:
+    """Completa os parâmetros de select_sql(..., after=..., limit=...)"""
+    if after is not None:
+        params.extend(after)
+    if limit is not None:
+        params.append(limit)
+    return params
+
+
+if __name__ == '__main__':
+    mapping = RowMapping('pages', [('id', 'id'), ('name', 'name'), ('tags', 'tags')],
+                         convert={'tags': lambda v: v.split(',') if v else []},
+                         computed=[('name_length', lambda d: len(d['name']))])
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE pages (id INTEGER PRIMARY KEY, user_id INTEGER, name TEXT, '
+                 'tags TEXT, updated_at TEXT)')
+    conn.execute("INSERT INTO pages VALUES (1, 1, 'Landing', 'a,b', '2024-01-01')")
+    conn.execute("INSERT INTO pages VALUES (2, 1, 'Checkout', NULL, '2024-01-02')")
+
+    query = select_sql(mapping, ('user_id = ?',), 'updated_at', after=True, limit=True)
+    print("SQL:", query)
+    print("Mesmo texto em cache:", query is select_sql(mapping, ('user_id = ?',), 'updated_at',
+                                                       after=True, limit=True))
+
+    cursor = conn.cursor()
+    cursor.row_factory = mapping.factory
+    print("Linhas:", cursor.execute(query, keyset_params([1], ('2024-01-03', 99), 10)).fetchall())
@@ -6,47 +6,19 @@ Protege contra ataques de força bruta e DDoS
 import time
 from collections import defaultdict
 from threading import Lock
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List, Optional
 
 
-class RateLimiter:
-    """Rate limiter usando sliding window algorithm"""
+class MemoryAttemptStore:
+    """Tentativas em memória do processo (sliding window em listas)"""
 
     def __init__(self):
         # IP/Identifier -> lista de timestamps
         self.attempts: Dict[str, list] = defaultdict(list)
         self.lock = Lock()
 
-        # Configurações por tipo de ação
-        self.limits = {
-            'login': {'max_attempts': 5, 'window': 300},      # 5 tentativas em 5 minutos
-            'register': {'max_attempts': 3, 'window': 600},   # 3 tentativas em 10 minutos
-            'api': {'max_attempts': 100, 'window': 60},       # 100 requisições por minuto
-            'api_write': {'max_attempts': 30, 'window': 60},  # 30 escritas por minuto
-        }
-
-    def is_allowed(self, identifier: str, action: str = 'api') -> Tuple[bool, int]:
-        """
-        Verifica se a requisição é permitida
-
-        Args:
-            identifier: IP ou user_id do cliente
-            action: Tipo de ação ('login', 'register', 'api', 'api_write')
-
-        Returns:
-            (allowed, remaining_attempts)
-        """
+    def hit(self, key: str, max_attempts: int, window: int, now: float) -> Tuple[bool, int]:
         with self.lock:
-            now = time.time()
-
-            # Obtém limites para esta ação
-            config = self.limits.get(action, self.limits['api'])
-            max_attempts = config['max_attempts']
-            window = config['window']
-
-            # Cria chave única por ação
-            key = f"{identifier}:{action}"
-
             # Remove tentativas antigas (fora da janela)
             self.attempts[key] = [
                 timestamp for timestamp in self.attempts[key]
@@ -69,6 +41,105 @@ class RateLimiter:
             remaining = max_attempts - current_attempts - 1
             return True, remaining
 
+    def oldest(self, key: str) -> Optional[float]:
+        with self.lock:
+            if key not in self.attempts or not self.attempts[key]:
+                return None
+            return min(self.attempts[key])
+
+    def reset(self, key: str = None, prefix: str = None):
+        with self.lock:
+            if key is not None:
+                if key in self.attempts:
+                    del self.attempts[key]
+            elif prefix is not None:
+                keys_to_remove = [k for k in self.attempts.keys() if k.startswith(prefix)]
+                for k in keys_to_remove:
+                    del self.attempts[k]
+
+    def cleanup(self, cutoff: float):
+        with self.lock:
+            # Remove entradas completamente expiradas
+            for key in list(self.attempts.keys()):
+                self.attempts[key] = [
+                    timestamp for timestamp in self.attempts[key]
+                    if timestamp > cutoff
+                ]
+
+                # Remove chave se não há mais tentativas
+                if not self.attempts[key]:
+                    del self.attempts[key]
+
+    def keys(self) -> List[str]:
+        with self.lock:
+            return list(self.attempts.keys())
+
+
+class DatabaseAttemptStore:
+    """
+    Tentativas na tabela rate_limit_hits do SQLite
+
+    Usado quando vários processos atendem a mesma porta, para que o limite
+    valha para o cliente e não para cada worker isoladamente.
+    """
+
+    def __init__(self, database):
+        self.db = database
+
+    def hit(self, key: str, max_attempts: int, window: int, now: float) -> Tuple[bool, int]:
+        return self.db.rate_limit_hit(key, max_attempts, window, now)
+
+    def oldest(self, key: str) -> Optional[float]:
+        return self.db.rate_limit_oldest(key)
+
+    def reset(self, key: str = None, prefix: str = None):
+        self.db.rate_limit_reset(key=key, prefix=prefix)
+
+    def cleanup(self, cutoff: float):
+        self.db.rate_limit_cleanup(cutoff)
+
+    def keys(self) -> List[str]:
+        return self.db.rate_limit_keys()
+
+
+class RateLimiter:
+    """Rate limiter usando sliding window algorithm"""
+
+    def __init__(self, store=None):
+        # Onde as tentativas ficam guardadas (memória por padrão)
+        self.store = store or MemoryAttemptStore()
+
+        # Configurações por tipo de ação
+        self.limits = {
+            'login': {'max_attempts': 5, 'window': 300},      # 5 tentativas em 5 minutos
+            'register': {'max_attempts': 3, 'window': 600},   # 3 tentativas em 10 minutos
+            'api': {'max_attempts': 100, 'window': 60},       # 100 requisições por minuto
+            'api_write': {'max_attempts': 30, 'window': 60},  # 30 escritas por minuto
+        }
+
+    def use_shared_store(self, database):
+        """Passa a guardar tentativas no banco (compartilhadas entre processos)"""
+        self.store = DatabaseAttemptStore(database)
+
+    def is_allowed(self, identifier: str, action: str = 'api') -> Tuple[bool, int]:
+        """
+        Verifica se a requisição é permitida
+
+        Args:
+            identifier: IP ou user_id do cliente
+            action: Tipo de ação ('login', 'register', 'api', 'api_write')
+
+        Returns:
+            (allowed, remaining_attempts)
+        """
+        # Obtém limites para esta ação
+        config = self.limits.get(action, self.limits['api'])
+
+        # Cria chave única por ação
+        key = f"{identifier}:{action}"
+
+        return self.store.hit(key, config['max_attempts'], config['window'], time.time())
+
     def get_retry_after(self, identifier: str, action: str = 'api') -> int:
         """
         Retorna tempo em segundos até poder tentar novamente
@@ -76,63 +147,43 @@ class RateLimiter:
         Returns:
             Segundos até próxima tentativa permitida
         """
-        with self.lock:
-            key = f"{identifier}:{action}"
-            config = self.limits.get(action, self.limits['api'])
-
-            if key not in self.attempts or not self.attempts[key]:
-                return 0
+        key = f"{identifier}:{action}"
+        config = self.limits.get(action, self.limits['api'])
 
-            now = time.time()
-            oldest = min(self.attempts[key])
-            retry_after = int(config['window'] - (now - oldest))
+        oldest = self.store.oldest(key)
+        if oldest is None:
+            return 0
 
-            return max(0, retry_after)
+        retry_after = int(config['window'] - (time.time() - oldest))
+        return max(0, retry_after)
 
     def reset(self, identifier: str, action: str = None):
         """
         Reseta o rate limit para um identifier
         Útil após login bem-sucedido
         """
-        with self.lock:
-            if action:
-                key = f"{identifier}:{action}"
-                if key in self.attempts:
-                    del self.attempts[key]
-            else:
-                # Remove todos os limites para este identifier
-                keys_to_remove = [k for k in self.attempts.keys() if k.startswith(f"{identifier}:")]
-                for key in keys_to_remove:
-                    del self.attempts[key]
+        if action:
+            self.store.reset(key=f"{identifier}:{action}")
+        else:
+            # Remove todos os limites para este identifier
+            self.store.reset(prefix=f"{identifier}:")
 
     def cleanup_old_entries(self):
         """
         Remove entradas antigas para economizar memória
         Deve ser executado periodicamente
         """
-        with self.lock:
-            now = time.time()
-            max_window = max(config['window'] for config in self.limits.values())
-
-            # Remove entradas completamente expiradas
-            for key in list(self.attempts.keys()):
-                self.attempts[key] = [
-                    timestamp for timestamp in self.attempts[key]
-                    if now - timestamp < max_window
-                ]
-
-                # Remove chave se não há mais tentativas
-                if not self.attempts[key]:
-                    del self.attempts[key]
+        max_window = max(config['window'] for config in self.limits.values())
+        self.store.cleanup(time.time() - max_window)
 
     def get_stats(self) -> Dict:
         """Retorna estatísticas do rate limiter"""
-        with self.lock:
-            return {
-                'total_tracked_ips': len(set(k.split(':')[0] for k in self.attempts.keys())),
-                'total_entries': len(self.attempts),
-                'limits': self.limits
-            }
+        keys = self.store.keys()
+        return {
+            'total_tracked_ips': len(set(k.split(':')[0] for k in keys)),
+            'total_entries': len(keys),
+            'limits': self.limits
+        }
 
 
 # Instância global
@@ -0,0 +1,181 @@
+"""
+Router para Funnel Builder
+Tabela de rotas declarativa compilada em uma trie de segmentos do path
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _int_converter(value: str) -> Optional[int]:
+    """Aceita apenas dígitos ASCII (evita '١٢', '+5', ' 7' etc.)"""
+    if value.isascii() and value.isdigit():
+        return int(value)
+    return None
+
+
+def _str_converter(value: str) -> Optional[str]:
+    return value
+
+
+CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    'int': _int_converter,
+    'str': _str_converter,
+}
+
+
+class Route:
+    """Uma rota registrada: método + padrão + handler + opções de middleware"""
+
+    def __init__(self, method: str, pattern: str, handler: Callable, auth=True,
+                 rate_limit: str = None, body: bool = False, admission=None, name: str = None):
+        """
+        Args:
+            method: GET, POST, PUT, DELETE...
+            pattern: ex '/api/pages/{id:int}/metrics'
+            handler: função(ctx) -> (status, payload[, headers])
+            auth: True (obrigatório), 'optional', 'ticket' (obrigatório, aceitando
+                  também ?ticket= de uso único, para o EventSource) ou False
+            rate_limit: ação do rate_limiter ('login', 'api_write'...) ou None
+            body: True para ler o corpo JSON antes do handler
+            admission: classe do controle de admissão ('auth', 'read', 'write'),
+                False para não passar pelo controle; padrão: 'read' para GET,
+                'write' para os demais métodos
+        """
+        self.method = method
+        self.pattern = pattern
+        self.handler = handler
+        self.auth = auth
+        self.rate_limit = rate_limit
+        self.body = body
+        if admission is None:
+            admission = 'read' if method == 'GET' else 'write'
+        self.admission = admission
+        self.name = name or handler.__name__
+
+    def __repr__(self):
+        return f"<Route({self.method} {self.pattern} -> {self.name})>"
+
+
+class RequestContext:
+    """Dados de uma requisição já roteada, passados aos middlewares e handlers"""
+
+    def __init__(self, method: str, path: str, params: Dict, query: Dict, headers,
+                 client_ip: str, read_body: Callable[[], Dict], handler=None):
+        self.method = method
+        self.path = path
+        self.params = params
+        self.query = query
+        self.headers = headers
+        self.client_ip = client_ip
+        self.user_agent = headers.get('User-Agent', '') if headers is not None else ''
+        self.read_body = read_body
+        self.handler = handler  # handler HTTP bruto (para rotas que precisam do socket)
+
+        self.token: Optional[str] = None
+        self.user = None
+        self.body: Dict = {}
+
+
+class _Node:
+    """Nó da trie: filhos estáticos por segmento, filhos parametrizados e rotas por método"""
+
+    __slots__ = ('static', 'params', 'routes')
+
+    def __init__(self):
+        self.static: Dict[str, '_Node'] = {}
+        self.params: List[Tuple[str, Callable, '_Node']] = []
+        self.routes: Dict[str, Route] = {}
+
+
+class Router:
+    """
+    Registro de rotas com matching por trie
+
+    O custo do match depende do número de segmentos do path, não do número
+    de rotas. Segmentos estáticos têm prioridade sobre parâmetros, então
+    '/api/pages/tests/{id:int}' convive com '/api/pages/{id:int}'.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.routes: List[Route] = []
+
+    @staticmethod
+    def _split(path: str) -> List[str]:
+        return [segment for segment in path.split('/') if segment]
+
+    def add(self, method: str, pattern: str, handler: Callable, **options) -> Route:
+        """Registra uma rota"""
+        route = Route(method, pattern, handler, **options)
+        node = self.root
+
+        for segment in self._split(pattern):
+            if segment.startswith('{') and segment.endswith('}'):
+                name, _, converter_name = segment[1:-1].partition(':')
+                converter = CONVERTERS[converter_name or 'str']
+                child = next((n for p, c, n in node.params if p == name and c is converter), None)
+                if child is None:
+                    child = _Node()
+                    node.params.append((name, converter, child))
+                node = child
+            else:
+                node = node.static.setdefault(segment, _Node())
+
+        if method in node.routes:
+            raise ValueError(f'Rota duplicada: {method} {pattern}')
+
+        node.routes[method] = route
+        self.routes.append(route)
+        return route
+
+    def route(self, method: str, pattern: str, **options):
+        """Decorator: @router.route('GET', '/api/funnels')"""
+        def decorator(handler):
+            self.add(method, pattern, handler, **options)
+            return handler
+        return decorator
+
+    def _find(self, node: _Node, segments: List[str], index: int, params: Dict) -> Optional[_Node]:
+        if index == len(segments):
+            return node if node.routes else None
+
+        segment = segments[index]
+
+        child = node.static.get(segment)
+        if child is not None:
+            found = self._find(child, segments, index + 1, params)
+            if found is not None:
+                return found
+
+        for name, converter, child in node.params:
+            value = converter(segment)
+            if value is None:
+                continue
+            params[name] = value
+            found = self._find(child, segments, index + 1, params)
+            if found is not None:
+                return found
+            del params[name]
+
+        return None
+
+    def match(self, method: str, path: str) -> Tuple[Optional[Route], Dict, List[str]]:
+        """
+        Encontra a rota para método + path (sem query string)
+
+        Returns:
+            (route ou None, params, métodos permitidos no path)
+            Path inexistente ou com parâmetro inválido ('/api/funnels/abc')
+            retorna lista de métodos vazia (404); método errado retorna os
+            métodos aceitos (405).
+        """
+        params: Dict = {}
+        node = self._find(self.root, self._split(path), 0, params)
+        if node is None:
+            return None, {}, []
+
+        route = node.routes.get(method)
+        if route is None:
+            return None, {}, sorted(node.routes)
+
+        return route, params, sorted(node.routes)
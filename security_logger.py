@@ -3,12 +3,17 @@ Security Logger para Funnel Builder
 Registra eventos de segurança em formato estruturado (JSON)
 """
 
+import atexit
 import logging
-import json
+import logging.handlers
 import os
+import queue
+import time
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, Optional
 
+from json_codec import json_codec
+
 
 class SecurityLogger:
     """Logger especializado para eventos de segurança"""
@@ -38,14 +43,56 @@ class SecurityLogger:
         formatter = logging.Formatter('%(message)s')
         file_handler.setFormatter(formatter)
 
-        self.logger.addHandler(file_handler)
+        self.handlers = [file_handler]
 
         # Também loga no console em desenvolvimento
         if not os.path.exists('/app/data'):
             console_handler = logging.StreamHandler()
             console_handler.setLevel(logging.WARNING)
             console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
+            self.handlers.append(console_handler)
+
+        # A requisição só enfileira o evento; a escrita em disco fica com o listener
+        self.queue = queue.Queue()
+        self.queue_handler = logging.handlers.QueueHandler(self.queue)
+        self.logger.addHandler(self.queue_handler)
+        self.listener = None
+        self._start_listener()
+
+        # Threads não sobrevivem ao fork: cada worker do prefork sobe seu listener
+        os.register_at_fork(after_in_child=self._restart_after_fork)
+        atexit.register(self.stop)
+
+    def _start_listener(self):
+        self.listener = logging.handlers.QueueListener(
+            self.queue, *self.handlers, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def _restart_after_fork(self):
+        """No processo filho: fila nova (os eventos herdados já são do pai) e listener novo"""
+        self.queue = queue.Queue()
+        self.queue_handler.queue = self.queue
+        self._start_listener()
+
+    def queue_depth(self) -> int:
+        """Eventos aguardando gravação em disco"""
+        return self.queue.qsize()
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Espera o listener gravar os eventos pendentes (True se a fila esvaziou)"""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def stop(self):
+        """Grava o que estiver na fila e encerra o listener"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
 
     def _log_event(self, event_type: str, level: str, data: Dict[str, Any]):
         """
@@ -64,7 +111,7 @@ class SecurityLogger:
         }
 
         # Serializa para JSON
-        json_line = json.dumps(log_entry, ensure_ascii=False)
+        json_line = json_codec.dumps_str(log_entry)
 
         # Escolhe método de log baseado no level
         if level == 'INFO':
@@ -248,6 +295,8 @@ class SecurityLogger:
         Returns:
             Lista de eventos (dicionários)
         """
+        self.flush()
+
         try:
             events = []
 
@@ -261,12 +310,12 @@ class SecurityLogger:
                         break
 
                     try:
-                        event = json.loads(line.strip())
+                        event = json_codec.loads(line.strip())
 
                         # Filtra por tipo se especificado
                         if event_type is None or event.get('event_type') == event_type:
                             events.append(event)
-                    except json.JSONDecodeError:
+                    except ValueError:
                         continue
 
             return events
@@ -285,6 +334,8 @@ class SecurityLogger:
         Returns:
             Número de falhas
         """
+        self.flush()
+
         try:
             cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=minutes)
             count = 0
@@ -292,7 +343,7 @@ class SecurityLogger:
             with open(self.log_file, 'r', encoding='utf-8') as f:
                 for line in f:
                     try:
-                        event = json.loads(line.strip())
+                        event = json_codec.loads(line.strip())
 
                         if event.get('event_type') != 'login_failure':
                             continue
@@ -306,7 +357,7 @@ class SecurityLogger:
                         if event_time > cutoff_time:
                             count += 1
 
-                    except (json.JSONDecodeError, KeyError, ValueError):
+                    except (KeyError, ValueError):
                         continue
 
             return count
@@ -0,0 +1,61 @@
+"""
+Server Metrics para Funnel Builder
+Contadores de conexões e requisições (thread-safe, por processo)
+"""
+
+import time
+from threading import Lock
+from typing import Dict
+
+
+class ServerMetrics:
+    """Contadores simples de acesso do servidor HTTP"""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.started_at = time.time()
+        self.counters: Dict[str, int] = {
+            'connections_opened': 0,
+            'connections_closed': 0,
+            'requests': 0,
+            'requests_reused_connection': 0,
+            'idle_timeouts': 0,
+            'header_timeouts': 0,
+            'body_timeouts': 0,
+            'max_requests_closes': 0,
+        }
+
+    def increment(self, name: str, amount: int = 1):
+        """Incrementa um contador (cria se não existir)"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_connection_opened(self):
+        self.increment('connections_opened')
+
+    def record_connection_closed(self):
+        self.increment('connections_closed')
+
+    def record_request(self, reused: bool):
+        """Registra uma requisição; reused=True se veio em conexão keep-alive já usada"""
+        with self.lock:
+            self.counters['requests'] += 1
+            if reused:
+                self.counters['requests_reused_connection'] += 1
+
+    def get_stats(self) -> Dict:
+        """Retorna cópia dos contadores com alguns valores derivados"""
+        with self.lock:
+            stats = dict(self.counters)
+
+        stats['connections_active'] = stats['connections_opened'] - stats['connections_closed']
+        stats['connection_reuse_ratio'] = (
+            round(stats['requests_reused_connection'] / stats['requests'], 3)
+            if stats['requests'] else 0
+        )
+        stats['uptime_seconds'] = int(time.time() - self.started_at)
+        return stats
+
+
+# Instância global
+server_metrics = ServerMetrics()
@@ -0,0 +1,81 @@
+"""
+Socket Deadline para Funnel Builder
+Leitura de socket com prazo total por fase da requisição (ociosa, cabeçalhos, corpo)
+"""
+
+import io
+import socket
+import time
+from typing import Optional
+
+
+class DeadlineSocketReader(io.RawIOBase):
+    """
+    Raw reader de socket usado como base do rfile do handler
+
+    O timeout do socket vale por recv(), então um cliente que manda um byte a
+    cada poucos segundos nunca estoura. Aqui cada fase tem um prazo total:
+
+    - idle: esperando o primeiro byte da próxima requisição (keep-alive)
+    - headers: do primeiro byte até o fim dos cabeçalhos
+    - body: leitura do corpo, iniciada explicitamente pelo handler
+
+    Estourar o prazo levanta TimeoutError, igual a um timeout de socket.
+    """
+
+    def __init__(self, sock: socket.socket, idle_timeout: Optional[float],
+                 header_timeout: Optional[float], body_timeout: Optional[float]):
+        super().__init__()
+        self.sock = sock
+        self.idle_timeout = idle_timeout
+        self.header_timeout = header_timeout
+        self.body_timeout = body_timeout
+        self.phase = 'idle'
+        self.deadline: Optional[float] = None
+        # Leitura sem esperar (o handler verifica se a próxima requisição já chegou)
+        self.nonblocking = False
+
+    def start_request(self):
+        """Próxima requisição da conexão: volta a esperar o primeiro byte"""
+        self.phase = 'idle'
+        self.deadline = None
+
+    def start_body(self):
+        """Cabeçalhos lidos: o corpo tem body_timeout segundos para chegar inteiro"""
+        self.phase = 'body'
+        self.deadline = time.monotonic() + self.body_timeout if self.body_timeout else None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> Optional[int]:
+        if self.nonblocking:
+            # Com timeout o socket espera dados antes do recv, mesmo com MSG_DONTWAIT
+            previous = self.sock.gettimeout()
+            self.sock.settimeout(0)
+            try:
+                return self.sock.recv_into(buffer)
+            except BlockingIOError:
+                return None
+            finally:
+                self.sock.settimeout(previous)
+
+        if self.phase == 'idle' or self.deadline is None:
+            timeout = self.idle_timeout
+        else:
+            timeout = self.deadline - time.monotonic()
+            if timeout <= 0:
+                raise TimeoutError(f'prazo de leitura ({self.phase}) excedido')
+
+        previous = self.sock.gettimeout()
+        self.sock.settimeout(timeout)
+        try:
+            n = self.sock.recv_into(buffer)
+        finally:
+            self.sock.settimeout(previous)
+
+        if self.phase == 'idle' and n:
+            self.phase = 'headers'
+            self.deadline = time.monotonic() + self.header_timeout if self.header_timeout else None
+
+        return n
@@ -0,0 +1,5059 @@
+        const { useState, useRef, useEffect } = React;
+
+        // ==================== API HELPERS ====================
+        const API_BASE = '';  // Mesmo domínio
+
+        // Helper para fazer chamadas autenticadas à API
+        const apiCall = async (endpoint, options = {}) => {
+            const token = localStorage.getItem('authToken');
+
+            const config = {
+                ...options,
+                headers: {
+                    'Content-Type': 'application/json',
+                    ...options.headers
+                }
+            };
+
+            // Adiciona token se existir
+            if (token) {
+                config.headers['Authorization'] = `Bearer ${token}`;
+            }
+
+            const response = await fetch(`${API_BASE}${endpoint}`, config);
+
+            // Se retornar 401 e tinha token, desloga
+            if (response.status === 401) {
+                // Se retornou 401 e não tem token, é normal (não está logado)
+                if (!token) {
+                    return response.json();
+                }
+
+                // Se tinha token, significa que expirou - desloga e recarrega
+                console.log('Token expirado, redirecionando para login...');
+                localStorage.removeItem('authToken');
+                localStorage.removeItem('currentUser');
+                window.location.reload();
+                return null;
+            }
+
+            return response.json();
+        };
+
+        // API: Buscar todos os funis (resumo: contagens e receita simulada, sem elements/connections)
+        const apiFetchFunnels = async () => {
+            return await apiCall('/api/funnels?view=summary');
+        };
+
+        // API: Criar funil
+        const apiCreateFunnel = async (funnelData) => {
+            return await apiCall('/api/funnels', {
+                method: 'POST',
+                body: JSON.stringify(funnelData)
+            });
+        };
+
+        // API: Atualizar funil
+        const apiUpdateFunnel = async (funnelId, funnelData) => {
+            return await apiCall(`/api/funnels/${funnelId}`, {
+                method: 'PUT',
+                body: JSON.stringify(funnelData)
+            });
+        };
+
+        // API: Salvar só o que mudou no funil (diff por id, ver diffFunnelItems)
+        const apiPatchFunnel = async (funnelId, changes) => {
+            return await apiCall(`/api/funnels/${funnelId}`, {
+                method: 'PATCH',
+                body: JSON.stringify(changes)
+            });
+        };
+
+        // Diff por id entre a lista salva no servidor e a atual: { upsert, delete }.
+        // O servidor mantém a posição dos itens alterados e põe os novos no fim,
+        // então devolve null (salvar a lista inteira) se a ordem mudou de outro
+        // jeito ou se algum item não tem id único.
+        const diffFunnelItems = (saved, current) => {
+            const savedIndex = new Map();
+            for (const [index, item] of saved.entries()) {
+                if (!item || item.id == null || savedIndex.has(item.id)) return null;
+                savedIndex.set(item.id, index);
+            }
+
+            const seen = new Set();
+            const upsert = [];
+            let lastKept = -1;
+            let added = false;
+            for (const item of current) {
+                if (!item || item.id == null || seen.has(item.id)) return null;
+                seen.add(item.id);
+                const index = savedIndex.get(item.id);
+                if (index === undefined) {
+                    added = true;
+                    upsert.push(item);
+                    continue;
+                }
+                // Item antigo depois de um novo, ou fora da ordem salva
+                if (added || index < lastKept) return null;
+                lastKept = index;
+                const previous = saved[index];
+                if (previous !== item && JSON.stringify(previous) !== JSON.stringify(item)) {
+                    upsert.push(item);
+                }
+            }
+
+            const removed = saved.filter(item => !seen.has(item.id)).map(item => item.id);
+            return { upsert, delete: removed };
+        };
+
+        // API: Deletar funil
+        const apiDeleteFunnel = async (funnelId) => {
+            return await apiCall(`/api/funnels/${funnelId}`, {
+                method: 'DELETE'
+            });
+        };
+
+        // API: Duplicar funil
+        const apiDuplicateFunnel = async (funnelId) => {
+            // Busca o funil original
+            const originalFunnel = await apiCall(`/api/funnels/${funnelId}`);
+
+            if (!originalFunnel || !originalFunnel.funnel) {
+                throw new Error('Funil não encontrado');
+            }
+
+            const funnel = originalFunnel.funnel;
+
+            // Cria cópia com novo nome
+            const copyName = `${funnel.name} (Cópia)`;
+
+            // Cria o novo funil
+            return await apiCall('/api/funnels', {
+                method: 'POST',
+                body: JSON.stringify({
+                    name: copyName,
+                    icon: funnel.icon,
+                    elements: funnel.elements,
+                    connections: funnel.connections
+                })
+            });
+        };
+
+        // API: Várias chamadas em uma requisição (token validado uma vez no servidor)
+        // Recebe [{ method, path, body }] e devolve o corpo de cada resposta, na ordem
+        const apiBatch = async (requests) => {
+            const data = await apiCall('/api/batch', {
+                method: 'POST',
+                body: JSON.stringify({ requests })
+            });
+            if (!data || !data.results) {
+                return requests.map(() => null);
+            }
+            return data.results.map(result => result.body);
+        };
+
+        // Feed de alterações (SSE /api/events): onChange recebe as alterações
+        // das entidades pedidas feitas em qualquer aba ou dispositivo. Um
+        // { action: 'reset' } significa que eventos se perderam: recarregar tudo.
+        const useChangeFeed = (entities, onChange) => {
+            const handlerRef = useRef(onChange);
+            handlerRef.current = onChange;
+
+            useEffect(() => {
+                if (!localStorage.getItem('authToken') || typeof EventSource === 'undefined') return;
+
+                let source = null;
+                let reconnectTimer = null;
+                let delay = 3000;
+                let lastEventId = null;
+                let stopped = false;
+                let pending = [];
+                let timer = null;
+
+                // Rajadas (ex: autosave de outra aba) viram uma única entrega
+                const schedule = (change) => {
+                    pending.push(change);
+                    if (timer) return;
+                    timer = setTimeout(() => {
+                        const changes = pending;
+                        pending = [];
+                        timer = null;
+                        handlerRef.current(changes);
+                    }, 300);
+                };
+
+                // O ticket vale uma conexão: cada reconexão pede outro, então a
+                // reconexão automática do EventSource (mesma URL) não serve
+                const reconnect = () => {
+                    if (source) source.close();
+                    source = null;
+                    if (stopped || reconnectTimer) return;
+                    const wait = delay + Math.random() * delay / 2;
+                    delay = Math.min(delay * 2, 60000);
+                    reconnectTimer = setTimeout(() => {
+                        reconnectTimer = null;
+                        connect();
+                    }, wait);
+                };
+
+                const connect = async () => {
+                    let data = null;
+                    try {
+                        data = await apiCall('/api/events/ticket', { method: 'POST' });
+                    } catch (error) {
+                        data = null;
+                    }
+                    if (stopped) return;
+                    if (!data || !data.ticket) {
+                        reconnect();
+                        return;
+                    }
+
+                    // EventSource não envia headers: a URL leva só o ticket de uso único
+                    let url = `${API_BASE}/api/events?ticket=${encodeURIComponent(data.ticket)}`;
+                    if (lastEventId) url += `&last_event_id=${encodeURIComponent(lastEventId)}`;
+                    source = new EventSource(url);
+
+                    source.addEventListener('change', (e) => {
+                        lastEventId = e.lastEventId || lastEventId;
+                        const change = JSON.parse(e.data);
+                        if (entities.includes(change.entity)) schedule(change);
+                    });
+                    source.addEventListener('reset', () => schedule({ action: 'reset' }));
+                    // Servidor sem vagas: espera o intervalo que ele pediu
+                    source.addEventListener('busy', (e) => {
+                        delay = JSON.parse(e.data).retry || delay;
+                    });
+                    source.onopen = () => { delay = 3000; };
+                    source.onerror = reconnect;
+                };
+
+                connect();
+
+                return () => {
+                    stopped = true;
+                    if (source) source.close();
+                    if (reconnectTimer) clearTimeout(reconnectTimer);
+                    if (timer) clearTimeout(timer);
+                };
+            }, [entities.join(',')]);
+        };
+
+        // ==================== FIM API HELPERS ====================
+
+        // Função para carregar configurações do sistema
+        const loadSystemConfig = () => {
+            const saved = localStorage.getItem('systemConfig');
+            if (saved) {
+                return JSON.parse(saved);
+            }
+            return null;
+        };
+
+        // Carrega configurações ou usa padrão
+        const systemConfig = loadSystemConfig();
+
+        // Componente de Ícone SVG Profissional
+        const Icon = ({ name, size = 16, stroke = 2, className = "" }) => {
+            const icons = {
+                target: <path d="M12 22c5.523 0 10-4.477 10-10S17.523 2 12 2 2 6.477 2 12s4.477 10 10 10z M12 16a4 4 0 1 0 0-8 4 4 0 0 0 0 8z M12 12h.01" />,
+                search: <path d="m21 21-6-6m2-5a7 7 0 1 1-14 0 7 7 0 0 1 14 0z" />,
+                facebook: <path d="M18 2h-3a5 5 0 0 0-5 5v3H7v4h3v8h4v-8h3l1-4h-4V7a1 1 0 0 1 1-1h3z" />,
+                repeat: <path d="m17 2 4 4-4 4 M3 11V9a4 4 0 0 1 4-4h14 M7 22l-4-4 4-4 M21 13v2a4 4 0 0 1-4 4H3" />,
+                rocket: <path d="M12 2c-4 8-8 12-8 12s4 4 12 4c0 0 4-8 4-12s-8-4-8-4z M8 12h8" />,
+                file: <path d="M14 2H6a2 2 0 0 0-2 2v16a2 2 0 0 0 2 2h12a2 2 0 0 0 2-2V8z M14 2v6h6 M16 13H8 M16 17H8 M10 9H8" />,
+                "file-edit": <path d="M4 13.5V4a2 2 0 0 1 2-2h8.5L20 7.5V20a2 2 0 0 1-2 2h-5.5 M14 2v6h6 M10.42 12.61a2.1 2.1 0 1 1 2.97 2.97L7.95 21 4 22l.99-3.95 5.43-5.44z" />,
+                video: <path d="m22 8-6 4 6 4V8z M16 8v8H4V8h12z M2 6h14v12H2z" />,
+                diamond: <path d="M2.7 10.3a2.41 2.41 0 0 0 0 3.41l7.59 7.59a2.41 2.41 0 0 0 3.41 0l7.59-7.59a2.41 2.41 0 0 0 0-3.41L13.7 2.71a2.41 2.41 0 0 0-3.41 0z" />,
+                "credit-card": <path d="M21 4H3a2 2 0 0 0-2 2v12a2 2 0 0 0 2 2h18a2 2 0 0 0 2-2V6a2 2 0 0 0-2-2z M1 10h22" />,
+                "party-popper": <path d="M5.8 11.3 2 22l10.7-3.79 M4 3h.01 M22 8h.01 M15 2h.01 M22 20h.01 M22 2l-2.24.75a2.9 2.9 0 0 0-1.96 3.12c.09.65.36 1.28.76 1.89l3.26 4.96c.39.6.66 1.23.75 1.88a2.9 2.9 0 0 1-1.96 3.12z M7 13.5l4-3.5" />,
+                gift: <path d="M20 12v10H4V12 M2 7h20v5H2z M12 22V7 M12 7H7.5a2.5 2.5 0 0 1 0-5C11 2 12 7 12 7z M12 7h4.5a2.5 2.5 0 0 0 0-5C13 2 12 7 12 7z" />,
+                "shopping-cart": <path d="M9 2 7.17 6H3a2 2 0 0 0-2 2v10a2 2 0 0 0 2 2h14a2 2 0 0 0 2-2V8a2 2 0 0 0-2-2h-4.17L11 2H9z M21 15H3 M9 11v6 M15 11v6" />,
+                mail: <path d="M22 6 12 13 2 6 M2 6v12a2 2 0 0 0 2 2h16a2 2 0 0 0 2-2V6a2 2 0 0 0-2-2H4a2 2 0 0 0-2 2z" />,
+                "mail-open": <path d="m22 13-9.5 5.5L3 13V6l9.5-4L22 6v7z M3 6l9 6 9-6" />,
+                "message-circle": <path d="M21 15a2 2 0 0 1-2 2H7l-4 4V5a2 2 0 0 1 2-2h14a2 2 0 0 1 2 2z" />,
+                smartphone: <path d="M17 2H7a2 2 0 0 0-2 2v16a2 2 0 0 0 2 2h10a2 2 0 0 0 2-2V4a2 2 0 0 0-2-2z M12 18h.01" />,
+                "bar-chart": <path d="M12 20V10 M18 20V4 M6 20v-4" />,
+                play: <path d="m6 4 14 8-14 8z" />,
+                phone: <path d="M22 16.92v3a2 2 0 0 1-2.18 2 19.79 19.79 0 0 1-8.63-3.07 19.5 19.5 0 0 1-6-6 19.79 19.79 0 0 1-3.07-8.67A2 2 0 0 1 4.11 2h3a2 2 0 0 1 2 1.72 12.84 12.84 0 0 0 .7 2.81 2 2 0 0 1-.45 2.11L8.09 9.91a16 16 0 0 0 6 6l1.27-1.27a2 2 0 0 1 2.11-.45 12.84 12.84 0 0 0 2.81.7A2 2 0 0 1 22 16.92z" />,
+                clock: <path d="M12 22c5.523 0 10-4.477 10-10S17.523 2 12 2 2 6.477 2 12s4.477 10 10 10z M12 6v6l4 2" />,
+                "trending-up": <path d="m23 6-9.5 9.5-5-5L1 18 M17 6h6v6" />,
+                "trending-down": <path d="M23 18 13.5 8.5l-5 5L1 6 M17 18h6v-6" />,
+                book: <path d="M4 19.5v-15A2.5 2.5 0 0 1 6.5 2H20v20H6.5a2.5 2.5 0 0 1 0-5H20" />,
+                zap: <path d="M13 2 3 14h8l-1 8 10-12h-8l1-8z" />
+            };
+
+            return (
+                <svg width={size} height={size} viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth={stroke} strokeLinecap="round" strokeLinejoin="round" className={className} style={{display: 'inline-block', verticalAlign: 'middle'}}>
+                    {icons[name] || icons.target}
+                </svg>
+            );
+        };
+
+        const ELEMENT_CATEGORIES_DEFAULT = [
+            {
+                name: 'Tráfego',
+                icon: 'target',
+                elements: [
+                    { type: 'google', name: 'Google Ads', icon: 'search', color: 'color-google' },
+                    { type: 'facebook', name: 'Facebook Ads', icon: 'facebook', color: 'color-facebook' },
+                    { type: 'trafego', name: 'Outros Tráfegos', icon: 'target', color: 'color-trafego' },
+                    { type: 'retargeting', name: 'Retargeting', icon: 'repeat', color: 'color-retargeting' }
+                ]
+            },
+            {
+                name: 'Páginas',
+                icon: 'file',
+                elements: [
+                    { type: 'landing', name: 'Landing Page', icon: 'rocket', color: 'color-landing' },
+                    { type: 'captura', name: 'Página de Captura', icon: 'file-edit', color: 'color-captura' },
+                    { type: 'vsl', name: 'VSL (Video Sales Letter)', icon: 'video', color: 'color-vsl' },
+                    { type: 'vendas', name: 'Página de Vendas', icon: 'diamond', color: 'color-vendas' },
+                    { type: 'checkout', name: 'Checkout', icon: 'credit-card', color: 'color-checkout' },
+                    { type: 'obrigado', name: 'Página Obrigado', icon: 'party-popper', color: 'color-obrigado' },
+                    { type: 'squeeze', name: 'Squeeze Page', icon: 'gift', color: 'color-squeeze' },
+                    { type: 'ecommerce', name: 'E-commerce', icon: 'shopping-cart', color: 'color-ecommerce' }
+                ]
+            },
+            {
+                name: 'Relacionamento',
+                icon: 'message-circle',
+                elements: [
+                    { type: 'email', name: 'Email', icon: 'mail', color: 'color-email' },
+                    { type: 'sequencia', name: 'Sequência Email', icon: 'mail-open', color: 'color-sequencia' },
+                    { type: 'whatsapp', name: 'WhatsApp', icon: 'smartphone', color: 'color-whatsapp' },
+                    { type: 'recuperacao', name: 'Recuperação de Carrinho', icon: 'shopping-cart', color: 'color-recuperacao' }
+                ]
+            },
+            {
+                name: 'Engajamento',
+                icon: 'zap',
+                elements: [
+                    { type: 'quiz', name: 'Quiz/Enquete', icon: 'bar-chart', color: 'color-quiz' },
+                    { type: 'video', name: 'Vídeo', icon: 'play', color: 'color-video' },
+                    { type: 'webinar', name: 'Webinar', icon: 'video', color: 'color-webinar' },
+                    { type: 'call', name: 'Call/Consulta', icon: 'phone', color: 'color-call' }
+                ]
+            },
+            {
+                name: 'Conversão',
+                icon: 'zap',
+                elements: [
+                    { type: 'countdown', name: 'Countdown', icon: 'clock', color: 'color-countdown' },
+                    { type: 'upsell', name: 'Upsell', icon: 'trending-up', color: 'color-upsell' },
+                    { type: 'downsell', name: 'Downsell', icon: 'trending-down', color: 'color-downsell' }
+                ]
+            },
+            {
+                name: 'Pós-Venda',
+                icon: 'gift',
+                elements: [
+                    { type: 'membros', name: 'Área de Membros', icon: 'book', color: 'color-membros' }
+                ]
+            }
+        ];
+
+        // Usa configurações personalizadas se existirem, senão usa padrão
+        const ELEMENT_CATEGORIES = systemConfig?.categories || ELEMENT_CATEGORIES_DEFAULT;
+        const ELEMENT_TYPES = ELEMENT_CATEGORIES.flatMap(cat => cat.elements);
+
+        // Mapeamento de cores padrão para cada tipo de elemento
+        const DEFAULT_COLORS = {
+            // Tráfego - Cores específicas por plataforma
+            'google': 'linear-gradient(135deg, #4285f4 0%, #34a853 100%)',
+            'facebook': 'linear-gradient(135deg, #1877f2 0%, #0a66c2 100%)',
+            'trafego': 'linear-gradient(135deg, #667eea 0%, #764ba2 100%)',
+            'retargeting': 'linear-gradient(135deg, #fc4a1a 0%, #f7b733 100%)',
+
+            // Páginas - Tons variados
+            'landing': 'linear-gradient(135deg, #f093fb 0%, #f5576c 100%)',
+            'captura': 'linear-gradient(135deg, #a8edea 0%, #fed6e3 100%)',
+            'vsl': 'linear-gradient(135deg, #43e97b 0%, #38f9d7 100%)',
+            'vendas': 'linear-gradient(135deg, #fa709a 0%, #fee140 100%)',
+            'checkout': 'linear-gradient(135deg, #30cfd0 0%, #330867 100%)',
+            'obrigado': 'linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%)',
+            'squeeze': 'linear-gradient(135deg, #ffeaa7 0%, #fdcb6e 100%)',
+            'ecommerce': 'linear-gradient(135deg, #f093fb 0%, #f5576c 100%)',
+
+            // Relacionamento - Azul/Roxo
+            'email': 'linear-gradient(135deg, #4facfe 0%, #00f2fe 100%)',
+            'sequencia': 'linear-gradient(135deg, #5f72bd 0%, #9b23ea 100%)',
+            'whatsapp': 'linear-gradient(135deg, #25d366 0%, #128c7e 100%)',
+            'recuperacao': 'linear-gradient(135deg, #ff6b6b 0%, #ffa502 100%)',
+
+            // Engajamento - Laranja/Amarelo
+            'quiz': 'linear-gradient(135deg, #ff9a56 0%, #ff6a88 100%)',
+            'video': 'linear-gradient(135deg, #43e97b 0%, #38f9d7 100%)',
+            'webinar': 'linear-gradient(135deg, #fa709a 0%, #fee140 100%)',
+            'call': 'linear-gradient(135deg, #2193b0 0%, #6dd5ed 100%)',
+
+            // Conversão - Verde/Amarelo
+            'countdown': 'linear-gradient(135deg, #ff6b6b 0%, #ee5a6f 100%)',
+            'upsell': 'linear-gradient(135deg, #a8edea 0%, #fed6e3 100%)',
+            'downsell': 'linear-gradient(135deg, #ffeaa7 0%, #fdcb6e 100%)',
+
+            // Pós-Venda - Roxo escuro
+            'membros': 'linear-gradient(135deg, #8e44ad 0%, #c0392b 100%)'
+        };
+
+        // Verifica se o texto é claro ou escuro para contraste
+        const needsDarkText = (color) => {
+            const lightBackgrounds = ['captura', 'obrigado', 'squeeze', 'upsell', 'downsell'];
+            return lightBackgrounds.includes(color);
+        };
+
+        // Paleta de cores predefinidas para seleção rápida
+        const COLOR_PALETTE = [
+            { name: 'Roxo Imperial', gradient: 'linear-gradient(135deg, #667eea 0%, #764ba2 100%)' },
+            { name: 'Laranja Quente', gradient: 'linear-gradient(135deg, #fc4a1a 0%, #f7b733 100%)' },
+            { name: 'Rosa Vibrante', gradient: 'linear-gradient(135deg, #f093fb 0%, #f5576c 100%)' },
+            { name: 'Ciano Suave', gradient: 'linear-gradient(135deg, #a8edea 0%, #fed6e3 100%)' },
+            { name: 'Verde Menta', gradient: 'linear-gradient(135deg, #43e97b 0%, #38f9d7 100%)' },
+            { name: 'Dourado Solar', gradient: 'linear-gradient(135deg, #fa709a 0%, #fee140 100%)' },
+            { name: 'Azul Oceano', gradient: 'linear-gradient(135deg, #30cfd0 0%, #330867 100%)' },
+            { name: 'Pêssego', gradient: 'linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%)' },
+            { name: 'Amarelo Brilhante', gradient: 'linear-gradient(135deg, #ffeaa7 0%, #fdcb6e 100%)' },
+            { name: 'Azul Claro', gradient: 'linear-gradient(135deg, #4facfe 0%, #00f2fe 100%)' },
+            { name: 'Roxo Místico', gradient: 'linear-gradient(135deg, #5f72bd 0%, #9b23ea 100%)' },
+            { name: 'Verde WhatsApp', gradient: 'linear-gradient(135deg, #25d366 0%, #128c7e 100%)' },
+            { name: 'Coral Tropical', gradient: 'linear-gradient(135deg, #ff9a56 0%, #ff6a88 100%)' },
+            { name: 'Azul Turquesa', gradient: 'linear-gradient(135deg, #2193b0 0%, #6dd5ed 100%)' },
+            { name: 'Vermelho Intenso', gradient: 'linear-gradient(135deg, #ff6b6b 0%, #ee5a6f 100%)' },
+            { name: 'Roxo Escuro', gradient: 'linear-gradient(135deg, #8e44ad 0%, #c0392b 100%)' },
+            { name: 'Verde Esmeralda', gradient: 'linear-gradient(135deg, #11998e 0%, #38ef7d 100%)' },
+            { name: 'Azul Índigo', gradient: 'linear-gradient(135deg, #4e54c8 0%, #8f94fb 100%)' }
+        ];
+
+        function LoginScreen({ onLogin }) {
+            const [email, setEmail] = useState('');
+            const [password, setPassword] = useState('');
+            const [name, setName] = useState('');
+            const [whatsapp, setWhatsapp] = useState('');
+            const [isRegister, setIsRegister] = useState(false);
+            const [loading, setLoading] = useState(false);
+            const [error, setError] = useState('');
+
+            const handleSubmit = async (e) => {
+                e.preventDefault();
+                setLoading(true);
+                setError('');
+
+                try {
+                    const endpoint = isRegister ? '/api/register' : '/api/login';
+                    const body = isRegister
+                        ? { email, password, name, whatsapp }
+                        : { email, password };
+
+                    const response = await fetch(endpoint, {
+                        method: 'POST',
+                        headers: {
+                            'Content-Type': 'application/json'
+                        },
+                        body: JSON.stringify(body)
+                    });
+
+                    const data = await response.json();
+
+                    if (data.success) {
+                        // Salva token e dados do usuário
+                        localStorage.setItem('authToken', data.token);
+                        localStorage.setItem('currentUser', JSON.stringify(data.user));
+                        onLogin();
+                    } else {
+                        setError(data.message || 'Erro ao fazer login');
+                    }
+                } catch (err) {
+                    setError('Erro ao conectar com o servidor');
+                    console.error('Erro:', err);
+                } finally {
+                    setLoading(false);
+                }
+            };
+
+            return (
+                <div className="login-container">
+                    <div className="login-card">
+                        <div className="login-header">
+                            <div className="login-logo">🚀</div>
+                            <h1 className="login-title">Funnel Builder</h1>
+                            <p className="login-subtitle">Construa funis de vendas de alta conversão</p>
+                        </div>
+
+                        {error && (
+                            <div style={{
+                                padding: '12px',
+                                marginBottom: '20px',
+                                background: '#fee',
+                                border: '1px solid #fcc',
+                                borderRadius: '8px',
+                                color: '#c33',
+                                fontSize: '14px'
+                            }}>
+                                ⚠️ {error}
+                            </div>
+                        )}
+
+                        <form className="login-form" onSubmit={handleSubmit}>
+                            {isRegister && (
+                                <>
+                                    <div className="login-input-group">
+                                        <label className="login-label" htmlFor="name">Nome</label>
+                                        <input
+                                            id="name"
+                                            type="text"
+                                            className="login-input"
+                                            placeholder="Seu nome completo"
+                                            value={name}
+                                            onChange={(e) => setName(e.target.value)}
+                                        />
+                                    </div>
+                                    <div className="login-input-group">
+                                        <label className="login-label" htmlFor="whatsapp">WhatsApp</label>
+                                        <input
+                                            id="whatsapp"
+                                            type="tel"
+                                            className="login-input"
+                                            placeholder="(11) 99999-9999"
+                                            value={whatsapp}
+                                            onChange={(e) => setWhatsapp(e.target.value)}
+                                            required
+                                        />
+                                        <small style={{ color: '#666', fontSize: '12px', marginTop: '4px' }}>
+                                            Formato: (DD) 9XXXX-XXXX
+                                        </small>
+                                    </div>
+                                </>
+                            )}
+                            <div className="login-input-group">
+                                <label className="login-label" htmlFor="email">Email</label>
+                                <input
+                                    id="email"
+                                    type="email"
+                                    className="login-input"
+                                    placeholder="seu@email.com"
+                                    value={email}
+                                    onChange={(e) => setEmail(e.target.value)}
+                                    required
+                                />
+                            </div>
+                            <div className="login-input-group">
+                                <label className="login-label" htmlFor="password">Senha</label>
+                                <input
+                                    id="password"
+                                    type="password"
+                                    className="login-input"
+                                    placeholder="••••••••"
+                                    value={password}
+                                    onChange={(e) => setPassword(e.target.value)}
+                                    required
+                                    minLength={6}
+                                />
+                                {isRegister && (
+                                    <small style={{ color: '#666', fontSize: '12px', marginTop: '4px' }}>
+                                        Mínimo de 6 caracteres
+                                    </small>
+                                )}
+                            </div>
+                            <button
+                                type="submit"
+                                className="login-button"
+                                disabled={loading}
+                                style={{ opacity: loading ? 0.6 : 1 }}
+                            >
+                                {loading ? '⏳ Aguarde...' : (isRegister ? '📝 Criar Conta' : '🚀 Acessar Sistema')}
+                            </button>
+                        </form>
+
+                        <div style={{
+                            textAlign: 'center',
+                            marginTop: '20px',
+                            paddingTop: '20px',
+                            borderTop: '1px solid #e2e8f0'
+                        }}>
+                            <button
+                                onClick={() => {
+                                    setIsRegister(!isRegister);
+                                    setError('');
+                                }}
+                                style={{
+                                    background: 'none',
+                                    border: 'none',
+                                    color: '#667eea',
+                                    cursor: 'pointer',
+                                    fontSize: '14px',
+                                    textDecoration: 'underline'
+                                }}
+                            >
+                                {isRegister ? '← Já tenho conta' : '✨ Criar nova conta'}
+                            </button>
+                        </div>
+
+                        <div className="login-footer">
+                            Versão 2.0 - Sistema de Funis com Banco de Dados
+                        </div>
+                    </div>
+                </div>
+            );
+        }
+
+        // Gera IDs numéricos únicos mesmo quando vários itens são criados no mesmo
+        // milissegundo (Date.now() sozinho colidia e quebrava seleção/deleção).
+        let __idSeq = 0;
+        const genId = () => {
+            __idSeq = (__idSeq + 1) % 10000;
+            return Date.now() * 10000 + __idSeq;
+        };
+
+        function FunnelBuilder({ funnelId, onBack }) {
+            const [elements, setElements] = useState([]);
+            const [connections, setConnections] = useState([]);
+            const [currentFunnel, setCurrentFunnel] = useState(null);
+            const [saving, setSaving] = useState(false);
+            const saveTimeoutRef = useRef(null);
+            const initialLoadRef = useRef(false);
+            // Elementos e conexões como estão no servidor: base do diff do autosave
+            const savedGraphRef = useRef(null);
+
+            // Estados para páginas e UTMs
+            const [pages, setPages] = useState([]);
+            const [utms, setUtms] = useState([]);
+            const [showUtmGenerator, setShowUtmGenerator] = useState(false);
+
+            // Carrega páginas, UTMs e o funil em uma única requisição
+            React.useEffect(() => {
+                savedGraphRef.current = null;
+                loadEditorData();
+            }, [funnelId]);
+
+            const loadEditorData = async () => {
+                try {
+                    const requests = [{ path: '/api/pages' }, { path: '/api/utms' }];
+                    if (funnelId) {
+                        requests.push({ path: `/api/funnels/${funnelId}` });
+                    }
+                    const [pagesData, utmsData, funnelData] = await apiBatch(requests);
+                    if (pagesData && pagesData.pages) {
+                        setPages(pagesData.pages);
+                    }
+                    if (utmsData && utmsData.utms) {
+                        setUtms(utmsData.utms);
+                    }
+                    if (funnelData && funnelData.funnel) {
+                        applyLoadedFunnel(funnelData.funnel);
+                    }
+                } catch (error) {
+                    console.error('Erro ao carregar dados do editor:', error);
+                }
+            };
+
+            const loadPages = async () => {
+                try {
+                    const data = await apiCall('/api/pages');
+                    if (data && data.pages) {
+                        setPages(data.pages);
+                    }
+                } catch (error) {
+                    console.error('Erro ao carregar páginas:', error);
+                }
+            };
+
+            const loadUtms = async () => {
+                try {
+                    const data = await apiCall('/api/utms');
+                    if (data && data.utms) {
+                        setUtms(data.utms);
+                    }
+                } catch (error) {
+                    console.error('Erro ao carregar UTMs:', error);
+                }
+            };
+
+            // Aplica o funil carregado da API (junto com páginas e UTMs)
+            const applyLoadedFunnel = (funnel) => {
+                setCurrentFunnel(funnel);
+                setElements(funnel.elements || []);
+                setConnections(funnel.connections || []);
+                savedGraphRef.current = { elements: funnel.elements || [], connections: funnel.connections || [] };
+                // Marca como carregado para não salvar no primeiro render
+                setTimeout(() => {
+                    initialLoadRef.current = true;
+                }, 100);
+            };
+
+            // Auto-salva com debounce quando elementos ou conexões mudam
+            React.useEffect(() => {
+                // Não salva no carregamento inicial
+                if (!initialLoadRef.current || !funnelId) {
+                    return;
+                }
+
+                // Limpa timeout anterior
+                if (saveTimeoutRef.current) {
+                    clearTimeout(saveTimeoutRef.current);
+                }
+
+                // Agenda novo salvamento após 2 segundos de inatividade
+                saveTimeoutRef.current = setTimeout(() => {
+                    saveFunnel();
+                }, 2000);
+
+                // Cleanup
+                return () => {
+                    if (saveTimeoutRef.current) {
+                        clearTimeout(saveTimeoutRef.current);
+                    }
+                };
+            }, [elements, connections, funnelId]);
+
+            const [saveSuccess, setSaveSuccess] = useState(false);
+            const [showBottleneckAnalysis, setShowBottleneckAnalysis] = useState(false);
+            // Seções colapsáveis do painel de propriedades
+            const [panelSections, setPanelSections] = useState(() => {
+                try { return JSON.parse(localStorage.getItem('panelSections') || 'null') || { essential: true, advanced: false, reference: false }; }
+                catch { return { essential: true, advanced: false, reference: false }; }
+            });
+            const togglePanelSection = (key) => {
+                setPanelSections(prev => {
+                    const next = { ...prev, [key]: !prev[key] };
+                    try { localStorage.setItem('panelSections', JSON.stringify(next)); } catch {}
+                    return next;
+                });
+            };
+
+            const saveFunnel = async () => {
+                // Se já há um save em andamento, reagenda para não perder mudanças
+                if (saving) {
+                    if (saveTimeoutRef.current) clearTimeout(saveTimeoutRef.current);
+                    saveTimeoutRef.current = setTimeout(() => saveFunnel(), 500);
+                    return;
+                }
+                setSaving(true);
+                setSaveSuccess(false);
+
+                try {
+                    // A receita simulada vai junto para o resumo da lista de funis
+                    const simulatedRevenue = getDashboardMetrics().revenue;
+                    const saved = savedGraphRef.current;
+                    const elementsDiff = saved && diffFunnelItems(saved.elements, elements);
+                    const connectionsDiff = saved && diffFunnelItems(saved.connections, connections);
+
+                    let result;
+                    if (elementsDiff && connectionsDiff) {
+                        // Só os itens que mudaram desde o último save (PATCH)
+                        const changes = {};
+                        if (Number.isFinite(simulatedRevenue)) changes.simulatedRevenue = simulatedRevenue;
+                        if (elementsDiff.upsert.length || elementsDiff.delete.length) changes.elements = elementsDiff;
+                        if (connectionsDiff.upsert.length || connectionsDiff.delete.length) changes.connections = connectionsDiff;
+                        result = Object.keys(changes).length
+                            ? await apiPatchFunnel(funnelId, changes)
+                            : { success: true };
+                    } else {
+                        result = await apiUpdateFunnel(funnelId, { elements, connections, simulatedRevenue });
+                    }
+                    if (!result || !result.success) {
+                        throw new Error((result && result.error) || 'Falha ao salvar');
+                    }
+                    savedGraphRef.current = { elements, connections };
+                    setSaveSuccess(true);
+                    setTimeout(() => setSaveSuccess(false), 2000);
+                } catch (error) {
+                    console.error('❌ Erro ao salvar funil:', error);
+                } finally {
+                    setSaving(false);
+                }
+            };
+            const [selectedElement, setSelectedElement] = useState(null);
+            const [selectedConnection, setSelectedConnection] = useState(null);
+            const [draggingElement, setDraggingElement] = useState(null);
+            const [connectingFrom, setConnectingFrom] = useState(null);
+            const [dragOffset, setDragOffset] = useState({ x: 0, y: 0 });
+            const [isDragging, setIsDragging] = useState(false);
+            const [mouseDownPos, setMouseDownPos] = useState({ x: 0, y: 0 });
+            const [zoomLevel, setZoomLevel] = useState(1);
+            const [isDraggingConnection, setIsDraggingConnection] = useState(false);
+            const [dragConnectionStart, setDragConnectionStart] = useState(null);
+            const [dragConnectionEnd, setDragConnectionEnd] = useState(null);
+            const [connectionFromSide, setConnectionFromSide] = useState(null);
+            const [hoveredElement, setHoveredElement] = useState(null);
+            const [showElementMenu, setShowElementMenu] = useState(false);
+            const [elementMenuPosition, setElementMenuPosition] = useState({ x: 0, y: 0 });
+            const [panOffset, setPanOffset] = useState({ x: 0, y: 0 });
+            const [isPanning, setIsPanning] = useState(false);
+            const [panStart, setPanStart] = useState({ x: 0, y: 0 });
+            const [sidebarCollapsed, setSidebarCollapsed] = useState(false);
+            // Modo de apresentação (estilo Funnelytics): esconde números e mostra
+            // os elementos como ícones limpos, para mostrar o funil a um cliente.
+            const [presentationMode, setPresentationMode] = useState(false);
+            const canvasRef = useRef(null);
+
+            // Atalho de teclado: Delete/Backspace apaga a conexão ou o elemento selecionado
+            React.useEffect(() => {
+                const handleKeyDown = (e) => {
+                    if (e.key !== 'Delete' && e.key !== 'Backspace') return;
+                    const tag = (e.target.tagName || '').toUpperCase();
+                    if (tag === 'INPUT' || tag === 'TEXTAREA' || e.target.isContentEditable) return;
+
+                    if (selectedConnection) {
+                        e.preventDefault();
+                        setConnections(prev => prev.filter(c => c.id !== selectedConnection));
+                        setSelectedConnection(null);
+                    } else if (selectedElement) {
+                        e.preventDefault();
+                        setElements(prev => prev.filter(el => el.id !== selectedElement));
+                        setConnections(prev => prev.filter(c => c.from !== selectedElement && c.to !== selectedElement));
+                        setSelectedElement(null);
+                    }
+                };
+                window.addEventListener('keydown', handleKeyDown);
+                return () => window.removeEventListener('keydown', handleKeyDown);
+            }, [selectedConnection, selectedElement]);
+
+            const calculateMetrics = () => {
+                const elementMap = {};
+                elements.forEach(el => {
+                    elementMap[el.id] = {
+                        ...el,
+                        childConnections: [],
+                        incomingTraffic: [] // Array para acumular tráfego de múltiplas fontes
+                    };
+                });
+
+                // Conta quantos "pais" cada elemento tem (in-degree) para processar em
+                // ordem topológica. Retargeting com métricas próprias age como fonte
+                // independente, então conexões de entrada nele NÃO contam como dependência.
+                const remainingParents = {};
+                elements.forEach(el => { remainingParents[el.id] = 0; });
+
+                const isIndependentSource = (el) =>
+                    el && el.type === 'retargeting' && (el.clicks || 0) > 0;
+
+                connections.forEach(conn => {
+                    if (elementMap[conn.from] && elementMap[conn.to]) {
+                        elementMap[conn.from].childConnections.push(conn);
+                        if (!isIndependentSource(elementMap[conn.to])) {
+                            remainingParents[conn.to] += 1;
+                        }
+                    }
+                });
+
+                // Calcula as métricas de um elemento a partir do tráfego já acumulado
+                // (ou das próprias métricas, se for fonte de tráfego/raiz).
+                const computeElementMetrics = (element) => {
+                    const isTrafficSource = ['trafego', 'google', 'facebook', 'retargeting'].includes(element.type);
+                    const actsAsSource = isTrafficSource && (element.clicks || 0) > 0;
+
+                    let visits = 0;       // Pessoas que chegaram
+                    let pageViews = 0;    // Pessoas que visualizaram a página
+                    let leads = 0;        // Pessoas convertidas
+                    let investment = 0;
+                    let cpm = 0;
+                    let ctr = 0;
+                    let costPerLead = 0;
+                    let cost = 0;
+
+                    if (actsAsSource) {
+                        // Fonte de tráfego: calcula a partir de impressões/cliques
+                        investment = element.type === 'retargeting'
+                            ? (element.investment || element.retargetingInvestment || 0)
+                            : (element.investment || 0);
+
+                        const impressions = element.impressions || 0;
+                        const clicks = element.clicks || 0;
+
+                        visits = clicks;
+                        pageViews = clicks;
+                        leads = clicks;
+
+                        cpm = impressions > 0 ? (investment / impressions) * 1000 : 0;
+                        ctr = impressions > 0 ? (clicks / impressions) * 100 : 0;
+                        costPerLead = clicks > 0 ? investment / clicks : 0;
+                        cost = investment; // dinheiro investido na fonte
+                    } else if (element.incomingTraffic.length > 0) {
+                        // Recebe tráfego de uma ou mais fontes: soma tudo
+                        visits = element.incomingTraffic.reduce((sum, t) => sum + t.traffic, 0);
+                        investment = element.incomingTraffic.reduce((sum, t) => sum + t.investment, 0);
+
+                        const pageViewRate = element.pageViewRate || 100;
+                        pageViews = Math.round(visits * (pageViewRate / 100));
+
+                        const conversionRate = element.conversionRate || 0;
+                        leads = Math.round(pageViews * (conversionRate / 100));
+                        // Elementos que recebem tráfego não adicionam novo custo de mídia
+                        cost = 0;
+                    }
+
+                    const price = element.price || 0;
+
+                    // Só gera receita se o elemento tiver a flag generatesRevenue ativada
+                    let revenue = element.generatesRevenue ? (leads * price) : 0;
+
+                    // Adiciona receita do Order Bump se estiver habilitado
+                    let orderBumpRevenue = 0;
+                    let orderBumpSales = 0;
+                    if (element.hasOrderBump && element.generatesRevenue) {
+                        const orderBumpPrice = element.orderBumpPrice || 0;
+                        const orderBumpConversion = element.orderBumpConversion || 0;
+                        orderBumpSales = Math.round(leads * (orderBumpConversion / 100));
+                        orderBumpRevenue = orderBumpSales * orderBumpPrice;
+                        revenue += orderBumpRevenue;
+                    }
+
+                    // Retargeting sempre carrega seu próprio custo de mídia, mesmo quando
+                    // recebe tráfego de outro elemento (evita perder esse investimento).
+                    if (element.type === 'retargeting' && !actsAsSource) {
+                        const retSpend = element.investment || element.retargetingInvestment || 0;
+                        cost += retSpend;
+                        investment += retSpend;
+                    }
+
+                    const profit = revenue - cost;
+
+                    element.calculatedMetrics = {
+                        visits,
+                        pageViews,
+                        leads,
+                        revenue,
+                        profit,
+                        cost,
+                        investment,
+                        cpm,
+                        ctr,
+                        costPerLead,
+                        orderBumpSales,
+                        orderBumpRevenue
+                    };
+
+                    return element.calculatedMetrics;
+                };
+
+                // Empurra o tráfego de um elemento já calculado para seus filhos.
+                const propagateToChildren = (element) => {
+                    const m = element.calculatedMetrics;
+                    element.childConnections.forEach(conn => {
+                        const childElement = elementMap[conn.to];
+                        if (!childElement) return;
+                        // Retargeting independente ignora tráfego de entrada
+                        if (isIndependentSource(childElement)) return;
+
+                        const conversionRate = conn.conversion || 0;
+                        let childTraffic;
+
+                        // Downsell/Recuperação recebem quem NÃO converteu; demais recebem os convertidos
+                        if (childElement.type === 'downsell' || childElement.type === 'recuperacao') {
+                            const nonConverted = m.pageViews - m.leads;
+                            childTraffic = Math.round(nonConverted * (conversionRate / 100));
+                        } else {
+                            childTraffic = Math.round(m.leads * (conversionRate / 100));
+                        }
+
+                        childElement.incomingTraffic.push({
+                            traffic: childTraffic,
+                            investment: m.investment
+                        });
+                    });
+                };
+
+                // Processamento em ordem topológica (algoritmo de Kahn): um elemento só
+                // é finalizado depois que TODOS os seus pais foram processados. Isso
+                // garante que funis convergentes (vários caminhos chegando no mesmo
+                // elemento) somem todo o tráfego corretamente.
+                const queue = [];
+                Object.values(elementMap).forEach(el => {
+                    if (remainingParents[el.id] === 0) queue.push(el);
+                });
+
+                const processed = new Set();
+                while (queue.length > 0) {
+                    const element = queue.shift();
+                    if (processed.has(element.id)) continue;
+                    processed.add(element.id);
+
+                    computeElementMetrics(element);
+                    propagateToChildren(element);
+
+                    element.childConnections.forEach(conn => {
+                        const childElement = elementMap[conn.to];
+                        if (!childElement || isIndependentSource(childElement)) return;
+                        remainingParents[conn.to] -= 1;
+                        if (remainingParents[conn.to] === 0) {
+                            queue.push(childElement);
+                        }
+                    });
+                }
+
+                // Fallback: elementos presos em ciclos (ex: A->B->A) nunca chegam a
+                // remainingParents 0. Calcula com o que tiverem para não ficarem vazios.
+                Object.values(elementMap).forEach(element => {
+                    if (!processed.has(element.id)) {
+                        processed.add(element.id);
+                        computeElementMetrics(element);
+                        propagateToChildren(element);
+                    }
+                });
+
+                return elementMap;
+            };
+
+            const getDashboardMetrics = () => {
+                const metricsMap = calculateMetrics();
+                let totalRevenue = 0;
+                let totalProfit = 0;
+                let totalSales = 0;
+                let totalActualSales = 0; // Vendas reais (apenas elementos que geram receita)
+                let totalInvestment = 0;
+                let totalVisitors = 0;
+
+                Object.values(metricsMap).forEach(el => {
+                    if (el.calculatedMetrics) {
+                        totalRevenue += el.calculatedMetrics.revenue;
+                        
+                        // Não conta cliques de tráfego como conversões no dashboard
+                        const isTrafficSource = ['trafego', 'google', 'facebook', 'retargeting'].includes(el.type);
+                        if (!isTrafficSource) {
+                            totalSales += el.calculatedMetrics.leads;
+                        }
+
+                        // Conta vendas apenas de elementos que geram receita
+                        if (el.generatesRevenue && el.calculatedMetrics.leads > 0) {
+                            totalActualSales += el.calculatedMetrics.leads;
+                        }
+
+                        // Soma o custo de mídia (já inclui o investimento de retargeting,
+                        // pois computeElementMetrics o registra em calculatedMetrics.cost)
+                        if (el.calculatedMetrics.cost > 0) {
+                            totalInvestment += el.calculatedMetrics.cost;
+                        }
+
+                        // Conta visitantes dos elementos de tráfego
+                        if (['trafego', 'google', 'facebook', 'retargeting'].includes(el.type)) {
+                            totalVisitors += el.clicks || 0;
+                        }
+                    }
+                });
+
+                totalProfit = totalRevenue - totalInvestment;
+                const roi = totalInvestment > 0 ? ((totalProfit / totalInvestment) * 100) : 0;
+                const cac = totalActualSales > 0 ? (totalInvestment / totalActualSales) : 0;
+
+                // Quality Score: verifica se os valores configurados são realistas
+                let qualityPoints = 0;
+                let qualityTotal = 0;
+                const trafficEls = elements.filter(el => ['trafego','google','facebook','retargeting'].includes(el.type));
+                const convEls = elements.filter(el => !['trafego','google','facebook','retargeting'].includes(el.type));
+                // +1 ponto por cada fonte de tráfego com cliques configurados
+                trafficEls.forEach(el => {
+                    qualityTotal += 2;
+                    if ((el.clicks || 0) > 0) qualityPoints += 1;
+                    if ((el.investment || 0) > 0) qualityPoints += 1;
+                });
+                // +1 ponto por cada elemento de conversão com taxa entre 0.5 e 80%
+                convEls.forEach(el => {
+                    qualityTotal += 1;
+                    const cr = el.conversionRate || 0;
+                    if (cr > 0 && cr <= 80) qualityPoints += 1;
+                });
+                // Bônus: funil tem pelo menos 2 elementos e 1 conexão
+                if (elements.length >= 2) { qualityPoints += 1; qualityTotal += 1; }
+                if (connections.length >= 1) { qualityPoints += 1; qualityTotal += 1; }
+                const qualityScore = qualityTotal > 0 ? Math.round((qualityPoints / qualityTotal) * 100) : 0;
+
+                return {
+                    revenue: totalRevenue,
+                    profit: totalProfit,
+                    cac: cac,
+                    roi: roi,
+                    sales: totalActualSales,
+                    investment: totalInvestment,
+                    visitors: totalVisitors,
+                    qualityScore
+                };
+            };
+
+            // Análise de Gargalos - identifica onde o funil perde mais pessoas
+            const analyzeBottlenecks = () => {
+                const metrics = calculateMetrics();
+                const bottlenecks = [];
+
+                // Para cada conexão, calcula a taxa de dropout
+                connections.forEach(conn => {
+                    const fromElement = metrics[conn.from];
+                    const toElement = metrics[conn.to];
+
+                    if (fromElement && toElement && fromElement.calculatedMetrics && toElement.calculatedMetrics) {
+                        // Usa 'visits' que é o campo correto nas métricas
+                        const fromVisitors = fromElement.calculatedMetrics.visits || 0;
+                        const toVisitors = toElement.calculatedMetrics.visits || 0;
+
+                        if (fromVisitors > 0 && toVisitors < fromVisitors) {
+                            const dropoutRate = ((fromVisitors - toVisitors) / fromVisitors) * 100;
+                            const dropoutCount = fromVisitors - toVisitors;
+
+                            bottlenecks.push({
+                                fromId: conn.from,
+                                toId: conn.to,
+                                fromName: fromElement.name,
+                                toName: toElement.name,
+                                fromVisitors: fromVisitors,
+                                toVisitors: toVisitors,
+                                dropoutCount: dropoutCount,
+                                dropoutRate: dropoutRate,
+                                conversionRate: 100 - dropoutRate
+                            });
+                        }
+                    }
+                });
+
+                // Ordena por taxa de dropout (maior primeiro)
+                bottlenecks.sort((a, b) => b.dropoutRate - a.dropoutRate);
+
+                return bottlenecks;
+            };
+
+            const handleDragFromLibrary = (e, elementType) => {
+                e.preventDefault();
+                const rect = canvasRef.current.getBoundingClientRect();
+                const x = e.clientX - rect.left - 100;
+                const y = e.clientY - rect.top - 50;
+
+                const newElement = {
+                    id: genId(),
+                    type: elementType.type,
+                    name: elementType.name,
+                    icon: elementType.icon,
+                    color: elementType.color,
+                    x: Math.max(0, x),
+                    y: Math.max(0, y),
+                    investment: 0,
+                    impressions: 0,
+                    clicks: 0,
+                    ctr: 0,
+                    cpm: 0,
+                    trafficMode: 'absolute', // 'absolute' ou 'metrics'
+                    pageViewRate: 100,
+                    conversionRate: elementType.type === 'recuperacao' ? 100 : 0,
+                    price: 0,
+                    url: '',
+                    description: '',
+                    generatesRevenue: false
+                };
+
+                setElements([...elements, newElement]);
+            };
+
+            const handleElementClick = (e, element) => {
+                e.stopPropagation();
+                setSelectedElement(element.id);
+            };
+
+            const handleElementMouseDown = (e, element) => {
+                if (e.target.classList.contains('connection-point') ||
+                    e.target.classList.contains('element-btn')) {
+                    return;
+                }
+
+                e.stopPropagation();
+                setSelectedElement(element.id);
+                setDraggingElement(element.id);
+                setIsDragging(false);
+                setMouseDownPos({ x: e.clientX, y: e.clientY });
+
+                const rect = e.currentTarget.getBoundingClientRect();
+                setDragOffset({
+                    x: e.clientX - rect.left,
+                    y: e.clientY - rect.top
+                });
+            };
+
+            const handleMouseMove = (e) => {
+                // Pan do canvas
+                if (isPanning) {
+                    const deltaX = e.clientX - panStart.x;
+                    const deltaY = e.clientY - panStart.y;
+                    setPanOffset({
+                        x: panOffset.x + deltaX,
+                        y: panOffset.y + deltaY
+                    });
+                    setPanStart({ x: e.clientX, y: e.clientY });
+                    return;
+                }
+
+                // Arrasto de conexão
+                if (isDraggingConnection) {
+                    handleConnectionDragMove(e);
+                    return;
+                }
+
+                // Arrasto de elemento
+                if (!draggingElement) return;
+
+                // Só começa a arrastar se mover mais de 5 pixels
+                const deltaX = Math.abs(e.clientX - mouseDownPos.x);
+                const deltaY = Math.abs(e.clientY - mouseDownPos.y);
+
+                if (!isDragging && (deltaX > 5 || deltaY > 5)) {
+                    setIsDragging(true);
+                }
+
+                if (isDragging) {
+                    const rect = canvasRef.current.getBoundingClientRect();
+                    const x = (e.clientX - rect.left - panOffset.x) / zoomLevel - dragOffset.x;
+                    const y = (e.clientY - rect.top - panOffset.y) / zoomLevel - dragOffset.y;
+
+                    setElements(elements.map(el =>
+                        el.id === draggingElement
+                            ? { ...el, x: x, y: y }
+                            : el
+                    ));
+                }
+            };
+
+            const handleMouseUp = () => {
+                setDraggingElement(null);
+                setIsDragging(false);
+                setIsPanning(false);
+            };
+
+            const handleCanvasMouseDown = (e) => {
+                // Se clicar diretamente no canvas-container (fundo), inicia o pan
+                if (e.target === e.currentTarget ||
+                    e.target.classList.contains('canvas') ||
+                    e.target.classList.contains('connections')) {
+                    setIsPanning(true);
+                    setPanStart({ x: e.clientX, y: e.clientY });
+                }
+            };
+
+            const handleCanvasClick = (e) => {
+                // Fecha o menu popup se estiver aberto
+                if (showElementMenu) {
+                    setShowElementMenu(false);
+                    return;
+                }
+
+                // Só desseleciona se clicar diretamente no canvas ou canvas-container
+                if (e.target === e.currentTarget ||
+                    e.target.classList.contains('canvas') ||
+                    e.target.classList.contains('canvas-container')) {
+                    setSelectedElement(null);
+                    setSelectedConnection(null);
+                }
+            };
+
+            const handleConnectionClick = (e, connection) => {
+                e.stopPropagation();
+                setSelectedConnection(connection.id);
+                setSelectedElement(null);
+            };
+
+            // Função helper para calcular posição do ponto de conexão
+            const getConnectionPointPosition = (element, side) => {
+                const width = 200;  // largura do elemento (atualizado de 220 para 200)
+                const height = 110; // altura aproximada do elemento
+
+                switch(side) {
+                    case 'top':
+                        return { x: element.x + width / 2, y: element.y };
+                    case 'right':
+                        return { x: element.x + width, y: element.y + height / 2 };
+                    case 'bottom':
+                        return { x: element.x + width / 2, y: element.y + height };
+                    case 'left':
+                        return { x: element.x, y: element.y + height / 2 };
+                    default:
+                        return { x: element.x + width, y: element.y + height / 2 };
+                }
+            };
+
+            const handleConnectionStart = (e, elementId, side = 'right') => {
+                e.stopPropagation();
+                e.preventDefault();
+
+                const element = elements.find(el => el.id === elementId);
+                if (!element) return;
+
+                const rect = canvasRef.current.getBoundingClientRect();
+                const startPos = getConnectionPointPosition(element, side);
+
+                // Inicia o arrasto da conexão
+                setIsDraggingConnection(true);
+                setConnectingFrom(elementId);
+                setConnectionFromSide(side);
+                setDragConnectionStart(startPos);
+                setDragConnectionEnd({
+                    x: (e.clientX - rect.left - panOffset.x) / zoomLevel,
+                    y: (e.clientY - rect.top - panOffset.y) / zoomLevel
+                });
+            };
+
+            const handleConnectionDragMove = (e) => {
+                if (!isDraggingConnection) return;
+
+                const rect = canvasRef.current.getBoundingClientRect();
+                setDragConnectionEnd({
+                    x: (e.clientX - rect.left - panOffset.x) / zoomLevel,
+                    y: (e.clientY - rect.top - panOffset.y) / zoomLevel
+                });
+            };
+
+            const handleConnectionDragEnd = (e) => {
+                if (!isDraggingConnection) return;
+
+                e.stopPropagation();
+
+                // Se soltou sobre um elemento com hover, cria a conexão
+                if (hoveredElement && hoveredElement !== connectingFrom) {
+                    const connectionExists = connections.some(
+                        conn => conn.from === connectingFrom && conn.to === hoveredElement
+                    );
+
+                    if (!connectionExists) {
+                        // Encontra o elemento de destino para calcular qual lado está mais próximo
+                        const toElement = elements.find(el => el.id === hoveredElement);
+                        let toSide = 'left'; // padrão
+
+                        if (toElement && dragConnectionEnd) {
+                            // Calcula qual lado está mais próximo do ponto onde o mouse está
+                            const width = 220;
+                            const height = 120;
+                            const centerX = toElement.x + width / 2;
+                            const centerY = toElement.y + height / 2;
+                            const dx = dragConnectionEnd.x - centerX;
+                            const dy = dragConnectionEnd.y - centerY;
+
+                            // Determina o lado mais próximo baseado em qual direção predomina
+                            if (Math.abs(dx) > Math.abs(dy)) {
+                                toSide = dx > 0 ? 'right' : 'left';
+                            } else {
+                                toSide = dy > 0 ? 'bottom' : 'top';
+                            }
+                        }
+
+                        setConnections([...connections, {
+                            id: genId(),
+                            from: connectingFrom,
+                            to: hoveredElement,
+                            fromSide: connectionFromSide,
+                            toSide: toSide,
+                            conversion: 100
+                        }]);
+                    }
+
+                    // Reset states
+                    setIsDraggingConnection(false);
+                    setDragConnectionStart(null);
+                    setDragConnectionEnd(null);
+                    setConnectingFrom(null);
+                    setConnectionFromSide(null);
+                    setHoveredElement(null);
+                } else {
+                    // Se não soltou sobre um elemento, mostra o menu
+                    const rect = canvasRef.current.getBoundingClientRect();
+                    const menuX = (e.clientX - rect.left) / zoomLevel;
+                    const menuY = (e.clientY - rect.top) / zoomLevel;
+
+                    setElementMenuPosition({
+                        x: menuX * zoomLevel,
+                        y: menuY * zoomLevel
+                    });
+                    setShowElementMenu(true);
+
+                    // Não reseta connectingFrom aqui, será resetado quando selecionar um elemento
+                    setIsDraggingConnection(false);
+                    setDragConnectionStart(null);
+                    setDragConnectionEnd(null);
+                    setHoveredElement(null);
+                }
+            };
+
+            const handleElementHover = (elementId, isHovering) => {
+                if (isDraggingConnection) {
+                    setHoveredElement(isHovering ? elementId : null);
+                }
+            };
+
+            const handleElementMenuSelect = (elementType) => {
+                // Google Ads sempre usa modo 'metrics' (CPM)
+                const defaultTrafficMode = elementType.type === 'google' ? 'metrics' : 'absolute';
+
+                const newElement = {
+                    id: genId(),
+                    type: elementType.type,
+                    name: elementType.name,
+                    icon: elementType.icon,
+                    color: elementType.color,
+                    x: elementMenuPosition.x / zoomLevel - 110,
+                    y: elementMenuPosition.y / zoomLevel - 60,
+                    investment: 0,
+                    impressions: 0,
+                    clicks: 0,
+                    ctr: 0,
+                    cpm: 0,
+                    cpc: 0, // Custo Por Clique (usado pelo Google Ads)
+                    trafficMode: defaultTrafficMode, // 'absolute' ou 'metrics'
+                    pageViewRate: 100,
+                    conversionRate: elementType.type === 'recuperacao' ? 100 : 0,
+                    price: 0,
+                    url: '',
+                    description: '',
+                    generatesRevenue: false
+                };
+
+                setElements([...elements, newElement]);
+
+                // Cria a conexão com o novo elemento
+                if (connectingFrom) {
+                    setConnections([...connections, {
+                        id: genId(),
+                        from: connectingFrom,
+                        to: newElement.id,
+                        conversion: 100
+                    }]);
+                }
+
+                setShowElementMenu(false);
+                setConnectingFrom(null);
+            };
+
+            const handleDeleteElement = (e, elementId) => {
+                e.stopPropagation();
+                setElements(elements.filter(el => el.id !== elementId));
+                setConnections(connections.filter(conn =>
+                    conn.from !== elementId && conn.to !== elementId
+                ));
+                if (selectedElement === elementId) {
+                    setSelectedElement(null);
+                }
+            };
+
+            const validateValue = (property, value) => {
+                const numValue = parseFloat(value) || 0;
+
+                // Validações para percentuais
+                if (['conversionRate', 'pageViewRate'].includes(property)) {
+                    if (numValue < 0) return { valid: false, type: 'error', message: '❌ O valor não pode ser negativo' };
+                    if (numValue > 100) return { valid: false, type: 'error', message: '❌ O valor não pode ser maior que 100%' };
+
+                    // Warnings para taxas de conversão
+                    if (property === 'conversionRate') {
+                        if (numValue < 1) return { valid: true, type: 'warning', message: '⚠️ Taxa muito baixa. Típico: 5-15%' };
+                        if (numValue > 50) return { valid: true, type: 'warning', message: '⚠️ Taxa muito alta. Verifique se está correto' };
+                        if (numValue >= 10 && numValue <= 30) return { valid: true, type: 'success', message: '✅ Ótima taxa de conversão!' };
+                    }
+                }
+
+                // Validações para valores monetários
+                if (['investment', 'price'].includes(property)) {
+                    if (numValue < 0) return { valid: false, type: 'error', message: '❌ O valor não pode ser negativo' };
+                    if (numValue > 1000000) return { valid: true, type: 'warning', message: '⚠️ Valor muito alto. Confirme se está correto' };
+                }
+
+                // Validações para impressões e cliques
+                if (property === 'impressions' && numValue < 1) {
+                    return { valid: true, type: 'warning', message: '⚠️ Configure as impressões esperadas' };
+                }
+                if (property === 'clicks' && numValue < 1) {
+                    return { valid: true, type: 'warning', message: '⚠️ Configure os cliques esperados' };
+                }
+
+                return { valid: true, type: null, message: null };
+            };
+
+            const updateElementProperty = (property, value) => {
+                setElements(elements.map(el => {
+                    if (el.id === selectedElement) {
+                        // Se for um campo numérico
+                        if (['investment', 'impressions', 'clicks', 'pageViewRate', 'conversionRate', 'price', 'ctr', 'cpm', 'cpc', 'orderBumpPrice', 'orderBumpConversion', 'addToCartRate', 'retargetingInvestment'].includes(property)) {
+                            // Se o valor estiver vazio, permite vazio (não força 0)
+                            if (value === '' || value === null || value === undefined) {
+                                return { ...el, [property]: 0 };
+                            }
+                            const numValue = parseFloat(value);
+                            const updated = { ...el, [property]: numValue };
+
+                            // Cálculos automáticos para modo de tráfego (trafego, google, facebook e retargeting)
+                            const isTrafficElement = ['trafego', 'google', 'facebook', 'retargeting'].includes(el.type);
+                            if (isTrafficElement) {
+                                // Para retargeting, usa investment ou retargetingInvestment
+                                const inv = el.type === 'retargeting' ? (updated.investment || updated.retargetingInvestment) : updated.investment;
+
+                                // Google usa CPC (Custo Por Clique)
+                                if (el.type === 'google') {
+                                    // Calcula cliques baseado em CPC e investimento
+                                    if (updated.cpc > 0 && inv > 0) {
+                                        updated.clicks = Math.round(inv / updated.cpc);
+                                    }
+                                    // Calcula CPC baseado em investimento e cliques
+                                    if (updated.clicks > 0 && inv > 0 && updated.cpc === 0) {
+                                        updated.cpc = parseFloat((inv / updated.clicks).toFixed(2));
+                                    }
+                                    // Calcula impressões se tivermos CTR
+                                    if (updated.ctr > 0 && updated.clicks > 0) {
+                                        updated.impressions = Math.round((updated.clicks / (updated.ctr / 100)));
+                                    }
+                                } else if (el.trafficMode === 'metrics') {
+                                    // Facebook/Outros usam CPM + CTR
+                                    // Sempre recalcula impressões se temos CPM e investimento
+                                    if (updated.cpm > 0 && inv > 0) {
+                                        updated.impressions = Math.round((inv / updated.cpm) * 1000);
+                                    }
+                                    // Sempre recalcula cliques se temos CTR e impressões
+                                    if (updated.ctr > 0 && updated.impressions > 0) {
+                                        updated.clicks = Math.round((updated.impressions * updated.ctr) / 100);
+                                    }
+                                } else if (el.trafficMode === 'absolute') {
+                                    // Calcula CTR automaticamente
+                                    if (updated.impressions > 0 && updated.clicks >= 0) {
+                                        updated.ctr = parseFloat(((updated.clicks / updated.impressions) * 100).toFixed(2));
+                                    }
+                                    // Calcula CPM automaticamente
+                                    if (updated.impressions > 0 && inv >= 0) {
+                                        updated.cpm = parseFloat(((inv / updated.impressions) * 1000).toFixed(2));
+                                    }
+                                }
+                            }
+
+                            return updated;
+                        }
+                        // Se mudou o modo de tráfego, recalcula tudo
+                        if (property === 'trafficMode') {
+                            const updated = { ...el, [property]: value };
+
+                            // Para retargeting, usa investment ou retargetingInvestment
+                            const inv = el.type === 'retargeting' ? (updated.investment || updated.retargetingInvestment) : updated.investment;
+
+                            if (value === 'metrics') {
+                                // Recalcula com base nas métricas
+                                if (updated.cpm > 0 && inv > 0) {
+                                    updated.impressions = Math.round((inv / updated.cpm) * 1000);
+                                }
+                                if (updated.ctr > 0 && updated.impressions > 0) {
+                                    updated.clicks = Math.round((updated.impressions * updated.ctr) / 100);
+                                }
+                            } else if (value === 'absolute') {
+                                // Recalcula as métricas
+                                if (updated.impressions > 0 && updated.clicks >= 0) {
+                                    updated.ctr = parseFloat(((updated.clicks / updated.impressions) * 100).toFixed(2));
+                                }
+                                if (updated.impressions > 0 && inv >= 0) {
+                                    updated.cpm = parseFloat(((inv / updated.impressions) * 1000).toFixed(2));
+                                }
+                            }
+
+                            return updated;
+                        }
+                        // Se for booleano, mantém como está
+                        if (property === 'generatesRevenue' || property === 'hasOrderBump') {
+                            return { ...el, [property]: value };
+                        }
+                        // Caso contrário, mantém como string
+                        const updated = { ...el, [property]: value };
+                        console.log('Elemento atualizado:', updated);
+                        return updated;
+                    }
+                    return el;
+                }));
+            };
+
+            const updateConnectionProperty = (property, value) => {
+                setConnections(connections.map(conn => {
+                    if (conn.id === selectedConnection) {
+                        if (property === 'conversion') {
+                            // Se o valor estiver vazio, permite vazio (converte para 0)
+                            if (value === '' || value === null || value === undefined) {
+                                return { ...conn, [property]: 0 };
+                            }
+                            return { ...conn, [property]: parseFloat(value) };
+                        }
+                        return { ...conn, [property]: value };
+                    }
+                    return conn;
+                }));
+            };
+
+            const deleteConnection = (connectionId) => {
+                if (confirm('Tem certeza que deseja deletar esta conexão?')) {
+                    setConnections(connections.filter(conn => conn.id !== connectionId));
+                    setSelectedConnection(null); // Deseleciona após deletar
+                }
+            };
+
+            const getConnectionPath = (fromId, toId, fromSide = 'right', toSide = 'left') => {
+                const fromEl = elements.find(el => el.id === fromId);
+                const toEl = elements.find(el => el.id === toId);
+
+                if (!fromEl || !toEl) return '';
+
+                // Calcula posição do ponto de saída
+                const fromPos = getConnectionPointPosition(fromEl, fromSide);
+                const fromX = fromPos.x;
+                const fromY = fromPos.y;
+
+                // Calcula posição do ponto de entrada
+                const toPos = getConnectionPointPosition(toEl, toSide);
+                const toX = toPos.x;
+                const toY = toPos.y;
+
+                // Cria curva suave baseada na direção da conexão
+                const dx = toX - fromX;
+                const dy = toY - fromY;
+                const absDx = Math.abs(dx);
+                const absDy = Math.abs(dy);
+
+                // Define o tamanho da curva baseado na distância
+                const curveOffset = Math.min(50, Math.max(absDx, absDy) / 4);
+
+                // Pontos de controle baseados nos lados
+                let cp1x = fromX, cp1y = fromY;
+                let cp2x = toX, cp2y = toY;
+
+                // Ajusta pontos de controle baseado no lado de saída
+                if (fromSide === 'right') cp1x = fromX + curveOffset;
+                else if (fromSide === 'left') cp1x = fromX - curveOffset;
+                else if (fromSide === 'top') cp1y = fromY - curveOffset;
+                else if (fromSide === 'bottom') cp1y = fromY + curveOffset;
+
+                // Ajusta pontos de controle baseado no lado de entrada
+                if (toSide === 'right') cp2x = toX + curveOffset;
+                else if (toSide === 'left') cp2x = toX - curveOffset;
+                else if (toSide === 'top') cp2y = toY - curveOffset;
+                else if (toSide === 'bottom') cp2y = toY + curveOffset;
+
+                // Cria uma curva suave
+                return `M ${fromX} ${fromY} C ${cp1x} ${cp1y}, ${cp2x} ${cp2y}, ${toX} ${toY}`;
+            };
+
+            const handleZoomIn = () => {
+                setZoomLevel(prev => Math.min(prev + 0.1, 2));
+            };
+
+            const handleZoomOut = () => {
+                setZoomLevel(prev => Math.max(prev - 0.1, 0.5));
+            };
+
+            const handleZoomReset = () => {
+                setZoomLevel(1);
+            };
+
+            const dashboardMetrics = getDashboardMetrics();
+            const metricsMap = calculateMetrics();
+            const selectedElementData = elements.find(el => el.id === selectedElement);
+
+            return (
+                <div className="app">
+                    <div className="dashboard">
+                        <div style={{ display: 'flex', gap: '8px', alignItems: 'center' }}>
+                            {onBack && (
+                                <button onClick={onBack} style={{ padding: '6px 12px', backgroundColor: 'rgba(100, 116, 139, 0.15)', color: '#334155', border: '1px solid rgba(100, 116, 139, 0.2)', borderRadius: '6px', cursor: 'pointer', fontWeight: '600', fontSize: '13px', transition: 'all 0.2s' }}>
+                                    ← Voltar
+                                </button>
+                            )}
+                            <button
+                                onClick={() => setShowBottleneckAnalysis(!showBottleneckAnalysis)}
+                                style={{
+                                    padding: '6px 12px',
+                                    backgroundColor: showBottleneckAnalysis ? 'rgba(239, 68, 68, 0.15)' : 'rgba(16, 185, 129, 0.15)',
+                                    color: showBottleneckAnalysis ? '#dc2626' : '#059669',
+                                    border: `1px solid ${showBottleneckAnalysis ? 'rgba(239, 68, 68, 0.3)' : 'rgba(16, 185, 129, 0.3)'}`,
+                                    borderRadius: '6px',
+                                    cursor: 'pointer',
+                                    fontWeight: '600',
+                                    fontSize: '13px',
+                                    display: 'flex',
+                                    alignItems: 'center',
+                                    gap: '6px',
+                                    transition: 'all 0.2s'
+                                }}
+                            >
+                                {showBottleneckAnalysis ? 'Fechar Análise' : 'Análise de Gargalos'}
+                            </button>
+                            <button
+                                onClick={() => {
+                                    setPresentationMode(!presentationMode);
+                                    setSelectedElement(null);
+                                    setSelectedConnection(null);
+                                    if (showBottleneckAnalysis) setShowBottleneckAnalysis(false);
+                                }}
+                                title="Visão limpa para apresentar ao cliente (esconde os números)"
+                                style={{
+                                    padding: '6px 12px',
+                                    backgroundColor: presentationMode ? 'rgba(139, 92, 246, 0.18)' : 'rgba(139, 92, 246, 0.1)',
+                                    color: '#7c3aed',
+                                    border: `1px solid rgba(139, 92, 246, ${presentationMode ? '0.4' : '0.25'})`,
+                                    borderRadius: '6px',
+                                    cursor: 'pointer',
+                                    fontWeight: '600',
+                                    fontSize: '13px',
+                                    display: 'flex',
+                                    alignItems: 'center',
+                                    gap: '6px',
+                                    transition: 'all 0.2s'
+                                }}
+                            >
+                                {presentationMode ? '✏️ Modo Edição' : '👁️ Modo Apresentação'}
+                            </button>
+                            <button
+                                onClick={() => saveFunnel()}
+                                disabled={saving}
+                                style={{
+                                    padding: '6px 12px',
+                                    backgroundColor: saveSuccess ? 'rgba(46, 213, 115, 0.15)' : (saving ? 'rgba(100, 116, 139, 0.1)' : 'rgba(59, 130, 246, 0.15)'),
+                                    color: saveSuccess ? '#059669' : (saving ? '#64748b' : '#2563eb'),
+                                    border: saveSuccess ? '1px solid rgba(46, 213, 115, 0.3)' : (saving ? '1px solid rgba(100, 116, 139, 0.2)' : '1px solid rgba(59, 130, 246, 0.3)'),
+                                    borderRadius: '6px',
+                                    cursor: saving ? 'not-allowed' : 'pointer',
+                                    fontWeight: '600',
+                                    fontSize: '13px',
+                                    transition: 'all 0.2s'
+                                }}
+                            >
+                                {saveSuccess ? 'Salvo!' : (saving ? 'Salvando...' : 'Salvar')}
+                            </button>
+                        </div>
+                        {!presentationMode && (
+                        <React.Fragment>
+                        <div className="metric">
+                            <div className="metric-label">Visitantes</div>
+                            <div className="metric-value">
+                                {dashboardMetrics.visitors.toLocaleString('pt-BR')}
+                            </div>
+                        </div>
+                        <div className="metric">
+                            <div className="metric-label">Investimento</div>
+                            <div className="metric-value">
+                                R$ {dashboardMetrics.investment.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
+                            </div>
+                        </div>
+                        <div className="metric">
+                            <div className="metric-label">CAC</div>
+                            <div className="metric-value">
+                                R$ {dashboardMetrics.cac.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
+                            </div>
+                        </div>
+                        <div className="metric">
+                            <div className="metric-label">Conversões</div>
+                            <div className="metric-value">
+                                {dashboardMetrics.sales.toLocaleString('pt-BR')}
+                            </div>
+                        </div>
+                        <div className="metric">
+                            <div className="metric-label">Receita</div>
+                            <div className="metric-value">
+                                R$ {dashboardMetrics.revenue.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}
+                            </div>
+                        </div>
+                        <div className="metric">
+                            <div className="metric-label">ROI</div>
+                            <div className="metric-value">
+                                {dashboardMetrics.roi.toFixed(1)}%
+                            </div>
+                        </div>
+                        <div className="metric" title="Qualidade da simulação — indica se os valores configurados parecem realistas">
+                            <div className="metric-label">Qualidade</div>
+                            <div className="metric-value" style={{color: dashboardMetrics.qualityScore >= 80 ? 'var(--success)' : dashboardMetrics.qualityScore >= 50 ? 'var(--warning)' : 'var(--danger)'}}>
+                                {dashboardMetrics.qualityScore}%
+                            </div>
+                        </div>
+                        </React.Fragment>
+                        )}
+                    </div>
+
+                    <div className="main-content">
+                        {/* Painel de Análise de Gargalos */}
+                        {showBottleneckAnalysis && (
+                            <div style={{
+                                position: 'fixed',
+                                top: '80px',
+                                right: '20px',
+                                width: '400px',
+                                maxHeight: '80vh',
+                                overflowY: 'auto',
+                                background: 'white',
+                                borderRadius: '12px',
+                                boxShadow: '0 10px 40px rgba(0,0,0,0.3)',
+                                zIndex: 1000,
+                                padding: '20px'
+                            }}>
+                                <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '20px' }}>
+                                    <h3 style={{ fontSize: '20px', fontWeight: 'bold', color: '#1f2937' }}>🔍 Análise de Gargalos</h3>
+                                    <button
+                                        onClick={() => setShowBottleneckAnalysis(false)}
+                                        style={{
+                                            background: 'none',
+                                            border: 'none',
+                                            fontSize: '24px',
+                                            cursor: 'pointer',
+                                            color: '#9ca3af'
+                                        }}
+                                    >
+                                        ×
+                                    </button>
+                                </div>
+
+                                {(() => {
+                                    const bottlenecks = analyzeBottlenecks();
+
+                                    if (bottlenecks.length === 0) {
+                                        return (
+                                            <div style={{ textAlign: 'center', padding: '40px 20px', color: '#9ca3af' }}>
+                                                <div style={{ fontSize: '48px', marginBottom: '16px' }}>📊</div>
+                                                <p>Adicione conexões entre elementos para ver a análise de gargalos</p>
+                                            </div>
+                                        );
+                                    }
+
+                                    const worstBottleneck = bottlenecks[0];
+
+                                    return (
+                                        <div>
+                                            {/* Maior Gargalo */}
+                                            <div style={{
+                                                background: 'linear-gradient(135deg, #fee2e2 0%, #fecaca 100%)',
+                                                border: '2px solid #ef4444',
+                                                borderRadius: '12px',
+                                                padding: '16px',
+                                                marginBottom: '20px'
+                                            }}>
+                                                <div style={{ fontSize: '14px', fontWeight: '600', color: '#dc2626', marginBottom: '8px' }}>
+                                                    🚨 MAIOR GARGALO
+                                                </div>
+                                                <div style={{ fontSize: '16px', fontWeight: 'bold', color: '#1f2937', marginBottom: '8px' }}>
+                                                    {worstBottleneck.fromName} → {worstBottleneck.toName}
+                                                </div>
+                                                <div style={{ fontSize: '32px', fontWeight: 'bold', color: '#dc2626', marginBottom: '8px' }}>
+                                                    {worstBottleneck.dropoutRate.toFixed(1)}%
+                                                </div>
+                                                <div style={{ fontSize: '13px', color: '#7f1d1d' }}>
+                                                    {worstBottleneck.dropoutCount.toLocaleString('pt-BR')} pessoas abandonam aqui
+                                                </div>
+                                            </div>
+
+                                            {/* Lista de Gargalos */}
+                                            <div style={{ fontSize: '14px', fontWeight: '600', color: '#4b5563', marginBottom: '12px' }}>
+                                                Todas as etapas:
+                                            </div>
+
+                                            {bottlenecks.map((bottleneck, index) => (
+                                                <div
+                                                    key={index}
+                                                    style={{
+                                                        background: index === 0 ? '#fef2f2' : '#f9fafb',
+                                                        border: `2px solid ${index === 0 ? '#fca5a5' : '#e5e7eb'}`,
+                                                        borderRadius: '8px',
+                                                        padding: '12px',
+                                                        marginBottom: '12px'
+                                                    }}
+                                                >
+                                                    <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '8px' }}>
+                                                        <div style={{ fontSize: '13px', fontWeight: '600', color: '#1f2937' }}>
+                                                            {bottleneck.fromName} → {bottleneck.toName}
+                                                        </div>
+                                                        <div style={{
+                                                            fontSize: '16px',
+                                                            fontWeight: 'bold',
+                                                            color: bottleneck.dropoutRate > 70 ? '#dc2626' : bottleneck.dropoutRate > 50 ? '#f59e0b' : '#10b981'
+                                                        }}>
+                                                            {bottleneck.dropoutRate.toFixed(1)}%
+                                                        </div>
+                                                    </div>
+
+                                                    <div style={{ fontSize: '12px', color: '#6b7280', marginBottom: '8px' }}>
+                                                        {bottleneck.fromVisitors.toLocaleString('pt-BR')} pessoas → {bottleneck.toVisitors.toLocaleString('pt-BR')} pessoas
+                                                    </div>
+
+                                                    {/* Barra de progresso */}
+                                                    <div style={{
+                                                        width: '100%',
+                                                        height: '8px',
+                                                        background: '#e5e7eb',
+                                                        borderRadius: '4px',
+                                                        overflow: 'hidden'
+                                                    }}>
+                                                        <div style={{
+                                                            width: `${bottleneck.conversionRate}%`,
+                                                            height: '100%',
+                                                            background: bottleneck.dropoutRate > 70 ? '#dc2626' : bottleneck.dropoutRate > 50 ? '#f59e0b' : '#10b981',
+                                                            transition: 'width 0.3s'
+                                                        }} />
+                                                    </div>
+
+                                                    <div style={{ fontSize: '11px', color: '#9ca3af', marginTop: '4px' }}>
+                                                        Taxa de conversão: {bottleneck.conversionRate.toFixed(1)}%
+                                                    </div>
+                                                </div>
+                                            ))}
+
+                                            {/* Sugestões */}
+                                            <div style={{
+                                                background: '#dbeafe',
+                                                border: '2px solid #3b82f6',
+                                                borderRadius: '8px',
+                                                padding: '12px',
+                                                marginTop: '20px'
+                                            }}>
+                                                <div style={{ fontSize: '13px', fontWeight: '600', color: '#1e40af', marginBottom: '8px' }}>
+                                                    💡 Dica de Otimização
+                                                </div>
+                                                <div style={{ fontSize: '12px', color: '#1e3a8a' }}>
+                                                    Foque em melhorar o maior gargalo primeiro. Uma melhoria de 10% nesta etapa pode aumentar significativamente o resultado final do funil.
+                                                </div>
+                                            </div>
+                                        </div>
+                                    );
+                                })()}
+                            </div>
+                        )}
+
+                        {!presentationMode && (
+                        <div className={`sidebar ${sidebarCollapsed ? 'collapsed' : ''}`}>
+                            <div className="sidebar-toggle" onClick={() => setSidebarCollapsed(!sidebarCollapsed)}>
+                                {sidebarCollapsed ? '→' : '←'}
+                            </div>
+                            <h3>Elementos do Funil</h3>
+                            <div className="element-library">
+                                {ELEMENT_CATEGORIES.map((category, idx) => (
+                                    <div key={idx} className="element-category">
+                                        <div className="category-header">
+                                            <span className="category-icon"><Icon name={category.icon} size={18} /></span>
+                                            <span className="category-name">{category.name}</span>
+                                        </div>
+                                        {category.elements.map(type => (
+                                            <div
+                                                key={type.type}
+                                                className={`library-element ${type.color}`}
+                                                draggable
+                                                onDragEnd={(e) => handleDragFromLibrary(e, type)}
+                                            >
+                                                <span className="element-icon"><Icon name={type.icon} size={16} /></span>
+                                                <span>{type.name}</span>
+                                            </div>
+                                        ))}
+                                    </div>
+                                ))}
+                            </div>
+                        </div>
+                        )}
+
+                        <div
+                            className="canvas-container"
+                            ref={canvasRef}
+                            onMouseDown={handleCanvasMouseDown}
+                            onMouseMove={handleMouseMove}
+                            onMouseUp={(e) => {
+                                if (isDraggingConnection) {
+                                    handleConnectionDragEnd(e);
+                                } else {
+                                    handleMouseUp();
+                                }
+                            }}
+                            onClick={handleCanvasClick}
+                            style={{ cursor: isPanning ? 'grabbing' : 'default' }}
+                        >
+                            <div className="zoom-controls">
+                                <button className="zoom-btn" onClick={handleZoomOut} title="Diminuir zoom">−</button>
+                                <div className="zoom-level">{Math.round(zoomLevel * 100)}%</div>
+                                <button className="zoom-btn" onClick={handleZoomIn} title="Aumentar zoom">+</button>
+                                <button className="zoom-btn" onClick={handleZoomReset} title="Resetar zoom">⊙</button>
+                            </div>
+                            <svg className="connections">
+                                <defs>
+                                    <marker
+                                        id="arrowhead"
+                                        markerWidth="10"
+                                        markerHeight="10"
+                                        refX="9"
+                                        refY="3"
+                                        orient="auto"
+                                    >
+                                        <polygon points="0 0, 10 3, 0 6" fill="rgba(148,163,184,0.5)" />
+                                    </marker>
+                                </defs>
+                                <g transform={`translate(${panOffset.x}, ${panOffset.y}) scale(${zoomLevel})`}>
+                                    {(() => {
+                                        // Pre-calcula gargalos uma vez para colorir as conexões
+                                        const bottleneckMap = {};
+                                        if (showBottleneckAnalysis) {
+                                            const bns = analyzeBottlenecks();
+                                            bns.forEach(b => { bottleneckMap[`${b.fromId}-${b.toId}`] = b; });
+                                        }
+                                        return connections.map((conn) => {
+                                        const fromEl = elements.find(el => el.id === conn.from);
+                                        const toEl = elements.find(el => el.id === conn.to);
+                                        if (!fromEl || !toEl) return null;
+
+                                        const midX = (fromEl.x + toEl.x) / 2 + 100;
+                                        const midY = (fromEl.y + toEl.y) / 2 + 50;
+                                        const connPath = getConnectionPath(conn.from, conn.to, conn.fromSide || 'right', conn.toSide || 'left');
+
+                                        // Gargalo para esta conexão
+                                        const bn = bottleneckMap[`${conn.from}-${conn.to}`];
+                                        const isBottleneck = !!bn;
+                                        const dropRate = bn ? bn.dropoutRate : 0;
+                                        const bnColor = dropRate > 70 ? '#EF4444' : dropRate > 40 ? '#F97316' : '#FBBF24';
+                                        const badgeW = isBottleneck ? 52 : 40;
+
+                                        return (
+                                            <g key={conn.id}>
+                                                <path
+                                                    className="connection-hit-area"
+                                                    d={connPath}
+                                                    onClick={(e) => handleConnectionClick(e, conn)}
+                                                />
+                                                <path
+                                                    className={`connection-line ${selectedConnection === conn.id ? 'selected' : ''}`}
+                                                    d={connPath}
+                                                    style={isBottleneck ? {stroke: bnColor, strokeWidth: selectedConnection === conn.id ? 4 : 2.5, opacity: 0.9} : {}}
+                                                />
+                                                {!presentationMode && (
+                                                <React.Fragment>
+                                                {isBottleneck ? (
+                                                    <>
+                                                        <rect x={midX - badgeW/2} y={midY - 11} width={badgeW} height="22" rx="6" fill={bnColor} opacity="0.92" />
+                                                        <text x={midX} y={midY + 4} textAnchor="middle" fontSize="10" fontWeight="700" fill="white" fontFamily="JetBrains Mono, monospace">
+                                                            -{dropRate.toFixed(0)}% perda
+                                                        </text>
+                                                    </>
+                                                ) : (
+                                                    <>
+                                                        <rect className="connection-label-bg" x={midX - 20} y={midY - 10} width="40" height="20" />
+                                                        <text className="connection-label" x={midX} y={midY + 4}>
+                                                            {conn.conversion || 0}%
+                                                        </text>
+                                                    </>
+                                                )}
+                                                </React.Fragment>
+                                                )}
+                                            </g>
+                                        );
+                                        });
+                                    })()}
+                                    {isDraggingConnection && dragConnectionStart && dragConnectionEnd && (
+                                        <line
+                                            className="connection-drag-line"
+                                            x1={dragConnectionStart.x}
+                                            y1={dragConnectionStart.y}
+                                            x2={dragConnectionEnd.x}
+                                            y2={dragConnectionEnd.y}
+                                        />
+                                    )}
+                                </g>
+                            </svg>
+
+                            <div className="canvas" style={{ transform: `translate(${panOffset.x}px, ${panOffset.y}px) scale(${zoomLevel})` }}>
+                                {/* Empty state — aparece quando o canvas está vazio */}
+                                {elements.length === 0 && !presentationMode && (
+                                    <div style={{
+                                        position: 'fixed',
+                                        inset: 0,
+                                        display: 'flex',
+                                        flexDirection: 'column',
+                                        alignItems: 'center',
+                                        justifyContent: 'center',
+                                        gap: '16px',
+                                        pointerEvents: 'none',
+                                        zIndex: 2
+                                    }}>
+                                        <div style={{
+                                            width: '72px', height: '72px',
+                                            borderRadius: '20px',
+                                            background: 'rgba(124,58,237,0.12)',
+                                            border: '1px solid rgba(124,58,237,0.25)',
+                                            display: 'flex', alignItems: 'center', justifyContent: 'center',
+                                            fontSize: '32px'
+                                        }}>📊</div>
+                                        <div style={{textAlign: 'center'}}>
+                                            <p style={{fontSize: '16px', fontWeight: '700', color: 'var(--fg)', marginBottom: '6px', fontFamily: 'Inter, sans-serif'}}>Canvas vazio</p>
+                                            <p style={{fontSize: '13px', color: 'var(--fg-muted)', fontFamily: 'Inter, sans-serif', lineHeight: '1.6'}}>
+                                                Arraste um elemento da barra lateral<br/>ou solte uma conexão no canvas para começar
+                                            </p>
+                                        </div>
+                                        <div style={{
+                                            display: 'flex', gap: '8px', flexWrap: 'wrap', justifyContent: 'center',
+                                            marginTop: '4px', pointerEvents: 'all'
+                                        }}>
+                                            {[{icon:'🎯',label:'Tráfego Pago',type:'trafego'},{icon:'🇫',label:'Facebook Ads',type:'facebook'},{icon:'🔍',label:'Google Ads',type:'google'}].map(t => (
+                                                <div key={t.type} onClick={() => {
+                                                    const newEl = {
+                                                        id: genId(), type: t.type, name: t.label, icon: t.icon,
+                                                        color: `color-${t.type}`, x: 200 + Math.random()*100, y: 200,
+                                                        investment: 0, impressions: 0, clicks: 0, ctr: 0, cpm: 0,
+                                                        trafficMode: t.type === 'google' ? 'metrics' : 'absolute',
+                                                        pageViewRate: 100, conversionRate: 0, price: 0, url: '', description: '', generatesRevenue: false
+                                                    };
+                                                    setElements([newEl]);
+                                                }} style={{
+                                                    padding: '8px 14px',
+                                                    background: 'rgba(124,58,237,0.1)',
+                                                    border: '1px solid rgba(124,58,237,0.25)',
+                                                    borderRadius: '8px',
+                                                    color: 'var(--primary-light)',
+                                                    fontSize: '13px', fontWeight: '600',
+                                                    cursor: 'pointer', display: 'flex', alignItems: 'center', gap: '6px',
+                                                    fontFamily: 'Inter, sans-serif',
+                                                    transition: 'all 150ms'
+                                                }}
+                                                    onMouseOver={(e) => { e.currentTarget.style.background='rgba(124,58,237,0.2)'; }}
+                                                    onMouseOut={(e) => { e.currentTarget.style.background='rgba(124,58,237,0.1)'; }}
+                                                >
+                                                    <span>{t.icon}</span>{t.label}
+                                                </div>
+                                            ))}
+                                        </div>
+                                    </div>
+                                )}
+                                {elements.map(element => {
+                                    const metrics = metricsMap[element.id]?.calculatedMetrics || {};
+                                    // Se tem cor customizada, usa ela; senão usa a padrão do tipo
+                                    const elementColor = element.customColor || DEFAULT_COLORS[element.type];
+                                    // Determina cor do texto baseado no tipo (alguns fundos claros precisam texto escuro)
+                                    const textColor = needsDarkText(element.type) ? '#2d3748' : 'white';
+
+                                    return (
+                                        <div
+                                            key={element.id}
+                                            className={`funnel-element ${
+                                                selectedElement === element.id ? 'selected' : ''
+                                            } ${isDragging && draggingElement === element.id ? 'dragging' : ''} ${
+                                                hoveredElement === element.id ? 'drag-hover' : ''
+                                            } ${presentationMode ? 'presentation' : ''}`}
+                                            style={{
+                                                left: element.x,
+                                                top: element.y,
+                                                background: elementColor,
+                                                color: textColor
+                                            }}
+                                            onClick={presentationMode ? undefined : (e) => handleElementClick(e, element)}
+                                            onMouseDown={presentationMode ? undefined : (e) => handleElementMouseDown(e, element)}
+                                            onMouseEnter={presentationMode ? undefined : () => handleElementHover(element.id, true)}
+                                            onMouseLeave={presentationMode ? undefined : () => handleElementHover(element.id, false)}
+                                        >
+                                            {presentationMode ? (
+                                            <div className="element-presentation">
+                                                <span className="element-presentation-icon"><Icon name={element.icon} size={32} /></span>
+                                                <span className="element-presentation-name">{element.name}</span>
+                                            </div>
+                                            ) : (
+                                            <React.Fragment>
+                                            {/* Pontos de conexão nos 4 lados */}
+                                            <div
+                                                className={`connection-point top ${connectingFrom === element.id ? 'connecting' : ''}`}
+                                                onMouseDown={(e) => handleConnectionStart(e, element.id, 'top')}
+                                                title="Conectar do topo"
+                                            />
+                                            <div
+                                                className={`connection-point right ${connectingFrom === element.id ? 'connecting' : ''}`}
+                                                onMouseDown={(e) => handleConnectionStart(e, element.id, 'right')}
+                                                title="Conectar da direita"
+                                            />
+                                            <div
+                                                className={`connection-point bottom ${connectingFrom === element.id ? 'connecting' : ''}`}
+                                                onMouseDown={(e) => handleConnectionStart(e, element.id, 'bottom')}
+                                                title="Conectar de baixo"
+                                            />
+                                            <div
+                                                className={`connection-point left ${connectingFrom === element.id ? 'connecting' : ''}`}
+                                                onMouseDown={(e) => handleConnectionStart(e, element.id, 'left')}
+                                                title="Conectar da esquerda"
+                                            />
+
+                                            <div className="element-header">
+                                                <span className="element-icon"><Icon name={element.icon} size={16} /></span>
+                                                <span className="element-title">{element.name}</span>
+                                                <div className="element-actions">
+                                                    <button
+                                                        className="element-btn"
+                                                        onClick={(e) => handleDeleteElement(e, element.id)}
+                                                        title="Deletar"
+                                                    >
+                                                        ✕
+                                                    </button>
+                                                </div>
+                                            </div>
+
+                                            <div className="element-metrics">
+                                                {['trafego', 'google', 'facebook'].includes(element.type) ? (
+                                                    // Métricas para Tráfego
+                                                    <>
+                                                        <div className="metric-row">
+                                                            <span>👁️ {(element.impressions || 0).toLocaleString('pt-BR')} impressões</span>
+                                                        </div>
+                                                        <div className="metric-row">
+                                                            <span>👆 {(element.clicks || 0).toLocaleString('pt-BR')} cliques ({element.impressions > 0 ? ((element.clicks / element.impressions) * 100).toFixed(1) : 0}%)</span>
+                                                        </div>
+                                                        <div style={{borderTop: '1px solid rgba(255,255,255,0.2)', margin: '6px 0', paddingTop: '6px'}}>
+                                                            <div className="metric-row">
+                                                                <span>💰 R$ {(metrics.investment || 0).toLocaleString('pt-BR', { minimumFractionDigits: 2 })}</span>
+                                                            </div>
+                                                            <div className="metric-row">
+                                                                <span>💵 R$ {(metrics.costPerLead || 0).toFixed(2)}/clique</span>
+                                                            </div>
+                                                        </div>
+                                                    </>
+                                                ) : element.type === 'retargeting' && element.clicks > 0 ? (
+                                                    // Métricas para Retargeting como fonte de tráfego
+                                                    <>
+                                                        <div className="metric-row">
+                                                            <span>👁️ {(element.impressions || 0).toLocaleString('pt-BR')} impressões</span>
+                                                        </div>
+                                                        <div className="metric-row">
+                                                            <span>👆 {(element.clicks || 0).toLocaleString('pt-BR')} cliques ({element.impressions > 0 ? ((element.clicks / element.impressions) * 100).toFixed(1) : 0}%)</span>
+                                                        </div>
+                                                        <div style={{borderTop: '1px solid rgba(255,255,255,0.2)', margin: '6px 0', paddingTop: '6px'}}>
+                                                            <div className="metric-row">
+                                                                <span>💰 R$ {((element.investment || element.retargetingInvestment) || 0).toLocaleString('pt-BR', { minimumFractionDigits: 2 })}</span>
+                                                            </div>
+                                                            <div className="metric-row">
+                                                                <span>💵 R$ {(metrics.costPerLead || 0).toFixed(2)}/clique</span>
+                                                            </div>
+                                                        </div>
+                                                    </>
+                                                ) : (
+                                                    // Métricas para páginas e outros elementos
+                                                    <>
+                                                        <div className="metric-row">
+                                                            <span>👥 {metrics.visits?.toLocaleString('pt-BR') || 0} visitantes</span>
+                                                        </div>
+                                                        <div className="metric-row">
+                                                            {(() => {
+                                                                const isRevenue = ['vendas','checkout','upsell','downsell','ecommerce'].includes(element.type);
+                                                                const isCapture = ['landing','captura','squeeze'].includes(element.type);
+                                                                const label = isRevenue ? 'vendas' : isCapture ? 'leads' : 'conversões';
+                                                                return <span>{metrics.leads?.toLocaleString('pt-BR') || 0} {label} ({element.conversionRate || 0}%)</span>;
+                                                            })()}
+                                                        </div>
+                                                        {/* Retargeting sem métricas de tráfego mostra apenas investimento se configurado */}
+                                                        {element.type === 'retargeting' && element.clicks === 0 && element.retargetingInvestment > 0 && (
+                                                            <div style={{borderTop: '1px solid rgba(255,255,255,0.2)', margin: '6px 0', paddingTop: '6px'}}>
+                                                                <div className="metric-row">
+                                                                    <span>💰 R$ {(element.retargetingInvestment || 0).toLocaleString('pt-BR', { minimumFractionDigits: 2 })} investido</span>
+                                                                </div>
+                                                            </div>
+                                                        )}
+                                                        {metrics.revenue > 0 && (
+                                                            <div style={{borderTop: '1px solid rgba(255,255,255,0.2)', margin: '6px 0', paddingTop: '6px'}}>
+                                                                <div className="metric-row">
+                                                                    <span>💰 R$ {element.price?.toLocaleString('pt-BR', { minimumFractionDigits: 2 }) || '0,00'} cada</span>
+                                                                </div>
+                                                                {element.hasOrderBump && metrics.orderBumpSales > 0 && (
+                                                                    <div className="metric-row">
+                                                                        <span>🎁 {metrics.orderBumpSales} bumps (R$ {(metrics.orderBumpRevenue || 0).toLocaleString('pt-BR', { minimumFractionDigits: 2 })})</span>
+                                                                    </div>
+                                                                )}
+                                                                <div className="metric-row">
+                                                                    <span>💵 R$ {(metrics.revenue || 0).toLocaleString('pt-BR', { minimumFractionDigits: 2 })} total</span>
+                                                                </div>
+                                                            </div>
+                                                        )}
+                                                    </>
+                                                )}
+                                            </div>
+
+                                            <div
+                                                className={`connection-point right ${connectingFrom === element.id ? 'connecting' : ''}`}
+                                                onMouseDown={(e) => handleConnectionStart(e, element.id)}
+                                                title="Saída - Segurar e arrastar para conectar"
+                                            />
+                                            </React.Fragment>
+                                            )}
+                                        </div>
+                                    );
+                                })}
+                            </div>
+
+                            {showElementMenu && (
+                                <div
+                                    className="element-menu-popup"
+                                    style={{
+                                        left: elementMenuPosition.x,
+                                        top: elementMenuPosition.y,
+                                        transform: `scale(${1 / zoomLevel})`
+                                    }}
+                                    onClick={(e) => e.stopPropagation()}
+                                >
+                                    <h4>+ Adicionar Elemento</h4>
+                                    {ELEMENT_CATEGORIES.map((category, idx) => (
+                                        <div key={idx} className="popup-category">
+                                            <div className="popup-category-header">
+                                                <span className="popup-category-icon"><Icon name={category.icon} size={16} /></span>
+                                                <span className="popup-category-name">{category.name}</span>
+                                            </div>
+                                            {category.elements.map(type => (
+                                                <div
+                                                    key={type.type}
+                                                    className={`popup-element-item ${type.color}`}
+                                                    onClick={() => handleElementMenuSelect(type)}
+                                                >
+                                                    <span className="element-icon"><Icon name={type.icon} size={16} /></span>
+                                                    <span>{type.name}</span>
+                                                </div>
+                                            ))}
+                                        </div>
+                                    ))}
+                                </div>
+                            )}
+                        </div>
+
+                        <div className={`properties-panel ${(!selectedElementData || presentationMode) ? 'hidden' : ''}`}>
+                            <h3 style={{marginBottom:'12px'}}>
+                                {selectedElementData?.name || 'Propriedades'}
+                                <span style={{fontSize:'10px', color:'var(--fg-subtle)', marginLeft:'8px', fontWeight:'400', textTransform:'uppercase', letterSpacing:'0.8px'}}>
+                                    {selectedElementData?.type}
+                                </span>
+                            </h3>
+                            {selectedElementData ? (
+                                <div>
+
+                                    {/* ── Divisor: AVANÇADO (cor, URL, descrição) ── aparece ANTES dos campos essenciais */}
+                                    <div className="panel-section-header" onClick={() => togglePanelSection('advanced')} style={{borderRadius:'var(--radius-sm)', marginBottom: panelSections.advanced ? '8px' : '4px'}}>
+                                        <span className="panel-section-title">Aparência &amp; Links</span>
+                                        <span className={`panel-section-arrow ${panelSections.advanced ? 'open' : ''}`}>▶</span>
+                                    </div>
+
+                                    {panelSections.advanced && (<div>
+
+                                    <div className="form-group">
+                                        <label className="form-label">Nome</label>
+                                        <input
+                                            type="text"
+                                            className="form-input"
+                                            value={selectedElementData.name || ''}
+                                            onChange={(e) => updateElementProperty('name', e.target.value)}
+                                            placeholder="Digite o nome..."
+                                        />
+                                    </div>
+
+                                    <div className="form-group">
+                                        <label className="form-label">Cor do Elemento</label>
+                                        <div style={{display: 'flex', gap: '10px', alignItems: 'center'}}>
+                                            <input
+                                                type="color"
+                                                style={{
+                                                    width: '60px',
+                                                    height: '40px',
+                                                    border: '2px solid #e2e8f0',
+                                                    borderRadius: '8px',
+                                                    cursor: 'pointer'
+                                                }}
+                                                value={selectedElementData.customColorPicker || '#667eea'}
+                                                onChange={(e) => {
+                                                    const color = e.target.value;
+                                                    updateElementProperty('customColorPicker', color);
+                                                    updateElementProperty('customColor', `linear-gradient(135deg, ${color} 0%, ${color} 100%)`);
+                                                }}
+                                            />
+                                            <button
+                                                className="form-button"
+                                                style={{
+                                                    padding: '8px 16px',
+                                                    background: '#e2e8f0',
+                                                    border: 'none',
+                                                    borderRadius: '6px',
+                                                    cursor: 'pointer',
+                                                    fontWeight: '600',
+                                                    fontSize: '13px',
+                                                    color: '#4a5568'
+                                                }}
+                                                onClick={() => {
+                                                    updateElementProperty('customColor', null);
+                                                    updateElementProperty('customColorPicker', null);
+                                                }}
+                                            >
+                                                🔄 Restaurar Padrão
+                                            </button>
+                                        </div>
+                                        <small className="form-help">Personalize a cor deste elemento ou use a cor padrão</small>
+                                    </div>
+
+                                    {/* Seletor de Página */}
+                                    {['landing', 'vsl', 'checkout', 'vendas', 'squeeze', 'captura', 'upsell', 'downsell', 'webinar'].includes(selectedElementData.type) && (
+                                        <div className="form-group">
+                                            <label className="form-label">📄 Vincular Página Cadastrada</label>
+                                            <select
+                                                className="form-input"
+                                                value={selectedElementData.pageId || ''}
+                                                onChange={(e) => {
+                                                    const pageId = e.target.value;
+
+                                                    if (pageId) {
+                                                        const page = pages.find(p => p.id === parseInt(pageId));
+                                                        if (page) {
+                                                            // Atualiza tudo de uma vez usando setElements
+                                                            setElements(elements.map(el => {
+                                                                if (el.id === selectedElement) {
+                                                                    return {
+                                                                        ...el,
+                                                                        pageId: parseInt(pageId),
+                                                                        pageName: page.name,
+                                                                        url: page.url,
+                                                                        description: page.description || el.description
+                                                                    };
+                                                                }
+                                                                return el;
+                                                            }));
+                                                        }
+                                                    } else {
+                                                        // Remove vinculação
+                                                        setElements(elements.map(el => {
+                                                            if (el.id === selectedElement) {
+                                                                return {
+                                                                    ...el,
+                                                                    pageId: null,
+                                                                    pageName: null
+                                                                };
+                                                            }
+                                                            return el;
+                                                        }));
+                                                    }
+                                                }}
+                                                style={{ fontSize: '14px' }}
+                                            >
+                                                <option value="">Nenhuma página vinculada</option>
+                                                {pages.map(page => (
+                                                    <option key={page.id} value={page.id}>
+                                                        {page.name} ({page.category})
+                                                    </option>
+                                                ))}
+                                            </select>
+                                            {selectedElementData.pageId && (
+                                                <small className="form-help" style={{ display: 'block', marginTop: '8px', color: '#10b981' }}>
+                                                    ✓ Página vinculada: {selectedElementData.pageName}
+                                                </small>
+                                            )}
+                                            {selectedElementData.url && (
+                                                <small className="form-help" style={{ display: 'block', marginTop: '4px', color: '#6b7280', fontSize: '12px', wordBreak: 'break-all' }}>
+                                                    🔗 {selectedElementData.url}
+                                                </small>
+                                            )}
+                                            {pages.length === 0 && (
+                                                <small className="form-help" style={{ display: 'block', marginTop: '8px', color: '#f59e0b' }}>
+                                                    💡 Cadastre páginas em Marketing &gt; Páginas
+                                                </small>
+                                            )}
+                                        </div>
+                                    )}
+
+                                    {/* Gerador de UTM */}
+                                    {['landing', 'vsl', 'checkout', 'vendas', 'squeeze', 'captura', 'upsell', 'downsell', 'webinar'].includes(selectedElementData.type) && selectedElementData.url && (
+                                        <div className="form-group">
+                                            <label className="form-label">🔗 UTMs para Rastreamento</label>
+
+                                            {/* Lista de UTMs existentes - Mostrar primeiro */}
+                                            {utms.length > 0 && !showUtmGenerator && (
+                                                <div style={{ marginBottom: '12px' }}>
+                                                    <label style={{ fontSize: '13px', color: '#718096', display: 'block', marginBottom: '8px' }}>
+                                                        Selecione uma UTM e copie a URL completa:
+                                                    </label>
+                                                    <div style={{
+                                                        border: '1px solid #e2e8f0',
+                                                        borderRadius: '8px',
+                                                        padding: '12px',
+                                                        background: '#f9fafb',
+                                                        maxHeight: '200px',
+                                                        overflowY: 'auto'
+                                                    }}>
+                                                        {utms.map(utm => {
+                                                            const utmUrl = `${selectedElementData.url}${selectedElementData.url.includes('?') ? '&' : '?'}utm_source=${utm.utm_source}&utm_medium=${utm.utm_medium}&utm_campaign=${utm.utm_campaign}${utm.utm_content ? '&utm_content=' + utm.utm_content : ''}${utm.utm_term ? '&utm_term=' + utm.utm_term : ''}`;
+
+                                                            return (
+                                                                <div
+                                                                    key={utm.id}
+                                                                    style={{
+                                                                        padding: '10px',
+                                                                        background: 'white',
+                                                                        border: '1px solid #e2e8f0',
+                                                                        borderRadius: '6px',
+                                                                        marginBottom: '8px',
+                                                                        cursor: 'pointer',
+                                                                        transition: 'all 0.2s'
+                                                                    }}
+                                                                    onMouseOver={(e) => {
+                                                                        e.currentTarget.style.borderColor = '#667eea';
+                                                                        e.currentTarget.style.background = '#f0f4ff';
+                                                                    }}
+                                                                    onMouseOut={(e) => {
+                                                                        e.currentTarget.style.borderColor = '#e2e8f0';
+                                                                        e.currentTarget.style.background = 'white';
+                                                                    }}
+                                                                    onClick={() => {
+                                                                        navigator.clipboard.writeText(utmUrl);
+                                                                        alert('✓ URL copiada com sucesso!');
+                                                                    }}
+                                                                >
+                                                                    <div style={{ fontSize: '13px', fontWeight: '600', color: '#1f2937', marginBottom: '4px' }}>
+                                                                        {utm.name}
+                                                                    </div>
+                                                                    <div style={{ fontSize: '11px', color: '#6b7280', marginBottom: '6px' }}>
+                                                                        {utm.utm_source} • {utm.utm_medium} • {utm.utm_campaign}
+                                                                    </div>
+                                                                    <div style={{
+                                                                        fontSize: '10px',
+                                                                        color: '#9ca3af',
+                                                                        fontFamily: 'monospace',
+                                                                        background: '#f3f4f6',
+                                                                        padding: '4px 6px',
+                                                                        borderRadius: '4px',
+                                                                        overflow: 'hidden',
+                                                                        textOverflow: 'ellipsis',
+                                                                        whiteSpace: 'nowrap'
+                                                                    }}>
+                                                                        {utmUrl}
+                                                                    </div>
+                                                                    <div style={{ fontSize: '11px', color: '#667eea', marginTop: '6px', textAlign: 'center', fontWeight: '600' }}>
+                                                                        📋 Clique para copiar
+                                                                    </div>
+                                                                </div>
+                                                            );
+                                                        })}
+                                                    </div>
+                                                </div>
+                                            )}
+
+                                            {/* Botão para criar nova UTM */}
+                                            {!showUtmGenerator ? (
+                                                <button
+                                                    className="form-button"
+                                                    style={{
+                                                        padding: '10px 16px',
+                                                        background: utms.length > 0 ? '#e2e8f0' : '#667eea',
+                                                        color: utms.length > 0 ? '#4a5568' : 'white',
+                                                        border: 'none',
+                                                        borderRadius: '6px',
+                                                        cursor: 'pointer',
+                                                        fontWeight: '600',
+                                                        fontSize: '14px',
+                                                        width: '100%'
+                                                    }}
+                                                    onClick={() => setShowUtmGenerator(true)}
+                                                >
+                                                    ➕ {utms.length > 0 ? 'Criar nova UTM' : 'Criar primeira UTM'}
+                                                </button>
+                                            ) : (
+                                                <div style={{
+                                                    border: '1px solid #667eea',
+                                                    borderRadius: '8px',
+                                                    padding: '12px',
+                                                    background: '#f0f4ff',
+                                                    marginTop: '8px'
+                                                }}>
+                                                    <UtmGeneratorInline
+                                                        elementUrl={selectedElementData.url || ''}
+                                                        onUtmCreated={(utmData) => {
+                                                            // Salva a UTM e atualiza a lista
+                                                            apiCall('/api/utms', {
+                                                                method: 'POST',
+                                                                body: JSON.stringify(utmData)
+                                                            }).then(() => {
+                                                                loadUtms();
+                                                                setShowUtmGenerator(false);
+                                                                alert('✓ UTM criada com sucesso!');
+                                                            }).catch(err => {
+                                                                console.error('Erro ao criar UTM:', err);
+                                                                alert('✗ Erro ao criar UTM');
+                                                            });
+                                                        }}
+                                                        onCancel={() => setShowUtmGenerator(false)}
+                                                    />
+                                                </div>
+                                            )}
+                                        </div>
+                                    )}
+
+                                    {/* Aviso se não tem URL configurada */}
+                                    {['landing', 'vsl', 'checkout', 'vendas', 'squeeze', 'captura', 'upsell', 'downsell', 'webinar'].includes(selectedElementData.type) && !selectedElementData.url && (
+                                        <div className="form-group">
+                                            <div style={{
+                                                padding: '12px',
+                                                background: '#fef3c7',
+                                                border: '1px solid #fbbf24',
+                                                borderRadius: '8px',
+                                                fontSize: '13px',
+                                                color: '#92400e'
+                                            }}>
+                                                ⚠️ Configure a URL do elemento primeiro para poder gerar UTMs
+                                            </div>
+                                        </div>
+                                    )}
+
+                                    </div>)} {/* Fecha panelSections.advanced */}
+
+                                    {/* ── Divisor: ESSENCIAL (métricas, conversão, receita) ── */}
+                                    <div className="panel-section-header" onClick={() => togglePanelSection('essential')} style={{borderRadius:'var(--radius-sm)', marginBottom: panelSections.essential ? '8px' : '4px', marginTop:'4px'}}>
+                                        <span className="panel-section-title">Métricas</span>
+                                        <span className={`panel-section-arrow ${panelSections.essential ? 'open' : ''}`}>▶</span>
+                                    </div>
+
+                                    {panelSections.essential && (<div>
+
+                                    {/* Campos específicos para TRÁFEGO */}
+                                    {['trafego', 'google', 'facebook'].includes(selectedElementData.type) && !connections.some(conn => conn.to === selectedElementData.id) && (
+                                        <>
+                                            {/* Toggle PRIMEIRO — define quais campos aparecerão abaixo */}
+                                            {selectedElementData.type !== 'google' && (
+                                                <>
+                                                    <p style={{fontSize:'11px', color:'var(--fg-subtle)', marginBottom:'6px', textTransform:'uppercase', letterSpacing:'0.7px', fontWeight:'600'}}>Como informar seus dados</p>
+                                                    <div className="traffic-mode-toggle">
+                                                        <div
+                                                            className={`mode-option ${selectedElementData.trafficMode === 'absolute' ? 'active' : 'inactive'}`}
+                                                            onClick={() => updateElementProperty('trafficMode', 'absolute')}
+                                                        >
+                                                            Impressões + Cliques
+                                                        </div>
+                                                        <div
+                                                            className={`mode-option ${selectedElementData.trafficMode === 'metrics' ? 'active' : 'inactive'}`}
+                                                            onClick={() => updateElementProperty('trafficMode', 'metrics')}
+                                                        >
+                                                            CPM + CTR
+                                                        </div>
+                                                    </div>
+                                                </>
+                                            )}
+
+                                            {selectedElementData.type === 'google' && (
+                                                <div style={{
+                                                    background: 'rgba(66,133,244,0.12)',
+                                                    border: '1px solid rgba(66,133,244,0.25)',
+                                                    color: 'var(--fg-muted)',
+                                                    padding: '10px 12px',
+                                                    borderRadius: 'var(--radius-sm)',
+                                                    marginBottom: '16px',
+                                                    fontSize: '12.5px',
+                                                    fontWeight: '500'
+                                                }}>
+                                                    Google Ads — modelo CPC (Custo Por Clique)
+                                                </div>
+                                            )}
+
+                                            <div className="form-group">
+                                                <label className="form-label">Investimento (R$)</label>
+                                                <input
+                                                    type="number"
+                                                    className={`form-input ${validateValue('investment', selectedElementData.investment).type || ''}`}
+                                                    value={selectedElementData.investment === 0 ? '' : selectedElementData.investment}
+                                                    onChange={(e) => updateElementProperty('investment', e.target.value)}
+                                                    placeholder="Ex: 10000"
+                                                    step="0.01"
+                                                />
+                                                <small className="form-help">Quanto você pretende investir em anúncios?</small>
+                                                {validateValue('investment', selectedElementData.investment).message && (
+                                                    <div className={`validation-message ${validateValue('investment', selectedElementData.investment).type}`}>
+                                                        {validateValue('investment', selectedElementData.investment).message}
+                                                    </div>
+                                                )}
+                                            </div>
+
+                                            {/* Google sempre usa CPM, outros podem escolher */}
+                                            {(selectedElementData.trafficMode === 'absolute' && selectedElementData.type !== 'google') ? (
+                                                <>
+                                                    <div className="form-group">
+                                                        <label className="form-label">👁️ Impressões Esperadas</label>
+                                                        <input
+                                                            type="number"
+                                                            className={`form-input ${validateValue('impressions', selectedElementData.impressions).type || ''}`}
+                                                            value={selectedElementData.impressions === 0 ? '' : selectedElementData.impressions}
+                                                            onChange={(e) => updateElementProperty('impressions', e.target.value)}
+                                                            placeholder="Ex: 100000"
+                                                        />
+                                                        <small className="form-help">Quantas pessoas verão seu anúncio?</small>
+                                                    </div>
+                                                    <div className="form-group">
+                                                        <label className="form-label">👆 Cliques Esperados</label>
+                                                        <input
+                                                            type="number"
+                                                            className={`form-input ${validateValue('clicks', selectedElementData.clicks).type || ''}`}
+                                                            value={selectedElementData.clicks === 0 ? '' : selectedElementData.clicks}
+                                                            onChange={(e) => updateElementProperty('clicks', e.target.value)}
+                                                            placeholder="Ex: 2000"
+                                                        />
+                                                        <small className="form-help">Quantas pessoas clicarão? (CTR calculado: {selectedElementData.ctr}%)</small>
+                                                    </div>
+                                                </>
+                                            ) : selectedElementData.type === 'google' ? (
+                                                <>
+                                                    {/* Google Ads usa CPC (Custo Por Clique) */}
+                                                    <div className="form-group">
+                                                        <label className="form-label">💰 Investimento (R$)</label>
+                                                        <input
+                                                            type="number"
+                                                            className="form-input"
+                                                            value={selectedElementData.investment === 0 ? '' : selectedElementData.investment}
+                                                            onChange={(e) => updateElementProperty('investment', e.target.value)}
+                                                            placeholder="Ex: 5000"
+                                                        />
+                                                        <small className="form-help">Total a investir no Google Ads</small>
+                                                    </div>
+                                                    <div className="form-group">
+                                                        <label className="form-label">💵 CPC - Custo por Clique (R$)</label>
+                                                        <input
+                                                            type="number"
+                                                            className="form-input"
+                                                            value={selectedElementData.cpc === 0 ? '' : selectedElementData.cpc}
+                                                            onChange={(e) => updateElementProperty('cpc', e.target.value)}
+                                                            placeholder="Ex: 2.50"
+                                                            step="0.01"
+                                                        />
+                                                        <small className="form-help">Quanto você paga por cada clique? (Cliques calculados: {selectedElementData.clicks.toLocaleString('pt-BR')})</small>
+                                                    </div>
+                                                    <div className="form-group">
+                                                        <label className="form-label">📊 CTR - Taxa de Cliques (%)</label>
+                                                        <input
+                                                            type="number"
+                                                            className="form-input"
+                                                            value={selectedElementData.ctr === 0 ? '' : selectedElementData.ctr}
+                                                            onChange={(e) => updateElementProperty('ctr', e.target.value)}
+                                                            placeholder="Ex: 5"
+                                                            step="0.01"
+                                                        />
+                                                        <small className="form-help">% de pessoas que clicam (Impressões calculadas: {selectedElementData.impressions.toLocaleString('pt-BR')})</small>
+                                                    </div>
+                                                </>
+                                            ) : (
+                                                <>
+                                                    {/* Facebook e Outros usam CPM + CTR */}
+                                                    <div className="form-group">
+                                                        <label className="form-label">💵 CPM - Custo por Mil (R$)</label>
+                                                        <input
+                                                            type="number"
+                                                            className="form-input"
+                                                            value={selectedElementData.cpm === 0 ? '' : selectedElementData.cpm}
+                                                            onChange={(e) => updateElementProperty('cpm', e.target.value)}
+                                                            placeholder="Ex: 25"
+                                                            step="0.01"
+                                                        />
+                                                        <small className="form-help">Quanto custa 1000 impressões? (Impressões calculadas: {selectedElementData.impressions.toLocaleString('pt-BR')})</small>
+                                                    </div>
+                                                    <div className="form-group">
+                                                        <label className="form-label">📊 CTR - Taxa de Cliques (%)</label>
+                                                        <input
+                                                            type="number"
+                                                            className="form-input"
+                                                            value={selectedElementData.ctr === 0 ? '' : selectedElementData.ctr}
+                                                            onChange={(e) => updateElementProperty('ctr', e.target.value)}
+                                                            placeholder="Ex: 2"
+                                                            step="0.01"
+                                                        />
+                                                        <small className="form-help">% de pessoas que clicam no anúncio (Cliques calculados: {selectedElementData.clicks.toLocaleString('pt-BR')})</small>
+                                                    </div>
+                                                </>
+                                            )}
+
+                                            {selectedElementData.clicks > 0 && (
+                                                <div className="benchmark-box" style={{background: 'linear-gradient(135deg, #667eea 0%, #764ba2 100%)', color: 'white', border: 'none'}}>
+                                                    <h4 style={{color: 'white'}}>👥 TRÁFEGO PARA PRÓXIMA ETAPA</h4>
+                                                    <div className="benchmark-item" style={{fontSize: '16px', fontWeight: 'bold'}}>
+                                                        <span>• {selectedElementData.clicks.toLocaleString('pt-BR')} pessoas chegarão na próxima página</span>
+                                                    </div>
+                                                    {selectedElementData.impressions > 0 && (
+                                                        <>
+                                                            <div className="benchmark-item">
+                                                                <span>• CTR: {selectedElementData.ctr > 0 ? selectedElementData.ctr : ((selectedElementData.clicks / selectedElementData.impressions) * 100).toFixed(2)}%</span>
+                                                            </div>
+                                                            <div className="benchmark-item">
+                                                                <span>• CPM: R$ {selectedElementData.cpm > 0 ? selectedElementData.cpm.toFixed(2) : ((selectedElementData.investment / selectedElementData.impressions) * 1000).toFixed(2)}</span>
+                                                            </div>
+                                                            <div className="benchmark-item">
+                                                                <span>• CPC: R$ {(selectedElementData.investment / selectedElementData.clicks).toFixed(2)}</span>
+                                                            </div>
+                                                        </>
+                                                    )}
+                                                </div>
+                                            )}
+
+                                            {(() => {
+                                                const metrics = calculateMetrics()[selectedElementData.id]?.calculatedMetrics;
+                                                return metrics && (
+                                                    <div className="benchmark-box">
+                                                        <h4>📊 MÉTRICAS CALCULADAS</h4>
+                                                        <div className="benchmark-item">
+                                                            <span>• CPM: R$ {metrics.cpm.toFixed(2)}</span>
+                                                        </div>
+                                                        <div className="benchmark-item">
+                                                            <span>• Custo/Clique: R$ {metrics.costPerLead.toFixed(2)}</span>
+                                                        </div>
+                                                        <div className="benchmark-item">
+                                                            <span>• CTR: {metrics.ctr.toFixed(2)}%</span>
+                                                        </div>
+                                                    </div>
+                                                );
+                                            })()}
+                                        </>
+                                    )}
+
+                                    {/* Campos específicos para LANDING PAGE */}
+                                    {selectedElementData.type === 'landing' && (
+                                        <>
+                                            <div className="form-group">
+                                                <label className="form-label">🔗 URL da Landing Page (opcional)</label>
+                                                <input
+                                                    type="text"
+                                                    className="form-input"
+                                                    value={selectedElementData.url || ''}
+                                                    onChange={(e) => updateElementProperty('url', e.target.value)}
+                                                    placeholder="https://meusite.com/cadastro"
+                                                />
+                                                <small className="form-help">URL da sua página de captura</small>
+                                            </div>
+                                            <div className="form-group">
+                                                <label className="form-label">📝 Descrição (opcional)</label>
+                                                <input
+                                                    type="text"
+                                                    className="form-input"
+                                                    value={selectedElementData.description || ''}
+                                                    onChange={(e) => updateElementProperty('description', e.target.value)}
+                                                    placeholder="Ex: Página de cadastro para webinar gratuito"
+                                                />
+                                                <small className="form-help">Descreva o objetivo desta página</small>
+                                            </div>
+                                            <div className="form-group">
+                                                <label className="form-label">Visitantes que preenchem o formulário (%)</label>
+                                                <input
+                                                    type="number"
+                                                    className={`form-input ${validateValue('conversionRate', selectedElementData.conversionRate).type || ''}`}
+                                                    value={selectedElementData.conversionRate === 0 ? '' : selectedElementData.conversionRate}
+                                                    onChange={(e) => updateElementProperty('conversionRate', e.target.value)}
+                                                    min="0"
+                                                    max="100"
+                                                    step="0.1"
+                                                    placeholder="Ex: 15"
+                                                />
+                                                <small className="form-help">De cada 100 que chegam, quantos convertem?</small>
+                                                {validateValue('conversionRate', selectedElementData.conversionRate).message && (
+                                                    <div className={`validation-message ${validateValue('conversionRate', selectedElementData.conversionRate).type}`}>
+                                                        {validateValue('conversionRate', selectedElementData.conversionRate).message}
+                                                    </div>
+                                                )}
+                                            </div>
+                                            <div className="benchmark-compact">
+                                                <h4>📋 Benchmarks</h4>
+                                                <div className="tooltip-container">
+                                                    <span className="info-icon">i</span>
+                                                    <div className="tooltip-content wide">
+                                                        <strong>Taxa de Conversão:</strong><br/>
+                                                        • 5-15%: Bom para leads<br/>
+                                                        • 15-30%: Excelente<br/>
+                                                        • 30%+: Otimizada
+                                                    </div>
+                                                </div>
+                                            </div>
+                                        </>
+                                    )}
+
+                                    {/* Campos para outros elementos (Email, Video, Webinar, etc) */}
+                                    {selectedElementData.type !== 'trafego' && selectedElementData.type !== 'landing' && (
+                                        <>
+                                            <div className="form-group">
+                                                <label className="form-label">🔗 URL (opcional)</label>
+                                                <input
+                                                    type="text"
+                                                    className="form-input"
+                                                    value={selectedElementData.url || ''}
+                                                    onChange={(e) => updateElementProperty('url', e.target.value)}
+                                                    placeholder="https://meusite.com/checkout"
+                                                />
+                                                <small className="form-help">Link da página deste elemento</small>
+                                            </div>
+                                            <div className="form-group">
+                                                <label className="form-label">📝 Descrição (opcional)</label>
+                                                <input
+                                                    type="text"
+                                                    className="form-input"
+                                                    value={selectedElementData.description || ''}
+                                                    onChange={(e) => updateElementProperty('description', e.target.value)}
+                                                    placeholder="Ex: Página de vendas do produto principal"
+                                                />
+                                                <small className="form-help">Descreva este elemento do funil</small>
+                                            </div>
+                                            {!(selectedElementData.type === 'retargeting' && selectedElementData.clicks > 0) && (
+                                                <div className="form-group">
+                                                    <label className="form-label">
+                                                        {['vendas','checkout','upsell','downsell','ecommerce'].includes(selectedElementData.type)
+                                                            ? 'Visitantes que compram (%)'
+                                                            : ['email','sequencia','whatsapp'].includes(selectedElementData.type)
+                                                            ? 'Taxa de resposta / clique (%)'
+                                                            : 'Visitantes que convertem (%)'}
+                                                    </label>
+                                                    <input
+                                                        type="number"
+                                                        className={`form-input ${validateValue('conversionRate', selectedElementData.conversionRate).type || ''}`}
+                                                        value={selectedElementData.conversionRate === 0 ? '' : selectedElementData.conversionRate}
+                                                        onChange={(e) => updateElementProperty('conversionRate', e.target.value)}
+                                                        min="0"
+                                                        max="100"
+                                                        step="0.1"
+                                                        placeholder="Ex: 10"
+                                                    />
+                                                    <small className="form-help">De cada 100 que chegam aqui, quantos completam a ação?</small>
+                                                    {validateValue('conversionRate', selectedElementData.conversionRate).message && (
+                                                        <div className={`validation-message ${validateValue('conversionRate', selectedElementData.conversionRate).type}`}>
+                                                            {validateValue('conversionRate', selectedElementData.conversionRate).message}
+                                                        </div>
+                                                    )}
+                                                </div>
+                                            )}
+                                            {/* Campo específico para E-commerce: Taxa de Add to Cart */}
+                                            {selectedElementData.type === 'ecommerce' && (
+                                                <div className="form-group">
+                                                    <label className="form-label">🛒 Taxa de Adicionar ao Carrinho (%)</label>
+                                                    <input
+                                                        type="number"
+                                                        className={`form-input ${validateValue('addToCartRate', selectedElementData.addToCartRate).type || ''}`}
+                                                        value={selectedElementData.addToCartRate === 0 ? '' : selectedElementData.addToCartRate || ''}
+                                                        onChange={(e) => updateElementProperty('addToCartRate', e.target.value)}
+                                                        min="0"
+                                                        max="100"
+                                                        step="0.1"
+                                                        placeholder="Ex: 20"
+                                                    />
+                                                    <small className="form-help">% de visitantes que adicionam produto ao carrinho</small>
+                                                    {validateValue('addToCartRate', selectedElementData.addToCartRate).message && (
+                                                        <div className={`validation-message ${validateValue('addToCartRate', selectedElementData.addToCartRate).type}`}>
+                                                            {validateValue('addToCartRate', selectedElementData.addToCartRate).message}
+                                                        </div>
+                                                    )}
+                                                </div>
+                                            )}
+
+                                            <div className="form-group">
+                                                <div className="form-checkbox">
+                                                    <input
+                                                        type="checkbox"
+                                                        id="generates-revenue"
+                                                        checked={selectedElementData.generatesRevenue || false}
+                                                        onChange={(e) => updateElementProperty('generatesRevenue', e.target.checked)}
+                                                    />
+                                                    <label htmlFor="generates-revenue">💰 Este elemento gera receita (vendas)</label>
+                                                </div>
+                                            </div>
+                                            {selectedElementData.generatesRevenue && (
+                                                <>
+                                                    <div className="form-group">
+                                                        <label className="form-label">💵 Preço do Produto (R$)</label>
+                                                        <input
+                                                            type="number"
+                                                            className={`form-input ${validateValue('price', selectedElementData.price).type || ''}`}
+                                                            value={selectedElementData.price === 0 ? '' : selectedElementData.price}
+                                                            onChange={(e) => updateElementProperty('price', e.target.value)}
+                                                            step="0.01"
+                                                            placeholder="Ex: 197.00"
+                                                        />
+                                                        <small className="form-help">Valor que será cobrado por venda</small>
+                                                        {validateValue('price', selectedElementData.price).message && (
+                                                            <div className={`validation-message ${validateValue('price', selectedElementData.price).type}`}>
+                                                                {validateValue('price', selectedElementData.price).message}
+                                                            </div>
+                                                        )}
+                                                    </div>
+
+                                                    <div className="form-group">
+                                                        <div className="form-checkbox">
+                                                            <input
+                                                                type="checkbox"
+                                                                id="has-orderbump"
+                                                                checked={selectedElementData.hasOrderBump || false}
+                                                                onChange={(e) => updateElementProperty('hasOrderBump', e.target.checked)}
+                                                            />
+                                                            <label htmlFor="has-orderbump">🎁 Possui Order Bump</label>
+                                                        </div>
+                                                    </div>
+
+                                                    {selectedElementData.hasOrderBump && (
+                                                        <>
+                                                            <div className="form-group">
+                                                                <label className="form-label">💰 Valor do Order Bump (R$)</label>
+                                                                <input
+                                                                    type="number"
+                                                                    className="form-input"
+                                                                    value={selectedElementData.orderBumpPrice === 0 ? '' : selectedElementData.orderBumpPrice || ''}
+                                                                    onChange={(e) => updateElementProperty('orderBumpPrice', e.target.value)}
+                                                                    step="0.01"
+                                                                    placeholder="Ex: 47.00"
+                                                                />
+                                                                <small className="form-help">Valor adicional do order bump</small>
+                                                            </div>
+                                                            <div className="form-group">
+                                                                <label className="form-label">📊 Taxa de Conversão do Order Bump (%)</label>
+                                                                <input
+                                                                    type="number"
+                                                                    className="form-input"
+                                                                    value={selectedElementData.orderBumpConversion === 0 ? '' : selectedElementData.orderBumpConversion || ''}
+                                                                    onChange={(e) => updateElementProperty('orderBumpConversion', e.target.value)}
+                                                                    min="0"
+                                                                    max="100"
+                                                                    step="1"
+                                                                    placeholder="Ex: 30"
+                                                                />
+                                                                <small className="form-help">% de compradores que aceitam o order bump (típico: 20-40%)</small>
+                                                            </div>
+                                                        </>
+                                                    )}
+                                                    {(() => {
+                                                        const metrics = calculateMetrics()[selectedElementData.id]?.calculatedMetrics;
+                                                        return metrics && metrics.revenue > 0 && (
+                                                            <div className="benchmark-box">
+                                                                <h4>📊 PREVISÃO DE VENDAS</h4>
+                                                                <div className="benchmark-item">
+                                                                    <span>• Visitantes: {metrics.visits?.toLocaleString('pt-BR') || 0}</span>
+                                                                </div>
+                                                                <div className="benchmark-item">
+                                                                    <span>• Vendas: {metrics.leads?.toLocaleString('pt-BR') || 0} ({selectedElementData.conversionRate || 0}%)</span>
+                                                                </div>
+                                                                {selectedElementData.hasOrderBump && metrics.orderBumpSales > 0 && (
+                                                                    <>
+                                                                        <div className="benchmark-item">
+                                                                            <span>• Order Bumps: {metrics.orderBumpSales?.toLocaleString('pt-BR') || 0} ({selectedElementData.orderBumpConversion || 0}%)</span>
+                                                                        </div>
+                                                                        <div className="benchmark-item">
+                                                                            <span>• Receita Bump: R$ {(metrics.orderBumpRevenue || 0).toLocaleString('pt-BR', { minimumFractionDigits: 2 })}</span>
+                                                                        </div>
+                                                                    </>
+                                                                )}
+                                                                <div className="benchmark-item">
+                                                                    <span>• Receita Total: R$ {metrics.revenue.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}</span>
+                                                                </div>
+                                                            </div>
+                                                        );
+                                                    })()}
+                                                </>
+                                            )}
+
+                                            {/* ── Sub-toggle REFERÊNCIA (benchmarks) ── */}
+                                            <div className="panel-section-header" onClick={() => togglePanelSection('reference')} style={{borderRadius:'var(--radius-sm)', marginBottom: panelSections.reference ? '8px' : '4px', marginTop:'8px', background:'rgba(124,58,237,0.06)', borderLeft:'2px solid var(--primary)'}}>
+                                                <span className="panel-section-title" style={{color:'var(--primary-light)'}}>Benchmarks do mercado</span>
+                                                <span className={`panel-section-arrow ${panelSections.reference ? 'open' : ''}`}>▶</span>
+                                            </div>
+                                            {panelSections.reference && (<div>
+
+                                            {selectedElementData.type === 'captura' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Taxa de Conversão:</strong><br/>
+                                                            • 20-40%: Taxa típica<br/>
+                                                            • 40-60%: Muito boa<br/>
+                                                            • 60%+: Excepcional
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'vsl' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>VSL - Métricas:</strong><br/>
+                                                            • 40-60%: Taxa de play<br/>
+                                                            • 30-50%: Assistem até o final<br/>
+                                                            • 5-15%: Conversão típica
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'vendas' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Taxa de Conversão:</strong><br/>
+                                                            • 2-5%: Tráfego frio<br/>
+                                                            • 5-15%: Tráfego qualificado<br/>
+                                                            • 15%+: Ultra-qualificado
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'squeeze' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Taxa de Conversão:</strong><br/>
+                                                            • 30-50%: Taxa típica<br/>
+                                                            • 50-70%: Muito boa<br/>
+                                                            • 70%+: Otimizada
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'checkout' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Taxa de Conversão:</strong><br/>
+                                                            • 1-3%: Típico e-commerce<br/>
+                                                            • 5-10%: Otimizado<br/>
+                                                            • 10%+: Excepcional
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'upsell' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Taxa de Aceitação:</strong><br/>
+                                                            • 10-20%: Taxa típica<br/>
+                                                            • 20-40%: Boa oferta<br/>
+                                                            • 40%+: Irresistível
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'downsell' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Taxa de Aceitação:</strong><br/>
+                                                            • 20-30%: Taxa típica<br/>
+                                                            • 30-50%: Boa oferta<br/>
+                                                            • 50%+: Muito atrativo
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'recuperacao' && (
+                                                <>
+                                                    <div className="benchmark-compact">
+                                                        <h4>📋 Benchmarks</h4>
+                                                        <div className="tooltip-container">
+                                                            <span className="info-icon">i</span>
+                                                            <div className="tooltip-content wide">
+                                                                <strong>Taxa de Recuperação:</strong><br/>
+                                                                • 5-10%: Taxa típica<br/>
+                                                                • 10-20%: Boa campanha<br/>
+                                                                • 20%+: Excelente!
+                                                            </div>
+                                                        </div>
+                                                    </div>
+
+                                                    <div className="benchmark-compact" style={{background: 'linear-gradient(135deg, #fff5f5 0%, #ffe5e5 100%)', border: '2px solid #fc8181'}}>
+                                                        <h4>💡 Como Usar</h4>
+                                                        <div className="tooltip-container">
+                                                            <span className="info-icon" style={{background: '#fc8181'}}>i</span>
+                                                            <div className="tooltip-content wide">
+                                                                <strong>Estratégia Visual:</strong><br/>
+                                                                Este elemento recebe quem NÃO comprou.<br/><br/>
+                                                                Monte sua sequência:<br/>
+                                                                Checkout → Recuperação →<br/>
+                                                                Email 1h → Email 24h →<br/>
+                                                                WhatsApp → Checkout Final
+                                                            </div>
+                                                        </div>
+                                                    </div>
+                                                </>
+                                            )}
+                                            {selectedElementData.type === 'ecommerce' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Métricas E-commerce:</strong><br/>
+                                                            • 15-25%: Add to Cart<br/>
+                                                            • 2-5%: Conversão<br/>
+                                                            • 50-70%: Abandono
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'whatsapp' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Métricas WhatsApp:</strong><br/>
+                                                            • 40-60%: Taxa abertura<br/>
+                                                            • 15-25%: Taxa resposta<br/>
+                                                            • 60%+: Excelente
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'sequencia' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Sequência de Emails:</strong><br/>
+                                                            • 15-25%: Taxa abertura<br/>
+                                                            • 2-5%: Taxa clique<br/>
+                                                            • 10-20%: Conversão final
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'quiz' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Métricas Quiz:</strong><br/>
+                                                            • 30-50%: Conclusão<br/>
+                                                            • 50-70%: Captura email<br/>
+                                                            • +2-3x: Engajamento
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'video' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Métricas Vídeo:</strong><br/>
+                                                            • 40-60%: Taxa play<br/>
+                                                            • 30-50%: Assistem final<br/>
+                                                            • 5-15%: Conversão típica
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'webinar' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Métricas Webinar:</strong><br/>
+                                                            • 30-50%: Comparecimento<br/>
+                                                            • 10-25%: Conversão<br/>
+                                                            • 40%+: Alta conversão
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'countdown' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Impacto Countdown:</strong><br/>
+                                                            • +20-40%: Aumento conversão<br/>
+                                                            • -60%: Tempo decisão<br/>
+                                                            • Ideal: 24-72h urgência
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'call' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Métricas Call:</strong><br/>
+                                                            • 20-40%: Agendamento<br/>
+                                                            • 60-80%: Comparecimento<br/>
+                                                            • 30-50%: Fechamento
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {selectedElementData.type === 'membros' && (
+                                                <div className="benchmark-compact">
+                                                    <h4>📋 Benchmarks</h4>
+                                                    <div className="tooltip-container">
+                                                        <span className="info-icon">i</span>
+                                                        <div className="tooltip-content wide">
+                                                            <strong>Métricas Membros:</strong><br/>
+                                                            • 70-90%: Acesso inicial<br/>
+                                                            • 40-60%: Conclusão<br/>
+                                                            • 80-95%: Retenção mensal
+                                                        </div>
+                                                    </div>
+                                                </div>
+                                            )}
+                                            {/* Campos específicos para RETARGETING */}
+                                            {selectedElementData.type === 'retargeting' && (
+                                                <>
+                                                    <div className="form-group">
+                                                        <label className="form-label">📝 Nome do Público</label>
+                                                        <input
+                                                            type="text"
+                                                            className="form-input"
+                                                            value={selectedElementData.audienceName || ''}
+                                                            onChange={(e) => updateElementProperty('audienceName', e.target.value)}
+                                                            placeholder="Ex: Visualizou VSL mas não comprou"
+                                                        />
+                                                        <small className="form-help">Identifique qual público será impactado neste retargeting</small>
+                                                    </div>
+
+                                                    <div className="traffic-mode-toggle">
+                                                        <div
+                                                            className={`mode-option ${selectedElementData.trafficMode === 'absolute' ? 'active' : 'inactive'}`}
+                                                            onClick={() => updateElementProperty('trafficMode', 'absolute')}
+                                                        >
+                                                            📊 Números Absolutos
+                                                        </div>
+                                                        <div
+                                                            className={`mode-option ${selectedElementData.trafficMode === 'metrics' ? 'active' : 'inactive'}`}
+                                                            onClick={() => updateElementProperty('trafficMode', 'metrics')}
+                                                        >
+                                                            📈 CTR & CPM
+                                                        </div>
+                                                    </div>
+
+                                                    <div className="form-group">
+                                                        <label className="form-label">💰 Investimento em Retargeting (R$)</label>
+                                                        <input
+                                                            type="number"
+                                                            className={`form-input ${validateValue('investment', selectedElementData.investment || selectedElementData.retargetingInvestment).type || ''}`}
+                                                            value={selectedElementData.investment || selectedElementData.retargetingInvestment || ''}
+                                                            onChange={(e) => {
+                                                                updateElementProperty('investment', e.target.value);
+                                                                updateElementProperty('retargetingInvestment', e.target.value);
+                                                            }}
+                                                            placeholder="Ex: 2000"
+                                                            step="0.01"
+                                                        />
+                                                        <small className="form-help">Investimento adicional em campanhas de retargeting</small>
+                                                        {validateValue('investment', selectedElementData.investment || selectedElementData.retargetingInvestment).message && (
+                                                            <div className={`validation-message ${validateValue('investment', selectedElementData.investment || selectedElementData.retargetingInvestment).type}`}>
+                                                                {validateValue('investment', selectedElementData.investment || selectedElementData.retargetingInvestment).message}
+                                                            </div>
+                                                        )}
+                                                    </div>
+
+                                                    {selectedElementData.trafficMode === 'absolute' ? (
+                                                        <>
+                                                            <div className="form-group">
+                                                                <label className="form-label">👁️ Impressões Esperadas</label>
+                                                                <input
+                                                                    type="number"
+                                                                    className={`form-input ${validateValue('impressions', selectedElementData.impressions).type || ''}`}
+                                                                    value={selectedElementData.impressions === 0 ? '' : selectedElementData.impressions}
+                                                                    onChange={(e) => updateElementProperty('impressions', e.target.value)}
+                                                                    placeholder="Ex: 50000"
+                                                                />
+                                                                <small className="form-help">Quantas pessoas do público verão o anúncio de retargeting?</small>
+                                                            </div>
+                                                            <div className="form-group">
+                                                                <label className="form-label">👆 Cliques Esperados</label>
+                                                                <input
+                                                                    type="number"
+                                                                    className={`form-input ${validateValue('clicks', selectedElementData.clicks).type || ''}`}
+                                                                    value={selectedElementData.clicks === 0 ? '' : selectedElementData.clicks}
+                                                                    onChange={(e) => updateElementProperty('clicks', e.target.value)}
+                                                                    placeholder="Ex: 2000"
+                                                                />
+                                                                <small className="form-help">Quantas pessoas clicarão? (CTR calculado: {selectedElementData.ctr}%)</small>
+                                                            </div>
+                                                        </>
+                                                    ) : (
+                                                        <>
+                                                            <div className="form-group">
+                                                                <label className="form-label">💵 CPM - Custo por Mil (R$)</label>
+                                                                <input
+                                                                    type="number"
+                                                                    className="form-input"
+                                                                    value={selectedElementData.cpm === 0 ? '' : selectedElementData.cpm}
+                                                                    onChange={(e) => updateElementProperty('cpm', e.target.value)}
+                                                                    placeholder="Ex: 15"
+                                                                    step="0.01"
+                                                                />
+                                                                <small className="form-help">Quanto custa 1000 impressões? (Impressões calculadas: {selectedElementData.impressions.toLocaleString('pt-BR')})</small>
+                                                            </div>
+                                                            <div className="form-group">
+                                                                <label className="form-label">📊 CTR - Taxa de Cliques (%)</label>
+                                                                <input
+                                                                    type="number"
+                                                                    className="form-input"
+                                                                    value={selectedElementData.ctr === 0 ? '' : selectedElementData.ctr}
+                                                                    onChange={(e) => updateElementProperty('ctr', e.target.value)}
+                                                                    placeholder="Ex: 4"
+                                                                    step="0.01"
+                                                                />
+                                                                <small className="form-help">% de pessoas que clicam no anúncio (Cliques calculados: {selectedElementData.clicks.toLocaleString('pt-BR')})</small>
+                                                            </div>
+                                                        </>
+                                                    )}
+
+                                                    {selectedElementData.clicks > 0 && (
+                                                        <div className="benchmark-box" style={{background: 'linear-gradient(135deg, #f093fb 0%, #f5576c 100%)', color: 'white', border: 'none'}}>
+                                                            <h4 style={{color: 'white'}}>👥 TRÁFEGO PARA PRÓXIMA ETAPA</h4>
+                                                            <div className="benchmark-item" style={{fontSize: '16px', fontWeight: 'bold'}}>
+                                                                <span>• {selectedElementData.clicks.toLocaleString('pt-BR')} pessoas chegarão na próxima página</span>
+                                                            </div>
+                                                            {selectedElementData.impressions > 0 && (
+                                                                <>
+                                                                    <div className="benchmark-item">
+                                                                        <span>• CTR: {selectedElementData.ctr > 0 ? selectedElementData.ctr : ((selectedElementData.clicks / selectedElementData.impressions) * 100).toFixed(2)}%</span>
+                                                                    </div>
+                                                                    <div className="benchmark-item">
+                                                                        <span>• CPM: R$ {selectedElementData.cpm > 0 ? selectedElementData.cpm.toFixed(2) : (((selectedElementData.investment || selectedElementData.retargetingInvestment) / selectedElementData.impressions) * 1000).toFixed(2)}</span>
+                                                                    </div>
+                                                                    <div className="benchmark-item">
+                                                                        <span>• CPC: R$ {((selectedElementData.investment || selectedElementData.retargetingInvestment) / selectedElementData.clicks).toFixed(2)}</span>
+                                                                    </div>
+                                                                </>
+                                                            )}
+                                                        </div>
+                                                    )}
+
+                                                    <div className="benchmark-compact">
+                                                        <h4>📋 Benchmarks</h4>
+                                                        <div className="tooltip-container">
+                                                            <span className="info-icon">i</span>
+                                                            <div className="tooltip-content wide">
+                                                                <strong>Métricas Retargeting:</strong><br/>
+                                                                • 3-8%: CTR típico<br/>
+                                                                • CPM 30-50% menor<br/>
+                                                                • 10-30%: Conversão<br/>
+                                                                • CPC 50-70% menor
+                                                            </div>
+                                                        </div>
+                                                    </div>
+                                                </>
+                                            )}
+                                            </div>)} {/* Fecha panelSections.reference */}
+                                        </>
+                                    )}
+                                    </div>)} {/* Fecha panelSections.essential */}
+                                </div>
+                            ) : selectedConnection ? (
+                                <div>
+                                    <h3>Conexão</h3>
+                                    <div className="form-group">
+                                        <label className="form-label">% que seguem para esta etapa</label>
+                                        <input
+                                            type="number"
+                                            className="form-input"
+                                            value={connections.find(c => c.id === selectedConnection)?.conversion || ''}
+                                            onChange={(e) => updateConnectionProperty('conversion', e.target.value)}
+                                            step="0.1"
+                                            min="0"
+                                            max="100"
+                                            placeholder="Ex: 100"
+                                        />
+                                        <small className="form-help">100% = todos os convertidos seguem para a próxima etapa</small>
+                                    </div>
+                                    <div className="empty-state" style={{marginTop: '20px'}}>
+                                        Esta é uma conexão entre elementos. Ajuste a taxa de conversão acima.
+                                    </div>
+                                    <button
+                                        onClick={() => deleteConnection(selectedConnection)}
+                                        style={{
+                                            width: '100%',
+                                            padding: '12px',
+                                            marginTop: '20px',
+                                            background: 'linear-gradient(135deg, #f56565 0%, #c53030 100%)',
+                                            color: 'white',
+                                            border: 'none',
+                                            borderRadius: '8px',
+                                            cursor: 'pointer',
+                                            fontWeight: '600',
+                                            fontSize: '14px',
+                                            transition: 'opacity 0.2s'
+                                        }}
+                                        onMouseEnter={(e) => e.target.style.opacity = '0.9'}
+                                        onMouseLeave={(e) => e.target.style.opacity = '1'}
+                                    >
+                                        🗑️ Deletar Conexão
+                                    </button>
+                                </div>
+                            ) : (
+                                <div className="empty-state">
+                                    Selecione um elemento ou conexão no canvas para editar suas propriedades
+                                </div>
+                            )}
+                        </div>
+                    </div>
+                </div>
+            );
+        }
+
+        // Templates de Funis Prontos
+        const FUNNEL_TEMPLATES = [
+            {
+                id: 'vsl-simples',
+                name: 'VSL Simples',
+                icon: '🎬',
+                description: 'Tráfego → Landing → VSL → Checkout',
+                elements: [
+                    { id: 1, type: 'trafego', name: 'Tráfego Pago', icon: '🎯', color: 'color-trafego', x: 100, y: 150, trafficMode: 'absolute', investment: 3000, impressions: 150000, clicks: 5000 },
+                    { id: 2, type: 'landing', name: 'Landing Page', icon: '📄', color: 'color-landing', x: 350, y: 150, conversionRate: 40, pageViewRate: 95 },
+                    { id: 3, type: 'vsl', name: 'VSL', icon: '🎥', color: 'color-vsl', x: 600, y: 150, conversionRate: 60, pageViewRate: 85 },
+                    { id: 4, type: 'vendas', name: 'Checkout', icon: '💳', color: 'color-vendas', x: 850, y: 150, conversionRate: 3, pageViewRate: 95, generatesRevenue: true, price: 497 }
+                ],
+                connections: [
+                    { id: 'c1', from: 1, to: 2, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c2', from: 2, to: 3, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c3', from: 3, to: 4, conversion: 100, fromSide: 'right', toSide: 'left' }
+                ]
+            },
+            {
+                id: 'webinar',
+                name: 'Webinar',
+                icon: '🎓',
+                description: 'Captura → Email → Webinar → Oferta',
+                elements: [
+                    { id: 1, type: 'trafego', name: 'Tráfego Pago', icon: '🎯', color: 'color-trafego', x: 100, y: 150, trafficMode: 'absolute', investment: 4000, impressions: 160000, clicks: 4000 },
+                    { id: 2, type: 'landing', name: 'Inscrição', icon: '📄', color: 'color-landing', x: 350, y: 150, conversionRate: 35, pageViewRate: 95 },
+                    { id: 3, type: 'email', name: 'Email Confirmação', icon: '✉️', color: 'color-email', x: 600, y: 150, conversionRate: 100, pageViewRate: 55 },
+                    { id: 4, type: 'webinar', name: 'Webinar', icon: '🎓', color: 'color-webinar', x: 850, y: 150, conversionRate: 40, pageViewRate: 40 },
+                    { id: 5, type: 'vendas', name: 'Oferta', icon: '💳', color: 'color-vendas', x: 1100, y: 150, conversionRate: 15, pageViewRate: 100, generatesRevenue: true, price: 997 }
+                ],
+                connections: [
+                    { id: 'c1', from: 1, to: 2, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c2', from: 2, to: 3, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c3', from: 3, to: 4, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c4', from: 4, to: 5, conversion: 100, fromSide: 'right', toSide: 'left' }
+                ]
+            },
+            {
+                id: 'tripwire',
+                name: 'Tripwire',
+                icon: '🎁',
+                description: 'Landing → Oferta Baixa → Upsells',
+                elements: [
+                    { id: 1, type: 'trafego', name: 'Tráfego Pago', icon: '🎯', color: 'color-trafego', x: 100, y: 150, trafficMode: 'absolute', investment: 1500, impressions: 75000, clicks: 3000 },
+                    { id: 2, type: 'landing', name: 'Landing Page', icon: '📄', color: 'color-landing', x: 350, y: 150, conversionRate: 40, pageViewRate: 95 },
+                    { id: 3, type: 'vendas', name: 'Tripwire R$ 27', icon: '🎁', color: 'color-vendas', x: 600, y: 150, conversionRate: 20, pageViewRate: 100, generatesRevenue: true, price: 27 },
+                    { id: 4, type: 'upsell', name: 'Upsell R$ 97', icon: '⬆️', color: 'color-upsell', x: 850, y: 150, conversionRate: 30, pageViewRate: 100, generatesRevenue: true, price: 97 }
+                ],
+                connections: [
+                    { id: 'c1', from: 1, to: 2, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c2', from: 2, to: 3, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c3', from: 3, to: 4, conversion: 100, fromSide: 'right', toSide: 'left' }
+                ]
+            },
+            {
+                id: 'perpetuo',
+                name: 'Perpétuo Simples',
+                icon: '♾️',
+                description: 'Tráfego → Landing → Vendas → Obrigado',
+                elements: [
+                    { id: 1, type: 'trafego', name: 'Tráfego Pago', icon: '🎯', color: 'color-trafego', x: 100, y: 150, trafficMode: 'absolute', investment: 2000, impressions: 100000, clicks: 3000 },
+                    { id: 2, type: 'landing', name: 'Landing Page', icon: '📄', color: 'color-landing', x: 350, y: 150, conversionRate: 35, pageViewRate: 95 },
+                    { id: 3, type: 'vendas', name: 'Página de Vendas', icon: '💳', color: 'color-vendas', x: 600, y: 150, conversionRate: 5, pageViewRate: 90, generatesRevenue: true, price: 297 },
+                    { id: 4, type: 'obrigado', name: 'Obrigado', icon: '🙏', color: 'color-obrigado', x: 850, y: 150, conversionRate: 100, pageViewRate: 100 }
+                ],
+                connections: [
+                    { id: 'c1', from: 1, to: 2, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c2', from: 2, to: 3, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c3', from: 3, to: 4, conversion: 100, fromSide: 'right', toSide: 'left' }
+                ]
+            },
+            {
+                id: 'lancamento',
+                name: 'Lançamento',
+                icon: '🚀',
+                description: 'Captura → Sequência → VSL → Checkout → Upsell',
+                elements: [
+                    { id: 1, type: 'facebook', name: 'Facebook Ads', icon: '🇫', color: 'color-facebook', x: 100, y: 150, trafficMode: 'metrics', investment: 8000, cpm: 30, ctr: 2 },
+                    { id: 2, type: 'captura', name: 'Página de Captura', icon: '📋', color: 'color-captura', x: 350, y: 150, conversionRate: 50, pageViewRate: 95 },
+                    { id: 3, type: 'sequencia', name: 'Sequência de E-mails', icon: '✉️', color: 'color-sequencia', x: 600, y: 150, conversionRate: 30, pageViewRate: 60 },
+                    { id: 4, type: 'vsl', name: 'VSL de Vendas', icon: '🎥', color: 'color-vsl', x: 850, y: 150, conversionRate: 55, pageViewRate: 80 },
+                    { id: 5, type: 'checkout', name: 'Checkout', icon: '💳', color: 'color-checkout', x: 1100, y: 150, conversionRate: 12, pageViewRate: 95, generatesRevenue: true, price: 997 },
+                    { id: 6, type: 'upsell', name: 'Upsell', icon: '⬆️', color: 'color-upsell', x: 1350, y: 150, conversionRate: 25, pageViewRate: 100, generatesRevenue: true, price: 497 }
+                ],
+                connections: [
+                    { id: 'c1', from: 1, to: 2, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c2', from: 2, to: 3, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c3', from: 3, to: 4, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c4', from: 4, to: 5, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c5', from: 5, to: 6, conversion: 100, fromSide: 'right', toSide: 'left' }
+                ]
+            },
+            {
+                id: 'lead-nutricao',
+                name: 'Lead + Nutrição',
+                icon: '🌱',
+                description: 'Squeeze → E-mail → Oferta → Checkout',
+                elements: [
+                    { id: 1, type: 'trafego', name: 'Tráfego Orgânico', icon: '🎯', color: 'color-trafego', x: 100, y: 150, trafficMode: 'absolute', investment: 0, impressions: 0, clicks: 2000 },
+                    { id: 2, type: 'squeeze', name: 'Squeeze Page', icon: '📌', color: 'color-squeeze', x: 350, y: 150, conversionRate: 60, pageViewRate: 95 },
+                    { id: 3, type: 'email', name: 'Nutrição por E-mail', icon: '✉️', color: 'color-email', x: 600, y: 150, conversionRate: 20, pageViewRate: 45 },
+                    { id: 4, type: 'vendas', name: 'Oferta', icon: '💳', color: 'color-vendas', x: 850, y: 150, conversionRate: 8, pageViewRate: 90, generatesRevenue: true, price: 197 },
+                    { id: 5, type: 'checkout', name: 'Checkout', icon: '🛒', color: 'color-checkout', x: 1100, y: 150, conversionRate: 80, pageViewRate: 100, generatesRevenue: false }
+                ],
+                connections: [
+                    { id: 'c1', from: 1, to: 2, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c2', from: 2, to: 3, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c3', from: 3, to: 4, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c4', from: 4, to: 5, conversion: 100, fromSide: 'right', toSide: 'left' }
+                ]
+            },
+            {
+                id: 'quiz-funil',
+                name: 'Quiz Funil',
+                icon: '🧩',
+                description: 'Tráfego → Quiz → Landing → Checkout',
+                elements: [
+                    { id: 1, type: 'facebook', name: 'Facebook Ads', icon: '🇫', color: 'color-facebook', x: 100, y: 150, trafficMode: 'metrics', investment: 3000, cpm: 25, ctr: 3 },
+                    { id: 2, type: 'quiz', name: 'Quiz de Qualificação', icon: '❓', color: 'color-quiz', x: 350, y: 150, conversionRate: 65, pageViewRate: 90 },
+                    { id: 3, type: 'landing', name: 'Landing Personalizada', icon: '📄', color: 'color-landing', x: 600, y: 150, conversionRate: 45, pageViewRate: 95 },
+                    { id: 4, type: 'checkout', name: 'Checkout', icon: '💳', color: 'color-checkout', x: 850, y: 150, conversionRate: 10, pageViewRate: 100, generatesRevenue: true, price: 497 },
+                    { id: 5, type: 'obrigado', name: 'Obrigado', icon: '🙏', color: 'color-obrigado', x: 1100, y: 150, conversionRate: 100, pageViewRate: 100 }
+                ],
+                connections: [
+                    { id: 'c1', from: 1, to: 2, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c2', from: 2, to: 3, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c3', from: 3, to: 4, conversion: 100, fromSide: 'right', toSide: 'left' },
+                    { id: 'c4', from: 4, to: 5, conversion: 100, fromSide: 'right', toSide: 'left' }
+                ]
+            }
+        ];
+
+        function FunnelDashboard({ onSelectFunnel, onCreateBlank, onOpenSettings, onGoToMarketing, onLogout }) {
+            const [funnels, setFunnels] = React.useState([]);
+            const [showNewModal, setShowNewModal] = React.useState(false);
+            const [newName, setNewName] = React.useState('');
+            const [loading, setLoading] = React.useState(true);
+
+            // Carrega funis da API ao montar o componente
+            React.useEffect(() => {
+                loadFunnels();
+            }, []);
+
+            // Funil criado, alterado ou apagado em outra aba: aplica só os ids que
+            // mudaram (o resumo de cada um em um batch), sem o loading
+            useChangeFeed(['funnel'], async (changes) => {
+                if (changes.some(c => c.action === 'reset')) {
+                    const data = await apiFetchFunnels();
+                    if (data && data.funnels) {
+                        setFunnels(data.funnels);
+                    }
+                    return;
+                }
+
+                // Vale a última ação de cada id
+                const lastAction = new Map();
+                changes.forEach(c => lastAction.set(c.id, c.action));
+                const deleted = new Set([...lastAction].filter(([, action]) => action === 'deleted').map(([id]) => id));
+                const changedIds = [...lastAction.keys()].filter(id => !deleted.has(id));
+
+                const bodies = changedIds.length
+                    ? await apiBatch(changedIds.map(id => ({ path: `/api/funnels/${id}?view=summary` })))
+                    : [];
+                const summaries = new Map();
+                changedIds.forEach((id, i) => {
+                    const body = bodies[i];
+                    if (body && body.funnel) {
+                        summaries.set(id, body.funnel);
+                    } else {
+                        deleted.add(id);  // apagado entre o evento e a busca
+                    }
+                });
+
+                setFunnels(current => {
+                    const next = current
+                        .filter(f => !deleted.has(f.id))
+                        .map(f => summaries.has(f.id) ? { ...f, ...summaries.get(f.id) } : f);
+                    const known = new Set(next.map(f => f.id));
+                    summaries.forEach((summary, id) => {
+                        if (!known.has(id)) next.push(summary);
+                    });
+                    return next;
+                });
+            });
+
+            const loadFunnels = async () => {
+                setLoading(true);
+                try {
+                    const data = await apiFetchFunnels();
+                    if (data && data.funnels) {
+                        setFunnels(data.funnels);
+                    }
+                } catch (error) {
+                    console.error('Erro ao carregar funis:', error);
+                } finally {
+                    setLoading(false);
+                }
+            };
+
+            const createFromTemplate = async (template) => {
+                try {
+                    const result = await apiCreateFunnel({
+                        name: template.name,
+                        icon: template.icon,
+                        elements: template.elements,
+                        connections: template.connections
+                    });
+
+                    if (result && result.funnel) {
+                        setFunnels([...funnels, result.funnel]);
+                        onSelectFunnel(result.funnel.id);
+                    }
+                } catch (error) {
+                    console.error('Erro ao criar funil:', error);
+                    alert('Erro ao criar funil do template');
+                }
+            };
+
+            const createBlank = async () => {
+                if (!newName.trim()) {
+                    alert('Digite um nome para o funil');
+                    return;
+                }
+
+                try {
+                    const result = await apiCreateFunnel({
+                        name: newName,
+                        icon: '🎯',
+                        elements: [],
+                        connections: []
+                    });
+
+                    if (result && result.funnel) {
+                        setFunnels([...funnels, result.funnel]);
+                        setShowNewModal(false);
+                        setNewName('');
+                        onSelectFunnel(result.funnel.id);
+                    }
+                } catch (error) {
+                    console.error('Erro ao criar funil:', error);
+                    alert('Erro ao criar funil');
+                }
+            };
+
+            const deleteFunnel = async (id, e) => {
+                e.stopPropagation();
+                if (confirm('Deletar este funil?')) {
+                    try {
+                        const result = await apiDeleteFunnel(id);
+                        if (result && result.success) {
+                            setFunnels(funnels.filter(f => f.id !== id));
+                        }
+                    } catch (error) {
+                        console.error('Erro ao deletar funil:', error);
+                        alert('Erro ao deletar funil');
+                    }
+                }
+            };
+
+            const duplicateFunnel = async (id, e) => {
+                e.stopPropagation();
+                try {
+                    const result = await apiDuplicateFunnel(id);
+                    if (result && result.funnel) {
+                        setFunnels([...funnels, result.funnel]);
+                        alert('✓ Funil duplicado com sucesso!');
+                    }
+                } catch (error) {
+                    console.error('Erro ao duplicar funil:', error);
+                    alert('✗ Erro ao duplicar funil');
+                }
+            };
+
+            const navBtnStyle = {
+                padding: '8px 14px', background: 'rgba(255,255,255,0.06)', border: '1px solid rgba(255,255,255,0.1)',
+                borderRadius: '8px', color: 'rgba(255,255,255,0.75)', fontSize: '13px', fontWeight: '500',
+                cursor: 'pointer', transition: 'all 150ms', display: 'flex', alignItems: 'center', gap: '6px',
+                fontFamily: 'Inter, sans-serif'
+            };
+            const navBtnDanger = { ...navBtnStyle, background: 'rgba(239,68,68,0.08)', border: '1px solid rgba(239,68,68,0.2)', color: 'rgba(252,165,165,0.9)' };
+            const cardStyle = {
+                background: '#1A2235', border: '1px solid rgba(255,255,255,0.08)', borderRadius: '12px',
+                padding: '20px', cursor: 'pointer', transition: 'all 150ms cubic-bezier(0.16,1,0.3,1)'
+            };
+
+            return (
+                <div style={{ minHeight: '100vh', maxHeight: '100vh', overflow: 'auto', background: '#0B0F1A', backgroundImage: 'radial-gradient(ellipse 70% 40% at 50% 0%, rgba(124,58,237,0.14) 0%, transparent 60%), radial-gradient(circle, rgba(255,255,255,0.04) 1px, transparent 1px)', backgroundSize: 'auto, 32px 32px', padding: '32px 20px' }}>
+                    {/* Nav bar */}
+                    <div style={{ position: 'fixed', top: '16px', right: '20px', zIndex: 1000, display: 'flex', gap: '8px' }}>
+                        <button style={navBtnStyle} onClick={onGoToMarketing}
+                            onMouseOver={(e) => { e.currentTarget.style.background='rgba(255,255,255,0.1)'; e.currentTarget.style.color='white'; }}
+                            onMouseOut={(e) => { e.currentTarget.style.background=navBtnStyle.background; e.currentTarget.style.color=navBtnStyle.color; }}>
+                            Marketing
+                        </button>
+                        <button style={navBtnStyle} onClick={onOpenSettings}
+                            onMouseOver={(e) => { e.currentTarget.style.background='rgba(255,255,255,0.1)'; e.currentTarget.style.color='white'; }}
+                            onMouseOut={(e) => { e.currentTarget.style.background=navBtnStyle.background; e.currentTarget.style.color=navBtnStyle.color; }}>
+                            Configurações
+                        </button>
+                        <button style={navBtnDanger} onClick={onLogout}
+                            onMouseOver={(e) => { e.currentTarget.style.background='rgba(239,68,68,0.18)'; }}
+                            onMouseOut={(e) => { e.currentTarget.style.background=navBtnDanger.background; }}>
+                            Sair
+                        </button>
+                    </div>
+
+                    <div style={{ maxWidth: '1160px', margin: '0 auto' }}>
+                        {/* Hero */}
+                        <div style={{ textAlign: 'center', marginBottom: '48px', paddingTop: '24px' }}>
+                            <h1 style={{ color: '#F1F5F9', fontSize: '36px', fontWeight: '700', marginBottom: '8px', letterSpacing: '-0.8px', fontFamily: 'Inter, sans-serif' }}>Funnel Builder</h1>
+                            <p style={{ color: '#64748B', fontSize: '15px', fontFamily: 'Inter, sans-serif' }}>Construa e simule funis de vendas de alta performance</p>
+                        </div>
+
+                        {/* Templates */}
+                        <div style={{ marginBottom: '32px' }}>
+                            <h2 style={{ fontSize: '13px', fontWeight: '700', color: '#64748B', textTransform: 'uppercase', letterSpacing: '1px', marginBottom: '14px', fontFamily: 'Inter, sans-serif' }}>Templates</h2>
+                            <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(240px, 1fr))', gap: '12px' }}>
+                                {FUNNEL_TEMPLATES.map(t => (
+                                    <div key={t.id} onClick={() => createFromTemplate(t)} style={cardStyle}
+                                        onMouseOver={(e) => { e.currentTarget.style.border='1px solid rgba(124,58,237,0.5)'; e.currentTarget.style.transform='translateY(-3px)'; e.currentTarget.style.boxShadow='0 8px 32px rgba(0,0,0,0.4)'; }}
+                                        onMouseOut={(e) => { e.currentTarget.style.border=cardStyle.border; e.currentTarget.style.transform='translateY(0)'; e.currentTarget.style.boxShadow='none'; }}>
+                                        <div style={{ fontSize: '36px', textAlign: 'center', marginBottom: '10px' }}>{t.icon}</div>
+                                        <h3 style={{ fontSize: '14px', fontWeight: '600', textAlign: 'center', marginBottom: '6px', color: '#F1F5F9', fontFamily: 'Inter, sans-serif' }}>{t.name}</h3>
+                                        <p style={{ fontSize: '12px', color: '#64748B', textAlign: 'center', lineHeight: '1.5', fontFamily: 'Inter, sans-serif' }}>{t.description}</p>
+                                    </div>
+                                ))}
+                                <div onClick={() => setShowNewModal(true)} style={{ ...cardStyle, border: '1px dashed rgba(124,58,237,0.35)', display: 'flex', flexDirection: 'column', alignItems: 'center', justifyContent: 'center', minHeight: '160px', gap: '10px' }}
+                                    onMouseOver={(e) => { e.currentTarget.style.border='1px dashed rgba(124,58,237,0.7)'; e.currentTarget.style.background='rgba(124,58,237,0.06)'; }}
+                                    onMouseOut={(e) => { e.currentTarget.style.border='1px dashed rgba(124,58,237,0.35)'; e.currentTarget.style.background=cardStyle.background; }}>
+                                    <div style={{ width: '44px', height: '44px', borderRadius: '50%', background: 'rgba(124,58,237,0.15)', display: 'flex', alignItems: 'center', justifyContent: 'center', fontSize: '22px', color: '#A78BFA' }}>+</div>
+                                    <span style={{ fontSize: '13px', fontWeight: '600', color: '#A78BFA', fontFamily: 'Inter, sans-serif' }}>Criar do Zero</span>
+                                </div>
+                            </div>
+                        </div>
+
+                        {/* Saved funnels */}
+                        {funnels.length > 0 && (
+                            <div>
+                                <h2 style={{ fontSize: '13px', fontWeight: '700', color: '#64748B', textTransform: 'uppercase', letterSpacing: '1px', marginBottom: '14px', fontFamily: 'Inter, sans-serif' }}>Meus Funis</h2>
+                                <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(280px, 1fr))', gap: '12px' }}>
+                                    {funnels.map(f => (
+                                        <div key={f.id} onClick={() => onSelectFunnel(f.id)} style={cardStyle}
+                                            onMouseOver={(e) => { e.currentTarget.style.border='1px solid rgba(124,58,237,0.5)'; e.currentTarget.style.transform='translateY(-2px)'; e.currentTarget.style.boxShadow='0 8px 32px rgba(0,0,0,0.4)'; }}
+                                            onMouseOut={(e) => { e.currentTarget.style.border=cardStyle.border; e.currentTarget.style.transform='translateY(0)'; e.currentTarget.style.boxShadow='none'; }}>
+                                            <div style={{ display: 'flex', alignItems: 'center', gap: '10px', marginBottom: '10px' }}>
+                                                <span style={{ fontSize: '26px', flexShrink: 0 }}>{f.icon}</span>
+                                                <h3 style={{ fontSize: '14px', fontWeight: '600', flex: 1, color: '#F1F5F9', fontFamily: 'Inter, sans-serif', overflow: 'hidden', textOverflow: 'ellipsis', whiteSpace: 'nowrap' }}>{f.name}</h3>
+                                                <button onClick={(e) => duplicateFunnel(f.id, e)} title="Duplicar"
+                                                    style={{ padding: '5px 10px', background: 'rgba(59,130,246,0.15)', border: '1px solid rgba(59,130,246,0.25)', borderRadius: '6px', color: '#93C5FD', fontSize: '12px', fontWeight: '600', cursor: 'pointer', fontFamily: 'Inter, sans-serif' }}
+                                                    onMouseOver={(e) => { e.currentTarget.style.background='rgba(59,130,246,0.28)'; }}
+                                                    onMouseOut={(e) => { e.currentTarget.style.background='rgba(59,130,246,0.15)'; }}>
+                                                    Copiar
+                                                </button>
+                                                <button onClick={(e) => deleteFunnel(f.id, e)} title="Deletar"
+                                                    style={{ padding: '5px 8px', background: 'rgba(239,68,68,0.1)', border: '1px solid rgba(239,68,68,0.2)', borderRadius: '6px', color: '#FCA5A5', fontSize: '13px', cursor: 'pointer' }}
+                                                    onMouseOver={(e) => { e.currentTarget.style.background='rgba(239,68,68,0.25)'; }}
+                                                    onMouseOut={(e) => { e.currentTarget.style.background='rgba(239,68,68,0.1)'; }}>
+                                                    ✕
+                                                </button>
+                                            </div>
+                                            <p style={{ fontSize: '11px', color: '#475569', fontFamily: 'JetBrains Mono, monospace' }}>{f.elementCount || 0} etapas  ·  {f.connectionCount || 0} conexões{f.simulatedRevenue ? `  ·  R$ ${f.simulatedRevenue.toLocaleString('pt-BR', { minimumFractionDigits: 2 })}` : ''}</p>
+                                        </div>
+                                    ))}
+                                </div>
+                            </div>
+                        )}
+
+                        {/* New funnel modal */}
+                        {showNewModal && (
+                            <div style={{ position: 'fixed', inset: 0, background: 'rgba(0,0,0,0.75)', backdropFilter: 'blur(4px)', display: 'flex', alignItems: 'center', justifyContent: 'center', zIndex: 9999 }} onClick={() => setShowNewModal(false)}>
+                                <div onClick={(e) => e.stopPropagation()} style={{ background: '#111827', border: '1px solid rgba(255,255,255,0.1)', padding: '36px', borderRadius: '16px', maxWidth: '460px', width: '90%', boxShadow: '0 24px 64px rgba(0,0,0,0.6)' }}>
+                                    <h2 style={{ fontSize: '20px', marginBottom: '20px', color: '#F1F5F9', fontFamily: 'Inter, sans-serif', fontWeight: '700', letterSpacing: '-0.3px' }}>Novo Funil</h2>
+                                    <input type="text" value={newName} onChange={(e) => setNewName(e.target.value)} placeholder="Nome do funil..."
+                                        onKeyPress={(e) => { if (e.key === 'Enter') createBlank(); }}
+                                        style={{ width: '100%', padding: '11px 13px', fontSize: '14px', border: '1px solid rgba(255,255,255,0.1)', borderRadius: '8px', marginBottom: '20px', background: 'rgba(255,255,255,0.05)', color: '#F1F5F9', fontFamily: 'Inter, sans-serif', outline: 'none' }} autoFocus />
+                                    <div style={{ display: 'flex', gap: '10px' }}>
+                                        <button onClick={() => setShowNewModal(false)} style={{ flex: 1, padding: '11px', background: 'rgba(255,255,255,0.06)', border: '1px solid rgba(255,255,255,0.1)', borderRadius: '8px', cursor: 'pointer', fontWeight: '600', color: '#94A3B8', fontFamily: 'Inter, sans-serif', fontSize: '14px' }}>Cancelar</button>
+                                        <button onClick={createBlank} style={{ flex: 1, padding: '11px', background: 'linear-gradient(135deg, #6D28D9, #7C3AED)', color: 'white', border: 'none', borderRadius: '8px', cursor: 'pointer', fontWeight: '600', fontFamily: 'Inter, sans-serif', fontSize: '14px' }}>Criar Funil</button>
+                                    </div>
+                                </div>
+                            </div>
+                        )}
+                    </div>
+                </div>
+            );
+        }
+
+        function SettingsPanel({ onClose }) {
+            // Carrega configurações do localStorage ou usa padrão
+            const loadConfig = () => {
+                const saved = localStorage.getItem('systemConfig');
+                if (saved) {
+                    return JSON.parse(saved);
+                }
+                return {
+                    categories: ELEMENT_CATEGORIES,
+                    fieldLabels: {
+                        investment: 'Investimento Planejado',
+                        impressions: 'Impressões Esperadas',
+                        clicks: 'Cliques Esperados',
+                        cpm: 'CPM - Custo por Mil',
+                        ctr: 'CTR - Taxa de Cliques',
+                        conversionRate: 'Taxa de Conversão',
+                        price: 'Preço do Produto',
+                        url: 'URL da Página',
+                        description: 'Descrição',
+                        name: 'Nome do Elemento',
+                        orderBumpPrice: 'Preço do Order Bump',
+                        orderBumpConversion: 'Taxa de Conversão do Order Bump'
+                    }
+                };
+            };
+
+            const [config, setConfig] = useState(loadConfig());
+            const [hasChanges, setHasChanges] = useState(false);
+
+            const updateCategoryName = (categoryIndex, newName) => {
+                const newConfig = { ...config };
+                newConfig.categories[categoryIndex].name = newName;
+                setConfig(newConfig);
+                setHasChanges(true);
+            };
+
+            const updateCategoryIcon = (categoryIndex, newIcon) => {
+                const newConfig = { ...config };
+                newConfig.categories[categoryIndex].icon = newIcon;
+                setConfig(newConfig);
+                setHasChanges(true);
+            };
+
+            const updateElementName = (categoryIndex, elementIndex, newName) => {
+                const newConfig = { ...config };
+                newConfig.categories[categoryIndex].elements[elementIndex].name = newName;
+                setConfig(newConfig);
+                setHasChanges(true);
+            };
+
+            const updateElementIcon = (categoryIndex, elementIndex, newIcon) => {
+                const newConfig = { ...config };
+                newConfig.categories[categoryIndex].elements[elementIndex].icon = newIcon;
+                setConfig(newConfig);
+                setHasChanges(true);
+            };
+
+            const updateFieldLabel = (fieldKey, newLabel) => {
+                const newConfig = { ...config };
+                newConfig.fieldLabels[fieldKey] = newLabel;
+                setConfig(newConfig);
+                setHasChanges(true);
+            };
+
+            const handleSave = () => {
+                localStorage.setItem('systemConfig', JSON.stringify(config));
+                setHasChanges(false);
+                // Recarrega a página para aplicar mudanças
+                window.location.reload();
+            };
+
+            const handleReset = () => {
+                if (confirm('Tem certeza que deseja restaurar todas as configurações padrão? Esta ação não pode ser desfeita.')) {
+                    localStorage.removeItem('systemConfig');
+                    window.location.reload();
+                }
+            };
+
+            return (
+                <div className="settings-overlay" onClick={onClose}>
+                    <div className="settings-panel" onClick={(e) => e.stopPropagation()}>
+                        <div className="settings-header">
+                            <h2>⚙️ Configurações do Sistema</h2>
+                            <button className="settings-close-btn" onClick={onClose}>×</button>
+                        </div>
+
+                        <div className="settings-content">
+                            {/* Seção: Categorias */}
+                            <div className="settings-section">
+                                <div className="settings-section-header">
+                                    <span className="settings-section-icon">📁</span>
+                                    <h3 className="settings-section-title">Categorias de Elementos</h3>
+                                </div>
+                                {config.categories.map((category, catIndex) => (
+                                    <div key={catIndex} className="category-editor">
+                                        <div className="category-editor-header">
+                                            <input
+                                                type="text"
+                                                className="settings-input"
+                                                value={category.icon}
+                                                onChange={(e) => updateCategoryIcon(catIndex, e.target.value)}
+                                                placeholder="Ícone"
+                                                style={{ width: '60px', textAlign: 'center', fontSize: '20px' }}
+                                            />
+                                            <input
+                                                type="text"
+                                                className="settings-input"
+                                                value={category.name}
+                                                onChange={(e) => updateCategoryName(catIndex, e.target.value)}
+                                                placeholder="Nome da categoria"
+                                                style={{ flex: 1 }}
+                                            />
+                                        </div>
+                                        <div className="settings-grid">
+                                            {category.elements.map((element, elemIndex) => (
+                                                <div key={elemIndex} className="settings-card">
+                                                    <div className="settings-card-header">
+                                                        <span className="settings-card-icon">{element.icon}</span>
+                                                        <h4 className="settings-card-title">{element.type}</h4>
+                                                    </div>
+                                                    <div className="settings-input-group">
+                                                        <label className="settings-label">Ícone</label>
+                                                        <input
+                                                            type="text"
+                                                            className="settings-input"
+                                                            value={element.icon}
+                                                            onChange={(e) => updateElementIcon(catIndex, elemIndex, e.target.value)}
+                                                            placeholder="Digite um emoji"
+                                                        />
+                                                    </div>
+                                                    <div className="settings-input-group">
+                                                        <label className="settings-label">Nome de Exibição</label>
+                                                        <input
+                                                            type="text"
+                                                            className="settings-input"
+                                                            value={element.name}
+                                                            onChange={(e) => updateElementName(catIndex, elemIndex, e.target.value)}
+                                                            placeholder="Nome do elemento"
+                                                        />
+                                                    </div>
+                                                </div>
+                                            ))}
+                                        </div>
+                                    </div>
+                                ))}
+                            </div>
+
+                            {/* Seção: Labels de Campos */}
+                            <div className="settings-section">
+                                <div className="settings-section-header">
+                                    <span className="settings-section-icon">🏷️</span>
+                                    <h3 className="settings-section-title">Labels dos Campos</h3>
+                                </div>
+                                <div className="settings-grid">
+                                    {Object.entries(config.fieldLabels).map(([key, label]) => (
+                                        <div key={key} className="settings-card">
+                                            <div className="settings-input-group">
+                                                <label className="settings-label">Campo: {key}</label>
+                                                <input
+                                                    type="text"
+                                                    className="settings-input"
+                                                    value={label}
+                                                    onChange={(e) => updateFieldLabel(key, e.target.value)}
+                                                    placeholder="Label do campo"
+                                                />
+                                            </div>
+                                        </div>
+                                    ))}
+                                </div>
+                            </div>
+                        </div>
+
+                        <div className="settings-footer">
+                            <button className="settings-btn settings-btn-secondary" onClick={handleReset}>
+                                🔄 Restaurar Padrões
+                            </button>
+                            <div style={{ display: 'flex', gap: '12px' }}>
+                                <button className="settings-btn settings-btn-secondary" onClick={onClose}>
+                                    Cancelar
+                                </button>
+                                <button
+                                    className="settings-btn settings-btn-primary"
+                                    onClick={handleSave}
+                                    disabled={!hasChanges}
+                                >
+                                    💾 Salvar Alterações
+                                </button>
+                            </div>
+                        </div>
+                    </div>
+                </div>
+            );
+        }
+
+        // ==================== UTM GENERATOR INLINE ====================
+
+        function UtmGeneratorInline({ elementUrl, onUtmCreated, onCancel }) {
+            const [formData, setFormData] = useState({
+                name: '',
+                utm_source: '',
+                utm_medium: '',
+                utm_campaign: '',
+                utm_content: '',
+                utm_term: '',
+                notes: ''
+            });
+
+            const handleSubmit = (e) => {
+                e.preventDefault();
+                if (!formData.name || !formData.utm_source || !formData.utm_medium || !formData.utm_campaign) {
+                    alert('Nome, Source, Medium e Campaign são obrigatórios');
+                    return;
+                }
+                onUtmCreated(formData);
+            };
+
+            const previewUrl = elementUrl ?
+                `${elementUrl}${elementUrl.includes('?') ? '&' : '?'}utm_source=${formData.utm_source || 'source'}&utm_medium=${formData.utm_medium || 'medium'}&utm_campaign=${formData.utm_campaign || 'campaign'}${formData.utm_content ? '&utm_content=' + formData.utm_content : ''}${formData.utm_term ? '&utm_term=' + formData.utm_term : ''}`
+                : 'Configure a URL do elemento primeiro';
+
+            return (
+                <form onSubmit={handleSubmit} style={{ fontSize: '13px' }}>
+                    <div style={{ marginBottom: '12px' }}>
+                        <input
+                            type="text"
+                            placeholder="Nome da campanha *"
+                            value={formData.name}
+                            onChange={(e) => setFormData({ ...formData, name: e.target.value })}
+                            style={{
+                                width: '100%',
+                                padding: '8px',
+                                border: '1px solid #e2e8f0',
+                                borderRadius: '6px',
+                                fontSize: '13px'
+                            }}
+                        />
+                    </div>
+                    <div style={{ display: 'grid', gridTemplateColumns: '1fr 1fr', gap: '8px', marginBottom: '12px' }}>
+                        <input
+                            type="text"
+                            placeholder="Source * (ex: facebook)"
+                            value={formData.utm_source}
+                            onChange={(e) => setFormData({ ...formData, utm_source: e.target.value })}
+                            style={{
+                                padding: '8px',
+                                border: '1px solid #e2e8f0',
+                                borderRadius: '6px',
+                                fontSize: '13px'
+                            }}
+                        />
+                        <input
+                            type="text"
+                            placeholder="Medium * (ex: cpc)"
+                            value={formData.utm_medium}
+                            onChange={(e) => setFormData({ ...formData, utm_medium: e.target.value })}
+                            style={{
+                                padding: '8px',
+                                border: '1px solid #e2e8f0',
+                                borderRadius: '6px',
+                                fontSize: '13px'
+                            }}
+                        />
+                    </div>
+                    <div style={{ marginBottom: '12px' }}>
+                        <input
+                            type="text"
+                            placeholder="Campaign * (ex: black_friday)"
+                            value={formData.utm_campaign}
+                            onChange={(e) => setFormData({ ...formData, utm_campaign: e.target.value })}
+                            style={{
+                                width: '100%',
+                                padding: '8px',
+                                border: '1px solid #e2e8f0',
+                                borderRadius: '6px',
+                                fontSize: '13px'
+                            }}
+                        />
+                    </div>
+                    <div style={{ display: 'grid', gridTemplateColumns: '1fr 1fr', gap: '8px', marginBottom: '12px' }}>
+                        <input
+                            type="text"
+                            placeholder="Content (opcional)"
+                            value={formData.utm_content}
+                            onChange={(e) => setFormData({ ...formData, utm_content: e.target.value })}
+                            style={{
+                                padding: '8px',
+                                border: '1px solid #e2e8f0',
+                                borderRadius: '6px',
+                                fontSize: '13px'
+                            }}
+                        />
+                        <input
+                            type="text"
+                            placeholder="Term (opcional)"
+                            value={formData.utm_term}
+                            onChange={(e) => setFormData({ ...formData, utm_term: e.target.value })}
+                            style={{
+                                padding: '8px',
+                                border: '1px solid #e2e8f0',
+                                borderRadius: '6px',
+                                fontSize: '13px'
+                            }}
+                        />
+                    </div>
+
+                    {elementUrl && (
+                        <div style={{
+                            background: '#edf2f7',
+                            padding: '10px',
+                            borderRadius: '6px',
+                            marginBottom: '12px',
+                            fontSize: '11px',
+                            fontFamily: 'monospace',
+                            wordBreak: 'break-all',
+                            color: '#4a5568'
+                        }}>
+                            {previewUrl}
+                        </div>
+                    )}
+
+                    <div style={{ display: 'flex', gap: '8px' }}>
+                        <button
+                            type="button"
+                            onClick={onCancel}
+                            style={{
+                                flex: 1,
+                                padding: '8px',
+                                background: '#e2e8f0',
+                                border: 'none',
+                                borderRadius: '6px',
+                                cursor: 'pointer',
+                                fontSize: '13px',
+                                fontWeight: '600'
+                            }}
+                        >
+                            Cancelar
+                        </button>
+                        <button
+                            type="submit"
+                            style={{
+                                flex: 1,
+                                padding: '8px',
+                                background: '#667eea',
+                                color: 'white',
+                                border: 'none',
+                                borderRadius: '6px',
+                                cursor: 'pointer',
+                                fontSize: '13px',
+                                fontWeight: '600'
+                            }}
+                        >
+                            Criar UTM
+                        </button>
+                    </div>
+                </form>
+            );
+        }
+
+        // ==================== MARKETING MANAGER ====================
+
+        function MarketingManager({ onBack }) {
+            const [activeTab, setActiveTab] = useState('pages');
+            const [pages, setPages] = useState([]);
+            const [utms, setUtms] = useState([]);
+            const [showPageModal, setShowPageModal] = useState(false);
+            const [showUtmModal, setShowUtmModal] = useState(false);
+            const [editingPage, setEditingPage] = useState(null);
+            const [editingUtm, setEditingUtm] = useState(null);
+
+            // Carrega páginas e UTMs ao montar (uma requisição)
+            useEffect(() => {
+                loadAll();
+            }, []);
+
+            // Recarrega só a lista que mudou em outra aba ou dispositivo
+            useChangeFeed(['page', 'utm'], (changes) => {
+                const has = (entity) => changes.some(c => c.action === 'reset' || c.entity === entity);
+                if (has('page') && has('utm')) {
+                    loadAll();
+                } else if (has('page')) {
+                    loadPages();
+                } else {
+                    loadUtms();
+                }
+            });
+
+            const loadAll = async () => {
+                try {
+                    const [pagesData, utmsData] = await apiBatch([
+                        { path: '/api/pages' },
+                        { path: '/api/utms' }
+                    ]);
+                    if (pagesData && pagesData.pages) {
+                        setPages(pagesData.pages);
+                    }
+                    if (utmsData && utmsData.utms) {
+                        setUtms(utmsData.utms);
+                    }
+                } catch (error) {
+                    console.error('Erro ao carregar páginas e UTMs:', error);
+                }
+            };
+
+            const loadPages = async () => {
+                try {
+                    const data = await apiCall('/api/pages');
+                    if (data && data.pages) {
+                        setPages(data.pages);
+                    }
+                } catch (error) {
+                    console.error('Erro ao carregar páginas:', error);
+                }
+            };
+
+            const loadUtms = async () => {
+                try {
+                    const data = await apiCall('/api/utms');
+                    if (data && data.utms) {
+                        setUtms(data.utms);
+                    }
+                } catch (error) {
+                    console.error('Erro ao carregar UTMs:', error);
+                }
+            };
+
+            const savePage = async (pageData) => {
+                try {
+                    if (editingPage) {
+                        await apiCall(`/api/pages/${editingPage.id}`, {
+                            method: 'PUT',
+                            body: JSON.stringify(pageData)
+                        });
+                    } else {
+                        await apiCall('/api/pages', {
+                            method: 'POST',
+                            body: JSON.stringify(pageData)
+                        });
+                    }
+                    loadPages();
+                    setShowPageModal(false);
+                    setEditingPage(null);
+                } catch (error) {
+                    console.error('Erro ao salvar página:', error);
+                    alert('Erro ao salvar página');
+                }
+            };
+
+            const deletePage = async (id) => {
+                if (confirm('Deletar esta página?')) {
+                    try {
+                        await apiCall(`/api/pages/${id}`, { method: 'DELETE' });
+                        loadPages();
+                    } catch (error) {
+                        console.error('Erro ao deletar página:', error);
+                    }
+                }
+            };
+
+            const saveUtm = async (utmData) => {
+                try {
+                    if (editingUtm) {
+                        await apiCall(`/api/utms/${editingUtm.id}`, {
+                            method: 'PUT',
+                            body: JSON.stringify(utmData)
+                        });
+                    } else {
+                        await apiCall('/api/utms', {
+                            method: 'POST',
+                            body: JSON.stringify(utmData)
+                        });
+                    }
+                    loadUtms();
+                    setShowUtmModal(false);
+                    setEditingUtm(null);
+                } catch (error) {
+                    console.error('Erro ao salvar UTM:', error);
+                    alert('Erro ao salvar UTM');
+                }
+            };
+
+            const deleteUtm = async (id) => {
+                if (confirm('Deletar esta UTM?')) {
+                    try {
+                        await apiCall(`/api/utms/${id}`, { method: 'DELETE' });
+                        loadUtms();
+                    } catch (error) {
+                        console.error('Erro ao deletar UTM:', error);
+                    }
+                }
+            };
+
+            return (
+                <div style={{ minHeight: '100vh', background: 'linear-gradient(135deg, #667eea 0%, #764ba2 100%)', padding: '40px 20px' }}>
+                    <div style={{ maxWidth: '1400px', margin: '0 auto' }}>
+                        {/* Header */}
+                        <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '30px' }}>
+                            <div>
+                                <h1 style={{ color: 'white', fontSize: '42px', fontWeight: 'bold', marginBottom: '5px' }}>📊 Marketing Digital</h1>
+                                <p style={{ color: 'rgba(255,255,255,0.9)', fontSize: '16px' }}>Gerencie suas páginas e UTMs</p>
+                            </div>
+                            <button onClick={onBack} style={{
+                                padding: '12px 24px',
+                                background: 'rgba(255,255,255,0.2)',
+                                border: '2px solid rgba(255,255,255,0.3)',
+                                borderRadius: '12px',
+                                color: 'white',
+                                fontSize: '16px',
+                                fontWeight: '600',
+                                cursor: 'pointer',
+                                transition: 'all 0.2s'
+                            }}>
+                                ← Voltar
+                            </button>
+                        </div>
+
+                        {/* Tabs */}
+                        <div style={{ display: 'flex', gap: '12px', marginBottom: '20px' }}>
+                            <button onClick={() => setActiveTab('pages')} style={{
+                                padding: '12px 24px',
+                                background: activeTab === 'pages' ? 'white' : 'rgba(255,255,255,0.2)',
+                                border: '2px solid rgba(255,255,255,0.3)',
+                                borderRadius: '12px',
+                                color: activeTab === 'pages' ? '#667eea' : 'white',
+                                fontSize: '16px',
+                                fontWeight: '600',
+                                cursor: 'pointer',
+                                transition: 'all 0.2s'
+                            }}>
+                                📄 Páginas ({pages.length})
+                            </button>
+                            <button onClick={() => setActiveTab('utms')} style={{
+                                padding: '12px 24px',
+                                background: activeTab === 'utms' ? 'white' : 'rgba(255,255,255,0.2)',
+                                border: '2px solid rgba(255,255,255,0.3)',
+                                borderRadius: '12px',
+                                color: activeTab === 'utms' ? '#667eea' : 'white',
+                                fontSize: '16px',
+                                fontWeight: '600',
+                                cursor: 'pointer',
+                                transition: 'all 0.2s'
+                            }}>
+                                🔗 UTMs ({utms.length})
+                            </button>
+                        </div>
+
+                        {/* Content */}
+                        <div style={{ background: 'white', borderRadius: '16px', padding: '30px', minHeight: '500px' }}>
+                            {activeTab === 'pages' ? (
+                                <PagesManager pages={pages} onAdd={() => { setEditingPage(null); setShowPageModal(true); }} onEdit={(page) => { setEditingPage(page); setShowPageModal(true); }} onDelete={deletePage} />
+                            ) : (
+                                <UtmsManager utms={utms} onAdd={() => { setEditingUtm(null); setShowUtmModal(true); }} onEdit={(utm) => { setEditingUtm(utm); setShowUtmModal(true); }} onDelete={deleteUtm} />
+                            )}
+                        </div>
+                    </div>
+
+                    {/* Modals */}
+                    {showPageModal && <PageModal page={editingPage} onSave={savePage} onClose={() => { setShowPageModal(false); setEditingPage(null); }} />}
+                    {showUtmModal && <UtmModal utm={editingUtm} onSave={saveUtm} onClose={() => { setShowUtmModal(false); setEditingUtm(null); }} />}
+                </div>
+            );
+        }
+
+        function PagesManager({ pages, onAdd, onEdit, onDelete }) {
+            const categories = {
+                'landing': 'Landing Page',
+                'vsl': 'VSL',
+                'checkout': 'Checkout',
+                'thankyou': 'Obrigado',
+                'webinar': 'Webinar',
+                'other': 'Outro'
+            };
+
+            return (
+                <div>
+                    <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '24px' }}>
+                        <h2 style={{ fontSize: '24px', fontWeight: 'bold' }}>Minhas Páginas</h2>
+                        <button onClick={onAdd} style={{
+                            padding: '10px 20px',
+                            background: '#667eea',
+                            border: 'none',
+                            borderRadius: '8px',
+                            color: 'white',
+                            fontSize: '14px',
+                            fontWeight: '600',
+                            cursor: 'pointer'
+                        }}>
+                            + Nova Página
+                        </button>
+                    </div>
+
+                    {pages.length === 0 ? (
+                        <div style={{ textAlign: 'center', padding: '60px 20px', color: '#999' }}>
+                            <div style={{ fontSize: '64px', marginBottom: '16px' }}>📄</div>
+                            <p style={{ fontSize: '18px' }}>Nenhuma página cadastrada</p>
+                            <p style={{ fontSize: '14px', marginTop: '8px' }}>Clique em "Nova Página" para começar</p>
+                        </div>
+                    ) : (
+                        <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(320px, 1fr))', gap: '20px' }}>
+                            {pages.map(page => (
+                                <div key={page.id} style={{
+                                    border: '1px solid #e5e7eb',
+                                    borderRadius: '12px',
+                                    padding: '20px',
+                                    transition: 'all 0.2s',
+                                    cursor: 'pointer'
+                                }} onMouseOver={(e) => e.currentTarget.style.boxShadow = '0 4px 12px rgba(0,0,0,0.1)'}
+                                   onMouseOut={(e) => e.currentTarget.style.boxShadow = 'none'}>
+                                    <div style={{ display: 'flex', justifyContent: 'space-between', marginBottom: '12px' }}>
+                                        <span style={{
+                                            padding: '4px 12px',
+                                            background: '#f3f4f6',
+                                            borderRadius: '6px',
+                                            fontSize: '12px',
+                                            fontWeight: '600'
+                                        }}>
+                                            {categories[page.category] || page.category}
+                                        </span>
+                                        <div style={{ display: 'flex', gap: '8px' }}>
+                                            <button onClick={(e) => { e.stopPropagation(); onEdit(page); }} style={{
+                                                padding: '4px 8px',
+                                                background: '#3b82f6',
+                                                border: 'none',
+                                                borderRadius: '4px',
+                                                color: 'white',
+                                                fontSize: '12px',
+                                                cursor: 'pointer'
+                                            }}>
+                                                ✏️
+                                            </button>
+                                            <button onClick={(e) => { e.stopPropagation(); onDelete(page.id); }} style={{
+                                                padding: '4px 8px',
+                                                background: '#ef4444',
+                                                border: 'none',
+                                                borderRadius: '4px',
+                                                color: 'white',
+                                                fontSize: '12px',
+                                                cursor: 'pointer'
+                                            }}>
+                                                🗑️
+                                            </button>
+                                        </div>
+                                    </div>
+                                    <h3 style={{ fontSize: '18px', fontWeight: 'bold', marginBottom: '8px', color: '#1f2937' }}>{page.name}</h3>
+                                    <a href={page.url} target="_blank" style={{ fontSize: '13px', color: '#6b7280', textDecoration: 'none', display: 'block', marginBottom: '12px', overflow: 'hidden', textOverflow: 'ellipsis', whiteSpace: 'nowrap' }}>
+                                        {page.url}
+                                    </a>
+                                    {page.description && <p style={{ fontSize: '13px', color: '#6b7280', marginBottom: '12px' }}>{page.description}</p>}
+                                    {page.tags && page.tags.length > 0 && (
+                                        <div style={{ display: 'flex', flexWrap: 'wrap', gap: '6px' }}>
+                                            {page.tags.map((tag, i) => (
+                                                <span key={i} style={{
+                                                    padding: '2px 8px',
+                                                    background: '#e0e7ff',
+                                                    borderRadius: '4px',
+                                                    fontSize: '11px',
+                                                    color: '#667eea'
+                                                }}>
+                                                    {tag}
+                                                </span>
+                                            ))}
+                                        </div>
+                                    )}
+                                </div>
+                            ))}
+                        </div>
+                    )}
+                </div>
+            );
+        }
+
+        function UtmsManager({ utms, onAdd, onEdit, onDelete }) {
+            const copyToClipboard = (text) => {
+                navigator.clipboard.writeText(text);
+                alert('UTM copiada!');
+            };
+
+            return (
+                <div>
+                    <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '24px' }}>
+                        <h2 style={{ fontSize: '24px', fontWeight: 'bold' }}>Minhas UTMs</h2>
+                        <button onClick={onAdd} style={{
+                            padding: '10px 20px',
+                            background: '#667eea',
+                            border: 'none',
+                            borderRadius: '8px',
+                            color: 'white',
+                            fontSize: '14px',
+                            fontWeight: '600',
+                            cursor: 'pointer'
+                        }}>
+                            + Nova UTM
+                        </button>
+                    </div>
+
+                    {utms.length === 0 ? (
+                        <div style={{ textAlign: 'center', padding: '60px 20px', color: '#999' }}>
+                            <div style={{ fontSize: '64px', marginBottom: '16px' }}>🔗</div>
+                            <p style={{ fontSize: '18px' }}>Nenhuma UTM cadastrada</p>
+                            <p style={{ fontSize: '14px', marginTop: '8px' }}>Clique em "Nova UTM" para começar</p>
+                        </div>
+                    ) : (
+                        <div style={{ display: 'grid', gap: '16px' }}>
+                            {utms.map(utm => {
+                                const exampleUrl = `https://exemplo.com?utm_source=${utm.utm_source}&utm_medium=${utm.utm_medium}&utm_campaign=${utm.utm_campaign}${utm.utm_content ? '&utm_content=' + utm.utm_content : ''}${utm.utm_term ? '&utm_term=' + utm.utm_term : ''}`;
+
+                                return (
+                                    <div key={utm.id} style={{
+                                        border: '1px solid #e5e7eb',
+                                        borderRadius: '12px',
+                                        padding: '20px',
+                                        transition: 'all 0.2s'
+                                    }}>
+                                        <div style={{ display: 'flex', justifyContent: 'space-between', marginBottom: '16px' }}>
+                                            <h3 style={{ fontSize: '18px', fontWeight: 'bold', color: '#1f2937' }}>{utm.name}</h3>
+                                            <div style={{ display: 'flex', gap: '8px' }}>
+                                                <button onClick={() => copyToClipboard(exampleUrl)} style={{
+                                                    padding: '6px 12px',
+                                                    background: '#10b981',
+                                                    border: 'none',
+                                                    borderRadius: '6px',
+                                                    color: 'white',
+                                                    fontSize: '12px',
+                                                    cursor: 'pointer'
+                                                }}>
+                                                    📋 Copiar URL
+                                                </button>
+                                                <button onClick={() => onEdit(utm)} style={{
+                                                    padding: '6px 12px',
+                                                    background: '#3b82f6',
+                                                    border: 'none',
+                                                    borderRadius: '6px',
+                                                    color: 'white',
+                                                    fontSize: '12px',
+                                                    cursor: 'pointer'
+                                                }}>
+                                                    ✏️ Editar
+                                                </button>
+                                                <button onClick={() => onDelete(utm.id)} style={{
+                                                    padding: '6px 12px',
+                                                    background: '#ef4444',
+                                                    border: 'none',
+                                                    borderRadius: '6px',
+                                                    color: 'white',
+                                                    fontSize: '12px',
+                                                    cursor: 'pointer'
+                                                }}>
+                                                    🗑️
+                                                </button>
+                                            </div>
+                                        </div>
+
+                                        <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(200px, 1fr))', gap: '12px', marginBottom: '16px' }}>
+                                            <div>
+                                                <div style={{ fontSize: '11px', color: '#9ca3af', marginBottom: '4px' }}>Source</div>
+                                                <div style={{ fontSize: '14px', fontWeight: '600', color: '#4b5563' }}>{utm.utm_source}</div>
+                                            </div>
+                                            <div>
+                                                <div style={{ fontSize: '11px', color: '#9ca3af', marginBottom: '4px' }}>Medium</div>
+                                                <div style={{ fontSize: '14px', fontWeight: '600', color: '#4b5563' }}>{utm.utm_medium}</div>
+                                            </div>
+                                            <div>
+                                                <div style={{ fontSize: '11px', color: '#9ca3af', marginBottom: '4px' }}>Campaign</div>
+                                                <div style={{ fontSize: '14px', fontWeight: '600', color: '#4b5563' }}>{utm.utm_campaign}</div>
+                                            </div>
+                                            {utm.utm_content && (
+                                                <div>
+                                                    <div style={{ fontSize: '11px', color: '#9ca3af', marginBottom: '4px' }}>Content</div>
+                                                    <div style={{ fontSize: '14px', fontWeight: '600', color: '#4b5563' }}>{utm.utm_content}</div>
+                                                </div>
+                                            )}
+                                            {utm.utm_term && (
+                                                <div>
+                                                    <div style={{ fontSize: '11px', color: '#9ca3af', marginBottom: '4px' }}>Term</div>
+                                                    <div style={{ fontSize: '14px', fontWeight: '600', color: '#4b5563' }}>{utm.utm_term}</div>
+                                                </div>
+                                            )}
+                                        </div>
+
+                                        <div style={{ background: '#f9fafb', padding: '12px', borderRadius: '8px', fontSize: '12px', color: '#6b7280', fontFamily: 'monospace', overflowX: 'auto' }}>
+                                            {exampleUrl}
+                                        </div>
+
+                                        {utm.notes && (
+                                            <div style={{ marginTop: '12px', fontSize: '13px', color: '#6b7280', fontStyle: 'italic' }}>
+                                                💡 {utm.notes}
+                                            </div>
+                                        )}
+                                    </div>
+                                );
+                            })}
+                        </div>
+                    )}
+                </div>
+            );
+        }
+
+        function PageModal({ page, onSave, onClose }) {
+            const [formData, setFormData] = useState(page || {
+                name: '',
+                url: '',
+                category: 'landing',
+                description: '',
+                tags: [],
+                status: 'active'
+            });
+            const [tagInput, setTagInput] = useState('');
+
+            const handleSubmit = (e) => {
+                e.preventDefault();
+                if (!formData.name || !formData.url) {
+                    alert('Nome e URL são obrigatórios');
+                    return;
+                }
+                onSave(formData);
+            };
+
+            const addTag = () => {
+                if (tagInput.trim() && !formData.tags.includes(tagInput.trim())) {
+                    setFormData({ ...formData, tags: [...formData.tags, tagInput.trim()] });
+                    setTagInput('');
+                }
+            };
+
+            const removeTag = (tag) => {
+                setFormData({ ...formData, tags: formData.tags.filter(t => t !== tag) });
+            };
+
+            return (
+                <div style={{ position: 'fixed', top: 0, left: 0, right: 0, bottom: 0, background: 'rgba(0,0,0,0.5)', display: 'flex', alignItems: 'center', justifyContent: 'center', zIndex: 9999 }}>
+                    <div style={{ background: 'white', borderRadius: '16px', padding: '30px', width: '90%', maxWidth: '600px', maxHeight: '90vh', overflowY: 'auto' }}>
+                        <h2 style={{ fontSize: '24px', fontWeight: 'bold', marginBottom: '24px' }}>{page ? 'Editar Página' : 'Nova Página'}</h2>
+
+                        <form onSubmit={handleSubmit}>
+                            <div style={{ marginBottom: '20px' }}>
+                                <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Nome *</label>
+                                <input
+                                    type="text"
+                                    value={formData.name}
+                                    onChange={(e) => setFormData({ ...formData, name: e.target.value })}
+                                    style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px' }}
+                                    placeholder="Ex: Landing Page - Curso Marketing Digital"
+                                />
+                            </div>
+
+                            <div style={{ marginBottom: '20px' }}>
+                                <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>URL *</label>
+                                <input
+                                    type="url"
+                                    value={formData.url}
+                                    onChange={(e) => setFormData({ ...formData, url: e.target.value })}
+                                    style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px' }}
+                                    placeholder="https://exemplo.com/minha-pagina"
+                                />
+                            </div>
+
+                            <div style={{ display: 'grid', gridTemplateColumns: '1fr 1fr', gap: '16px', marginBottom: '20px' }}>
+                                <div>
+                                    <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Categoria</label>
+                                    <select
+                                        value={formData.category}
+                                        onChange={(e) => setFormData({ ...formData, category: e.target.value })}
+                                        style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px' }}
+                                    >
+                                        <option value="landing">Landing Page</option>
+                                        <option value="vsl">VSL</option>
+                                        <option value="checkout">Checkout</option>
+                                        <option value="thankyou">Obrigado</option>
+                                        <option value="webinar">Webinar</option>
+                                        <option value="other">Outro</option>
+                                    </select>
+                                </div>
+                                <div>
+                                    <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Status</label>
+                                    <select
+                                        value={formData.status}
+                                        onChange={(e) => setFormData({ ...formData, status: e.target.value })}
+                                        style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px' }}
+                                    >
+                                        <option value="active">Ativa</option>
+                                        <option value="testing">Em Teste</option>
+                                        <option value="paused">Pausada</option>
+                                        <option value="archived">Arquivada</option>
+                                    </select>
+                                </div>
+                            </div>
+
+                            <div style={{ marginBottom: '20px' }}>
+                                <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Descrição</label>
+                                <textarea
+                                    value={formData.description}
+                                    onChange={(e) => setFormData({ ...formData, description: e.target.value })}
+                                    style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px', minHeight: '80px' }}
+                                    placeholder="Descreva o objetivo e contexto desta página..."
+                                />
+                            </div>
+
+                            <div style={{ marginBottom: '20px' }}>
+                                <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Tags</label>
+                                <div style={{ display: 'flex', gap: '8px', marginBottom: '8px' }}>
+                                    <input
+                                        type="text"
+                                        value={tagInput}
+                                        onChange={(e) => setTagInput(e.target.value)}
+                                        onKeyPress={(e) => e.key === 'Enter' && (e.preventDefault(), addTag())}
+                                        style={{ flex: 1, padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px' }}
+                                        placeholder="Digite uma tag e pressione Enter"
+                                    />
+                                    <button type="button" onClick={addTag} style={{
+                                        padding: '10px 16px',
+                                        background: '#667eea',
+                                        border: 'none',
+                                        borderRadius: '8px',
+                                        color: 'white',
+                                        fontSize: '14px',
+                                        cursor: 'pointer'
+                                    }}>
+                                        + Adicionar
+                                    </button>
+                                </div>
+                                <div style={{ display: 'flex', flexWrap: 'wrap', gap: '6px' }}>
+                                    {formData.tags.map((tag, i) => (
+                                        <span key={i} style={{
+                                            padding: '4px 10px',
+                                            background: '#e0e7ff',
+                                            borderRadius: '6px',
+                                            fontSize: '12px',
+                                            color: '#667eea',
+                                            display: 'flex',
+                                            alignItems: 'center',
+                                            gap: '6px'
+                                        }}>
+                                            {tag}
+                                            <span onClick={() => removeTag(tag)} style={{ cursor: 'pointer', fontWeight: 'bold' }}>×</span>
+                                        </span>
+                                    ))}
+                                </div>
+                            </div>
+
+                            <div style={{ display: 'flex', gap: '12px', justifyContent: 'flex-end' }}>
+                                <button type="button" onClick={onClose} style={{
+                                    padding: '10px 20px',
+                                    background: '#f3f4f6',
+                                    border: 'none',
+                                    borderRadius: '8px',
+                                    fontSize: '14px',
+                                    fontWeight: '600',
+                                    cursor: 'pointer'
+                                }}>
+                                    Cancelar
+                                </button>
+                                <button type="submit" style={{
+                                    padding: '10px 20px',
+                                    background: '#667eea',
+                                    border: 'none',
+                                    borderRadius: '8px',
+                                    color: 'white',
+                                    fontSize: '14px',
+                                    fontWeight: '600',
+                                    cursor: 'pointer'
+                                }}>
+                                    {page ? 'Salvar Alterações' : 'Criar Página'}
+                                </button>
+                            </div>
+                        </form>
+                    </div>
+                </div>
+            );
+        }
+
+        function UtmModal({ utm, onSave, onClose }) {
+            const [formData, setFormData] = useState(utm || {
+                name: '',
+                utm_source: '',
+                utm_medium: '',
+                utm_campaign: '',
+                utm_content: '',
+                utm_term: '',
+                notes: ''
+            });
+
+            const handleSubmit = (e) => {
+                e.preventDefault();
+                if (!formData.name || !formData.utm_source || !formData.utm_medium || !formData.utm_campaign) {
+                    alert('Nome, Source, Medium e Campaign são obrigatórios');
+                    return;
+                }
+                onSave(formData);
+            };
+
+            const exampleUrl = `https://exemplo.com?utm_source=${formData.utm_source || 'source'}&utm_medium=${formData.utm_medium || 'medium'}&utm_campaign=${formData.utm_campaign || 'campaign'}${formData.utm_content ? '&utm_content=' + formData.utm_content : ''}${formData.utm_term ? '&utm_term=' + formData.utm_term : ''}`;
+
+            return (
+                <div style={{ position: 'fixed', top: 0, left: 0, right: 0, bottom: 0, background: 'rgba(0,0,0,0.5)', display: 'flex', alignItems: 'center', justifyContent: 'center', zIndex: 9999 }}>
+                    <div style={{ background: 'white', borderRadius: '16px', padding: '30px', width: '90%', maxWidth: '700px', maxHeight: '90vh', overflowY: 'auto' }}>
+                        <h2 style={{ fontSize: '24px', fontWeight: 'bold', marginBottom: '24px' }}>{utm ? 'Editar UTM' : 'Nova UTM'}</h2>
+
+                        <form onSubmit={handleSubmit}>
+                            <div style={{ marginBottom: '20px' }}>
+                                <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Nome da Campanha *</label>
+                                <input
+                                    type="text"
+                                    value={formData.name}
+                                    onChange={(e) => setFormData({ ...formData, name: e.target.value })}
+                                    style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px' }}
+                                    placeholder="Ex: Black Friday 2024 - Facebook Ads"
+                                />
+                            </div>
+
+                            <div style={{ display: 'grid', gridTemplateColumns: '1fr 1fr', gap: '16px', marginBottom: '20px' }}>
+                                <div>
+                                    <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Source * (origem)</label>
+                                    <input
+                                        type="text"
+                                        value={formData.utm_source}
+                                        onChange={(e) => setFormData({ ...formData, utm_source: e.target.value })}
+                                        style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px' }}
+                                        placeholder="Ex: facebook, google, instagram"
+                                    />
+                                </div>
+                                <div>
+                                    <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Medium * (meio)</label>
+                                    <input
+                                        type="text"
+                                        value={formData.utm_medium}
+                                        onChange={(e) => setFormData({ ...formData, utm_medium: e.target.value })}
+                                        style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px' }}
+                                        placeholder="Ex: cpc, email, social"
+                                    />
+                                </div>
+                            </div>
+
+                            <div style={{ marginBottom: '20px' }}>
+                                <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Campaign * (campanha)</label>
+                                <input
+                                    type="text"
+                                    value={formData.utm_campaign}
+                                    onChange={(e) => setFormData({ ...formData, utm_campaign: e.target.value })}
+                                    style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px' }}
+                                    placeholder="Ex: black_friday_2024"
+                                />
+                            </div>
+
+                            <div style={{ display: 'grid', gridTemplateColumns: '1fr 1fr', gap: '16px', marginBottom: '20px' }}>
+                                <div>
+                                    <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Content (conteúdo)</label>
+                                    <input
+                                        type="text"
+                                        value={formData.utm_content}
+                                        onChange={(e) => setFormData({ ...formData, utm_content: e.target.value })}
+                                        style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px' }}
+                                        placeholder="Ex: banner_topo, video_1"
+                                    />
+                                </div>
+                                <div>
+                                    <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Term (termo)</label>
+                                    <input
+                                        type="text"
+                                        value={formData.utm_term}
+                                        onChange={(e) => setFormData({ ...formData, utm_term: e.target.value })}
+                                        style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px' }}
+                                        placeholder="Ex: marketing_digital"
+                                    />
+                                </div>
+                            </div>
+
+                            <div style={{ marginBottom: '20px' }}>
+                                <label style={{ display: 'block', fontSize: '14px', fontWeight: '600', marginBottom: '8px' }}>Observações</label>
+                                <textarea
+                                    value={formData.notes}
+                                    onChange={(e) => setFormData({ ...formData, notes: e.target.value })}
+                                    style={{ width: '100%', padding: '10px', border: '1px solid #d1d5db', borderRadius: '8px', fontSize: '14px', minHeight: '60px' }}
+                                    placeholder="Anotações sobre esta campanha..."
+                                />
+                            </div>
+
+                            <div style={{ marginBottom: '20px', background: '#f9fafb', padding: '16px', borderRadius: '8px' }}>
+                                <div style={{ fontSize: '12px', fontWeight: '600', color: '#6b7280', marginBottom: '8px' }}>Preview da URL:</div>
+                                <div style={{ fontSize: '12px', color: '#4b5563', fontFamily: 'monospace', wordBreak: 'break-all' }}>
+                                    {exampleUrl}
+                                </div>
+                            </div>
+
+                            <div style={{ display: 'flex', gap: '12px', justifyContent: 'flex-end' }}>
+                                <button type="button" onClick={onClose} style={{
+                                    padding: '10px 20px',
+                                    background: '#f3f4f6',
+                                    border: 'none',
+                                    borderRadius: '8px',
+                                    fontSize: '14px',
+                                    fontWeight: '600',
+                                    cursor: 'pointer'
+                                }}>
+                                    Cancelar
+                                </button>
+                                <button type="submit" style={{
+                                    padding: '10px 20px',
+                                    background: '#667eea',
+                                    border: 'none',
+                                    borderRadius: '8px',
+                                    color: 'white',
+                                    fontSize: '14px',
+                                    fontWeight: '600',
+                                    cursor: 'pointer'
+                                }}>
+                                    {utm ? 'Salvar Alterações' : 'Criar UTM'}
+                                </button>
+                            </div>
+                        </form>
+                    </div>
+                </div>
+            );
+        }
+
+        // ==================== APP ====================
+
+        function App() {
+            const [isAuthenticated, setIsAuthenticated] = React.useState(false);
+            const [view, setView] = React.useState('dashboard');
+            const [funnelId, setFunnelId] = React.useState(null);
+            const [showSettings, setShowSettings] = React.useState(false);
+
+            // Verifica autenticação ao montar
+            React.useEffect(() => {
+                const token = localStorage.getItem('authToken');
+                setIsAuthenticated(!!token);
+            }, []);
+
+            const handleLogin = () => {
+                setIsAuthenticated(true);
+            };
+
+            const selectFunnel = (id) => {
+                setFunnelId(id);
+                setView('editor');
+            };
+
+            const backToDashboard = () => {
+                setView('dashboard');
+                setFunnelId(null);
+            };
+
+            const goToMarketing = () => {
+                setView('marketing');
+            };
+
+            const handleLogout = async () => {
+                const token = localStorage.getItem('authToken');
+
+                // Chama API de logout
+                if (token) {
+                    try {
+                        await apiCall('/api/logout', {
+                            method: 'DELETE'
+                        });
+                    } catch (error) {
+                        console.error('Erro ao fazer logout:', error);
+                    }
+                }
+
+                // Remove dados locais
+                localStorage.removeItem('authToken');
+                localStorage.removeItem('currentUser');
+
+                // Atualiza estado
+                setIsAuthenticated(false);
+                setView('dashboard');
+                setFunnelId(null);
+            };
+
+            // Se não está autenticado, mostra tela de login
+            if (!isAuthenticated) {
+                return <LoginScreen onLogin={handleLogin} />;
+            }
+
+            return (
+                <>
+                    {showSettings && <SettingsPanel onClose={() => setShowSettings(false)} />}
+                    {view === 'dashboard' ? (
+                        <FunnelDashboard
+                            onSelectFunnel={selectFunnel}
+                            onOpenSettings={() => setShowSettings(true)}
+                            onGoToMarketing={goToMarketing}
+                            onLogout={handleLogout}
+                        />
+                    ) : view === 'marketing' ? (
+                        <MarketingManager onBack={backToDashboard} />
+                    ) : (
+                        <FunnelBuilder funnelId={funnelId} onBack={backToDashboard} />
+                    )}
+                </>
+            );
+        }
+
+        ReactDOM.render(<App />, document.getElementById('root'));
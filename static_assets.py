@@ -0,0 +1,136 @@
+"""
+Static Assets para Funnel Builder
+CSS e JSX do app servidos de arquivos com nome versionado pelo conteúdo
+(cache imutável no navegador) e transmissão zero-copy via sendfile
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+
+from precompressed import choose_encoding
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# Variantes comprimidas ficam em disco para também poderem sair via sendfile
+STATIC_CACHE_DIR = os.getenv(
+    'STATIC_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'funnel-builder-static')
+)
+
+# Um ano: o nome muda sempre que o conteúdo muda
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class StaticAsset:
+    """Um arquivo estático com hash de conteúdo e variantes identity/gzip no cache em disco"""
+
+    def __init__(self, name: str, path: str, content_type: str, cache_dir: str):
+        self.name = name
+        self.content_type = content_type
+
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        self.digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        self.hashed_name = f'{stem}.{self.digest}{ext}'
+        self.url = f'/static/{self.hashed_name}'
+
+        # encoding -> (caminho no disco, tamanho, etag). A variante identity
+        # também é uma cópia no cache: o arquivo em static/ pode mudar com o
+        # servidor rodando (git reset no deploy) e a URL com este hash precisa
+        # continuar servindo exatamente estes bytes
+        identity_path = os.path.join(cache_dir, self.hashed_name)
+        self._write_once(identity_path, content)
+        self.variants: Dict[str, Tuple[str, int, str]] = {
+            'identity': (identity_path, len(content), f'"{self.digest}"')
+        }
+
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            gz_path = os.path.join(cache_dir, self.hashed_name + '.gz')
+            self._write_once(gz_path, compressed)
+            self.variants['gzip'] = (gz_path, len(compressed), f'"{self.digest}-gz"')
+
+    @staticmethod
+    def _write_once(path: str, data: bytes):
+        """Grava o arquivo se ainda não existir (rename atômico: seguro entre processos)"""
+        if os.path.exists(path) and os.path.getsize(path) == len(data):
+            return
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def select(self, accept_encoding: Optional[str]) -> Optional[Tuple[str, str, int, str]]:
+        """
+        Returns:
+            (codificação, caminho, tamanho, etag) ou None se nenhuma variante é aceitável
+        """
+        available = [e for e in ('gzip', 'identity') if e in self.variants]
+        encoding = choose_encoding(accept_encoding, available)
+        if encoding is None:
+            return None
+        path, size, etag = self.variants[encoding]
+        return encoding, path, size, etag
+
+
+class StaticAssets:
+    """Registro dos assets do app, indexado pela URL versionada"""
+
+    CONTENT_TYPES = {
+        '.css': 'text/css; charset=utf-8',
+        '.js': 'application/javascript; charset=utf-8',
+        '.jsx': 'text/babel; charset=utf-8',
+    }
+
+    def __init__(self, static_dir: str = STATIC_DIR, cache_dir: str = STATIC_CACHE_DIR):
+        self.static_dir = static_dir
+        self.cache_dir = cache_dir
+        self.assets: Dict[str, StaticAsset] = {}   # nome original -> asset
+        self.by_hashed_name: Dict[str, StaticAsset] = {}
+
+    def add(self, name: str) -> StaticAsset:
+        """Registra um arquivo de static/ (lido e comprimido uma vez)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        ext = os.path.splitext(name)[1]
+        asset = StaticAsset(
+            name,
+            os.path.join(self.static_dir, name),
+            self.CONTENT_TYPES.get(ext, 'application/octet-stream'),
+            self.cache_dir
+        )
+        self.assets[name] = asset
+        self.by_hashed_name[asset.hashed_name] = asset
+        return asset
+
+    def url(self, name: str) -> str:
+        """URL versionada para usar no HTML"""
+        return self.assets[name].url
+
+    def lookup(self, path: str) -> Optional[StaticAsset]:
+        """Encontra o asset pela URL ('/static/app.<hash>.css'); hash antigo = None"""
+        if not path.startswith('/static/'):
+            return None
+        return self.by_hashed_name.get(path[len('/static/'):])
+
+    def get_stats(self) -> Dict:
+        return {
+            asset.hashed_name: {e: size for e, (_, size, _) in asset.variants.items()}
+            for asset in self.assets.values()
+        }
+
+
+# Instância global
+static_assets = StaticAssets()
+
+
+if __name__ == '__main__':
+    static_assets.add('app.css')
+    static_assets.add('app.jsx')
+    for name in ('app.css', 'app.jsx'):
+        print(f"{name} -> {static_assets.url(name)}")
+    print("Variantes:", static_assets.get_stats())
@@ -34,7 +34,7 @@ api_call() {
 echo "📝 1. Fazendo login..."
 LOGIN_RESPONSE=$(curl -s -X POST \
     -H "Content-Type: application/json" \
-    -d '{"email":"teste@funnel.com","password":"senha123"}' \
+    -d '{"email":"teste@funnel.com","password":"Funil@Teste2024"}' \
     "$BASE_URL/api/login")
 
 TOKEN=$(echo $LOGIN_RESPONSE | grep -o '"token":"[^"]*' | cut -d'"' -f4)
@@ -44,7 +44,7 @@ if [ -z "$TOKEN" ]; then
 
     REGISTER_RESPONSE=$(curl -s -X POST \
         -H "Content-Type: application/json" \
-        -d '{"email":"teste@funnel.com","password":"senha123","name":"Teste Marketing","whatsapp":"11999999999"}' \
+        -d '{"email":"teste@funnel.com","password":"Funil@Teste2024","name":"Teste Marketing","whatsapp":"11999999999"}' \
         "$BASE_URL/api/register")
 
     TOKEN=$(echo $REGISTER_RESPONSE | grep -o '"token":"[^"]*' | cut -d'"' -f4)
@@ -229,6 +229,30 @@ if [ -n "$PAGE_ID" ]; then
     echo ""
 fi
 
+# 12. Batch (páginas e UTMs em uma requisição; corpo que não é objeto vira 400)
+echo "📦 12. Listando páginas e UTMs em batch..."
+BATCH=$(api_call POST "/api/batch" '{"requests":[{"method":"GET","path":"/api/pages"},{"method":"GET","path":"/api/utms"}]}')
+
+if echo $BATCH | grep -q '"results":\[{"status":200'; then
+    echo "✅ Batch respondido"
+else
+    echo "❌ Erro no batch"
+fi
+
+for INVALID in '[]' '[{"method":"GET","path":"/api/pages"}]' '"requests"' '42'; do
+    STATUS=$(curl -s -o /dev/null -w "%{http_code}" -X POST \
+        -H "Authorization: Bearer $TOKEN" \
+        -H "Content-Type: application/json" \
+        -d "$INVALID" \
+        "$BASE_URL/api/batch")
+    if [ "$STATUS" = "400" ]; then
+        echo "✅ Batch com corpo $INVALID: 400"
+    else
+        echo "❌ Batch com corpo $INVALID: $STATUS (esperado 400)"
+    fi
+done
+echo ""
+
 echo "======================================"
 echo "✅ Testes concluídos com sucesso!"
 echo ""
@@ -3,22 +3,41 @@ Webhooks module for Funnel Builder
 Gerencia envio de webhooks para eventos do sistema
 """
 
-import json
+import os
+import queue
+import time
 import urllib.request
 import urllib.error
 from typing import Dict, Optional
-from threading import Thread
+from threading import Lock, Thread
+
+
+# Webhooks aguardando envio; acima disso novos eventos são descartados
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', '256'))
 
 
 class WebhookManager:
     """Gerencia o envio de webhooks para eventos do sistema"""
 
-    def __init__(self):
+    def __init__(self, queue_size: int = WEBHOOK_QUEUE_SIZE):
         # URL do webhook - pode ser configurado via variável de ambiente
         # Exemplo: https://hooks.zapier.com/hooks/catch/123456/abcdef/
         self.webhook_url = None
         self.enabled = False
 
+        # Fila limitada consumida por uma única thread (criada sob demanda,
+        # inclusive de novo em cada processo worker após o fork)
+        self.queue_size = queue_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = Lock()
+        self._worker = None
+        self.in_flight = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
     def configure(self, webhook_url: str):
         """Configura a URL do webhook"""
         if webhook_url and webhook_url.startswith(('http://', 'https://')):
@@ -40,13 +59,80 @@ class WebhookManager:
         if not self.enabled or not self.webhook_url:
             return
 
-        # Executa em thread separada para não bloquear
-        thread = Thread(target=self._send_webhook_sync, args=(event, data))
-        thread.daemon = True  # Thread finaliza quando app terminar
-        thread.start()
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait((event, data))
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            print(f"⚠️ Fila de webhooks cheia ({self.queue_size}); evento descartado: {event}")
+
+    def _reset_after_fork(self):
+        """No processo filho: a fila herdada pertence ao pai e a thread não existe"""
+        self.lock = Lock()
+        self.queue = queue.Queue(maxsize=self.queue_size)
+        self._worker = None
+        self.in_flight = 0
+
+    def _ensure_worker(self):
+        """Sobe a thread consumidora se ainda não existe neste processo"""
+        with self.lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = Thread(target=self._worker_loop, name='webhook-worker')
+            self._worker.daemon = True  # Thread finaliza quando app terminar
+            self._worker.start()
+
+    def _worker_loop(self):
+        """Envia os webhooks da fila, um por vez"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                break
+
+            with self.lock:
+                self.in_flight += 1
+            ok = False
+            try:
+                ok = self._send_webhook_sync(*item)
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+                    if ok:
+                        self.sent += 1
+                    else:
+                        self.failed += 1
+                self.queue.task_done()
+
+    def backlog(self) -> int:
+        """Webhooks enfileirados ou em envio"""
+        with self.lock:
+            return self.queue.qsize() + self.in_flight
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Espera a fila esvaziar (encerramento gracioso); False se o prazo acabou"""
+        deadline = time.monotonic() + timeout
+        while self.backlog():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'queued': self.queue.qsize(),
+                'queue_size': self.queue_size,
+                'in_flight': self.in_flight,
+                'sent': self.sent,
+                'failed': self.failed,
+                'dropped': self.dropped
+            }
 
-    def _send_webhook_sync(self, event: str, data: Dict):
-        """Envia webhook de forma síncrona (executa em thread separada)"""
+    def _send_webhook_sync(self, event: str, data: Dict) -> bool:
+        """Envia webhook de forma síncrona (executa na thread da fila)"""
         try:
             payload = {
                 'event': event,
@@ -55,7 +141,7 @@ class WebhookManager:
             }
 
             # Prepara request
-            json_data = json.dumps(payload).encode('utf-8')
+            json_data = json_codec.dumps(payload)
             req = urllib.request.Request(
                 self.webhook_url,
                 data=json_data,
@@ -71,8 +157,9 @@ class WebhookManager:
                 status_code = response.getcode()
                 if status_code in (200, 201, 204):
                     print(f"✅ Webhook enviado com sucesso: {event}")
-                else:
-                    print(f"⚠️ Webhook retornou status {status_code}: {event}")
+                    return True
+                print(f"⚠️ Webhook retornou status {status_code}: {event}")
+                return False
 
         except urllib.error.HTTPError as e:
             print(f"❌ Erro HTTP ao enviar webhook {event}: {e.code} - {e.reason}")
@@ -80,6 +167,7 @@ class WebhookManager:
             print(f"❌ Erro de conexão ao enviar webhook {event}: {e.reason}")
         except Exception as e:
             print(f"❌ Erro inesperado ao enviar webhook {event}: {e}")
+        return False
 
     def on_user_registered(self, user_data: Dict):
         """
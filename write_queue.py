@@ -0,0 +1,180 @@
+"""
+Fila de escrita com group commit para Funnel Builder
+Escritas frequentes (autosave do editor, métricas) entram em uma fila e uma
+única thread as grava em lotes: as que chegam dentro de uma janela curta
+dividem a mesma transação e o mesmo commit
+
+Quem chama continua síncrono: submit() só retorna depois do commit do lote,
+com o resultado (ou a exceção) da própria escrita. Cada escrita roda em um
+savepoint, então a que falha é desfeita sem derrubar as outras do lote.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+
+# Quanto o primeiro item de um lote espera por outros (s); limita a latência extra
+GROUP_COMMIT_WINDOW = float(os.getenv('GROUP_COMMIT_WINDOW', '0.005'))
+# Escritas por transação
+GROUP_COMMIT_MAX_BATCH = int(os.getenv('GROUP_COMMIT_MAX_BATCH', '64'))
+
+
+class GroupCommitQueue:
+    """
+    Grava as escritas enfileiradas em lotes, uma transação por lote
+
+    Chamadas de dentro de um bloco db.connection() (o /api/batch, ou a
+    própria thread da fila) rodam direto na transação que já está aberta:
+    enfileirá-las travaria, pois quem espera já tem o lock de escrita. Também
+    nesse caso a escrita roda em um savepoint próprio.
+    """
+
+    def __init__(self, database, window: float = GROUP_COMMIT_WINDOW,
+                 max_batch: int = GROUP_COMMIT_MAX_BATCH):
+        self.db = database
+        self.window = window
+        self.max_batch = max_batch
+        self._reset_state()
+
+        # Thread não sobrevive ao fork: cada worker do prefork sobe a sua
+        os.register_at_fork(after_in_child=self._reset_state)
+
+    def _reset_state(self):
+        self.queue: queue.Queue = queue.Queue()
+        self.lock = threading.Lock()
+        self._worker = None
+        # Chamadas dentro de submit() esperando o commit
+        self.waiting = 0
+        self.writes = 0
+        self.commits = 0
+        self.largest_batch = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Any:
+        """Executa fn(*args, **kwargs) no próximo lote e devolve o resultado após o commit"""
+        if self.db.in_transaction():
+            conn = self.db.get_connection()
+            return self._in_savepoint(conn, fn, args, kwargs)
+
+        self._ensure_worker()
+        future = Future()
+        with self.lock:
+            self.waiting += 1
+        try:
+            self.queue.put((future, fn, args, kwargs))
+            return future.result()
+        finally:
+            with self.lock:
+                self.waiting -= 1
+
+    def _ensure_worker(self):
+        with self.lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._worker_loop, name='group-commit',
+                                            daemon=True)
+            self._worker.start()
+
+    @staticmethod
+    def _in_savepoint(conn, fn: Callable, args, kwargs) -> Any:
+        """fn(*args, **kwargs) em um savepoint: se levantar, só o que ela gravou é desfeito"""
+        conn.execute('SAVEPOINT group_write')
+        try:
+            return fn(*args, **kwargs)
+        except BaseException:
+            conn.execute('ROLLBACK TO group_write')
+            raise
+        finally:
+            conn.execute('RELEASE group_write')
+
+    def _collect(self) -> List[Tuple]:
+        """
+        Espera a primeira escrita e junta as que chegarem até a janela fechar
+
+        A janela fecha antes se todas as chamadas em espera já estão no lote:
+        com uma escrita só (servidor ocioso) o commit é imediato, e sob carga
+        os lotes se formam enquanto o commit anterior acontece.
+        """
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            with self.lock:
+                if len(batch) >= self.waiting:
+                    break
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self.queue.get(timeout=remaining))
+                else:
+                    # Janela fechada: leva só o que já está na fila
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker_loop(self):
+        while True:
+            batch = self._collect()
+            results = []
+            try:
+                with self.db.connection(write=True) as conn:
+                    for future, fn, args, kwargs in batch:
+                        try:
+                            results.append((future, True, self._in_savepoint(conn, fn, args, kwargs)))
+                        except Exception as e:
+                            results.append((future, False, e))
+            except Exception as e:
+                # BEGIN ou COMMIT falhou (ex.: lock do banco): o lote inteiro falhou
+                print(f"❌ Group commit: lote de {len(batch)} escritas falhou: {e}")
+                for future, _, _, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            with self.lock:
+                self.writes += len(batch)
+                self.commits += 1
+                self.largest_batch = max(self.largest_batch, len(batch))
+
+            # Só depois do commit: quem chamou pode responder que a escrita foi gravada
+            for future, ok, value in results:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def get_stats(self) -> Dict:
+        with self.lock:
+            return {
+                'pending': self.queue.qsize(),
+                'writes': self.writes,
+                'commits': self.commits,
+                'largest_batch': self.largest_batch
+            }
+
+
+if __name__ == '__main__':
+    from database import Database
+
+    test_db = Database('test_funnel.db')
+    user_id = test_db.create_user('fila@test.com', 'hash') or test_db.get_user_by_email('fila@test.com')['id']
+    funnel_ids = [test_db.create_funnel(user_id, f'Funil {i}') for i in range(20)]
+
+    threads = [
+        threading.Thread(target=test_db.update_funnel, args=(funnel_id, user_id),
+                         kwargs={'name': f'Autosave {funnel_id}'})
+        for funnel_id in funnel_ids for _ in range(5)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats = test_db.write_queue.get_stats()
+    print(f"✅ {stats['writes']} escritas em {stats['commits']} commits ({elapsed * 1000:.0f} ms)")
+    print(f"✅ Maior lote: {stats['largest_batch']}")
+    print(f"✅ Funil gravado: {test_db.get_funnel_by_id(funnel_ids[0], user_id)['name']}")